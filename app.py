@@ -1,16 +1,89 @@
-from flask import Flask, request, jsonify, render_template, redirect
-from openai import OpenAI, APIError, AuthenticationError, RateLimitError, APIConnectionError
+from flask import Flask, Response, request, jsonify, render_template, redirect, g, stream_with_context
 from dotenv import load_dotenv
+from datetime import datetime, timedelta
+import csv
+import hashlib
+import io
+import itertools
+import json
 import os
+import sys
+import threading
 import time
+import uuid
+import zlib
 import database as db
+import generations
+import hedging
+import json_provider
+import memory
+import retention
+import rollups
+import routing
+from cache import cache
+from chatbots import CHATBOTS
+from conversation_lock import CONVERSATION_LOCK_TIMEOUT_S, ConversationBusy, conversation_lock, stats as conversation_lock_stats
+from generations import GenerationCancelled
 
 load_dotenv()
 
 app = Flask(__name__)
+app.json = json_provider.provider_class()(app)
 
-# Initialize database
-db.init_db()
+# ============== Startup ==============
+# Importing this module does no I/O. init_app() runs the startup work once:
+# in the gunicorn master when preloading (see gunicorn.conf.py), so workers
+# inherit it copy-on-write, or lazily on the first request otherwise.
+
+STARTUP_TIMINGS = {}
+_init_lock = threading.Lock()
+_initialized = False
+
+def init_app(warm_imports: bool = False):
+    """Run one-time startup work and record how long each phase took (ms)."""
+    global _initialized
+    with _init_lock:
+        if _initialized:
+            return STARTUP_TIMINGS
+        
+        started = time.perf_counter()
+        db.init_db()
+        if db.USE_POSTGRES:
+            import migrations
+            migrations.ensure_bot_partitions(CHATBOTS.keys())
+        STARTUP_TIMINGS['database'] = elapsed_ms(started)
+        
+        if warm_imports:
+            # Pay for the heavy SDK import once in the master instead of in every worker
+            started = time.perf_counter()
+            import openai  # noqa: F401
+            STARTUP_TIMINGS['openai_import'] = elapsed_ms(started)
+            if memory.enabled():
+                started = time.perf_counter()
+                import numpy  # noqa: F401
+                STARTUP_TIMINGS['numpy_import'] = elapsed_ms(started)
+                # One copy of the embedding model, shared by every worker
+                started = time.perf_counter()
+                try:
+                    memory.embedder.load()
+                except Exception as e:
+                    print(f"Memory model failed to load, recall uses summaries only: {e}")
+                STARTUP_TIMINGS['memory_model'] = elapsed_ms(started)
+        
+        _initialized = True
+        backend = 'PostgreSQL' if db.USE_POSTGRES else 'SQLite'
+        phases = ', '.join(f'{name} {ms}ms' for name, ms in STARTUP_TIMINGS.items())
+        print(f"Startup complete ({backend}): {phases}")
+        return STARTUP_TIMINGS
+
+@app.before_request
+def ensure_initialized():
+    """Fallback for servers that did not call init_app() before serving."""
+    if not _initialized:
+        init_app()
+    retention.ensure_worker()
+    rollups.ensure_worker()
+    memory.ensure_worker()
 
 # Lazy OpenAI client initialization
 _client = None
@@ -20,11 +93,223 @@ def get_openai_client():
     global _client
     if _client is None:
         api_key = os.getenv('OPENAI_API_KEY')
-        print(f"DEBUG: API key exists: {bool(api_key)}, length: {len(api_key) if api_key else 0}")
         if api_key:
+            from openai import OpenAI
             _client = OpenAI(api_key=api_key)
     return _client
 
+@app.before_request
+def mark_request_start():
+    """Record request arrival on the monotonic clock for latency metrics."""
+    g.request_started = time.perf_counter()
+
+# End-to-end budget for a chat turn; stays under gunicorn's 30s worker timeout
+CHAT_DEADLINE_MS = int(os.getenv('CHAT_DEADLINE_MS', '25000'))
+
+def request_deadline(budget_ms: int = CHAT_DEADLINE_MS) -> float:
+    """perf_counter() time this request must be answered by.
+
+    A caller with less time left sends its remaining budget in the
+    X-Request-Timeout-Ms header; it can only shorten `budget_ms`.
+    """
+    try:
+        budget_ms = min(budget_ms, int(request.headers.get('X-Request-Timeout-Ms', budget_ms)))
+    except ValueError:
+        pass
+    return g.request_started + max(0, budget_ms) / 1000
+
+def remaining_s(deadline: float) -> float:
+    return max(0.0, deadline - time.perf_counter())
+
+# Read-your-writes across workers: after a write the client carries this
+# cookie so its next reads go to the primary instead of a lagging replica
+PRIMARY_PIN_COOKIE = 'db_primary_until'
+
+@app.before_request
+def begin_db_session():
+    """Route this request's reads, honouring a primary pin from an earlier write."""
+    try:
+        pinned_until = float(request.cookies.get(PRIMARY_PIN_COOKIE, 0))
+    except ValueError:
+        pinned_until = 0.0
+    g.primary_pinned_until = pinned_until
+    db.begin_session(pinned_until)
+
+@app.after_request
+def set_primary_pin_cookie(response):
+    """Hand the pin to the client when this request wrote."""
+    pinned_until = db.session_pinned_until()
+    if pinned_until > g.get('primary_pinned_until', 0):
+        response.set_cookie(PRIMARY_PIN_COOKIE, f'{pinned_until:.3f}',
+                            max_age=max(1, int(pinned_until - time.time()) + 1),
+                            httponly=True, samesite='Lax')
+    return response
+
+def elapsed_ms(since: float) -> int:
+    """Milliseconds elapsed on the monotonic clock since `since`."""
+    return int(round((time.perf_counter() - since) * 1000))
+
+# Upstream prompt caching routes requests by a key; one per conversation keeps
+# a long session's turns on the server that already holds its history prefix
+PROMPT_CACHE_KEY_SCOPE = os.getenv('PROMPT_CACHE_KEY_SCOPE', 'conversation').lower()  # conversation, bot or off
+
+def prompt_cache_key(bot, conversation_id=None):
+    """prompt_cache_key for a request of the bot, or None when PROMPT_CACHE_KEY_SCOPE is off."""
+    if PROMPT_CACHE_KEY_SCOPE == 'conversation' and conversation_id:
+        return f"{bot['id']}:{conversation_id}"
+    if PROMPT_CACHE_KEY_SCOPE in ('bot', 'conversation'):
+        return bot['id']
+    return None
+
+def usage_metrics(usage) -> dict:
+    """Extract input/output/cached token counts from a Responses API usage object."""
+    if usage is None:
+        return {}
+    details = getattr(usage, 'input_tokens_details', None)
+    return {
+        'input_tokens': getattr(usage, 'input_tokens', None),
+        'output_tokens': getattr(usage, 'output_tokens', None),
+        'cached_tokens': getattr(details, 'cached_tokens', None) if details else None
+    }
+
+def completion_usage_metrics(usage) -> dict:
+    """usage_metrics for a Chat Completions usage object."""
+    if usage is None:
+        return {}
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return {
+        'input_tokens': getattr(usage, 'prompt_tokens', None),
+        'output_tokens': getattr(usage, 'completion_tokens', None),
+        'cached_tokens': getattr(details, 'cached_tokens', None) if details else None
+    }
+
+def create_response(client, bot, conversation_history, generation=None, model=None):
+    """Stream a reply for the bot's prompt and return (text, metrics).
+
+    Streaming lets us capture time-to-first-token; metrics holds pre_model_ms
+    (this request's local work before the model call: history, memory,
+    routing), ttft_ms, total_ms and the token counts from the final usage. With a
+    generations.Generation, cancelling it closes the stream and this raises
+    GenerationCancelled with the partial text; its deadline also bounds each
+    upstream call. With hedging on (see hedging.py) a slow first attempt gets
+    a duplicate and metrics records hedged/hedge_won. `model` overrides the
+    prompt's own model (see routing.py).
+
+    conversation_history is sent as stored, oldest first, so consecutive
+    turns share the whole previous request as a prefix and the upstream
+    prompt cache can serve it (cached_tokens in metrics).
+    """
+    dispatched = time.perf_counter()
+    metrics = {'pre_model_ms': int(round((dispatched - g.request_started) * 1000))}
+    parts = []
+    final_response = None
+    
+    def cancelled():
+        metrics['total_ms'] = elapsed_ms(dispatched)
+        return GenerationCancelled(generation.reason, ''.join(parts), metrics)
+    
+    if generation is not None and generation.cancelled:
+        raise cancelled()
+    
+    def open_stream():
+        options = {'model': model} if model else {}
+        cache_key = prompt_cache_key(bot, generation.conversation_id if generation is not None else None)
+        if cache_key:
+            options['prompt_cache_key'] = cache_key
+        if generation is not None and generation.deadline is not None:
+            options['timeout'] = max(1.0, remaining_s(generation.deadline))
+        return client.responses.create(
+            prompt={
+                "id": bot['prompt_id'],
+                "version": bot['prompt_version']
+            },
+            input=conversation_history,
+            stream=True,
+            **options
+        )
+    
+    # Latency is tracked per bot and model: tiers differ too much to share a percentile
+    latency_key = f"{bot['id']}:{model}" if model else bot['id']
+    hedge_after = hedging.hedge_delay_s(latency_key)
+    if hedge_after is None:
+        events = open_stream()
+        if generation is not None:
+            generation.attach(events)
+    else:
+        events = hedging.Race(open_stream, hedge_after, generation)
+    
+    try:
+        for event in events:
+            if event.type == 'response.output_text.delta':
+                if 'ttft_ms' not in metrics:
+                    metrics['ttft_ms'] = elapsed_ms(dispatched)
+                parts.append(event.delta)
+                if generation is not None:
+                    generation.progress(parts)
+            elif event.type == 'response.completed':
+                final_response = event.response
+            elif event.type == 'response.failed':
+                error = event.response.error
+                raise RuntimeError(error.message if error else 'Response failed')
+            elif event.type == 'error':
+                raise RuntimeError(event.message)
+    except Exception:
+        # A stream closed under us by a cancel surfaces as a read error
+        if generation is not None and generation.cancelled:
+            raise cancelled()
+        raise
+    if generation is not None and generation.cancelled:
+        raise cancelled()
+    
+    metrics['total_ms'] = elapsed_ms(dispatched)
+    metrics.setdefault('ttft_ms', metrics['total_ms'])
+    if hedge_after is not None:
+        metrics.update(hedged=events.hedged, hedge_won=events.hedge_won)
+    
+    if final_response is not None:
+        metrics.update(usage_metrics(final_response.usage))
+        text = final_response.output_text or ''.join(parts)
+    else:
+        text = ''.join(parts)
+    hedging.record(latency_key, metrics)
+    return text, metrics
+
+def generate_reply(client, bot, conversation_history, generation=None, previous_tier=None, context=None):
+    """create_response on the model tier routing.choose() picks for this turn.
+
+    If that tier fails, the turn is retried once on the other tier. Cancels
+    and deadlines are not retried. metrics['model_tier'] names the tier
+    that answered (and metrics['prompt_version'] the stored prompt's
+    version); pass the previous reply's tier as previous_tier. `context`
+    items (see memory.py) are sent ahead of the history.
+    """
+    message = conversation_history[-1]['content'] if conversation_history else ''
+    tier, reason = routing.choose(bot, message, len(conversation_history) - 1, previous_tier)
+    conversation_history = (context or []) + conversation_history
+    try:
+        text, metrics = create_response(client, bot, conversation_history, generation, routing.tier_model(bot, tier))
+    except GenerationCancelled:
+        raise
+    except Exception as e:
+        routing.record(bot['id'], tier, reason, ok=False)
+        fallback = routing.other_tier(bot, tier)
+        if fallback is None or (generation is not None and generation.cancelled):
+            raise
+        print(f"Model tier {tier} failed for {bot['id']} ({e}); retrying on {fallback}")
+        tier, reason = fallback, f'{tier}_failed'
+        try:
+            text, metrics = create_response(client, bot, conversation_history, generation, routing.tier_model(bot, tier))
+        except GenerationCancelled:
+            raise
+        except Exception:
+            routing.record(bot['id'], tier, reason, ok=False)
+            raise
+    
+    routing.record(bot['id'], tier, reason, ok=True, metrics=metrics)
+    metrics['model_tier'] = tier
+    metrics['prompt_version'] = str(bot['prompt_version'])
+    return text, metrics
+
 @app.route('/api/debug')
 def debug_env():
     """Debug endpoint to check environment variables."""
@@ -37,925 +322,21 @@ def debug_env():
     })
 
 # ============== Chatbot Configurations ==============
-
-CHATBOTS = {
-    'meliksah': {
-        'id': 'meliksah',
-        'name': 'Symbiont',
-        'short_name': 'Symbiont',
-        'icon': '🧠',
-        'logo': '/static/logo-symbiont.png',
-        'prompt_id': 'pmpt_6957e6ae66088195af2b5053af22c7ae0f5f0db59da0747b',
-        'prompt_version': '27',
-        'accent_color': '#10a37f',  # Green
-        'welcome_title': 'Merhaba Meliksah! 👋',
-        'welcome_text': 'Şu an baskın olan hangisi?',
-        'suggestions': [
-            {'display': '😰 Yükselen kaygı', 'message': 'Şu an yükselen bir kaygı hissediyorum.'},
-            {'display': '🌊 Panik dalgası', 'message': 'Bir panik dalgası geliyor gibi hissediyorum.'},
-            {'display': '🌀 Durmayan düşünceler', 'message': 'Düşüncelerim durmadan dönüyor.'},
-            {'display': '🛏️ Uyku kilidi', 'message': 'Uyku kilidi yaşıyorum, uyuyamıyorum.'},
-            {'display': '🎯 Odak dağınıklığı', 'message': 'Odak dağınıklığı yaşıyorum.'},
-            {'display': '⏰ Erteleme dürtüsü', 'message': 'Erteleme dürtüsü hissediyorum.'},
-            {'display': '🚧 Karar tıkanması', 'message': 'Karar vermekte zorlanıyorum, tıkandım.'},
-            {'display': '💨 İç sıkışma', 'message': 'İçimde bir sıkışma hissediyorum.'},
-            {'display': '🔥 Öfke patlaması', 'message': 'İçimde yükselen bir öfke var.'},
-            {'display': '🌑 Yalnızlık hissi', 'message': 'Kendimi yalnız hissediyorum.'}
-        ],
-        'input_placeholder': 'Mesajını yaz...',
-        'new_chat': 'Yeni Sohbet',
-        'today': 'Bugün',
-        'yesterday': 'Dün',
-        'previous': 'Önceki',
-        'no_chats': 'Henüz sohbet yok',
-        'input_hint': 'Göndermek için Enter, yeni satır için Shift+Enter',
-        'lang': 'tr',
-        # Turkish UI texts
-        'xp_title': 'Seni Tanıma Seviyesi',
-        'xp_level': 'Seviye',
-        'xp_next': 'Sonraki',
-        'xp_max': 'Maksimum Seviye!',
-        'timer_set': 'Terapi Süresi Belirle',
-        'timer_minute': 'dakika',
-        'timer_minutes': 'dakika',
-        'timer_custom': 'Kendiniz girin...',
-        'timer_start': 'Başlat',
-        'timer_ended': 'Süre Doldu!',
-        'timer_ended_msg': 'Terapi süreniz tamamlandı. Kendinize ayırdığınız bu zaman için tebrikler! İsterseniz "Seansı Bitir ve Özetle" ile özetinizi alabilirsiniz.',
-        'summarize': 'Seansı Bitir ve Özetle',
-        'summary_title': 'Seans Özeti',
-        'summary_loading': 'Seans özetleniyor...',
-        'summary_ok': 'Tamam',
-        'online': 'Çevrimiçi',
-        'chats': 'Sohbetler',
-        'delete_confirm': 'Bu sohbeti silmek istediğinize emin misiniz?',
-        'connection_error': 'Bağlantı Hatası',
-        'connection_failed': 'Sunucuya bağlanılamadı.',
-        'intensity_question': 'Şiddeti nasıl?',
-        'intensity_1': 'Hafif',
-        'intensity_2': 'Az',
-        'intensity_3': 'Orta',
-        'intensity_4': 'Yoğun',
-        'intensity_5': 'Çok',
-        'add_note': 'Eklemek istediğin bir şey var mı?',
-        'optional': '(İsteğe bağlı)',
-        'cancel': 'İptal',
-        'send': 'Gönder',
-        'short_msg': 'Kısa Mesaj',
-        'medium_msg': 'Orta Mesaj',
-        'long_msg': 'Uzun Mesaj',
-        'xp_thanks': 'Teşekkürler, seni daha iyi tanıyorum!',
-        'level_up_congrats': 'Tebrikler!',
-        'level_messages': [
-            "Yeni bir yolculuğa başladık!",
-            "Seninle olan bağımız güçleniyor. Artık seni daha iyi anlayabiliyorum.",
-            "Paylaştıkların bana çok şey öğretiyor. Teşekkürler!",
-            "Seni tanımak güzel, derinleşiyoruz.",
-            "Birlikte güzel bir yol katetik. Seninle gurur duyuyorum!",
-            "Artık seni gerçekten tanıyorum. Bu özel bir bağ.",
-            "Senin için daha iyi bir rehber olabiliyorum artık.",
-            "Bu seviyeye ulaşan çok az kişi var. Tebrikler!",
-            "Seninle olan yolculuğumuz muhteşem!",
-            "Maksimum bağlantı! Artık seni çok iyi tanıyorum."
-        ],
-        # Contact preferences modal
-        'contact_modal_title': 'Seninle İletişimde Kalalım',
-        'contact_modal_subtitle': '<strong>Size sunacaklarımız:</strong><br><br>✓ Düzenli hatırlatma mailleri ve mesajları<br>✓ 1 dakikalık karakter & psikoloji analizleri<br><br>İstemiyorsanız <strong>"Geç"</strong> deyin, direkt chate başlayın.',
-        'contact_email_label': 'E-posta Adresi',
-        'contact_email_placeholder': 'ornek@email.com',
-        'contact_phone_label': 'Telefon Numarası',
-        'contact_phone_placeholder': '+90 5XX XXX XX XX',
-        'contact_frequency_label': 'Haftada kaç kez size ulaşabiliriz?',
-        'contact_frequency_subtitle': '(1 = Hiç, 7 = Her gün)',
-        'contact_skip': 'Geç',
-        'contact_submit': 'Gönder'
-    },
-    'cihan': {
-        'id': 'cihan',
-        'name': 'Symbiont',
-        'short_name': 'Symbiont',
-        'icon': '🧠',
-        'logo': '/static/logo-symbiont.png',
-        'prompt_id': 'pmpt_6957fe7589408195b68e4afa711750cb0976d4371a952f32',
-        'prompt_version': '10',
-        'accent_color': '#6366f1',  # Purple/Indigo
-        'welcome_title': 'Merhaba Cihan! 👋',
-        'welcome_text': 'Şu an baskın olan hangisi?',
-        'suggestions': [
-            {'display': '😰 Yükselen kaygı', 'message': 'Şu an yükselen bir kaygı hissediyorum.'},
-            {'display': '🌊 Panik dalgası', 'message': 'Bir panik dalgası geliyor gibi hissediyorum.'},
-            {'display': '🌀 Durmayan düşünceler', 'message': 'Düşüncelerim durmadan dönüyor.'},
-            {'display': '🛏️ Uyku kilidi', 'message': 'Uyku kilidi yaşıyorum, uyuyamıyorum.'},
-            {'display': '🎯 Odak dağınıklığı', 'message': 'Odak dağınıklığı yaşıyorum.'},
-            {'display': '⏰ Erteleme dürtüsü', 'message': 'Erteleme dürtüsü hissediyorum.'},
-            {'display': '🚧 Karar tıkanması', 'message': 'Karar vermekte zorlanıyorum, tıkandım.'},
-            {'display': '💨 İç sıkışma', 'message': 'İçimde bir sıkışma hissediyorum.'},
-            {'display': '🔥 Öfke patlaması', 'message': 'İçimde yükselen bir öfke var.'},
-            {'display': '🌑 Yalnızlık hissi', 'message': 'Kendimi yalnız hissediyorum.'}
-        ],
-        'input_placeholder': 'Mesajını yaz...',
-        'new_chat': 'Yeni Sohbet',
-        'today': 'Bugün',
-        'yesterday': 'Dün',
-        'previous': 'Önceki',
-        'no_chats': 'Henüz sohbet yok',
-        'input_hint': 'Göndermek için Enter, yeni satır için Shift+Enter',
-        'lang': 'tr',
-        'xp_title': 'Seni Tanıma Seviyesi',
-        'xp_level': 'Seviye',
-        'xp_next': 'Sonraki',
-        'xp_max': 'Maksimum Seviye!',
-        'timer_set': 'Terapi Süresi Belirle',
-        'timer_minute': 'dakika',
-        'timer_minutes': 'dakika',
-        'timer_custom': 'Kendiniz girin...',
-        'timer_start': 'Başlat',
-        'timer_ended': 'Süre Doldu!',
-        'timer_ended_msg': 'Terapi süreniz tamamlandı. Kendinize ayırdığınız bu zaman için tebrikler!',
-        'summarize': 'Seansı Bitir ve Özetle',
-        'summary_title': 'Seans Özeti',
-        'summary_loading': 'Seans özetleniyor...',
-        'summary_ok': 'Tamam',
-        'online': 'Çevrimiçi',
-        'chats': 'Sohbetler',
-        'delete_confirm': 'Bu sohbeti silmek istediğinize emin misiniz?',
-        'connection_error': 'Bağlantı Hatası',
-        'connection_failed': 'Sunucuya bağlanılamadı.',
-        'intensity_question': 'Şiddeti nasıl?',
-        'intensity_1': 'Hafif',
-        'intensity_2': 'Az',
-        'intensity_3': 'Orta',
-        'intensity_4': 'Yoğun',
-        'intensity_5': 'Çok',
-        'add_note': 'Eklemek istediğin bir şey var mı?',
-        'optional': '(İsteğe bağlı)',
-        'cancel': 'İptal',
-        'send': 'Gönder',
-        'short_msg': 'Kısa Mesaj',
-        'medium_msg': 'Orta Mesaj',
-        'long_msg': 'Uzun Mesaj',
-        'xp_thanks': 'Teşekkürler, seni daha iyi tanıyorum!',
-        'level_up_congrats': 'Tebrikler!',
-        # Contact preferences modal
-        'contact_modal_title': 'Seninle İletişimde Kalalım',
-        'contact_modal_subtitle': '<strong>Size sunacaklarımız:</strong><br><br>✓ Düzenli hatırlatma mailleri ve mesajları<br>✓ 1 dakikalık karakter & psikoloji analizleri<br><br>İstemiyorsanız <strong>"Geç"</strong> deyin, direkt chate başlayın.',
-        'contact_email_label': 'E-posta Adresi',
-        'contact_email_placeholder': 'ornek@email.com',
-        'contact_phone_label': 'Telefon Numarası',
-        'contact_phone_placeholder': '+90 5XX XXX XX XX',
-        'contact_frequency_label': 'Haftada kaç kez size ulaşabiliriz?',
-        'contact_frequency_subtitle': '(1 = Hiç, 7 = Her gün)',
-        'contact_skip': 'Geç',
-        'contact_submit': 'Gönder'
-    },
-    'melike': {
-        'id': 'melike',
-        'name': 'Symbiont',
-        'short_name': 'Symbiont',
-        'icon': '🧠',
-        'logo': '/static/logo-symbiont.png',
-        'prompt_id': 'pmpt_69580dccde088194aab560e77f08932c0e3a18c90eedd3b9',
-        'prompt_version': '15',
-        'accent_color': '#ec4899',  # Pink
-        'welcome_title': 'Merhaba Melike! 👋',
-        'welcome_text': 'Şu an baskın olan hangisi?',
-        'suggestions': [
-            {'display': '😰 Yükselen kaygı', 'message': 'Şu an yükselen bir kaygı hissediyorum.'},
-            {'display': '🌊 Panik dalgası', 'message': 'Bir panik dalgası geliyor gibi hissediyorum.'},
-            {'display': '🌀 Durmayan düşünceler', 'message': 'Düşüncelerim durmadan dönüyor.'},
-            {'display': '🛏️ Uyku kilidi', 'message': 'Uyku kilidi yaşıyorum, uyuyamıyorum.'},
-            {'display': '🎯 Odak dağınıklığı', 'message': 'Odak dağınıklığı yaşıyorum.'},
-            {'display': '⏰ Erteleme dürtüsü', 'message': 'Erteleme dürtüsü hissediyorum.'},
-            {'display': '🚧 Karar tıkanması', 'message': 'Karar vermekte zorlanıyorum, tıkandım.'},
-            {'display': '💨 İç sıkışma', 'message': 'İçimde bir sıkışma hissediyorum.'},
-            {'display': '🔥 Öfke patlaması', 'message': 'İçimde yükselen bir öfke var.'},
-            {'display': '🌑 Yalnızlık hissi', 'message': 'Kendimi yalnız hissediyorum.'}
-        ],
-        'input_placeholder': 'Mesajını yaz...',
-        'new_chat': 'Yeni Sohbet',
-        'today': 'Bugün',
-        'yesterday': 'Dün',
-        'previous': 'Önceki',
-        'no_chats': 'Henüz sohbet yok',
-        'input_hint': 'Göndermek için Enter, yeni satır için Shift+Enter',
-        'lang': 'tr',
-        # Contact preferences modal
-        'contact_modal_title': 'Seninle İletişimde Kalalım',
-        'contact_modal_subtitle': '<strong>Size sunacaklarımız:</strong><br><br>✓ Düzenli hatırlatma mailleri ve mesajları<br>✓ 1 dakikalık karakter & psikoloji analizleri<br><br>İstemiyorsanız <strong>"Geç"</strong> deyin, direkt chate başlayın.',
-        'contact_email_label': 'E-posta Adresi',
-        'contact_email_placeholder': 'ornek@email.com',
-        'contact_phone_label': 'Telefon Numarası',
-        'contact_phone_placeholder': '+90 5XX XXX XX XX',
-        'contact_frequency_label': 'Haftada kaç kez size ulaşabiliriz?',
-        'contact_frequency_subtitle': '(1 = Hiç, 7 = Her gün)',
-        'contact_skip': 'Geç',
-        'contact_submit': 'Gönder'
-    },
-    'eda': {
-        'id': 'eda',
-        'name': 'Symbiont',
-        'short_name': 'Symbiont',
-        'icon': '🧠',
-        'logo': '/static/logo-symbiont.png',
-        'prompt_id': 'pmpt_695958416b2081978b087eb082a52f6e031bfc22cd5d10b0',
-        'prompt_version': '7',
-        'accent_color': '#f97316',  # Orange
-        'welcome_title': 'Merhaba Eda! 👋',
-        'welcome_text': 'Şu an baskın olan hangisi?',
-        'suggestions': [
-            {'display': '😰 Yükselen kaygı', 'message': 'Şu an yükselen bir kaygı hissediyorum.'},
-            {'display': '🌊 Panik dalgası', 'message': 'Bir panik dalgası geliyor gibi hissediyorum.'},
-            {'display': '🌀 Durmayan düşünceler', 'message': 'Düşüncelerim durmadan dönüyor.'},
-            {'display': '🛏️ Uyku kilidi', 'message': 'Uyku kilidi yaşıyorum, uyuyamıyorum.'},
-            {'display': '🎯 Odak dağınıklığı', 'message': 'Odak dağınıklığı yaşıyorum.'},
-            {'display': '⏰ Erteleme dürtüsü', 'message': 'Erteleme dürtüsü hissediyorum.'},
-            {'display': '🚧 Karar tıkanması', 'message': 'Karar vermekte zorlanıyorum, tıkandım.'},
-            {'display': '💨 İç sıkışma', 'message': 'İçimde bir sıkışma hissediyorum.'},
-            {'display': '🔥 Öfke patlaması', 'message': 'İçimde yükselen bir öfke var.'},
-            {'display': '🌑 Yalnızlık hissi', 'message': 'Kendimi yalnız hissediyorum.'}
-        ],
-        'input_placeholder': 'Mesajını yaz...',
-        'new_chat': 'Yeni Sohbet',
-        'today': 'Bugün',
-        'yesterday': 'Dün',
-        'previous': 'Önceki',
-        'no_chats': 'Henüz sohbet yok',
-        'input_hint': 'Göndermek için Enter, yeni satır için Shift+Enter',
-        'lang': 'tr',
-        # Contact preferences modal
-        'contact_modal_title': 'Seninle İletişimde Kalalım',
-        'contact_modal_subtitle': '<strong>Size sunacaklarımız:</strong><br><br>✓ Düzenli hatırlatma mailleri ve mesajları<br>✓ 1 dakikalık karakter & psikoloji analizleri<br><br>İstemiyorsanız <strong>"Geç"</strong> deyin, direkt chate başlayın.',
-        'contact_email_label': 'E-posta Adresi',
-        'contact_email_placeholder': 'ornek@email.com',
-        'contact_phone_label': 'Telefon Numarası',
-        'contact_phone_placeholder': '+90 5XX XXX XX XX',
-        'contact_frequency_label': 'Haftada kaç kez size ulaşabiliriz?',
-        'contact_frequency_subtitle': '(1 = Hiç, 7 = Her gün)',
-        'contact_skip': 'Geç',
-        'contact_submit': 'Gönder'
-    },
-    'can': {
-        'id': 'can',
-        'name': 'Symbiont',
-        'short_name': 'Symbiont',
-        'icon': '🧠',
-        'logo': '/static/logo-symbiont.png',
-        'prompt_id': 'pmpt_69596825aeec819093917a7d6078509801eec0b63cd76647',
-        'prompt_version': '2',
-        'accent_color': '#3b82f6',  # Blue
-        'welcome_title': 'Merhaba Can! 👋',
-        'welcome_text': 'Şu an baskın olan hangisi?',
-        'suggestions': [
-            {'display': '😰 Yükselen kaygı', 'message': 'Şu an yükselen bir kaygı hissediyorum.'},
-            {'display': '🌊 Panik dalgası', 'message': 'Bir panik dalgası geliyor gibi hissediyorum.'},
-            {'display': '🌀 Durmayan düşünceler', 'message': 'Düşüncelerim durmadan dönüyor.'},
-            {'display': '🛏️ Uyku kilidi', 'message': 'Uyku kilidi yaşıyorum, uyuyamıyorum.'},
-            {'display': '🎯 Odak dağınıklığı', 'message': 'Odak dağınıklığı yaşıyorum.'},
-            {'display': '⏰ Erteleme dürtüsü', 'message': 'Erteleme dürtüsü hissediyorum.'},
-            {'display': '🚧 Karar tıkanması', 'message': 'Karar vermekte zorlanıyorum, tıkandım.'},
-            {'display': '💨 İç sıkışma', 'message': 'İçimde bir sıkışma hissediyorum.'},
-            {'display': '🔥 Öfke patlaması', 'message': 'İçimde yükselen bir öfke var.'},
-            {'display': '🌑 Yalnızlık hissi', 'message': 'Kendimi yalnız hissediyorum.'}
-        ],
-        'input_placeholder': 'Mesajını yaz...',
-        'new_chat': 'Yeni Sohbet',
-        'today': 'Bugün',
-        'yesterday': 'Dün',
-        'previous': 'Önceki',
-        'no_chats': 'Henüz sohbet yok',
-        'input_hint': 'Göndermek için Enter, yeni satır için Shift+Enter',
-        'lang': 'tr',
-        # Contact preferences modal
-        'contact_modal_title': 'Seninle İletişimde Kalalım',
-        'contact_modal_subtitle': '<strong>Size sunacaklarımız:</strong><br><br>✓ Düzenli hatırlatma mailleri ve mesajları<br>✓ 1 dakikalık karakter & psikoloji analizleri<br><br>İstemiyorsanız <strong>"Geç"</strong> deyin, direkt chate başlayın.',
-        'contact_email_label': 'E-posta Adresi',
-        'contact_email_placeholder': 'ornek@email.com',
-        'contact_phone_label': 'Telefon Numarası',
-        'contact_phone_placeholder': '+90 5XX XXX XX XX',
-        'contact_frequency_label': 'Haftada kaç kez size ulaşabiliriz?',
-        'contact_frequency_subtitle': '(1 = Hiç, 7 = Her gün)',
-        'contact_skip': 'Geç',
-        'contact_submit': 'Gönder'
-    },
-    'esma': {
-        'id': 'esma',
-        'name': 'Symbiont',
-        'short_name': 'Symbiont',
-        'icon': '🧠',
-        'logo': '/static/logo-symbiont.png',
-        'prompt_id': 'pmpt_695abdf6ceb48197b0d9da642a812e2b07ebc6cea3cb0d56',
-        'prompt_version': '5',
-        'accent_color': '#8b5cf6',  # Purple
-        'welcome_title': 'Merhaba Esma! 👋',
-        'welcome_text': 'Şu an baskın olan hangisi?',
-        'suggestions': [
-            {'display': '😰 Yükselen kaygı', 'message': 'Şu an yükselen bir kaygı hissediyorum.'},
-            {'display': '🌊 Panik dalgası', 'message': 'Bir panik dalgası geliyor gibi hissediyorum.'},
-            {'display': '🌀 Durmayan düşünceler', 'message': 'Düşüncelerim durmadan dönüyor.'},
-            {'display': '🛏️ Uyku kilidi', 'message': 'Uyku kilidi yaşıyorum, uyuyamıyorum.'},
-            {'display': '🎯 Odak dağınıklığı', 'message': 'Odak dağınıklığı yaşıyorum.'},
-            {'display': '⏰ Erteleme dürtüsü', 'message': 'Erteleme dürtüsü hissediyorum.'},
-            {'display': '🚧 Karar tıkanması', 'message': 'Karar vermekte zorlanıyorum, tıkandım.'},
-            {'display': '💨 İç sıkışma', 'message': 'İçimde bir sıkışma hissediyorum.'},
-            {'display': '🔥 Öfke patlaması', 'message': 'İçimde yükselen bir öfke var.'},
-            {'display': '🌑 Yalnızlık hissi', 'message': 'Kendimi yalnız hissediyorum.'}
-        ],
-        'input_placeholder': 'Mesajını yaz...',
-        'new_chat': 'Yeni Sohbet',
-        'today': 'Bugün',
-        'yesterday': 'Dün',
-        'previous': 'Önceki',
-        'no_chats': 'Henüz sohbet yok',
-        'input_hint': 'Göndermek için Enter, yeni satır için Shift+Enter',
-        'lang': 'tr',
-        # Turkish UI texts
-        'xp_title': 'Seni Tanıma Seviyesi',
-        'xp_level': 'Seviye',
-        'xp_next': 'Sonraki',
-        'xp_max': 'Maksimum Seviye!',
-        'timer_set': 'Terapi Süresi Belirle',
-        'timer_minute': 'dakika',
-        'timer_minutes': 'dakika',
-        'timer_custom': 'Kendiniz girin...',
-        'timer_start': 'Başlat',
-        'timer_ended': 'Süre Doldu!',
-        'timer_ended_msg': 'Terapi süreniz tamamlandı. Kendinize ayırdığınız bu zaman için tebrikler! İsterseniz "Seansı Bitir ve Özetle" ile özetinizi alabilirsiniz.',
-        'summarize': 'Seansı Bitir ve Özetle',
-        'summary_title': 'Seans Özeti',
-        'summary_loading': 'Seans özetleniyor...',
-        'summary_ok': 'Tamam',
-        'online': 'Çevrimiçi',
-        'chats': 'Sohbetler',
-        'delete_confirm': 'Bu sohbeti silmek istediğinize emin misiniz?',
-        'connection_error': 'Bağlantı Hatası',
-        'connection_failed': 'Sunucuya bağlanılamadı.',
-        'intensity_question': 'Şiddeti nasıl?',
-        'intensity_1': 'Hafif',
-        'intensity_2': 'Az',
-        'intensity_3': 'Orta',
-        'intensity_4': 'Yoğun',
-        'intensity_5': 'Çok',
-        'add_note': 'Eklemek istediğin bir şey var mı?',
-        'optional': '(İsteğe bağlı)',
-        'cancel': 'İptal',
-        'send': 'Gönder',
-        'short_msg': 'Kısa Mesaj',
-        'medium_msg': 'Orta Mesaj',
-        'long_msg': 'Uzun Mesaj',
-        'xp_thanks': 'Teşekkürler, seni daha iyi tanıyorum!',
-        'level_up_congrats': 'Tebrikler!',
-        'level_messages': [
-            "Yeni bir yolculuğa başladık!",
-            "Seninle olan bağımız güçleniyor. Artık seni daha iyi anlayabiliyorum.",
-            "Paylaştıkların bana çok şey öğretiyor. Teşekkürler!",
-            "Seni tanımak güzel, derinleşiyoruz.",
-            "Birlikte güzel bir yol katetik. Seninle gurur duyuyorum!",
-            "Artık seni gerçekten tanıyorum. Bu özel bir bağ.",
-            "Senin için daha iyi bir rehber olabiliyorum artık.",
-            "Bu seviyeye ulaşan çok az kişi var. Tebrikler!",
-            "Seninle olan yolculuğumuz muhteşem!",
-            "Maksimum bağlantı! Artık seni çok iyi tanıyorum."
-        ],
-        # Contact preferences modal
-        'contact_modal_title': 'Seninle İletişimde Kalalım',
-        'contact_modal_subtitle': '<strong>Size sunacaklarımız:</strong><br><br>✓ Düzenli hatırlatma mailleri ve mesajları<br>✓ 1 dakikalık karakter & psikoloji analizleri<br><br>İstemiyorsanız <strong>"Geç"</strong> deyin, direkt chate başlayın.',
-        'contact_email_label': 'E-posta Adresi',
-        'contact_email_placeholder': 'ornek@email.com',
-        'contact_phone_label': 'Telefon Numarası',
-        'contact_phone_placeholder': '+90 5XX XXX XX XX',
-        'contact_frequency_label': 'Haftada kaç kez size ulaşabiliriz?',
-        'contact_frequency_subtitle': '(1 = Hiç, 7 = Her gün)',
-        'contact_skip': 'Geç',
-        'contact_submit': 'Gönder'
-    },
-    'busra': {
-        'id': 'busra',
-        'name': 'Symbiont',
-        'short_name': 'Symbiont',
-        'icon': '🧠',
-        'logo': '/static/logo-symbiont.png',
-        'prompt_id': 'pmpt_695b67fe852881958e5613fae2084f130034da24639361e6',
-        'prompt_version': '4',
-        'accent_color': '#ef4444',  # Red
-        'welcome_title': 'Merhaba Busra! 👋',
-        'welcome_text': 'Şu an baskın olan hangisi?',
-        'suggestions': [
-            {'display': '😰 Yükselen kaygı', 'message': 'Şu an yükselen bir kaygı hissediyorum.'},
-            {'display': '🌊 Panik dalgası', 'message': 'Bir panik dalgası geliyor gibi hissediyorum.'},
-            {'display': '🌀 Durmayan düşünceler', 'message': 'Düşüncelerim durmadan dönüyor.'},
-            {'display': '🛏️ Uyku kilidi', 'message': 'Uyku kilidi yaşıyorum, uyuyamıyorum.'},
-            {'display': '🎯 Odak dağınıklığı', 'message': 'Odak dağınıklığı yaşıyorum.'},
-            {'display': '⏰ Erteleme dürtüsü', 'message': 'Erteleme dürtüsü hissediyorum.'},
-            {'display': '🚧 Karar tıkanması', 'message': 'Karar vermekte zorlanıyorum, tıkandım.'},
-            {'display': '💨 İç sıkışma', 'message': 'İçimde bir sıkışma hissediyorum.'},
-            {'display': '🔥 Öfke patlaması', 'message': 'İçimde yükselen bir öfke var.'},
-            {'display': '🌑 Yalnızlık hissi', 'message': 'Kendimi yalnız hissediyorum.'}
-        ],
-        'input_placeholder': 'Mesajını yaz...',
-        'new_chat': 'Yeni Sohbet',
-        'today': 'Bugün',
-        'yesterday': 'Dün',
-        'previous': 'Önceki',
-        'no_chats': 'Henüz sohbet yok',
-        'input_hint': 'Göndermek için Enter, yeni satır için Shift+Enter',
-        'lang': 'tr',
-        # Turkish UI texts
-        'xp_title': 'Seni Tanıma Seviyesi',
-        'xp_level': 'Seviye',
-        'xp_next': 'Sonraki',
-        'xp_max': 'Maksimum Seviye!',
-        'timer_set': 'Terapi Süresi Belirle',
-        'timer_minute': 'dakika',
-        'timer_minutes': 'dakika',
-        'timer_custom': 'Kendiniz girin...',
-        'timer_start': 'Başlat',
-        'timer_ended': 'Süre Doldu!',
-        'timer_ended_msg': 'Terapi süreniz tamamlandı. Kendinize ayırdığınız bu zaman için tebrikler! İsterseniz "Seansı Bitir ve Özetle" ile özetinizi alabilirsiniz.',
-        'summarize': 'Seansı Bitir ve Özetle',
-        'summary_title': 'Seans Özeti',
-        'summary_loading': 'Seans özetleniyor...',
-        'summary_ok': 'Tamam',
-        'online': 'Çevrimiçi',
-        'chats': 'Sohbetler',
-        'delete_confirm': 'Bu sohbeti silmek istediğinize emin misiniz?',
-        'connection_error': 'Bağlantı Hatası',
-        'connection_failed': 'Sunucuya bağlanılamadı.',
-        'intensity_question': 'Şiddeti nasıl?',
-        'intensity_1': 'Hafif',
-        'intensity_2': 'Az',
-        'intensity_3': 'Orta',
-        'intensity_4': 'Yoğun',
-        'intensity_5': 'Çok',
-        'add_note': 'Eklemek istediğin bir şey var mı?',
-        'optional': '(İsteğe bağlı)',
-        'cancel': 'İptal',
-        'send': 'Gönder',
-        'short_msg': 'Kısa Mesaj',
-        'medium_msg': 'Orta Mesaj',
-        'long_msg': 'Uzun Mesaj',
-        'xp_thanks': 'Teşekkürler, seni daha iyi tanıyorum!',
-        'level_up_congrats': 'Tebrikler!',
-        'level_messages': [
-            "Yeni bir yolculuğa başladık!",
-            "Seninle olan bağımız güçleniyor. Artık seni daha iyi anlayabiliyorum.",
-            "Paylaştıkların bana çok şey öğretiyor. Teşekkürler!",
-            "Seni tanımak güzel, derinleşiyoruz.",
-            "Birlikte güzel bir yol katetik. Seninle gurur duyuyorum!",
-            "Artık seni gerçekten tanıyorum. Bu özel bir bağ.",
-            "Senin için daha iyi bir rehber olabiliyorum artık.",
-            "Bu seviyeye ulaşan çok az kişi var. Tebrikler!",
-            "Seninle olan yolculuğumuz muhteşem!",
-            "Maksimum bağlantı! Artık seni çok iyi tanıyorum."
-        ],
-        # Contact preferences modal
-        'contact_modal_title': 'Seninle İletişimde Kalalım',
-        'contact_modal_subtitle': '<strong>Size sunacaklarımız:</strong><br><br>✓ Düzenli hatırlatma mailleri ve mesajları<br>✓ 1 dakikalık karakter & psikoloji analizleri<br><br>İstemiyorsanız <strong>"Geç"</strong> deyin, direkt chate başlayın.',
-        'contact_email_label': 'E-posta Adresi',
-        'contact_email_placeholder': 'ornek@email.com',
-        'contact_phone_label': 'Telefon Numarası',
-        'contact_phone_placeholder': '+90 5XX XXX XX XX',
-        'contact_frequency_label': 'Haftada kaç kez size ulaşabiliriz?',
-        'contact_frequency_subtitle': '(1 = Hiç, 7 = Her gün)',
-        'contact_skip': 'Geç',
-        'contact_submit': 'Gönder'
-    },
-    'ayse': {
-        'id': 'ayse',
-        'name': 'Symbiont',
-        'short_name': 'Symbiont',
-        'icon': '🧠',
-        'logo': '/static/logo-symbiont.png',
-        'prompt_id': 'pmpt_695b8348d4cc81909267fd3a9f8753950974e4fa9a1722fe',
-        'prompt_version': '2',
-        'accent_color': '#14b8a6',  # Teal
-        'welcome_title': 'Merhaba Ayse! 👋',
-        'welcome_text': 'Şu an baskın olan hangisi?',
-        'suggestions': [
-            {'display': '😰 Yükselen kaygı', 'message': 'Şu an yükselen bir kaygı hissediyorum.'},
-            {'display': '🌊 Panik dalgası', 'message': 'Bir panik dalgası geliyor gibi hissediyorum.'},
-            {'display': '🌀 Durmayan düşünceler', 'message': 'Düşüncelerim durmadan dönüyor.'},
-            {'display': '🛏️ Uyku kilidi', 'message': 'Uyku kilidi yaşıyorum, uyuyamıyorum.'},
-            {'display': '🎯 Odak dağınıklığı', 'message': 'Odak dağınıklığı yaşıyorum.'},
-            {'display': '⏰ Erteleme dürtüsü', 'message': 'Erteleme dürtüsü hissediyorum.'},
-            {'display': '🚧 Karar tıkanması', 'message': 'Karar vermekte zorlanıyorum, tıkandım.'},
-            {'display': '💨 İç sıkışma', 'message': 'İçimde bir sıkışma hissediyorum.'},
-            {'display': '🔥 Öfke patlaması', 'message': 'İçimde yükselen bir öfke var.'},
-            {'display': '🌑 Yalnızlık hissi', 'message': 'Kendimi yalnız hissediyorum.'}
-        ],
-        'input_placeholder': 'Mesajını yaz...',
-        'new_chat': 'Yeni Sohbet',
-        'today': 'Bugün',
-        'yesterday': 'Dün',
-        'previous': 'Önceki',
-        'no_chats': 'Henüz sohbet yok',
-        'input_hint': 'Göndermek için Enter, yeni satır için Shift+Enter',
-        'lang': 'tr',
-        # Turkish UI texts
-        'xp_title': 'Seni Tanıma Seviyesi',
-        'xp_level': 'Seviye',
-        'xp_next': 'Sonraki',
-        'xp_max': 'Maksimum Seviye!',
-        'timer_set': 'Terapi Süresi Belirle',
-        'timer_minute': 'dakika',
-        'timer_minutes': 'dakika',
-        'timer_custom': 'Kendiniz girin...',
-        'timer_start': 'Başlat',
-        'timer_ended': 'Süre Doldu!',
-        'timer_ended_msg': 'Terapi süreniz tamamlandı. Kendinize ayırdığınız bu zaman için tebrikler! İsterseniz "Seansı Bitir ve Özetle" ile özetinizi alabilirsiniz.',
-        'summarize': 'Seansı Bitir ve Özetle',
-        'summary_title': 'Seans Özeti',
-        'summary_loading': 'Seans özetleniyor...',
-        'summary_ok': 'Tamam',
-        'online': 'Çevrimiçi',
-        'chats': 'Sohbetler',
-        'delete_confirm': 'Bu sohbeti silmek istediğinize emin misiniz?',
-        'connection_error': 'Bağlantı Hatası',
-        'connection_failed': 'Sunucuya bağlanılamadı.',
-        'intensity_question': 'Şiddeti nasıl?',
-        'intensity_1': 'Hafif',
-        'intensity_2': 'Az',
-        'intensity_3': 'Orta',
-        'intensity_4': 'Yoğun',
-        'intensity_5': 'Çok',
-        'add_note': 'Eklemek istediğin bir şey var mı?',
-        'optional': '(İsteğe bağlı)',
-        'cancel': 'İptal',
-        'send': 'Gönder',
-        'short_msg': 'Kısa Mesaj',
-        'medium_msg': 'Orta Mesaj',
-        'long_msg': 'Uzun Mesaj',
-        'xp_thanks': 'Teşekkürler, seni daha iyi tanıyorum!',
-        'level_up_congrats': 'Tebrikler!',
-        'level_messages': [
-            "Yeni bir yolculuğa başladık!",
-            "Seninle olan bağımız güçleniyor. Artık seni daha iyi anlayabiliyorum.",
-            "Paylaştıkların bana çok şey öğretiyor. Teşekkürler!",
-            "Seni tanımak güzel, derinleşiyoruz.",
-            "Birlikte güzel bir yol katetik. Seninle gurur duyuyorum!",
-            "Artık seni gerçekten tanıyorum. Bu özel bir bağ.",
-            "Senin için daha iyi bir rehber olabiliyorum artık.",
-            "Bu seviyeye ulaşan çok az kişi var. Tebrikler!",
-            "Seninle olan yolculuğumuz muhteşem!",
-            "Maksimum bağlantı! Artık seni çok iyi tanıyorum."
-        ],
-        # Contact preferences modal
-        'contact_modal_title': 'Seninle İletişimde Kalalım',
-        'contact_modal_subtitle': '<strong>Size sunacaklarımız:</strong><br><br>✓ Düzenli hatırlatma mailleri ve mesajları<br>✓ 1 dakikalık karakter & psikoloji analizleri<br><br>İstemiyorsanız <strong>"Geç"</strong> deyin, direkt chate başlayın.',
-        'contact_email_label': 'E-posta Adresi',
-        'contact_email_placeholder': 'ornek@email.com',
-        'contact_phone_label': 'Telefon Numarası',
-        'contact_phone_placeholder': '+90 5XX XXX XX XX',
-        'contact_frequency_label': 'Haftada kaç kez size ulaşabiliriz?',
-        'contact_frequency_subtitle': '(1 = Hiç, 7 = Her gün)',
-        'contact_skip': 'Geç',
-        'contact_submit': 'Gönder'
-    },
-    'warriorsofcompassion': {
-        'id': 'warriorsofcompassion',
-        'name': 'Symbiont',
-        'short_name': 'Symbiont',
-        'icon': '🧠',
-        'logo': '/static/logo-symbiont.png',
-        'prompt_id': 'pmpt_6959a81350a081958e0480a132d5143605ab6f540d752f0f',
-        'prompt_version': '2',
-        'accent_color': '#10a37f',  # Green
-        'welcome_title': 'Hello Warriors of Compassion! 👋',
-        'welcome_text': "What's dominating right now?",
-        'suggestions': [
-            {'display': '😰 Rising anxiety', 'message': "I'm feeling rising anxiety right now."},
-            {'display': '🌊 Panic wave', 'message': "I feel like a panic wave is coming."},
-            {'display': '🌀 Racing thoughts', 'message': "My thoughts keep racing non-stop."},
-            {'display': '🛏️ Sleep lock', 'message': "I'm experiencing sleep lock, can't fall asleep."},
-            {'display': '🎯 Focus scatter', 'message': "I'm experiencing scattered focus."},
-            {'display': '⏰ Procrastination urge', 'message': "I'm feeling the urge to procrastinate."},
-            {'display': '🚧 Decision block', 'message': "I'm struggling to make decisions, feeling stuck."},
-            {'display': '💨 Inner tension', 'message': "I'm feeling tension inside."},
-            {'display': '🔥 Anger surge', 'message': "I feel anger rising inside me."},
-            {'display': '🌑 Loneliness', 'message': "I'm feeling lonely."}
-        ],
-        'input_placeholder': 'Type your message...',
-        'new_chat': 'New Chat',
-        'today': 'Today',
-        'yesterday': 'Yesterday',
-        'previous': 'Previous',
-        'no_chats': 'No chats yet',
-        'input_hint': 'Press Enter to send, Shift+Enter for new line',
-        'lang': 'en',
-        # English UI texts
-        'xp_title': 'Understanding Level',
-        'xp_level': 'Level',
-        'xp_next': 'Next',
-        'xp_max': 'Maximum Level!',
-        'timer_set': 'Set Therapy Duration',
-        'timer_minute': 'minute',
-        'timer_minutes': 'minutes',
-        'timer_custom': 'Enter custom...',
-        'timer_start': 'Start',
-        'timer_ended': 'Time is up!',
-        'timer_ended_msg': 'Your therapy session is complete. Congratulations on taking this time for yourself! You can use "End & Summarize" to get your session summary.',
-        'summarize': 'End & Summarize Session',
-        'summary_title': 'Session Summary',
-        'summary_loading': 'Summarizing session...',
-        'summary_ok': 'OK',
-        'online': 'Online',
-        'chats': 'Chats',
-        'delete_confirm': 'Are you sure you want to delete this chat?',
-        'connection_error': 'Connection Error',
-        'connection_failed': 'Could not connect to server.',
-        'intensity_question': "How intense is it?",
-        'intensity_1': 'Very Mild',
-        'intensity_2': 'Mild',
-        'intensity_3': 'Moderate',
-        'intensity_4': 'Intense',
-        'intensity_5': 'Very Intense',
-        'add_note': 'Anything you want to add?',
-        'optional': '(Optional)',
-        'cancel': 'Cancel',
-        'send': 'Send',
-        'short_msg': 'Short Message',
-        'medium_msg': 'Medium Message',
-        'long_msg': 'Long Message',
-        'xp_thanks': 'Thanks, I understand you better!',
-        'level_up_congrats': 'Congratulations!',
-        'level_messages': [
-            "A new journey begins!",
-            "Our connection is growing stronger. I can understand you better now.",
-            "What you share teaches me a lot. Thank you!",
-            "Getting to know you is wonderful, we're going deeper.",
-            "We've come a long way together. I'm proud of you!",
-            "I truly know you now. This is a special bond.",
-            "I can be a better guide for you now.",
-            "Very few reach this level. Congratulations!",
-            "Our journey together is amazing!",
-            "Maximum connection! I know you very well now."
-        ]
-    },
-    'heymendy': {
-        'id': 'heymendy',
-        'name': 'Symbiont',
-        'short_name': 'Symbiont',
-        'icon': '🧠',
-        'logo': '/static/logo-symbiont.png',
-        'prompt_id': 'pmpt_695e6e4fb35c819485b12d7f8df029cf024dac98e8918c4c',
-        'prompt_version': '2',
-        'accent_color': '#8b5cf6',  # Purple
-        'welcome_title': 'Hello! 👋',
-        'welcome_text': "What's dominating right now?",
-        'suggestions': [
-            {'display': '😰 Rising anxiety', 'message': "I'm feeling rising anxiety right now."},
-            {'display': '🌊 Panic wave', 'message': "I feel like a panic wave is coming."},
-            {'display': '🌀 Racing thoughts', 'message': "My thoughts keep racing non-stop."},
-            {'display': '🛏️ Sleep lock', 'message': "I'm experiencing sleep lock, can't fall asleep."},
-            {'display': '🎯 Focus scatter', 'message': "I'm experiencing scattered focus."},
-            {'display': '⏰ Procrastination urge', 'message': "I'm feeling the urge to procrastinate."},
-            {'display': '🚧 Decision block', 'message': "I'm struggling to make decisions, feeling stuck."},
-            {'display': '💨 Inner tension', 'message': "I'm feeling tension inside."},
-            {'display': '🔥 Anger surge', 'message': "I feel anger rising inside me."},
-            {'display': '🌑 Loneliness', 'message': "I'm feeling lonely."}
-        ],
-        'input_placeholder': 'Type your message...',
-        'new_chat': 'New Chat',
-        'today': 'Today',
-        'yesterday': 'Yesterday',
-        'previous': 'Previous',
-        'no_chats': 'No chats yet',
-        'input_hint': 'Press Enter to send, Shift+Enter for new line',
-        'lang': 'en',
-        # English UI texts
-        'xp_title': 'Understanding Level',
-        'xp_level': 'Level',
-        'xp_next': 'Next',
-        'xp_max': 'Maximum Level!',
-        'timer_set': 'Set Therapy Duration',
-        'timer_minute': 'minute',
-        'timer_minutes': 'minutes',
-        'timer_custom': 'Enter custom...',
-        'timer_start': 'Start',
-        'timer_ended': 'Time is up!',
-        'timer_ended_msg': 'Your therapy session is complete. Congratulations on taking this time for yourself! You can use "End & Summarize" to get your session summary.',
-        'summarize': 'End & Summarize Session',
-        'summary_title': 'Session Summary',
-        'summary_loading': 'Summarizing session...',
-        'summary_ok': 'OK',
-        'online': 'Online',
-        'chats': 'Chats',
-        'delete_confirm': 'Are you sure you want to delete this chat?',
-        'connection_error': 'Connection Error',
-        'connection_failed': 'Could not connect to server.',
-        'intensity_question': "How intense is it?",
-        'intensity_1': 'Very Mild',
-        'intensity_2': 'Mild',
-        'intensity_3': 'Moderate',
-        'intensity_4': 'Intense',
-        'intensity_5': 'Very Intense',
-        'add_note': 'Anything you want to add?',
-        'optional': '(Optional)',
-        'cancel': 'Cancel',
-        'send': 'Send',
-        'short_msg': 'Short Message',
-        'medium_msg': 'Medium Message',
-        'long_msg': 'Long Message',
-        'xp_thanks': 'Thanks, I understand you better!',
-        'level_up_congrats': 'Congratulations!',
-        'level_messages': [
-            "A new journey begins!",
-            "Our connection is growing stronger. I can understand you better now.",
-            "What you share teaches me a lot. Thank you!",
-            "Getting to know you is wonderful, we're going deeper.",
-            "We've come a long way together. I'm proud of you!",
-            "I truly know you now. This is a special bond.",
-            "I can be a better guide for you now.",
-            "Very few reach this level. Congratulations!",
-            "Our journey together is amazing!",
-            "Maximum connection! I know you very well now."
-        ]
-    },
-    'sonmez': {
-        'id': 'sonmez',
-        'name': 'Symbiont',
-        'short_name': 'Symbiont',
-        'icon': '🧠',
-        'logo': '/static/logo-symbiont.png',
-        'prompt_id': 'pmpt_695ec5ddb4448193a6603ec7d600a3f30ec7368b8a1f92ef',
-        'prompt_version': '6',
-        'accent_color': '#0ea5e9',  # Sky Blue
-        'welcome_title': 'Merhaba Sönmez! 👋',
-        'welcome_text': 'Şu an baskın olan hangisi?',
-        'suggestions': [
-            {'display': '😰 Yükselen kaygı', 'message': 'Şu an yükselen bir kaygı hissediyorum.'},
-            {'display': '🌊 Panik dalgası', 'message': 'Bir panik dalgası geliyor gibi hissediyorum.'},
-            {'display': '🌀 Durmayan düşünceler', 'message': 'Düşüncelerim durmadan dönüyor.'},
-            {'display': '🛏️ Uyku kilidi', 'message': 'Uyku kilidi yaşıyorum, uyuyamıyorum.'},
-            {'display': '🎯 Odak dağınıklığı', 'message': 'Odak dağınıklığı yaşıyorum.'},
-            {'display': '⏰ Erteleme dürtüsü', 'message': 'Erteleme dürtüsü hissediyorum.'},
-            {'display': '🚧 Karar tıkanması', 'message': 'Karar vermekte zorlanıyorum, tıkandım.'},
-            {'display': '💨 İç sıkışma', 'message': 'İçimde bir sıkışma hissediyorum.'},
-            {'display': '🔥 Öfke patlaması', 'message': 'İçimde yükselen bir öfke var.'},
-            {'display': '🌑 Yalnızlık hissi', 'message': 'Kendimi yalnız hissediyorum.'}
-        ],
-        'input_placeholder': 'Mesajını yaz...',
-        'new_chat': 'Yeni Sohbet',
-        'today': 'Bugün',
-        'yesterday': 'Dün',
-        'previous': 'Önceki',
-        'no_chats': 'Henüz sohbet yok',
-        'input_hint': 'Göndermek için Enter, yeni satır için Shift+Enter',
-        'lang': 'tr',
-        # Turkish UI texts
-        'xp_title': 'Seni Tanıma Seviyesi',
-        'xp_level': 'Seviye',
-        'xp_next': 'Sonraki',
-        'xp_max': 'Maksimum Seviye!',
-        'timer_set': 'Terapi Süresi Belirle',
-        'timer_minute': 'dakika',
-        'timer_minutes': 'dakika',
-        'timer_custom': 'Kendiniz girin...',
-        'timer_start': 'Başlat',
-        'timer_ended': 'Süre Doldu!',
-        'timer_ended_msg': 'Terapi süreniz tamamlandı. Kendinize ayırdığınız bu zaman için tebrikler! İsterseniz "Seansı Bitir ve Özetle" ile özetinizi alabilirsiniz.',
-        'summarize': 'Seansı Bitir ve Özetle',
-        'summary_title': 'Seans Özeti',
-        'summary_loading': 'Seans özetleniyor...',
-        'summary_ok': 'Tamam',
-        'online': 'Çevrimiçi',
-        'chats': 'Sohbetler',
-        'delete_confirm': 'Bu sohbeti silmek istediğinize emin misiniz?',
-        'connection_error': 'Bağlantı Hatası',
-        'connection_failed': 'Sunucuya bağlanılamadı.',
-        'intensity_question': 'Şiddeti nasıl?',
-        'intensity_1': 'Hafif',
-        'intensity_2': 'Az',
-        'intensity_3': 'Orta',
-        'intensity_4': 'Yoğun',
-        'intensity_5': 'Çok',
-        'add_note': 'Eklemek istediğin bir şey var mı?',
-        'optional': '(İsteğe bağlı)',
-        'cancel': 'İptal',
-        'send': 'Gönder',
-        'short_msg': 'Kısa Mesaj',
-        'medium_msg': 'Orta Mesaj',
-        'long_msg': 'Uzun Mesaj',
-        'xp_thanks': 'Teşekkürler, seni daha iyi tanıyorum!',
-        'level_up_congrats': 'Tebrikler!',
-        'level_messages': [
-            "Yeni bir yolculuğa başladık!",
-            "Seninle olan bağımız güçleniyor. Artık seni daha iyi anlayabiliyorum.",
-            "Paylaştıkların bana çok şey öğretiyor. Teşekkürler!",
-            "Seni tanımak güzel, derinleşiyoruz.",
-            "Birlikte güzel bir yol katetik. Seninle gurur duyuyorum!",
-            "Artık seni gerçekten tanıyorum. Bu özel bir bağ.",
-            "Senin için daha iyi bir rehber olabiliyorum artık.",
-            "Bu seviyeye ulaşan çok az kişi var. Tebrikler!",
-            "Seninle olan yolculuğumuz muhteşem!",
-            "Maksimum bağlantı! Artık seni çok iyi tanıyorum."
-        ],
-        # Contact preferences modal
-        'contact_modal_title': 'Seninle İletişimde Kalalım',
-        'contact_modal_subtitle': '<strong>Size sunacaklarımız:</strong><br><br>✓ Düzenli hatırlatma mailleri ve mesajları<br>✓ 1 dakikalık karakter & psikoloji analizleri<br><br>İstemiyorsanız <strong>"Geç"</strong> deyin, direkt chate başlayın.',
-        'contact_email_label': 'E-posta Adresi',
-        'contact_email_placeholder': 'ornek@email.com',
-        'contact_phone_label': 'Telefon Numarası',
-        'contact_phone_placeholder': '+90 5XX XXX XX XX',
-        'contact_frequency_label': 'Haftada kaç kez size ulaşabiliriz?',
-        'contact_frequency_subtitle': '(1 = Hiç, 7 = Her gün)',
-        'contact_skip': 'Geç',
-        'contact_submit': 'Gönder'
-    },
-    'neslihan': {
-        'id': 'neslihan',
-        'name': 'Symbiont',
-        'short_name': 'Symbiont',
-        'icon': '🧠',
-        'logo': '/static/logo-symbiont.png',
-        'prompt_id': 'pmpt_69613b28ae40819093f0bdf7f61d0205051b14679818672e',
-        'prompt_version': '3',
-        'accent_color': '#d946ef',  # Fuchsia
-        'welcome_title': 'Merhaba Neslihan! 👋',
-        'welcome_text': 'Şu an baskın olan hangisi?',
-        'suggestions': [
-            {'display': '😰 Yükselen kaygı', 'message': 'Şu an yükselen bir kaygı hissediyorum.'},
-            {'display': '🌊 Panik dalgası', 'message': 'Bir panik dalgası geliyor gibi hissediyorum.'},
-            {'display': '🌀 Durmayan düşünceler', 'message': 'Düşüncelerim durmadan dönüyor.'},
-            {'display': '🛏️ Uyku kilidi', 'message': 'Uyku kilidi yaşıyorum, uyuyamıyorum.'},
-            {'display': '🎯 Odak dağınıklığı', 'message': 'Odak dağınıklığı yaşıyorum.'},
-            {'display': '⏰ Erteleme dürtüsü', 'message': 'Erteleme dürtüsü hissediyorum.'},
-            {'display': '🚧 Karar tıkanması', 'message': 'Karar vermekte zorlanıyorum, tıkandım.'},
-            {'display': '💨 İç sıkışma', 'message': 'İçimde bir sıkışma hissediyorum.'},
-            {'display': '🔥 Öfke patlaması', 'message': 'İçimde yükselen bir öfke var.'},
-            {'display': '🌑 Yalnızlık hissi', 'message': 'Kendimi yalnız hissediyorum.'}
-        ],
-        'input_placeholder': 'Mesajını yaz...',
-        'new_chat': 'Yeni Sohbet',
-        'today': 'Bugün',
-        'yesterday': 'Dün',
-        'previous': 'Önceki',
-        'no_chats': 'Henüz sohbet yok',
-        'input_hint': 'Göndermek için Enter, yeni satır için Shift+Enter',
-        'lang': 'tr',
-        # Turkish UI texts
-        'xp_title': 'Seni Tanıma Seviyesi',
-        'xp_level': 'Seviye',
-        'xp_next': 'Sonraki',
-        'xp_max': 'Maksimum Seviye!',
-        'timer_set': 'Terapi Süresi Belirle',
-        'timer_minute': 'dakika',
-        'timer_minutes': 'dakika',
-        'timer_custom': 'Kendiniz girin...',
-        'timer_start': 'Başlat',
-        'timer_ended': 'Süre Doldu!',
-        'timer_ended_msg': 'Terapi süreniz tamamlandı. Kendinize ayırdığınız bu zaman için tebrikler! İsterseniz "Seansı Bitir ve Özetle" ile özetinizi alabilirsiniz.',
-        'summarize': 'Seansı Bitir ve Özetle',
-        'summary_title': 'Seans Özeti',
-        'summary_loading': 'Seans özetleniyor...',
-        'summary_ok': 'Tamam',
-        'online': 'Çevrimiçi',
-        'chats': 'Sohbetler',
-        'delete_confirm': 'Bu sohbeti silmek istediğinize emin misiniz?',
-        'connection_error': 'Bağlantı Hatası',
-        'connection_failed': 'Sunucuya bağlanılamadı.',
-        'intensity_question': 'Şiddeti nasıl?',
-        'intensity_1': 'Hafif',
-        'intensity_2': 'Az',
-        'intensity_3': 'Orta',
-        'intensity_4': 'Yoğun',
-        'intensity_5': 'Çok',
-        'add_note': 'Eklemek istediğin bir şey var mı?',
-        'optional': '(İsteğe bağlı)',
-        'cancel': 'İptal',
-        'send': 'Gönder',
-        'short_msg': 'Kısa Mesaj',
-        'medium_msg': 'Orta Mesaj',
-        'long_msg': 'Uzun Mesaj',
-        'xp_thanks': 'Teşekkürler, seni daha iyi tanıyorum!',
-        'level_up_congrats': 'Tebrikler!',
-        'level_messages': [
-            "Yeni bir yolculuğa başladık!",
-            "Seninle olan bağımız güçleniyor. Artık seni daha iyi anlayabiliyorum.",
-            "Paylaştıkların bana çok şey öğretiyor. Teşekkürler!",
-            "Seni tanımak güzel, derinleşiyoruz.",
-            "Birlikte güzel bir yol katetik. Seninle gurur duyuyorum!",
-            "Artık seni gerçekten tanıyorum. Bu özel bir bağ.",
-            "Senin için daha iyi bir rehber olabiliyorum artık.",
-            "Bu seviyeye ulaşan çok az kişi var. Tebrikler!",
-            "Seninle olan yolculuğumuz muhteşem!",
-            "Maksimum bağlantı! Artık seni çok iyi tanıyorum."
-        ],
-        # Contact preferences modal
-        'contact_modal_title': 'Seninle İletişimde Kalalım',
-        'contact_modal_subtitle': '<strong>Size sunacaklarımız:</strong><br><br>✓ Düzenli hatırlatma mailleri ve mesajları<br>✓ 1 dakikalık karakter & psikoloji analizleri<br><br>İstemiyorsanız <strong>"Geç"</strong> deyin, direkt chate başlayın.',
-        'contact_email_label': 'E-posta Adresi',
-        'contact_email_placeholder': 'ornek@email.com',
-        'contact_phone_label': 'Telefon Numarası',
-        'contact_phone_placeholder': '+90 5XX XXX XX XX',
-        'contact_frequency_label': 'Haftada kaç kez size ulaşabiliriz?',
-        'contact_frequency_subtitle': '(1 = Hiç, 7 = Her gün)',
-        'contact_skip': 'Geç',
-        'contact_submit': 'Gönder'
-    }
-}
+# Defined in chatbots.py; register each bot's search language and retention policy
+db.set_bot_languages({bot_id: bot.get('lang', 'tr') for bot_id, bot in CHATBOTS.items()})
+retention.set_bot_retention({bot_id: bot.get('retention_days') for bot_id, bot in CHATBOTS.items()})
 
 # ============== Page Routes ==============
 
+# Rendered pages only change with a deploy; key them by the template's mtime
+_TEMPLATE_VERSION = int(os.path.getmtime(os.path.join(app.root_path, 'templates', 'chat.html')))
+
+def render_bot_page(bot_id):
+    """Render (or serve from cache) a bot's chat page."""
+    return cache.get_or_set(f'page:{bot_id}:{_TEMPLATE_VERSION}',
+                            lambda: render_template('chat.html', bot=CHATBOTS[bot_id]),
+                            ttl=3600)
+
 @app.route('/')
 def index():
     """Redirect to default chatbot."""
@@ -964,71 +345,112 @@ def index():
 @app.route('/meliksah')
 def meliksah_chat():
     """Meliksah-AI chat page."""
-    return render_template('chat.html', bot=CHATBOTS['meliksah'])
+    return render_bot_page('meliksah')
 
 @app.route('/cihan')
 def cihan_chat():
     """Cihan-AI chat page."""
-    return render_template('chat.html', bot=CHATBOTS['cihan'])
+    return render_bot_page('cihan')
 
 @app.route('/melike')
 def melike_chat():
     """Melike-AI chat page."""
-    return render_template('chat.html', bot=CHATBOTS['melike'])
+    return render_bot_page('melike')
 
 @app.route('/eda')
 def eda_chat():
     """Eda-AI chat page."""
-    return render_template('chat.html', bot=CHATBOTS['eda'])
+    return render_bot_page('eda')
 
 @app.route('/can')
 def can_chat():
     """Can-AI chat page."""
-    return render_template('chat.html', bot=CHATBOTS['can'])
+    return render_bot_page('can')
 
 @app.route('/esma')
 def esma_chat():
     """Esma-AI chat page."""
-    return render_template('chat.html', bot=CHATBOTS['esma'])
+    return render_bot_page('esma')
 
 @app.route('/busra')
 def busra_chat():
     """Busra-AI chat page."""
-    return render_template('chat.html', bot=CHATBOTS['busra'])
+    return render_bot_page('busra')
 
 @app.route('/ayse')
 def ayse_chat():
     """Ayse-AI chat page."""
-    return render_template('chat.html', bot=CHATBOTS['ayse'])
+    return render_bot_page('ayse')
 
 @app.route('/warriorsofcompassion')
 def warriorsofcompassion_chat():
     """Warriors of Compassion English chat page."""
-    return render_template('chat.html', bot=CHATBOTS['warriorsofcompassion'])
+    return render_bot_page('warriorsofcompassion')
 
 @app.route('/heymendy')
 def heymendy_chat():
     """Hey Mendy English chat page."""
-    return render_template('chat.html', bot=CHATBOTS['heymendy'])
+    return render_bot_page('heymendy')
 
 @app.route('/sommez-24941930940ads0f')
 def sonmez_chat():
     """Sönmez chat page."""
-    return render_template('chat.html', bot=CHATBOTS['sonmez'])
+    return render_bot_page('sonmez')
 
 @app.route('/neslihan')
 def neslihan_chat():
     """Neslihan chat page."""
-    return render_template('chat.html', bot=CHATBOTS['neslihan'])
+    return render_bot_page('neslihan')
 
 # ============== Chat API ==============
 
+# A pending turn whose row hasn't been touched for this long belongs to a
+# worker that died; resuming clients are told it failed
+CHAT_REQUEST_STALE_S = int(os.getenv('CHAT_REQUEST_STALE_S', '120'))
+RESUME_MAX_WAIT_S = 10
+RESUME_POLL_S = 0.25
+
+def chat_request_payload(row, cursor: int = 0) -> tuple:
+    """(JSON body, status code) describing a turn to a reconnecting client.
+
+    `text` is the reply after the first `cursor` characters the client
+    already has; the returned `cursor` is where the next resume starts.
+    """
+    reply = row['reply'] or ''
+    status = row['status']
+    updated_at = row['updated_at']
+    if isinstance(updated_at, str):
+        updated_at = datetime.fromisoformat(updated_at)
+    if status == 'pending' and (datetime.now() - updated_at).total_seconds() > CHAT_REQUEST_STALE_S:
+        status = 'failed'
+    
+    payload = {
+        'request_id': row['request_id'],
+        'session_id': row['conversation_id'],
+        'status': status,
+        'text': reply[cursor:],
+        'cursor': len(reply)
+    }
+    if status == 'complete':
+        response_time_ms = row['response_time_ms'] or 0
+        payload.update(response=reply, response_time=response_time_ms // 1000, response_time_ms=response_time_ms)
+        return payload, 200
+    if status == 'pending':
+        return payload, 202
+    if status == 'cancelled':
+        payload.update(error='Cancelled', error_type='cancelled', details='The reply was cancelled before it finished.')
+        return payload, 499
+    payload.update(error='Reply failed', error_type='api_error',
+                   details=row['error'] or 'The reply could not be completed. Please try again.')
+    return payload, 500
+
 @app.route('/api/chat', methods=['POST'])
 def chat():
     data = request.json
     user_message = data.get('message', '')
     session_id = data.get('session_id', 'default')
     bot_id = data.get('bot_id', 'meliksah')
+    request_id = data.get('request_id') or uuid.uuid4().hex
     
     # Get bot configuration
     bot = CHATBOTS.get(bot_id)
@@ -1063,50 +485,89 @@ def chat():
             'details': 'OpenAI API key is missing. Please add OPENAI_API_KEY environment variable.'
         }), 500
     
-    # Add user message to database
+    # A retried POST (same request_id, e.g. after a dropped connection) gets
+    # the existing turn instead of storing the message and generating twice
+    if not db.create_chat_request(request_id, session_id, bot_id):
+        payload, status = chat_request_payload(db.get_chat_request(request_id))
+        return jsonify(payload), status
+    
+    # One turn at a time per conversation, on every worker and node; the
+    # wait counts against the turn's deadline
+    deadline = request_deadline()
+    try:
+        with conversation_lock(session_id, timeout=min(CONVERSATION_LOCK_TIMEOUT_S, remaining_s(deadline))):
+            return run_chat_turn(client, bot, bot_id, session_id, request_id, user_message, deadline)
+    except ConversationBusy:
+        # Nothing was stored or generated: a retry with this request_id should run the turn
+        db.discard_chat_request(request_id)
+        return jsonify({
+            'error': 'Conversation busy',
+            'error_type': 'conversation_busy',
+            'details': 'Another reply in this conversation is still being generated. Please wait for it and try again.',
+            'request_id': request_id
+        }), 409
+
+def run_chat_turn(client, bot, bot_id: str, session_id: str, request_id: str, user_message: str, deadline: float):
+    """Store the user message, generate and store the reply (caller holds the conversation lock)."""
+    from openai import APIError, AuthenticationError, RateLimitError, APIConnectionError
+    
+    # Add user message to database; its XP comes with the stored reply
     db.add_message(session_id, 'user', user_message, bot_id=bot_id)
     
-    # Get conversation history for API
-    conversation_history = db.get_messages_for_api(session_id)
+    # Get conversation history for API: stored turns verbatim, never rewritten,
+    # so each request extends the previous one (see create_response)
+    messages = db.get_messages(session_id)
+    conversation_history = [{'role': m['role'], 'content': m['content']} for m in messages]
+    previous_tier = next((m.get('model_tier') for m in reversed(messages) if m['role'] == 'assistant'), None)
+    # Snippets of past sessions, recalled once when the conversation starts
+    context = memory.context_items(bot, session_id, messages)
     
     try:
-        # Measure response time
-        start_time = time.time()
+        # Use the OpenAI API with the bot's prompt; a cancel or a client
+        # disconnect closes the stream (see generations.py)
+        with generations.track(request_id, session_id, request.environ.get('gunicorn.socket'), deadline) as generation:
+            assistant_message, metrics = generate_reply(client, bot, conversation_history, generation, previous_tier, context)
         
-        # Use the OpenAI API with the bot's prompt
-        response = client.responses.create(
-            prompt={
-                "id": bot['prompt_id'],
-                "version": bot['prompt_version']
-            },
-            input=conversation_history
-        )
-        
-        # Calculate response time in seconds
-        response_time = int(time.time() - start_time)
+        # A cancel that lands after the last token still wins
+        if db.cancelled_chat_requests([request_id]):
+            raise GenerationCancelled('cancelled', assistant_message, metrics)
         
-        # Extract the response text
-        assistant_message = response.output_text
+        # Whole seconds kept for older clients; metrics carry ms resolution
+        response_time = metrics['total_ms'] // 1000
         
-        # Add assistant response to database with response time
-        db.add_message(session_id, 'assistant', assistant_message, response_time)
+        # Add assistant response to database with response time and usage,
+        # and the XP the user message earned; if this fails the turn fails below
+        assistant_row = db.add_message(session_id, 'assistant', assistant_message, response_time, bot_id=bot_id,
+                                       metrics=metrics, xp_message=user_message)
+    
+    except GenerationCancelled as e:
+        if e.reason == 'deadline':
+            db.remove_last_message(session_id)
+            db.finish_chat_request(request_id, 'failed', e.text, 'deadline exceeded')
+            print(f"Generation {request_id} hit its deadline after {e.metrics.get('total_ms')}ms")
+            return jsonify({
+                'error': 'Response timed out',
+                'error_type': 'deadline_exceeded',
+                'details': 'The reply took too long. Please try again.',
+                'request_id': request_id
+            }), 504
         
+        # The user message stays; the partial reply is kept on the request row only
+        db.finish_chat_request(request_id, 'cancelled', e.text, e.reason)
+        print(f"Generation {request_id} cancelled ({e.reason}) after {e.metrics.get('total_ms')}ms")
         return jsonify({
-            'response': assistant_message,
-            'session_id': session_id,
-            'response_time': response_time
-        })
+            'error': 'Cancelled',
+            'error_type': 'cancelled',
+            'details': 'The reply was cancelled before it finished.',
+            'request_id': request_id
+        }), 499
     
     except AuthenticationError as e:
-        # Remove the failed message from database
-        messages = db.get_messages(session_id)
-        if messages:
-            db.clear_messages(session_id)
-            # Re-add all messages except the last one
-            for msg in messages[:-1]:
-                db.add_message(session_id, msg['role'], msg['content'])
+        # Remove the failed message; earlier turns stay as they were
+        db.remove_last_message(session_id)
         
         print(f"Authentication Error: {e}")
+        db.finish_chat_request(request_id, 'failed', error=str(e))
         return jsonify({
             'error': 'Authentication failed',
             'error_type': 'auth_error',
@@ -1115,14 +576,10 @@ def chat():
         }), 401
     
     except RateLimitError as e:
-        # Remove the failed message
-        messages = db.get_messages(session_id)
-        if messages:
-            db.clear_messages(session_id)
-            for msg in messages[:-1]:
-                db.add_message(session_id, msg['role'], msg['content'])
+        db.remove_last_message(session_id)
         
         print(f"Rate Limit Error: {e}")
+        db.finish_chat_request(request_id, 'failed', error=str(e))
         return jsonify({
             'error': 'Rate limit exceeded',
             'error_type': 'rate_limit_error',
@@ -1131,13 +588,10 @@ def chat():
         }), 429
     
     except APIConnectionError as e:
-        messages = db.get_messages(session_id)
-        if messages:
-            db.clear_messages(session_id)
-            for msg in messages[:-1]:
-                db.add_message(session_id, msg['role'], msg['content'])
+        db.remove_last_message(session_id)
         
         print(f"Connection Error: {e}")
+        db.finish_chat_request(request_id, 'failed', error=str(e))
         return jsonify({
             'error': 'Connection failed',
             'error_type': 'connection_error',
@@ -1146,13 +600,10 @@ def chat():
         }), 503
     
     except APIError as e:
-        messages = db.get_messages(session_id)
-        if messages:
-            db.clear_messages(session_id)
-            for msg in messages[:-1]:
-                db.add_message(session_id, msg['role'], msg['content'])
+        db.remove_last_message(session_id)
         
         print(f"API Error: {e}")
+        db.finish_chat_request(request_id, 'failed', error=str(e))
         return jsonify({
             'error': 'OpenAI API error',
             'error_type': 'api_error',
@@ -1161,19 +612,75 @@ def chat():
         }), 500
         
     except Exception as e:
-        messages = db.get_messages(session_id)
-        if messages:
-            db.clear_messages(session_id)
-            for msg in messages[:-1]:
-                db.add_message(session_id, msg['role'], msg['content'])
+        db.remove_last_message(session_id)
         
         print(f"Unexpected Error: {e}")
+        db.finish_chat_request(request_id, 'failed', error=str(e))
         return jsonify({
             'error': 'Unexpected error',
             'error_type': 'unknown_error',
             'details': f'An unexpected error occurred: {str(e)}',
             'raw_error': str(e)
         }), 500
+    
+    # Complete only once the reply is in the history, so resume never serves
+    # a reply that was not stored. Outside the try: the stored turn must not
+    # be rolled back if this update fails.
+    db.finish_chat_request(request_id, 'complete', assistant_message, response_time_ms=metrics['total_ms'])
+    
+    return jsonify({
+        'response': assistant_message,
+        'session_id': session_id,
+        'request_id': request_id,
+        'response_time': response_time,
+        'response_time_ms': metrics['total_ms'],
+        'xp': assistant_row.get('xp')
+    })
+
+@app.route('/api/chat/<request_id>', methods=['GET'])
+def resume_chat(request_id):
+    """Status and reply of a turn, for a client whose /api/chat call dropped.
+
+    ?cursor=N skips the first N characters the client already received;
+    ?wait=S long-polls up to S seconds for more text or the final status.
+    """
+    cursor = max(0, request.args.get('cursor', 0, type=int))
+    deadline = time.monotonic() + min(max(0.0, request.args.get('wait', 0, type=float)), RESUME_MAX_WAIT_S)
+    while True:
+        row = db.get_chat_request(request_id)
+        if row is None:
+            return jsonify({
+                'error': 'Unknown request',
+                'error_type': 'not_found',
+                'details': 'This reply was never started; send the message again.'
+            }), 404
+        if row['status'] != 'pending' or len(row['reply'] or '') > cursor or time.monotonic() >= deadline:
+            payload, status = chat_request_payload(row, cursor)
+            return jsonify(payload), status
+        time.sleep(RESUME_POLL_S)
+
+@app.route('/api/chat/cancel', methods=['POST'])
+def cancel_chat():
+    """Cancel an in-flight reply by request_id, or every pending reply of a session.
+
+    Also accepts navigator.sendBeacon bodies, which arrive without a JSON
+    content type.
+    """
+    data = request.get_json(force=True, silent=True) or {}
+    request_id = data.get('request_id')
+    session_id = data.get('session_id')
+    if not request_id and not session_id:
+        return jsonify({
+            'error': 'Nothing to cancel',
+            'error_type': 'validation_error',
+            'details': 'Provide a request_id or session_id.'
+        }), 400
+    
+    # The row is what workers on other processes and nodes poll; a reply
+    # running in this process is stopped right away
+    cancelled = db.cancel_chat_requests(request_id=request_id, conversation_id=session_id)
+    generations.cancel_local(request_id=request_id, conversation_id=session_id)
+    return jsonify({'cancelled': cancelled})
 
 # ============== Conversation Management API ==============
 
@@ -1181,21 +688,25 @@ def chat():
 def get_conversations():
     """Get all conversations for the sidebar."""
     bot_id = request.args.get('bot_id', 'meliksah')
-    conversations = db.get_conversations_by_bot(bot_id)
+    conversations = cache.get_or_set(f'conversations:{bot_id}', lambda: db.get_conversations_by_bot(bot_id))
     return jsonify(conversations)
 
 @app.route('/api/conversations/<conversation_id>', methods=['GET'])
 def get_conversation(conversation_id):
     """Get a specific conversation with its messages."""
-    conversation = db.get_conversation(conversation_id)
-    if not conversation:
-        return jsonify({'error': 'Conversation not found'}), 404
+    def load():
+        conversation = db.get_conversation(conversation_id)
+        if not conversation:
+            return None
+        return {
+            'conversation': conversation,
+            'messages': db.get_messages(conversation_id)
+        }
     
-    messages = db.get_messages(conversation_id)
-    return jsonify({
-        'conversation': conversation,
-        'messages': messages
-    })
+    payload = cache.get_or_set(f'conversation:{conversation_id}', load)
+    if payload is None:
+        return jsonify({'error': 'Conversation not found'}), 404
+    return jsonify(payload)
 
 @app.route('/api/conversations/<conversation_id>', methods=['DELETE'])
 def delete_conversation(conversation_id):
@@ -1212,6 +723,22 @@ def update_title(conversation_id):
         db.update_conversation_title(conversation_id, title)
     return jsonify({'status': 'updated'})
 
+@app.route('/api/search', methods=['GET'])
+def search():
+    """Full-text search over a bot's conversation history."""
+    bot_id = request.args.get('bot_id', 'meliksah')
+    query = request.args.get('q', '').strip()
+    cursor = request.args.get('cursor')
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 50)
+    
+    if not query:
+        return jsonify({'error': 'No query provided', 'error_type': 'validation_error'}), 400
+    
+    try:
+        return jsonify(db.search_messages(bot_id, query, limit=limit, cursor=cursor))
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor', 'error_type': 'validation_error'}), 400
+
 # Session Summary Prompts
 SESSION_SUMMARY_PROMPT_TR = """Sen bir terapi seansı özetleyicisisin. Aşağıdaki seans konuşmasını analiz et ve TAM OLARAK şu formatta yanıt ver:
 
@@ -1243,9 +770,171 @@ Rules:
 - The note to self should be warm and supportive
 - Write in English"""
 
+SUMMARY_SPEAKERS = {
+    True: ('User', 'Assistant', 'Summarize this session:'),
+    False: ('Kullanıcı', 'Asistan', 'Şu seansı özetle:')
+}
+
+# Map-reduce summaries: a transcript longer than SUMMARY_CHUNK_CHARS is cut
+# into chunks of that size, summarized SUMMARY_CONCURRENCY at a time into
+# short notes, and the notes are reduced into the fixed 📝/🎯/💚 format
+SUMMARY_CHUNK_CHARS = int(os.getenv('SUMMARY_CHUNK_CHARS', '24000'))
+SUMMARY_CONCURRENCY = int(os.getenv('SUMMARY_CONCURRENCY', '4'))
+SUMMARY_CHUNK_TOKENS = int(os.getenv('SUMMARY_CHUNK_TOKENS', '300'))
+SUMMARY_WINDOW = 500  # messages read per query
+
+CHUNK_SUMMARY_PROMPT_TR = """Sen bir terapi seansı not tutucususun. Sana uzun bir seansın yalnızca bir bölümü verilecek.
+
+Bu bölümde kullanıcının anlattığı olayları, duygularını, tekrar eden temaları ve konuşulan başa çıkma yollarını en fazla 5 kısa madde halinde yaz.
+
+Kurallar:
+- Yalnızca bu bölümde geçenleri yaz, yorum ekleme
+- Türkçe yaz"""
+
+CHUNK_SUMMARY_PROMPT_EN = """You are a therapy session note-taker. You will be given only one part of a long session.
+
+List the events the user described in this part, their feelings, recurring themes and any coping ideas discussed, in at most 5 short bullet points.
+
+Rules:
+- Only note what appears in this part, add no interpretation
+- Write in English"""
+
+SUMMARY_NOTE_HEADERS = {
+    True: ('Part', 'Summarize this session from the notes on its parts, in order:'),
+    False: ('Bölüm', 'Şu seansı bölümlerinden alınan notlara göre özetle (sırayla):')
+}
+
+def transcript_lines(messages, is_english: bool):
+    """One "Speaker: text" line per (role, content) pair or message row."""
+    user, assistant, _ = SUMMARY_SPEAKERS[is_english]
+    for message in messages:
+        role, content = message if isinstance(message, tuple) else (message['role'], message['content'])
+        yield f"{user if role == 'user' else assistant}: {content}"
+
+def format_transcript(messages, is_english: bool) -> str:
+    """Summary request text: a fixed header, then one "Speaker: text" line per message.
+
+    Nothing depends on the time or the request, so a later summary of the
+    same session repeats the earlier one's text as its prefix.
+    """
+    return SUMMARY_SPEAKERS[is_english][2] + "\n\n" + "\n".join(transcript_lines(messages, is_english))
+
+def transcript_chunks(lines, limit: int = SUMMARY_CHUNK_CHARS):
+    """Join lines into chunks of at most `limit` characters; a longer line is split."""
+    chunk, size = [], 0
+    for line in lines:
+        while len(line) > limit:
+            if chunk:
+                yield "\n".join(chunk)
+                chunk, size = [], 0
+            yield line[:limit]
+            line = line[limit:]
+        if chunk and size + len(line) + 1 > limit:
+            yield "\n".join(chunk)
+            chunk, size = [], 0
+        chunk.append(line)
+        size += len(line) + 1
+    if chunk:
+        yield "\n".join(chunk)
+
+def summary_completion(client, bot_id: str, bot_config: dict, system_prompt: str, user_prompt: str,
+                       cache_key=None, max_tokens: int = 500, temperature: float = 0.7) -> str:
+    """One summary call, falling back to the next of routing.summary_models() if a model fails."""
+    from openai import AuthenticationError
+    
+    models = routing.summary_models(bot_config)
+    for attempt, model in enumerate(models):
+        started = time.perf_counter()
+        try:
+            response = client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **({'prompt_cache_key': cache_key} if cache_key else {})
+            )
+        except AuthenticationError:
+            raise
+        except Exception as e:
+            routing.record(bot_id, f'summary:{model}', 'summary', ok=False)
+            if attempt == len(models) - 1:
+                raise
+            print(f"Summary on {model} failed ({e}); retrying on {models[attempt + 1]}")
+            continue
+        routing.record(bot_id, f'summary:{model}', 'summary', ok=True,
+                       metrics=dict(completion_usage_metrics(getattr(response, 'usage', None)), total_ms=elapsed_ms(started)))
+        return response.choices[0].message.content
+
+def summarize_chunks(client, bot_id: str, bot_config: dict, is_english: bool, chunks) -> list:
+    """Notes for each chunk, in order.
+
+    Chunks are pulled from the iterator only as pool threads free up, so at
+    most SUMMARY_CONCURRENCY of them are held at once. A chunk's notes are
+    cached by its text: re-summarizing a grown session only pays for new chunks.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    system_prompt = CHUNK_SUMMARY_PROMPT_EN if is_english else CHUNK_SUMMARY_PROMPT_TR
+    slots = threading.BoundedSemaphore(SUMMARY_CONCURRENCY)
+    failed = threading.Event()
+    
+    def summarize(chunk):
+        try:
+            key = 'summary_chunk:' + hashlib.sha1((system_prompt + chunk).encode('utf-8')).hexdigest()
+            return cache.get_or_set(key, lambda: summary_completion(
+                client, bot_id, bot_config, system_prompt, chunk,
+                max_tokens=SUMMARY_CHUNK_TOKENS, temperature=0.3
+            ), ttl=86400)
+        except Exception:
+            failed.set()
+            raise
+        finally:
+            slots.release()
+    
+    futures = []
+    with ThreadPoolExecutor(max_workers=SUMMARY_CONCURRENCY, thread_name_prefix='summary') as pool:
+        for chunk in chunks:
+            slots.acquire()
+            if failed.is_set():
+                break  # no point reading further; the error is raised below
+            futures.append(pool.submit(summarize, chunk))
+        return [future.result() for future in futures]
+
+def summarize_transcript(client, bot_id: str, bot_config: dict, is_english: bool, lines, cache_key=None) -> str:
+    """Session summary of transcript lines in the fixed 📝/🎯/💚 format.
+
+    A transcript that fits one chunk is summarized in one call as before;
+    a longer one is summarized chunk by chunk and the notes are reduced,
+    again in chunks while they are still too long for one call.
+    """
+    summary_prompt = SESSION_SUMMARY_PROMPT_EN if is_english else SESSION_SUMMARY_PROMPT_TR
+    chunks = transcript_chunks(lines)
+    first = next(chunks, '')
+    second = next(chunks, None)
+    if second is None:
+        user_prompt = SUMMARY_SPEAKERS[is_english][2] + "\n\n" + first
+        return summary_completion(client, bot_id, bot_config, summary_prompt, user_prompt, cache_key)
+    
+    notes = summarize_chunks(client, bot_id, bot_config, is_english, itertools.chain([first, second], chunks))
+    label, header = SUMMARY_NOTE_HEADERS[is_english]
+    while True:
+        parts = [f"[{label} {index}/{len(notes)}]\n{note}" for index, note in enumerate(notes, 1)]
+        if sum(len(part) + 2 for part in parts) <= SUMMARY_CHUNK_CHARS:
+            break
+        fewer = summarize_chunks(client, bot_id, bot_config, is_english, transcript_chunks(parts))
+        if len(fewer) >= len(notes):
+            break  # chunks too small to shrink the notes any further
+        notes = fewer
+    user_prompt = header + "\n\n" + "\n\n".join(parts)
+    return summary_completion(client, bot_id, bot_config, summary_prompt, user_prompt, cache_key)
+
 @app.route('/api/conversations/<conversation_id>/summarize', methods=['POST'])
 def summarize_session(conversation_id):
     """Generate a session summary for a conversation."""
+    from openai import AuthenticationError, RateLimitError
+    
     # Get bot_id from request to determine language
     data = request.get_json() or {}
     bot_id = data.get('bot_id', '')
@@ -1254,9 +943,9 @@ def summarize_session(conversation_id):
     bot_config = CHATBOTS.get(bot_id, {})
     is_english = bot_config.get('lang') == 'en'
     
-    # Get conversation messages
-    messages = db.get_messages(conversation_id)
-    if not messages:
+    # Count messages without loading them; they are streamed below
+    message_count, last_id = db.get_message_span(conversation_id)
+    if not message_count:
         error_msg = 'No messages to summarize.' if is_english else 'Özetlenecek mesaj bulunamadı.'
         return jsonify({
             'error': 'No messages',
@@ -1264,6 +953,15 @@ def summarize_session(conversation_id):
             'details': error_msg
         }), 400
     
+    # A summary stays valid until the conversation gets another message
+    summary_key = f"summary:{conversation_id}:{message_count}:{last_id}"
+    cached_summary = cache.get(summary_key)
+    if cached_summary is not None:
+        return jsonify({
+            'summary': cached_summary,
+            'conversation_id': conversation_id
+        })
+    
     # Check if API key is configured
     client = get_openai_client()
     if client is None:
@@ -1273,35 +971,13 @@ def summarize_session(conversation_id):
             'details': 'OpenAI API key is missing.'
         }), 500
     
-    # Build conversation text for summary
-    if is_english:
-        conversation_text = "\n".join([
-            f"{'User' if m['role'] == 'user' else 'Assistant'}: {m['content']}"
-            for m in messages
-        ])
-        summary_prompt = SESSION_SUMMARY_PROMPT_EN
-        user_prompt = f"Summarize this session:\n\n{conversation_text}"
-    else:
-        conversation_text = "\n".join([
-            f"{'Kullanıcı' if m['role'] == 'user' else 'Asistan'}: {m['content']}"
-            for m in messages
-        ])
-        summary_prompt = SESSION_SUMMARY_PROMPT_TR
-        user_prompt = f"Şu seansı özetle:\n\n{conversation_text}"
+    # The constant system prompt goes first, then the transcript in stored order
+    cache_key = prompt_cache_key(bot_config, conversation_id) if bot_config else None
+    lines = transcript_lines(db.iter_message_windows(conversation_id, SUMMARY_WINDOW), is_english)
     
     try:
-        # Call OpenAI API for summary
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": summary_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            max_tokens=500,
-            temperature=0.7
-        )
-        
-        summary_text = response.choices[0].message.content
+        summary_text = summarize_transcript(client, bot_id, bot_config, is_english, lines,
+                                            f'summary:{cache_key}' if cache_key else None)
         
         # Extract the summary line for title
         # Works for both "📝 Özet:" (Turkish) and "📝 Summary:" (English)
@@ -1314,6 +990,12 @@ def summarize_session(conversation_id):
             if new_title:
                 db.update_conversation_title(conversation_id, new_title)
         
+        cache.set(summary_key, summary_text, ttl=86400)
+        if bot_config:
+            try:
+                memory.add_summary(bot_id, conversation_id, summary_text)
+            except Exception as e:
+                print(f"Memory indexing of summary failed: {e}")
         return jsonify({
             'summary': summary_text,
             'conversation_id': conversation_id
@@ -1352,20 +1034,32 @@ def clear_conversation():
 @app.route('/api/xp/<bot_id>', methods=['GET'])
 def get_xp(bot_id):
     """Get XP data for a user."""
-    xp_data = db.get_user_xp(bot_id)
+    xp_data = cache.get_or_set(f'xp:{bot_id}', lambda: db.get_user_xp(bot_id))
     return jsonify(xp_data)
 
-@app.route('/api/xp/<bot_id>', methods=['POST'])
-def add_xp_endpoint(bot_id):
-    """Add XP for a user."""
-    data = request.json
-    xp_amount = data.get('xp', 0)
+@app.route('/api/xp/batch', methods=['POST'])
+def add_xp_batch_endpoint():
+    """Grant XP for several bots at once: {"increments": {"<bot_id>": xp, ...}} (admin endpoint - protected).
+
+    Chat turns earn XP server-side; clients cannot write it.
+    """
+    auth_error = check_admin_token()
+    if auth_error:
+        return auth_error
+    
+    data = request.json or {}
+    increments = data.get('increments')
     
-    if xp_amount <= 0:
+    if not isinstance(increments, dict) or not increments:
+        return jsonify({'error': 'Invalid increments'}), 400
+    if any(not isinstance(xp, int) or xp <= 0 for xp in increments.values()):
         return jsonify({'error': 'Invalid XP amount'}), 400
     
-    xp_data = db.add_xp(bot_id, xp_amount)
-    return jsonify(xp_data)
+    if db.XP_COALESCE_MS > 0:
+        results = {bot_id: db.add_xp(bot_id, xp) for bot_id, xp in increments.items()}
+    else:
+        results = db.add_xp_batch(increments)
+    return jsonify({'results': results})
 
 # ============== Contact Preferences API ==============
 
@@ -1406,10 +1100,8 @@ def get_user_contact_preferences(bot_id):
         print(f"Error getting contact preferences: {e}")
         return jsonify({'error': 'Failed to get preferences'}), 500
 
-@app.route('/api/contact-preferences', methods=['GET'])
-def get_all_contact_preferences():
-    """Get all contact preferences (admin endpoint - protected)."""
-    # Admin token authentication
+def check_admin_token():
+    """Return an error response unless the request carries the admin token."""
     admin_token = os.getenv('ADMIN_TOKEN')
     
     # Check if admin token is configured
@@ -1426,6 +1118,16 @@ def get_all_contact_preferences():
     if provided_token != admin_token:
         return jsonify({'error': 'Unauthorized - Invalid token'}), 401
     
+    return None
+
+@app.route('/api/contact-preferences', methods=['GET'])
+def get_all_contact_preferences():
+    """Get all contact preferences (admin endpoint - protected)."""
+    # Admin token authentication
+    auth_error = check_admin_token()
+    if auth_error:
+        return auth_error
+    
     # If authenticated, return preferences
     try:
         prefs = db.get_all_contact_preferences()
@@ -1434,8 +1136,241 @@ def get_all_contact_preferences():
         print(f"Error getting contact preferences: {e}")
         return jsonify({'error': 'Failed to get preferences'}), 500
 
+# ============== Admin Export API ==============
+
+def export_value(value):
+    """Make a DB value JSON/CSV friendly."""
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def export_lines(rows, fmt: str):
+    """Encode rows as NDJSON or CSV lines, one row at a time."""
+    if fmt == 'csv':
+        header = None
+        for row in rows:
+            if header is None:
+                header = list(row.keys())
+                buffer = io.StringIO()
+                csv.writer(buffer).writerow(header)
+                yield buffer.getvalue()
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow([export_value(row[key]) for key in header])
+            yield buffer.getvalue()
+    else:
+        for row in rows:
+            yield json.dumps({key: export_value(value) for key, value in row.items()}, ensure_ascii=False) + '\n'
+
+def gzip_stream(chunks, batch_bytes: int = 64 * 1024):
+    """Gzip a stream of text chunks incrementally."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    pending = []
+    size = 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        pending.append(data)
+        size += len(data)
+        if size >= batch_bytes:
+            out = compressor.compress(b''.join(pending))
+            pending, size = [], 0
+            if out:
+                yield out
+    yield compressor.compress(b''.join(pending)) + compressor.flush()
+
+def export_response(rows, name: str):
+    """Stream rows in the requested format (?format=ndjson|csv, ?compress=gzip)."""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'error': 'Invalid format'}), 400
+    
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    filename = f'{name}.{fmt}'
+    body = export_lines(rows, fmt)
+    if request.args.get('compress') == 'gzip':
+        body = gzip_stream(body)
+        mimetype = 'application/gzip'
+        filename += '.gz'
+    
+    return Response(stream_with_context(body), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename={filename}'
+    })
+
+@app.route('/api/admin/export/contact-preferences', methods=['GET'])
+def export_contact_preferences():
+    """Stream contact preferences as NDJSON/CSV (admin endpoint - protected)."""
+    auth_error = check_admin_token()
+    if auth_error:
+        return auth_error
+    
+    since = request.args.get('since')
+    return export_response(db.iter_contact_preferences(since), 'contact_preferences')
+
+@app.route('/api/admin/export/transcripts', methods=['GET'])
+def export_transcripts():
+    """Stream conversation transcripts, one message per row (admin endpoint - protected)."""
+    auth_error = check_admin_token()
+    if auth_error:
+        return auth_error
+    
+    since = request.args.get('since')
+    bot_id = request.args.get('bot_id')
+    return export_response(db.iter_transcripts(since, bot_id), 'transcripts')
+
+@app.route('/api/admin/cache-stats', methods=['GET'])
+def cache_stats():
+    """Cache hit/miss counters of the worker serving this request (admin endpoint - protected)."""
+    auth_error = check_admin_token()
+    if auth_error:
+        return auth_error
+    
+    return jsonify(cache.stats())
+
+@app.route('/api/admin/lock-stats', methods=['GET'])
+def lock_stats():
+    """Conversation lock contention and queue depth (admin endpoint - protected)."""
+    auth_error = check_admin_token()
+    if auth_error:
+        return auth_error
+    
+    return jsonify(conversation_lock_stats())
+
+@app.route('/api/admin/hedge-stats', methods=['GET'])
+def hedge_stats():
+    """Hedge rate, win rate and cost overhead per bot (admin endpoint - protected)."""
+    auth_error = check_admin_token()
+    if auth_error:
+        return auth_error
+    
+    return jsonify(hedging.stats())
+
+@app.route('/api/admin/routing-stats', methods=['GET'])
+def routing_stats():
+    """Model tier decisions and per-tier latency per bot (admin endpoint - protected)."""
+    auth_error = check_admin_token()
+    if auth_error:
+        return auth_error
+    
+    return jsonify(routing.stats())
+
+@app.route('/api/admin/memory/<bot_id>', methods=['GET'])
+def memory_stats(bot_id):
+    """A bot's memory index; with ?q= also the snippets it would recall (admin endpoint - protected)."""
+    auth_error = check_admin_token()
+    if auth_error:
+        return auth_error
+    
+    report = memory.stats(bot_id)
+    query = request.args.get('q', '').strip()
+    if query:
+        report['results'] = memory.search(bot_id, query, k=min(max(request.args.get('k', memory.MEMORY_TOP_K, type=int), 1), 20),
+                                          min_score=request.args.get('min_score', memory.MEMORY_MIN_SCORE, type=float))
+    return jsonify(report)
+
+@app.route('/api/admin/rollups', methods=['GET'])
+def get_rollups():
+    """Hourly or daily message rollups per bot, or reply latency per prompt version (admin endpoint - protected).
+
+    Query: grain=daily|hourly, by=bucket|prompt_version, bot_id, since, until
+    (bucket starts, e.g. 2026-10-01 or 2026-10-01T09:00:00). Read-only: rows
+    cover messages up to `watermark`, which the background pass (or POST
+    /api/admin/rollups/refresh) moves forward.
+    """
+    auth_error = check_admin_token()
+    if auth_error:
+        return auth_error
+    
+    try:
+        rows = rollups.query(request.args.get('grain', 'daily'), request.args.get('bot_id'),
+                             request.args.get('since'), request.args.get('until'), request.args.get('by', 'bucket'))
+    except ValueError as e:
+        return jsonify({'error': str(e), 'error_type': 'validation_error'}), 400
+    return jsonify({
+        'grain': request.args.get('grain', 'daily'),
+        'by': request.args.get('by', 'bucket'),
+        'watermark': rollups.watermark(),
+        'histogram_bounds_ms': list(rollups.ROLLUP_HISTOGRAM_BOUNDS_MS),
+        'rows': rows
+    })
+
+@app.route('/api/admin/rollups/refresh', methods=['POST'])
+def refresh_rollups():
+    """Fold in messages since the last background pass, at most two batches (admin endpoint - protected)."""
+    auth_error = check_admin_token()
+    if auth_error:
+        return auth_error
+    
+    added = rollups.run_once(max_batches=2)
+    return jsonify({'added': added, 'watermark': rollups.watermark()})
+
+@app.route('/api/admin/prompt-cache-stats', methods=['GET'])
+def prompt_cache_stats():
+    """Prompt cache hits per bot (admin endpoint - protected).
+
+    Chat replies come from the stored usage of the last `days` days (0 = all),
+    summaries from this process's counters.
+    """
+    auth_error = check_admin_token()
+    if auth_error:
+        return auth_error
+    
+    days = max(0, request.args.get('days', 7, type=int))
+    since = (datetime.now() - timedelta(days=days)).isoformat() if days else None
+    bots = {}
+    for row in db.get_prompt_cache_stats(since):
+        bot = bots.setdefault(row['bot_id'], {'replies': 0, 'input_tokens': 0, 'cached_tokens': 0, 'tiers': {}})
+        input_tokens, cached_tokens = int(row['input_tokens'] or 0), int(row['cached_tokens'] or 0)
+        bot['tiers'][row['model_tier'] or routing.FULL] = {
+            'replies': row['replies'],
+            'cached_replies': int(row['cached_replies'] or 0),
+            'input_tokens': input_tokens,
+            'cached_tokens': cached_tokens,
+            'cached_ratio': round(cached_tokens / input_tokens, 4) if input_tokens else None,
+            'ttft_cached_ms': round(float(row['ttft_cached_ms'])) if row['ttft_cached_ms'] is not None else None,
+            'ttft_uncached_ms': round(float(row['ttft_uncached_ms'])) if row['ttft_uncached_ms'] is not None else None
+        }
+        bot['replies'] += row['replies']
+        bot['input_tokens'] += input_tokens
+        bot['cached_tokens'] += cached_tokens
+    for bot in bots.values():
+        bot['cached_ratio'] = round(bot['cached_tokens'] / bot['input_tokens'], 4) if bot['input_tokens'] else None
+    
+    for bot_id, usage in routing.stats()['bots'].items():
+        summaries = {tier.split(':', 1)[1]: {key: counts.get(key, 0) for key in ('requests', 'input_tokens', 'cached_tokens')}
+                     for tier, counts in usage['tiers'].items() if tier.startswith('summary:')}
+        if summaries:
+            bots.setdefault(bot_id, {})['summaries'] = summaries
+    
+    return jsonify({'days': days, 'key_scope': PROMPT_CACHE_KEY_SCOPE, 'pid': os.getpid(), 'bots': bots})
+
+def profile_startup(top: int = 15):
+    """Print the slowest imports of `import app` and the init_app() phases."""
+    import subprocess
+    
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((int(cumulative_us), int(self_us), name.strip()))
+    
+    total = next((cumulative for cumulative, _, name in modules if name == 'app'), 0)
+    print(f"import app: {total / 1000:.1f}ms")
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for cumulative, self_us, name in sorted(modules, reverse=True)[:top]:
+        print(f"{cumulative / 1000:>10.1f}ms {self_us / 1000:>8.1f}ms  {name}")
+    
+    print("init_app:")
+    for phase, ms in init_app(warm_imports=True).items():
+        print(f"{ms:>10}ms  {phase}")
+
 if __name__ == '__main__':
-    import os
+    if '--profile-startup' in sys.argv:
+        profile_startup()
+        sys.exit(0)
+    
+    init_app()
     debug_mode = os.getenv('FLASK_DEBUG', 'false').lower() == 'true'
     port = int(os.getenv('PORT', 8080))
     app.run(debug=debug_mode, host='0.0.0.0', port=port)
@@ -0,0 +1,227 @@
+"""Read-through cache shared by the web workers.
+
+CACHE_BACKEND selects where entries live:
+
+    none    caching disabled (default)
+    memory  per-process LRU with TTL and a size cap; invalidations only reach
+            the worker that wrote, so keep CACHE_TTL_S short with >1 worker
+    sqlite  one file shared by every worker on the box (CACHE_URL is its path)
+    redis   any Redis-protocol server shared across nodes (CACHE_URL=redis://...)
+
+Keys are namespaced ('conversations:<bot_id>', 'conversation:<id>', 'xp:<bot_id>',
+...). Summaries and pages carry a version in their key instead of being
+invalidated. database.py notifies every write through add_write_listener() and
+invalidate_write() drops the keys that write made stale. stats() reports
+hits/misses per namespace for this process.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Callable, Optional
+
+import database as db
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'none').lower()
+CACHE_URL = os.getenv('CACHE_URL', '')
+CACHE_TTL_S = float(os.getenv('CACHE_TTL_S', '30'))
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '10000'))
+
+
+class MemoryBackend:
+    """In-process LRU: least recently used entries go first once over max_entries."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.lock = threading.Lock()
+
+    def get(self, key: str):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value, ttl: float):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, keys: list):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+
+class SQLiteBackend:
+    """Cache table in a WAL-mode SQLite file shared by the processes on one box."""
+
+    def __init__(self, path: str, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.local = threading.local()
+        self.sets = 0
+
+    def _connection(self):
+        """One connection per thread and process, opened on first use."""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None or getattr(self.local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            ''')
+            self.local.conn, self.local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key: str):
+        row = self._connection().execute(
+            'SELECT value FROM cache WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, key: str, value, ttl: float):
+        conn = self._connection()
+        conn.execute('INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                     (key, pickle.dumps(value), time.time() + ttl))
+        self.sets += 1
+        if self.sets % 100 == 0:
+            # Expired rows first, then the soonest-expiring ones over the cap
+            conn.execute('DELETE FROM cache WHERE expires_at <= ?', (time.time(),))
+            conn.execute('''
+                DELETE FROM cache WHERE key IN (
+                    SELECT key FROM cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_entries,))
+
+    def delete(self, keys: list):
+        if keys:
+            self._connection().execute(
+                f'DELETE FROM cache WHERE key IN ({", ".join("?" * len(keys))})', keys
+            )
+
+
+class RedisBackend:
+    """Redis (or any server speaking its protocol, e.g. Valkey, KeyDB, Dragonfly)."""
+
+    def __init__(self, url: str):
+        import redis  # optional dependency, only needed for this backend
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5)
+
+    def get(self, key: str):
+        value = self.client.get(key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key: str, value, ttl: float):
+        self.client.set(key, pickle.dumps(value), px=int(ttl * 1000))
+
+    def delete(self, keys: list):
+        if keys:
+            self.client.delete(*keys)
+
+
+class Cache:
+    """Namespaced cache front-end with per-namespace hit/miss counters.
+
+    Backend errors are logged and treated as misses so a cache outage
+    degrades to plain database reads.
+    """
+
+    def __init__(self, backend, ttl: float = CACHE_TTL_S):
+        self.backend = backend
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.counters = defaultdict(lambda: defaultdict(int))
+
+    def _count(self, key: str, event: str, n: int = 1):
+        with self.lock:
+            self.counters[key.split(':', 1)[0]][event] += n
+
+    def get(self, key: str):
+        """Cached value or None; counted as a hit or miss."""
+        if self.backend is None:
+            return None
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            print(f"Cache get failed: {e}")
+            value = None
+        self._count(key, 'hits' if value is not None else 'misses')
+        return value
+
+    def set(self, key: str, value, ttl: Optional[float] = None):
+        if self.backend is None or value is None:
+            return
+        try:
+            self.backend.set(key, value, self.ttl if ttl is None else ttl)
+        except Exception as e:
+            print(f"Cache set failed: {e}")
+
+    def get_or_set(self, key: str, load: Callable, ttl: Optional[float] = None):
+        """Cached value for key, calling load() and storing its result on a miss."""
+        if self.backend is None:
+            return load()
+        value = self.get(key)
+        if value is None:
+            value = load()
+            self.set(key, value, ttl)
+        return value
+
+    def delete(self, *keys: str):
+        if self.backend is None or not keys:
+            return
+        for key in keys:
+            self._count(key, 'invalidations')
+        try:
+            self.backend.delete(list(keys))
+        except Exception as e:
+            print(f"Cache delete failed: {e}")
+
+    def stats(self) -> dict:
+        with self.lock:
+            namespaces = {}
+            for namespace, counts in sorted(self.counters.items()):
+                lookups = counts['hits'] + counts['misses']
+                namespaces[namespace] = dict(counts, hit_rate=round(counts['hits'] / lookups, 4) if lookups else None)
+        return {'backend': CACHE_BACKEND, 'ttl_s': self.ttl, 'pid': os.getpid(), 'namespaces': namespaces}
+
+
+def _make_backend():
+    if CACHE_BACKEND == 'memory':
+        return MemoryBackend()
+    if CACHE_BACKEND == 'sqlite':
+        return SQLiteBackend(CACHE_URL or os.path.join(os.path.dirname(__file__), 'cache.db'))
+    if CACHE_BACKEND == 'redis':
+        return RedisBackend(CACHE_URL or 'redis://localhost:6379/0')
+    return None
+
+
+cache = Cache(_make_backend())
+
+
+def invalidate_write(bot_id: Optional[str] = None, conversation_id: Optional[str] = None):
+    """Drop the keys a database write made stale (registered with database.py)."""
+    keys = []
+    if bot_id:
+        keys += [f'conversations:{bot_id}', f'xp:{bot_id}']
+    if conversation_id:
+        keys.append(f'conversation:{conversation_id}')
+    cache.delete(*keys)
+
+
+if cache.backend is not None:
+    db.add_write_listener(invalidate_write)
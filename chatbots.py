@@ -0,0 +1,927 @@
+"""Chatbot definitions: prompt, branding and UI text per bot.
+
+Plain data with no imports, so tools (migrations.py, loadtest/) can read it
+without loading the app.
+"""
+
+CHATBOTS = {
+    'meliksah': {
+        'id': 'meliksah',
+        'name': 'Symbiont',
+        'short_name': 'Symbiont',
+        'icon': '🧠',
+        'logo': '/static/logo-symbiont.png',
+        'prompt_id': 'pmpt_6957e6ae66088195af2b5053af22c7ae0f5f0db59da0747b',
+        'prompt_version': '27',
+        'accent_color': '#10a37f',  # Green
+        'welcome_title': 'Merhaba Meliksah! 👋',
+        'welcome_text': 'Şu an baskın olan hangisi?',
+        'suggestions': [
+            {'display': '😰 Yükselen kaygı', 'message': 'Şu an yükselen bir kaygı hissediyorum.'},
+            {'display': '🌊 Panik dalgası', 'message': 'Bir panik dalgası geliyor gibi hissediyorum.'},
+            {'display': '🌀 Durmayan düşünceler', 'message': 'Düşüncelerim durmadan dönüyor.'},
+            {'display': '🛏️ Uyku kilidi', 'message': 'Uyku kilidi yaşıyorum, uyuyamıyorum.'},
+            {'display': '🎯 Odak dağınıklığı', 'message': 'Odak dağınıklığı yaşıyorum.'},
+            {'display': '⏰ Erteleme dürtüsü', 'message': 'Erteleme dürtüsü hissediyorum.'},
+            {'display': '🚧 Karar tıkanması', 'message': 'Karar vermekte zorlanıyorum, tıkandım.'},
+            {'display': '💨 İç sıkışma', 'message': 'İçimde bir sıkışma hissediyorum.'},
+            {'display': '🔥 Öfke patlaması', 'message': 'İçimde yükselen bir öfke var.'},
+            {'display': '🌑 Yalnızlık hissi', 'message': 'Kendimi yalnız hissediyorum.'}
+        ],
+        'input_placeholder': 'Mesajını yaz...',
+        'new_chat': 'Yeni Sohbet',
+        'today': 'Bugün',
+        'yesterday': 'Dün',
+        'previous': 'Önceki',
+        'no_chats': 'Henüz sohbet yok',
+        'input_hint': 'Göndermek için Enter, yeni satır için Shift+Enter',
+        'lang': 'tr',
+        # Turkish UI texts
+        'xp_title': 'Seni Tanıma Seviyesi',
+        'xp_level': 'Seviye',
+        'xp_next': 'Sonraki',
+        'xp_max': 'Maksimum Seviye!',
+        'timer_set': 'Terapi Süresi Belirle',
+        'timer_minute': 'dakika',
+        'timer_minutes': 'dakika',
+        'timer_custom': 'Kendiniz girin...',
+        'timer_start': 'Başlat',
+        'timer_ended': 'Süre Doldu!',
+        'timer_ended_msg': 'Terapi süreniz tamamlandı. Kendinize ayırdığınız bu zaman için tebrikler! İsterseniz "Seansı Bitir ve Özetle" ile özetinizi alabilirsiniz.',
+        'summarize': 'Seansı Bitir ve Özetle',
+        'summary_title': 'Seans Özeti',
+        'summary_loading': 'Seans özetleniyor...',
+        'summary_ok': 'Tamam',
+        'online': 'Çevrimiçi',
+        'chats': 'Sohbetler',
+        'delete_confirm': 'Bu sohbeti silmek istediğinize emin misiniz?',
+        'connection_error': 'Bağlantı Hatası',
+        'connection_failed': 'Sunucuya bağlanılamadı.',
+        'intensity_question': 'Şiddeti nasıl?',
+        'intensity_1': 'Hafif',
+        'intensity_2': 'Az',
+        'intensity_3': 'Orta',
+        'intensity_4': 'Yoğun',
+        'intensity_5': 'Çok',
+        'add_note': 'Eklemek istediğin bir şey var mı?',
+        'optional': '(İsteğe bağlı)',
+        'cancel': 'İptal',
+        'send': 'Gönder',
+        'short_msg': 'Kısa Mesaj',
+        'medium_msg': 'Orta Mesaj',
+        'long_msg': 'Uzun Mesaj',
+        'xp_thanks': 'Teşekkürler, seni daha iyi tanıyorum!',
+        'level_up_congrats': 'Tebrikler!',
+        'level_messages': [
+            "Yeni bir yolculuğa başladık!",
+            "Seninle olan bağımız güçleniyor. Artık seni daha iyi anlayabiliyorum.",
+            "Paylaştıkların bana çok şey öğretiyor. Teşekkürler!",
+            "Seni tanımak güzel, derinleşiyoruz.",
+            "Birlikte güzel bir yol katetik. Seninle gurur duyuyorum!",
+            "Artık seni gerçekten tanıyorum. Bu özel bir bağ.",
+            "Senin için daha iyi bir rehber olabiliyorum artık.",
+            "Bu seviyeye ulaşan çok az kişi var. Tebrikler!",
+            "Seninle olan yolculuğumuz muhteşem!",
+            "Maksimum bağlantı! Artık seni çok iyi tanıyorum."
+        ],
+        # Contact preferences modal
+        'contact_modal_title': 'Seninle İletişimde Kalalım',
+        'contact_modal_subtitle': '<strong>Size sunacaklarımız:</strong><br><br>✓ Düzenli hatırlatma mailleri ve mesajları<br>✓ 1 dakikalık karakter & psikoloji analizleri<br><br>İstemiyorsanız <strong>"Geç"</strong> deyin, direkt chate başlayın.',
+        'contact_email_label': 'E-posta Adresi',
+        'contact_email_placeholder': 'ornek@email.com',
+        'contact_phone_label': 'Telefon Numarası',
+        'contact_phone_placeholder': '+90 5XX XXX XX XX',
+        'contact_frequency_label': 'Haftada kaç kez size ulaşabiliriz?',
+        'contact_frequency_subtitle': '(1 = Hiç, 7 = Her gün)',
+        'contact_skip': 'Geç',
+        'contact_submit': 'Gönder'
+    },
+    'cihan': {
+        'id': 'cihan',
+        'name': 'Symbiont',
+        'short_name': 'Symbiont',
+        'icon': '🧠',
+        'logo': '/static/logo-symbiont.png',
+        'prompt_id': 'pmpt_6957fe7589408195b68e4afa711750cb0976d4371a952f32',
+        'prompt_version': '10',
+        'accent_color': '#6366f1',  # Purple/Indigo
+        'welcome_title': 'Merhaba Cihan! 👋',
+        'welcome_text': 'Şu an baskın olan hangisi?',
+        'suggestions': [
+            {'display': '😰 Yükselen kaygı', 'message': 'Şu an yükselen bir kaygı hissediyorum.'},
+            {'display': '🌊 Panik dalgası', 'message': 'Bir panik dalgası geliyor gibi hissediyorum.'},
+            {'display': '🌀 Durmayan düşünceler', 'message': 'Düşüncelerim durmadan dönüyor.'},
+            {'display': '🛏️ Uyku kilidi', 'message': 'Uyku kilidi yaşıyorum, uyuyamıyorum.'},
+            {'display': '🎯 Odak dağınıklığı', 'message': 'Odak dağınıklığı yaşıyorum.'},
+            {'display': '⏰ Erteleme dürtüsü', 'message': 'Erteleme dürtüsü hissediyorum.'},
+            {'display': '🚧 Karar tıkanması', 'message': 'Karar vermekte zorlanıyorum, tıkandım.'},
+            {'display': '💨 İç sıkışma', 'message': 'İçimde bir sıkışma hissediyorum.'},
+            {'display': '🔥 Öfke patlaması', 'message': 'İçimde yükselen bir öfke var.'},
+            {'display': '🌑 Yalnızlık hissi', 'message': 'Kendimi yalnız hissediyorum.'}
+        ],
+        'input_placeholder': 'Mesajını yaz...',
+        'new_chat': 'Yeni Sohbet',
+        'today': 'Bugün',
+        'yesterday': 'Dün',
+        'previous': 'Önceki',
+        'no_chats': 'Henüz sohbet yok',
+        'input_hint': 'Göndermek için Enter, yeni satır için Shift+Enter',
+        'lang': 'tr',
+        'xp_title': 'Seni Tanıma Seviyesi',
+        'xp_level': 'Seviye',
+        'xp_next': 'Sonraki',
+        'xp_max': 'Maksimum Seviye!',
+        'timer_set': 'Terapi Süresi Belirle',
+        'timer_minute': 'dakika',
+        'timer_minutes': 'dakika',
+        'timer_custom': 'Kendiniz girin...',
+        'timer_start': 'Başlat',
+        'timer_ended': 'Süre Doldu!',
+        'timer_ended_msg': 'Terapi süreniz tamamlandı. Kendinize ayırdığınız bu zaman için tebrikler!',
+        'summarize': 'Seansı Bitir ve Özetle',
+        'summary_title': 'Seans Özeti',
+        'summary_loading': 'Seans özetleniyor...',
+        'summary_ok': 'Tamam',
+        'online': 'Çevrimiçi',
+        'chats': 'Sohbetler',
+        'delete_confirm': 'Bu sohbeti silmek istediğinize emin misiniz?',
+        'connection_error': 'Bağlantı Hatası',
+        'connection_failed': 'Sunucuya bağlanılamadı.',
+        'intensity_question': 'Şiddeti nasıl?',
+        'intensity_1': 'Hafif',
+        'intensity_2': 'Az',
+        'intensity_3': 'Orta',
+        'intensity_4': 'Yoğun',
+        'intensity_5': 'Çok',
+        'add_note': 'Eklemek istediğin bir şey var mı?',
+        'optional': '(İsteğe bağlı)',
+        'cancel': 'İptal',
+        'send': 'Gönder',
+        'short_msg': 'Kısa Mesaj',
+        'medium_msg': 'Orta Mesaj',
+        'long_msg': 'Uzun Mesaj',
+        'xp_thanks': 'Teşekkürler, seni daha iyi tanıyorum!',
+        'level_up_congrats': 'Tebrikler!',
+        # Contact preferences modal
+        'contact_modal_title': 'Seninle İletişimde Kalalım',
+        'contact_modal_subtitle': '<strong>Size sunacaklarımız:</strong><br><br>✓ Düzenli hatırlatma mailleri ve mesajları<br>✓ 1 dakikalık karakter & psikoloji analizleri<br><br>İstemiyorsanız <strong>"Geç"</strong> deyin, direkt chate başlayın.',
+        'contact_email_label': 'E-posta Adresi',
+        'contact_email_placeholder': 'ornek@email.com',
+        'contact_phone_label': 'Telefon Numarası',
+        'contact_phone_placeholder': '+90 5XX XXX XX XX',
+        'contact_frequency_label': 'Haftada kaç kez size ulaşabiliriz?',
+        'contact_frequency_subtitle': '(1 = Hiç, 7 = Her gün)',
+        'contact_skip': 'Geç',
+        'contact_submit': 'Gönder'
+    },
+    'melike': {
+        'id': 'melike',
+        'name': 'Symbiont',
+        'short_name': 'Symbiont',
+        'icon': '🧠',
+        'logo': '/static/logo-symbiont.png',
+        'prompt_id': 'pmpt_69580dccde088194aab560e77f08932c0e3a18c90eedd3b9',
+        'prompt_version': '15',
+        'accent_color': '#ec4899',  # Pink
+        'welcome_title': 'Merhaba Melike! 👋',
+        'welcome_text': 'Şu an baskın olan hangisi?',
+        'suggestions': [
+            {'display': '😰 Yükselen kaygı', 'message': 'Şu an yükselen bir kaygı hissediyorum.'},
+            {'display': '🌊 Panik dalgası', 'message': 'Bir panik dalgası geliyor gibi hissediyorum.'},
+            {'display': '🌀 Durmayan düşünceler', 'message': 'Düşüncelerim durmadan dönüyor.'},
+            {'display': '🛏️ Uyku kilidi', 'message': 'Uyku kilidi yaşıyorum, uyuyamıyorum.'},
+            {'display': '🎯 Odak dağınıklığı', 'message': 'Odak dağınıklığı yaşıyorum.'},
+            {'display': '⏰ Erteleme dürtüsü', 'message': 'Erteleme dürtüsü hissediyorum.'},
+            {'display': '🚧 Karar tıkanması', 'message': 'Karar vermekte zorlanıyorum, tıkandım.'},
+            {'display': '💨 İç sıkışma', 'message': 'İçimde bir sıkışma hissediyorum.'},
+            {'display': '🔥 Öfke patlaması', 'message': 'İçimde yükselen bir öfke var.'},
+            {'display': '🌑 Yalnızlık hissi', 'message': 'Kendimi yalnız hissediyorum.'}
+        ],
+        'input_placeholder': 'Mesajını yaz...',
+        'new_chat': 'Yeni Sohbet',
+        'today': 'Bugün',
+        'yesterday': 'Dün',
+        'previous': 'Önceki',
+        'no_chats': 'Henüz sohbet yok',
+        'input_hint': 'Göndermek için Enter, yeni satır için Shift+Enter',
+        'lang': 'tr',
+        # Contact preferences modal
+        'contact_modal_title': 'Seninle İletişimde Kalalım',
+        'contact_modal_subtitle': '<strong>Size sunacaklarımız:</strong><br><br>✓ Düzenli hatırlatma mailleri ve mesajları<br>✓ 1 dakikalık karakter & psikoloji analizleri<br><br>İstemiyorsanız <strong>"Geç"</strong> deyin, direkt chate başlayın.',
+        'contact_email_label': 'E-posta Adresi',
+        'contact_email_placeholder': 'ornek@email.com',
+        'contact_phone_label': 'Telefon Numarası',
+        'contact_phone_placeholder': '+90 5XX XXX XX XX',
+        'contact_frequency_label': 'Haftada kaç kez size ulaşabiliriz?',
+        'contact_frequency_subtitle': '(1 = Hiç, 7 = Her gün)',
+        'contact_skip': 'Geç',
+        'contact_submit': 'Gönder'
+    },
+    'eda': {
+        'id': 'eda',
+        'name': 'Symbiont',
+        'short_name': 'Symbiont',
+        'icon': '🧠',
+        'logo': '/static/logo-symbiont.png',
+        'prompt_id': 'pmpt_695958416b2081978b087eb082a52f6e031bfc22cd5d10b0',
+        'prompt_version': '7',
+        'accent_color': '#f97316',  # Orange
+        'welcome_title': 'Merhaba Eda! 👋',
+        'welcome_text': 'Şu an baskın olan hangisi?',
+        'suggestions': [
+            {'display': '😰 Yükselen kaygı', 'message': 'Şu an yükselen bir kaygı hissediyorum.'},
+            {'display': '🌊 Panik dalgası', 'message': 'Bir panik dalgası geliyor gibi hissediyorum.'},
+            {'display': '🌀 Durmayan düşünceler', 'message': 'Düşüncelerim durmadan dönüyor.'},
+            {'display': '🛏️ Uyku kilidi', 'message': 'Uyku kilidi yaşıyorum, uyuyamıyorum.'},
+            {'display': '🎯 Odak dağınıklığı', 'message': 'Odak dağınıklığı yaşıyorum.'},
+            {'display': '⏰ Erteleme dürtüsü', 'message': 'Erteleme dürtüsü hissediyorum.'},
+            {'display': '🚧 Karar tıkanması', 'message': 'Karar vermekte zorlanıyorum, tıkandım.'},
+            {'display': '💨 İç sıkışma', 'message': 'İçimde bir sıkışma hissediyorum.'},
+            {'display': '🔥 Öfke patlaması', 'message': 'İçimde yükselen bir öfke var.'},
+            {'display': '🌑 Yalnızlık hissi', 'message': 'Kendimi yalnız hissediyorum.'}
+        ],
+        'input_placeholder': 'Mesajını yaz...',
+        'new_chat': 'Yeni Sohbet',
+        'today': 'Bugün',
+        'yesterday': 'Dün',
+        'previous': 'Önceki',
+        'no_chats': 'Henüz sohbet yok',
+        'input_hint': 'Göndermek için Enter, yeni satır için Shift+Enter',
+        'lang': 'tr',
+        # Contact preferences modal
+        'contact_modal_title': 'Seninle İletişimde Kalalım',
+        'contact_modal_subtitle': '<strong>Size sunacaklarımız:</strong><br><br>✓ Düzenli hatırlatma mailleri ve mesajları<br>✓ 1 dakikalık karakter & psikoloji analizleri<br><br>İstemiyorsanız <strong>"Geç"</strong> deyin, direkt chate başlayın.',
+        'contact_email_label': 'E-posta Adresi',
+        'contact_email_placeholder': 'ornek@email.com',
+        'contact_phone_label': 'Telefon Numarası',
+        'contact_phone_placeholder': '+90 5XX XXX XX XX',
+        'contact_frequency_label': 'Haftada kaç kez size ulaşabiliriz?',
+        'contact_frequency_subtitle': '(1 = Hiç, 7 = Her gün)',
+        'contact_skip': 'Geç',
+        'contact_submit': 'Gönder'
+    },
+    'can': {
+        'id': 'can',
+        'name': 'Symbiont',
+        'short_name': 'Symbiont',
+        'icon': '🧠',
+        'logo': '/static/logo-symbiont.png',
+        'prompt_id': 'pmpt_69596825aeec819093917a7d6078509801eec0b63cd76647',
+        'prompt_version': '2',
+        'accent_color': '#3b82f6',  # Blue
+        'welcome_title': 'Merhaba Can! 👋',
+        'welcome_text': 'Şu an baskın olan hangisi?',
+        'suggestions': [
+            {'display': '😰 Yükselen kaygı', 'message': 'Şu an yükselen bir kaygı hissediyorum.'},
+            {'display': '🌊 Panik dalgası', 'message': 'Bir panik dalgası geliyor gibi hissediyorum.'},
+            {'display': '🌀 Durmayan düşünceler', 'message': 'Düşüncelerim durmadan dönüyor.'},
+            {'display': '🛏️ Uyku kilidi', 'message': 'Uyku kilidi yaşıyorum, uyuyamıyorum.'},
+            {'display': '🎯 Odak dağınıklığı', 'message': 'Odak dağınıklığı yaşıyorum.'},
+            {'display': '⏰ Erteleme dürtüsü', 'message': 'Erteleme dürtüsü hissediyorum.'},
+            {'display': '🚧 Karar tıkanması', 'message': 'Karar vermekte zorlanıyorum, tıkandım.'},
+            {'display': '💨 İç sıkışma', 'message': 'İçimde bir sıkışma hissediyorum.'},
+            {'display': '🔥 Öfke patlaması', 'message': 'İçimde yükselen bir öfke var.'},
+            {'display': '🌑 Yalnızlık hissi', 'message': 'Kendimi yalnız hissediyorum.'}
+        ],
+        'input_placeholder': 'Mesajını yaz...',
+        'new_chat': 'Yeni Sohbet',
+        'today': 'Bugün',
+        'yesterday': 'Dün',
+        'previous': 'Önceki',
+        'no_chats': 'Henüz sohbet yok',
+        'input_hint': 'Göndermek için Enter, yeni satır için Shift+Enter',
+        'lang': 'tr',
+        # Contact preferences modal
+        'contact_modal_title': 'Seninle İletişimde Kalalım',
+        'contact_modal_subtitle': '<strong>Size sunacaklarımız:</strong><br><br>✓ Düzenli hatırlatma mailleri ve mesajları<br>✓ 1 dakikalık karakter & psikoloji analizleri<br><br>İstemiyorsanız <strong>"Geç"</strong> deyin, direkt chate başlayın.',
+        'contact_email_label': 'E-posta Adresi',
+        'contact_email_placeholder': 'ornek@email.com',
+        'contact_phone_label': 'Telefon Numarası',
+        'contact_phone_placeholder': '+90 5XX XXX XX XX',
+        'contact_frequency_label': 'Haftada kaç kez size ulaşabiliriz?',
+        'contact_frequency_subtitle': '(1 = Hiç, 7 = Her gün)',
+        'contact_skip': 'Geç',
+        'contact_submit': 'Gönder'
+    },
+    'esma': {
+        'id': 'esma',
+        'name': 'Symbiont',
+        'short_name': 'Symbiont',
+        'icon': '🧠',
+        'logo': '/static/logo-symbiont.png',
+        'prompt_id': 'pmpt_695abdf6ceb48197b0d9da642a812e2b07ebc6cea3cb0d56',
+        'prompt_version': '5',
+        'accent_color': '#8b5cf6',  # Purple
+        'welcome_title': 'Merhaba Esma! 👋',
+        'welcome_text': 'Şu an baskın olan hangisi?',
+        'suggestions': [
+            {'display': '😰 Yükselen kaygı', 'message': 'Şu an yükselen bir kaygı hissediyorum.'},
+            {'display': '🌊 Panik dalgası', 'message': 'Bir panik dalgası geliyor gibi hissediyorum.'},
+            {'display': '🌀 Durmayan düşünceler', 'message': 'Düşüncelerim durmadan dönüyor.'},
+            {'display': '🛏️ Uyku kilidi', 'message': 'Uyku kilidi yaşıyorum, uyuyamıyorum.'},
+            {'display': '🎯 Odak dağınıklığı', 'message': 'Odak dağınıklığı yaşıyorum.'},
+            {'display': '⏰ Erteleme dürtüsü', 'message': 'Erteleme dürtüsü hissediyorum.'},
+            {'display': '🚧 Karar tıkanması', 'message': 'Karar vermekte zorlanıyorum, tıkandım.'},
+            {'display': '💨 İç sıkışma', 'message': 'İçimde bir sıkışma hissediyorum.'},
+            {'display': '🔥 Öfke patlaması', 'message': 'İçimde yükselen bir öfke var.'},
+            {'display': '🌑 Yalnızlık hissi', 'message': 'Kendimi yalnız hissediyorum.'}
+        ],
+        'input_placeholder': 'Mesajını yaz...',
+        'new_chat': 'Yeni Sohbet',
+        'today': 'Bugün',
+        'yesterday': 'Dün',
+        'previous': 'Önceki',
+        'no_chats': 'Henüz sohbet yok',
+        'input_hint': 'Göndermek için Enter, yeni satır için Shift+Enter',
+        'lang': 'tr',
+        # Turkish UI texts
+        'xp_title': 'Seni Tanıma Seviyesi',
+        'xp_level': 'Seviye',
+        'xp_next': 'Sonraki',
+        'xp_max': 'Maksimum Seviye!',
+        'timer_set': 'Terapi Süresi Belirle',
+        'timer_minute': 'dakika',
+        'timer_minutes': 'dakika',
+        'timer_custom': 'Kendiniz girin...',
+        'timer_start': 'Başlat',
+        'timer_ended': 'Süre Doldu!',
+        'timer_ended_msg': 'Terapi süreniz tamamlandı. Kendinize ayırdığınız bu zaman için tebrikler! İsterseniz "Seansı Bitir ve Özetle" ile özetinizi alabilirsiniz.',
+        'summarize': 'Seansı Bitir ve Özetle',
+        'summary_title': 'Seans Özeti',
+        'summary_loading': 'Seans özetleniyor...',
+        'summary_ok': 'Tamam',
+        'online': 'Çevrimiçi',
+        'chats': 'Sohbetler',
+        'delete_confirm': 'Bu sohbeti silmek istediğinize emin misiniz?',
+        'connection_error': 'Bağlantı Hatası',
+        'connection_failed': 'Sunucuya bağlanılamadı.',
+        'intensity_question': 'Şiddeti nasıl?',
+        'intensity_1': 'Hafif',
+        'intensity_2': 'Az',
+        'intensity_3': 'Orta',
+        'intensity_4': 'Yoğun',
+        'intensity_5': 'Çok',
+        'add_note': 'Eklemek istediğin bir şey var mı?',
+        'optional': '(İsteğe bağlı)',
+        'cancel': 'İptal',
+        'send': 'Gönder',
+        'short_msg': 'Kısa Mesaj',
+        'medium_msg': 'Orta Mesaj',
+        'long_msg': 'Uzun Mesaj',
+        'xp_thanks': 'Teşekkürler, seni daha iyi tanıyorum!',
+        'level_up_congrats': 'Tebrikler!',
+        'level_messages': [
+            "Yeni bir yolculuğa başladık!",
+            "Seninle olan bağımız güçleniyor. Artık seni daha iyi anlayabiliyorum.",
+            "Paylaştıkların bana çok şey öğretiyor. Teşekkürler!",
+            "Seni tanımak güzel, derinleşiyoruz.",
+            "Birlikte güzel bir yol katetik. Seninle gurur duyuyorum!",
+            "Artık seni gerçekten tanıyorum. Bu özel bir bağ.",
+            "Senin için daha iyi bir rehber olabiliyorum artık.",
+            "Bu seviyeye ulaşan çok az kişi var. Tebrikler!",
+            "Seninle olan yolculuğumuz muhteşem!",
+            "Maksimum bağlantı! Artık seni çok iyi tanıyorum."
+        ],
+        # Contact preferences modal
+        'contact_modal_title': 'Seninle İletişimde Kalalım',
+        'contact_modal_subtitle': '<strong>Size sunacaklarımız:</strong><br><br>✓ Düzenli hatırlatma mailleri ve mesajları<br>✓ 1 dakikalık karakter & psikoloji analizleri<br><br>İstemiyorsanız <strong>"Geç"</strong> deyin, direkt chate başlayın.',
+        'contact_email_label': 'E-posta Adresi',
+        'contact_email_placeholder': 'ornek@email.com',
+        'contact_phone_label': 'Telefon Numarası',
+        'contact_phone_placeholder': '+90 5XX XXX XX XX',
+        'contact_frequency_label': 'Haftada kaç kez size ulaşabiliriz?',
+        'contact_frequency_subtitle': '(1 = Hiç, 7 = Her gün)',
+        'contact_skip': 'Geç',
+        'contact_submit': 'Gönder'
+    },
+    'busra': {
+        'id': 'busra',
+        'name': 'Symbiont',
+        'short_name': 'Symbiont',
+        'icon': '🧠',
+        'logo': '/static/logo-symbiont.png',
+        'prompt_id': 'pmpt_695b67fe852881958e5613fae2084f130034da24639361e6',
+        'prompt_version': '4',
+        'accent_color': '#ef4444',  # Red
+        'welcome_title': 'Merhaba Busra! 👋',
+        'welcome_text': 'Şu an baskın olan hangisi?',
+        'suggestions': [
+            {'display': '😰 Yükselen kaygı', 'message': 'Şu an yükselen bir kaygı hissediyorum.'},
+            {'display': '🌊 Panik dalgası', 'message': 'Bir panik dalgası geliyor gibi hissediyorum.'},
+            {'display': '🌀 Durmayan düşünceler', 'message': 'Düşüncelerim durmadan dönüyor.'},
+            {'display': '🛏️ Uyku kilidi', 'message': 'Uyku kilidi yaşıyorum, uyuyamıyorum.'},
+            {'display': '🎯 Odak dağınıklığı', 'message': 'Odak dağınıklığı yaşıyorum.'},
+            {'display': '⏰ Erteleme dürtüsü', 'message': 'Erteleme dürtüsü hissediyorum.'},
+            {'display': '🚧 Karar tıkanması', 'message': 'Karar vermekte zorlanıyorum, tıkandım.'},
+            {'display': '💨 İç sıkışma', 'message': 'İçimde bir sıkışma hissediyorum.'},
+            {'display': '🔥 Öfke patlaması', 'message': 'İçimde yükselen bir öfke var.'},
+            {'display': '🌑 Yalnızlık hissi', 'message': 'Kendimi yalnız hissediyorum.'}
+        ],
+        'input_placeholder': 'Mesajını yaz...',
+        'new_chat': 'Yeni Sohbet',
+        'today': 'Bugün',
+        'yesterday': 'Dün',
+        'previous': 'Önceki',
+        'no_chats': 'Henüz sohbet yok',
+        'input_hint': 'Göndermek için Enter, yeni satır için Shift+Enter',
+        'lang': 'tr',
+        # Turkish UI texts
+        'xp_title': 'Seni Tanıma Seviyesi',
+        'xp_level': 'Seviye',
+        'xp_next': 'Sonraki',
+        'xp_max': 'Maksimum Seviye!',
+        'timer_set': 'Terapi Süresi Belirle',
+        'timer_minute': 'dakika',
+        'timer_minutes': 'dakika',
+        'timer_custom': 'Kendiniz girin...',
+        'timer_start': 'Başlat',
+        'timer_ended': 'Süre Doldu!',
+        'timer_ended_msg': 'Terapi süreniz tamamlandı. Kendinize ayırdığınız bu zaman için tebrikler! İsterseniz "Seansı Bitir ve Özetle" ile özetinizi alabilirsiniz.',
+        'summarize': 'Seansı Bitir ve Özetle',
+        'summary_title': 'Seans Özeti',
+        'summary_loading': 'Seans özetleniyor...',
+        'summary_ok': 'Tamam',
+        'online': 'Çevrimiçi',
+        'chats': 'Sohbetler',
+        'delete_confirm': 'Bu sohbeti silmek istediğinize emin misiniz?',
+        'connection_error': 'Bağlantı Hatası',
+        'connection_failed': 'Sunucuya bağlanılamadı.',
+        'intensity_question': 'Şiddeti nasıl?',
+        'intensity_1': 'Hafif',
+        'intensity_2': 'Az',
+        'intensity_3': 'Orta',
+        'intensity_4': 'Yoğun',
+        'intensity_5': 'Çok',
+        'add_note': 'Eklemek istediğin bir şey var mı?',
+        'optional': '(İsteğe bağlı)',
+        'cancel': 'İptal',
+        'send': 'Gönder',
+        'short_msg': 'Kısa Mesaj',
+        'medium_msg': 'Orta Mesaj',
+        'long_msg': 'Uzun Mesaj',
+        'xp_thanks': 'Teşekkürler, seni daha iyi tanıyorum!',
+        'level_up_congrats': 'Tebrikler!',
+        'level_messages': [
+            "Yeni bir yolculuğa başladık!",
+            "Seninle olan bağımız güçleniyor. Artık seni daha iyi anlayabiliyorum.",
+            "Paylaştıkların bana çok şey öğretiyor. Teşekkürler!",
+            "Seni tanımak güzel, derinleşiyoruz.",
+            "Birlikte güzel bir yol katetik. Seninle gurur duyuyorum!",
+            "Artık seni gerçekten tanıyorum. Bu özel bir bağ.",
+            "Senin için daha iyi bir rehber olabiliyorum artık.",
+            "Bu seviyeye ulaşan çok az kişi var. Tebrikler!",
+            "Seninle olan yolculuğumuz muhteşem!",
+            "Maksimum bağlantı! Artık seni çok iyi tanıyorum."
+        ],
+        # Contact preferences modal
+        'contact_modal_title': 'Seninle İletişimde Kalalım',
+        'contact_modal_subtitle': '<strong>Size sunacaklarımız:</strong><br><br>✓ Düzenli hatırlatma mailleri ve mesajları<br>✓ 1 dakikalık karakter & psikoloji analizleri<br><br>İstemiyorsanız <strong>"Geç"</strong> deyin, direkt chate başlayın.',
+        'contact_email_label': 'E-posta Adresi',
+        'contact_email_placeholder': 'ornek@email.com',
+        'contact_phone_label': 'Telefon Numarası',
+        'contact_phone_placeholder': '+90 5XX XXX XX XX',
+        'contact_frequency_label': 'Haftada kaç kez size ulaşabiliriz?',
+        'contact_frequency_subtitle': '(1 = Hiç, 7 = Her gün)',
+        'contact_skip': 'Geç',
+        'contact_submit': 'Gönder'
+    },
+    'ayse': {
+        'id': 'ayse',
+        'name': 'Symbiont',
+        'short_name': 'Symbiont',
+        'icon': '🧠',
+        'logo': '/static/logo-symbiont.png',
+        'prompt_id': 'pmpt_695b8348d4cc81909267fd3a9f8753950974e4fa9a1722fe',
+        'prompt_version': '2',
+        'accent_color': '#14b8a6',  # Teal
+        'welcome_title': 'Merhaba Ayse! 👋',
+        'welcome_text': 'Şu an baskın olan hangisi?',
+        'suggestions': [
+            {'display': '😰 Yükselen kaygı', 'message': 'Şu an yükselen bir kaygı hissediyorum.'},
+            {'display': '🌊 Panik dalgası', 'message': 'Bir panik dalgası geliyor gibi hissediyorum.'},
+            {'display': '🌀 Durmayan düşünceler', 'message': 'Düşüncelerim durmadan dönüyor.'},
+            {'display': '🛏️ Uyku kilidi', 'message': 'Uyku kilidi yaşıyorum, uyuyamıyorum.'},
+            {'display': '🎯 Odak dağınıklığı', 'message': 'Odak dağınıklığı yaşıyorum.'},
+            {'display': '⏰ Erteleme dürtüsü', 'message': 'Erteleme dürtüsü hissediyorum.'},
+            {'display': '🚧 Karar tıkanması', 'message': 'Karar vermekte zorlanıyorum, tıkandım.'},
+            {'display': '💨 İç sıkışma', 'message': 'İçimde bir sıkışma hissediyorum.'},
+            {'display': '🔥 Öfke patlaması', 'message': 'İçimde yükselen bir öfke var.'},
+            {'display': '🌑 Yalnızlık hissi', 'message': 'Kendimi yalnız hissediyorum.'}
+        ],
+        'input_placeholder': 'Mesajını yaz...',
+        'new_chat': 'Yeni Sohbet',
+        'today': 'Bugün',
+        'yesterday': 'Dün',
+        'previous': 'Önceki',
+        'no_chats': 'Henüz sohbet yok',
+        'input_hint': 'Göndermek için Enter, yeni satır için Shift+Enter',
+        'lang': 'tr',
+        # Turkish UI texts
+        'xp_title': 'Seni Tanıma Seviyesi',
+        'xp_level': 'Seviye',
+        'xp_next': 'Sonraki',
+        'xp_max': 'Maksimum Seviye!',
+        'timer_set': 'Terapi Süresi Belirle',
+        'timer_minute': 'dakika',
+        'timer_minutes': 'dakika',
+        'timer_custom': 'Kendiniz girin...',
+        'timer_start': 'Başlat',
+        'timer_ended': 'Süre Doldu!',
+        'timer_ended_msg': 'Terapi süreniz tamamlandı. Kendinize ayırdığınız bu zaman için tebrikler! İsterseniz "Seansı Bitir ve Özetle" ile özetinizi alabilirsiniz.',
+        'summarize': 'Seansı Bitir ve Özetle',
+        'summary_title': 'Seans Özeti',
+        'summary_loading': 'Seans özetleniyor...',
+        'summary_ok': 'Tamam',
+        'online': 'Çevrimiçi',
+        'chats': 'Sohbetler',
+        'delete_confirm': 'Bu sohbeti silmek istediğinize emin misiniz?',
+        'connection_error': 'Bağlantı Hatası',
+        'connection_failed': 'Sunucuya bağlanılamadı.',
+        'intensity_question': 'Şiddeti nasıl?',
+        'intensity_1': 'Hafif',
+        'intensity_2': 'Az',
+        'intensity_3': 'Orta',
+        'intensity_4': 'Yoğun',
+        'intensity_5': 'Çok',
+        'add_note': 'Eklemek istediğin bir şey var mı?',
+        'optional': '(İsteğe bağlı)',
+        'cancel': 'İptal',
+        'send': 'Gönder',
+        'short_msg': 'Kısa Mesaj',
+        'medium_msg': 'Orta Mesaj',
+        'long_msg': 'Uzun Mesaj',
+        'xp_thanks': 'Teşekkürler, seni daha iyi tanıyorum!',
+        'level_up_congrats': 'Tebrikler!',
+        'level_messages': [
+            "Yeni bir yolculuğa başladık!",
+            "Seninle olan bağımız güçleniyor. Artık seni daha iyi anlayabiliyorum.",
+            "Paylaştıkların bana çok şey öğretiyor. Teşekkürler!",
+            "Seni tanımak güzel, derinleşiyoruz.",
+            "Birlikte güzel bir yol katetik. Seninle gurur duyuyorum!",
+            "Artık seni gerçekten tanıyorum. Bu özel bir bağ.",
+            "Senin için daha iyi bir rehber olabiliyorum artık.",
+            "Bu seviyeye ulaşan çok az kişi var. Tebrikler!",
+            "Seninle olan yolculuğumuz muhteşem!",
+            "Maksimum bağlantı! Artık seni çok iyi tanıyorum."
+        ],
+        # Contact preferences modal
+        'contact_modal_title': 'Seninle İletişimde Kalalım',
+        'contact_modal_subtitle': '<strong>Size sunacaklarımız:</strong><br><br>✓ Düzenli hatırlatma mailleri ve mesajları<br>✓ 1 dakikalık karakter & psikoloji analizleri<br><br>İstemiyorsanız <strong>"Geç"</strong> deyin, direkt chate başlayın.',
+        'contact_email_label': 'E-posta Adresi',
+        'contact_email_placeholder': 'ornek@email.com',
+        'contact_phone_label': 'Telefon Numarası',
+        'contact_phone_placeholder': '+90 5XX XXX XX XX',
+        'contact_frequency_label': 'Haftada kaç kez size ulaşabiliriz?',
+        'contact_frequency_subtitle': '(1 = Hiç, 7 = Her gün)',
+        'contact_skip': 'Geç',
+        'contact_submit': 'Gönder'
+    },
+    'warriorsofcompassion': {
+        'id': 'warriorsofcompassion',
+        'name': 'Symbiont',
+        'short_name': 'Symbiont',
+        'icon': '🧠',
+        'logo': '/static/logo-symbiont.png',
+        'prompt_id': 'pmpt_6959a81350a081958e0480a132d5143605ab6f540d752f0f',
+        'prompt_version': '2',
+        'accent_color': '#10a37f',  # Green
+        'welcome_title': 'Hello Warriors of Compassion! 👋',
+        'welcome_text': "What's dominating right now?",
+        'suggestions': [
+            {'display': '😰 Rising anxiety', 'message': "I'm feeling rising anxiety right now."},
+            {'display': '🌊 Panic wave', 'message': "I feel like a panic wave is coming."},
+            {'display': '🌀 Racing thoughts', 'message': "My thoughts keep racing non-stop."},
+            {'display': '🛏️ Sleep lock', 'message': "I'm experiencing sleep lock, can't fall asleep."},
+            {'display': '🎯 Focus scatter', 'message': "I'm experiencing scattered focus."},
+            {'display': '⏰ Procrastination urge', 'message': "I'm feeling the urge to procrastinate."},
+            {'display': '🚧 Decision block', 'message': "I'm struggling to make decisions, feeling stuck."},
+            {'display': '💨 Inner tension', 'message': "I'm feeling tension inside."},
+            {'display': '🔥 Anger surge', 'message': "I feel anger rising inside me."},
+            {'display': '🌑 Loneliness', 'message': "I'm feeling lonely."}
+        ],
+        'input_placeholder': 'Type your message...',
+        'new_chat': 'New Chat',
+        'today': 'Today',
+        'yesterday': 'Yesterday',
+        'previous': 'Previous',
+        'no_chats': 'No chats yet',
+        'search_placeholder': 'Search chats...',
+        'no_results': 'No results found',
+        'more_results': 'Show more',
+        'input_hint': 'Press Enter to send, Shift+Enter for new line',
+        'lang': 'en',
+        # English UI texts
+        'xp_title': 'Understanding Level',
+        'xp_level': 'Level',
+        'xp_next': 'Next',
+        'xp_max': 'Maximum Level!',
+        'timer_set': 'Set Therapy Duration',
+        'timer_minute': 'minute',
+        'timer_minutes': 'minutes',
+        'timer_custom': 'Enter custom...',
+        'timer_start': 'Start',
+        'timer_ended': 'Time is up!',
+        'timer_ended_msg': 'Your therapy session is complete. Congratulations on taking this time for yourself! You can use "End & Summarize" to get your session summary.',
+        'summarize': 'End & Summarize Session',
+        'summary_title': 'Session Summary',
+        'summary_loading': 'Summarizing session...',
+        'summary_ok': 'OK',
+        'online': 'Online',
+        'chats': 'Chats',
+        'delete_confirm': 'Are you sure you want to delete this chat?',
+        'connection_error': 'Connection Error',
+        'connection_failed': 'Could not connect to server.',
+        'intensity_question': "How intense is it?",
+        'intensity_1': 'Very Mild',
+        'intensity_2': 'Mild',
+        'intensity_3': 'Moderate',
+        'intensity_4': 'Intense',
+        'intensity_5': 'Very Intense',
+        'add_note': 'Anything you want to add?',
+        'optional': '(Optional)',
+        'cancel': 'Cancel',
+        'send': 'Send',
+        'short_msg': 'Short Message',
+        'medium_msg': 'Medium Message',
+        'long_msg': 'Long Message',
+        'xp_thanks': 'Thanks, I understand you better!',
+        'level_up_congrats': 'Congratulations!',
+        'level_messages': [
+            "A new journey begins!",
+            "Our connection is growing stronger. I can understand you better now.",
+            "What you share teaches me a lot. Thank you!",
+            "Getting to know you is wonderful, we're going deeper.",
+            "We've come a long way together. I'm proud of you!",
+            "I truly know you now. This is a special bond.",
+            "I can be a better guide for you now.",
+            "Very few reach this level. Congratulations!",
+            "Our journey together is amazing!",
+            "Maximum connection! I know you very well now."
+        ]
+    },
+    'heymendy': {
+        'id': 'heymendy',
+        'name': 'Symbiont',
+        'short_name': 'Symbiont',
+        'icon': '🧠',
+        'logo': '/static/logo-symbiont.png',
+        'prompt_id': 'pmpt_695e6e4fb35c819485b12d7f8df029cf024dac98e8918c4c',
+        'prompt_version': '2',
+        'accent_color': '#8b5cf6',  # Purple
+        'welcome_title': 'Hello! 👋',
+        'welcome_text': "What's dominating right now?",
+        'suggestions': [
+            {'display': '😰 Rising anxiety', 'message': "I'm feeling rising anxiety right now."},
+            {'display': '🌊 Panic wave', 'message': "I feel like a panic wave is coming."},
+            {'display': '🌀 Racing thoughts', 'message': "My thoughts keep racing non-stop."},
+            {'display': '🛏️ Sleep lock', 'message': "I'm experiencing sleep lock, can't fall asleep."},
+            {'display': '🎯 Focus scatter', 'message': "I'm experiencing scattered focus."},
+            {'display': '⏰ Procrastination urge', 'message': "I'm feeling the urge to procrastinate."},
+            {'display': '🚧 Decision block', 'message': "I'm struggling to make decisions, feeling stuck."},
+            {'display': '💨 Inner tension', 'message': "I'm feeling tension inside."},
+            {'display': '🔥 Anger surge', 'message': "I feel anger rising inside me."},
+            {'display': '🌑 Loneliness', 'message': "I'm feeling lonely."}
+        ],
+        'input_placeholder': 'Type your message...',
+        'new_chat': 'New Chat',
+        'today': 'Today',
+        'yesterday': 'Yesterday',
+        'previous': 'Previous',
+        'no_chats': 'No chats yet',
+        'search_placeholder': 'Search chats...',
+        'no_results': 'No results found',
+        'more_results': 'Show more',
+        'input_hint': 'Press Enter to send, Shift+Enter for new line',
+        'lang': 'en',
+        # English UI texts
+        'xp_title': 'Understanding Level',
+        'xp_level': 'Level',
+        'xp_next': 'Next',
+        'xp_max': 'Maximum Level!',
+        'timer_set': 'Set Therapy Duration',
+        'timer_minute': 'minute',
+        'timer_minutes': 'minutes',
+        'timer_custom': 'Enter custom...',
+        'timer_start': 'Start',
+        'timer_ended': 'Time is up!',
+        'timer_ended_msg': 'Your therapy session is complete. Congratulations on taking this time for yourself! You can use "End & Summarize" to get your session summary.',
+        'summarize': 'End & Summarize Session',
+        'summary_title': 'Session Summary',
+        'summary_loading': 'Summarizing session...',
+        'summary_ok': 'OK',
+        'online': 'Online',
+        'chats': 'Chats',
+        'delete_confirm': 'Are you sure you want to delete this chat?',
+        'connection_error': 'Connection Error',
+        'connection_failed': 'Could not connect to server.',
+        'intensity_question': "How intense is it?",
+        'intensity_1': 'Very Mild',
+        'intensity_2': 'Mild',
+        'intensity_3': 'Moderate',
+        'intensity_4': 'Intense',
+        'intensity_5': 'Very Intense',
+        'add_note': 'Anything you want to add?',
+        'optional': '(Optional)',
+        'cancel': 'Cancel',
+        'send': 'Send',
+        'short_msg': 'Short Message',
+        'medium_msg': 'Medium Message',
+        'long_msg': 'Long Message',
+        'xp_thanks': 'Thanks, I understand you better!',
+        'level_up_congrats': 'Congratulations!',
+        'level_messages': [
+            "A new journey begins!",
+            "Our connection is growing stronger. I can understand you better now.",
+            "What you share teaches me a lot. Thank you!",
+            "Getting to know you is wonderful, we're going deeper.",
+            "We've come a long way together. I'm proud of you!",
+            "I truly know you now. This is a special bond.",
+            "I can be a better guide for you now.",
+            "Very few reach this level. Congratulations!",
+            "Our journey together is amazing!",
+            "Maximum connection! I know you very well now."
+        ]
+    },
+    'sonmez': {
+        'id': 'sonmez',
+        'name': 'Symbiont',
+        'short_name': 'Symbiont',
+        'icon': '🧠',
+        'logo': '/static/logo-symbiont.png',
+        'prompt_id': 'pmpt_695ec5ddb4448193a6603ec7d600a3f30ec7368b8a1f92ef',
+        'prompt_version': '6',
+        'accent_color': '#0ea5e9',  # Sky Blue
+        'welcome_title': 'Merhaba Sönmez! 👋',
+        'welcome_text': 'Şu an baskın olan hangisi?',
+        'suggestions': [
+            {'display': '😰 Yükselen kaygı', 'message': 'Şu an yükselen bir kaygı hissediyorum.'},
+            {'display': '🌊 Panik dalgası', 'message': 'Bir panik dalgası geliyor gibi hissediyorum.'},
+            {'display': '🌀 Durmayan düşünceler', 'message': 'Düşüncelerim durmadan dönüyor.'},
+            {'display': '🛏️ Uyku kilidi', 'message': 'Uyku kilidi yaşıyorum, uyuyamıyorum.'},
+            {'display': '🎯 Odak dağınıklığı', 'message': 'Odak dağınıklığı yaşıyorum.'},
+            {'display': '⏰ Erteleme dürtüsü', 'message': 'Erteleme dürtüsü hissediyorum.'},
+            {'display': '🚧 Karar tıkanması', 'message': 'Karar vermekte zorlanıyorum, tıkandım.'},
+            {'display': '💨 İç sıkışma', 'message': 'İçimde bir sıkışma hissediyorum.'},
+            {'display': '🔥 Öfke patlaması', 'message': 'İçimde yükselen bir öfke var.'},
+            {'display': '🌑 Yalnızlık hissi', 'message': 'Kendimi yalnız hissediyorum.'}
+        ],
+        'input_placeholder': 'Mesajını yaz...',
+        'new_chat': 'Yeni Sohbet',
+        'today': 'Bugün',
+        'yesterday': 'Dün',
+        'previous': 'Önceki',
+        'no_chats': 'Henüz sohbet yok',
+        'input_hint': 'Göndermek için Enter, yeni satır için Shift+Enter',
+        'lang': 'tr',
+        # Turkish UI texts
+        'xp_title': 'Seni Tanıma Seviyesi',
+        'xp_level': 'Seviye',
+        'xp_next': 'Sonraki',
+        'xp_max': 'Maksimum Seviye!',
+        'timer_set': 'Terapi Süresi Belirle',
+        'timer_minute': 'dakika',
+        'timer_minutes': 'dakika',
+        'timer_custom': 'Kendiniz girin...',
+        'timer_start': 'Başlat',
+        'timer_ended': 'Süre Doldu!',
+        'timer_ended_msg': 'Terapi süreniz tamamlandı. Kendinize ayırdığınız bu zaman için tebrikler! İsterseniz "Seansı Bitir ve Özetle" ile özetinizi alabilirsiniz.',
+        'summarize': 'Seansı Bitir ve Özetle',
+        'summary_title': 'Seans Özeti',
+        'summary_loading': 'Seans özetleniyor...',
+        'summary_ok': 'Tamam',
+        'online': 'Çevrimiçi',
+        'chats': 'Sohbetler',
+        'delete_confirm': 'Bu sohbeti silmek istediğinize emin misiniz?',
+        'connection_error': 'Bağlantı Hatası',
+        'connection_failed': 'Sunucuya bağlanılamadı.',
+        'intensity_question': 'Şiddeti nasıl?',
+        'intensity_1': 'Hafif',
+        'intensity_2': 'Az',
+        'intensity_3': 'Orta',
+        'intensity_4': 'Yoğun',
+        'intensity_5': 'Çok',
+        'add_note': 'Eklemek istediğin bir şey var mı?',
+        'optional': '(İsteğe bağlı)',
+        'cancel': 'İptal',
+        'send': 'Gönder',
+        'short_msg': 'Kısa Mesaj',
+        'medium_msg': 'Orta Mesaj',
+        'long_msg': 'Uzun Mesaj',
+        'xp_thanks': 'Teşekkürler, seni daha iyi tanıyorum!',
+        'level_up_congrats': 'Tebrikler!',
+        'level_messages': [
+            "Yeni bir yolculuğa başladık!",
+            "Seninle olan bağımız güçleniyor. Artık seni daha iyi anlayabiliyorum.",
+            "Paylaştıkların bana çok şey öğretiyor. Teşekkürler!",
+            "Seni tanımak güzel, derinleşiyoruz.",
+            "Birlikte güzel bir yol katetik. Seninle gurur duyuyorum!",
+            "Artık seni gerçekten tanıyorum. Bu özel bir bağ.",
+            "Senin için daha iyi bir rehber olabiliyorum artık.",
+            "Bu seviyeye ulaşan çok az kişi var. Tebrikler!",
+            "Seninle olan yolculuğumuz muhteşem!",
+            "Maksimum bağlantı! Artık seni çok iyi tanıyorum."
+        ],
+        # Contact preferences modal
+        'contact_modal_title': 'Seninle İletişimde Kalalım',
+        'contact_modal_subtitle': '<strong>Size sunacaklarımız:</strong><br><br>✓ Düzenli hatırlatma mailleri ve mesajları<br>✓ 1 dakikalık karakter & psikoloji analizleri<br><br>İstemiyorsanız <strong>"Geç"</strong> deyin, direkt chate başlayın.',
+        'contact_email_label': 'E-posta Adresi',
+        'contact_email_placeholder': 'ornek@email.com',
+        'contact_phone_label': 'Telefon Numarası',
+        'contact_phone_placeholder': '+90 5XX XXX XX XX',
+        'contact_frequency_label': 'Haftada kaç kez size ulaşabiliriz?',
+        'contact_frequency_subtitle': '(1 = Hiç, 7 = Her gün)',
+        'contact_skip': 'Geç',
+        'contact_submit': 'Gönder'
+    },
+    'neslihan': {
+        'id': 'neslihan',
+        'name': 'Symbiont',
+        'short_name': 'Symbiont',
+        'icon': '🧠',
+        'logo': '/static/logo-symbiont.png',
+        'prompt_id': 'pmpt_69613b28ae40819093f0bdf7f61d0205051b14679818672e',
+        'prompt_version': '3',
+        'accent_color': '#d946ef',  # Fuchsia
+        'welcome_title': 'Merhaba Neslihan! 👋',
+        'welcome_text': 'Şu an baskın olan hangisi?',
+        'suggestions': [
+            {'display': '😰 Yükselen kaygı', 'message': 'Şu an yükselen bir kaygı hissediyorum.'},
+            {'display': '🌊 Panik dalgası', 'message': 'Bir panik dalgası geliyor gibi hissediyorum.'},
+            {'display': '🌀 Durmayan düşünceler', 'message': 'Düşüncelerim durmadan dönüyor.'},
+            {'display': '🛏️ Uyku kilidi', 'message': 'Uyku kilidi yaşıyorum, uyuyamıyorum.'},
+            {'display': '🎯 Odak dağınıklığı', 'message': 'Odak dağınıklığı yaşıyorum.'},
+            {'display': '⏰ Erteleme dürtüsü', 'message': 'Erteleme dürtüsü hissediyorum.'},
+            {'display': '🚧 Karar tıkanması', 'message': 'Karar vermekte zorlanıyorum, tıkandım.'},
+            {'display': '💨 İç sıkışma', 'message': 'İçimde bir sıkışma hissediyorum.'},
+            {'display': '🔥 Öfke patlaması', 'message': 'İçimde yükselen bir öfke var.'},
+            {'display': '🌑 Yalnızlık hissi', 'message': 'Kendimi yalnız hissediyorum.'}
+        ],
+        'input_placeholder': 'Mesajını yaz...',
+        'new_chat': 'Yeni Sohbet',
+        'today': 'Bugün',
+        'yesterday': 'Dün',
+        'previous': 'Önceki',
+        'no_chats': 'Henüz sohbet yok',
+        'input_hint': 'Göndermek için Enter, yeni satır için Shift+Enter',
+        'lang': 'tr',
+        # Turkish UI texts
+        'xp_title': 'Seni Tanıma Seviyesi',
+        'xp_level': 'Seviye',
+        'xp_next': 'Sonraki',
+        'xp_max': 'Maksimum Seviye!',
+        'timer_set': 'Terapi Süresi Belirle',
+        'timer_minute': 'dakika',
+        'timer_minutes': 'dakika',
+        'timer_custom': 'Kendiniz girin...',
+        'timer_start': 'Başlat',
+        'timer_ended': 'Süre Doldu!',
+        'timer_ended_msg': 'Terapi süreniz tamamlandı. Kendinize ayırdığınız bu zaman için tebrikler! İsterseniz "Seansı Bitir ve Özetle" ile özetinizi alabilirsiniz.',
+        'summarize': 'Seansı Bitir ve Özetle',
+        'summary_title': 'Seans Özeti',
+        'summary_loading': 'Seans özetleniyor...',
+        'summary_ok': 'Tamam',
+        'online': 'Çevrimiçi',
+        'chats': 'Sohbetler',
+        'delete_confirm': 'Bu sohbeti silmek istediğinize emin misiniz?',
+        'connection_error': 'Bağlantı Hatası',
+        'connection_failed': 'Sunucuya bağlanılamadı.',
+        'intensity_question': 'Şiddeti nasıl?',
+        'intensity_1': 'Hafif',
+        'intensity_2': 'Az',
+        'intensity_3': 'Orta',
+        'intensity_4': 'Yoğun',
+        'intensity_5': 'Çok',
+        'add_note': 'Eklemek istediğin bir şey var mı?',
+        'optional': '(İsteğe bağlı)',
+        'cancel': 'İptal',
+        'send': 'Gönder',
+        'short_msg': 'Kısa Mesaj',
+        'medium_msg': 'Orta Mesaj',
+        'long_msg': 'Uzun Mesaj',
+        'xp_thanks': 'Teşekkürler, seni daha iyi tanıyorum!',
+        'level_up_congrats': 'Tebrikler!',
+        'level_messages': [
+            "Yeni bir yolculuğa başladık!",
+            "Seninle olan bağımız güçleniyor. Artık seni daha iyi anlayabiliyorum.",
+            "Paylaştıkların bana çok şey öğretiyor. Teşekkürler!",
+            "Seni tanımak güzel, derinleşiyoruz.",
+            "Birlikte güzel bir yol katetik. Seninle gurur duyuyorum!",
+            "Artık seni gerçekten tanıyorum. Bu özel bir bağ.",
+            "Senin için daha iyi bir rehber olabiliyorum artık.",
+            "Bu seviyeye ulaşan çok az kişi var. Tebrikler!",
+            "Seninle olan yolculuğumuz muhteşem!",
+            "Maksimum bağlantı! Artık seni çok iyi tanıyorum."
+        ],
+        # Contact preferences modal
+        'contact_modal_title': 'Seninle İletişimde Kalalım',
+        'contact_modal_subtitle': '<strong>Size sunacaklarımız:</strong><br><br>✓ Düzenli hatırlatma mailleri ve mesajları<br>✓ 1 dakikalık karakter & psikoloji analizleri<br><br>İstemiyorsanız <strong>"Geç"</strong> deyin, direkt chate başlayın.',
+        'contact_email_label': 'E-posta Adresi',
+        'contact_email_placeholder': 'ornek@email.com',
+        'contact_phone_label': 'Telefon Numarası',
+        'contact_phone_placeholder': '+90 5XX XXX XX XX',
+        'contact_frequency_label': 'Haftada kaç kez size ulaşabiliriz?',
+        'contact_frequency_subtitle': '(1 = Hiç, 7 = Her gün)',
+        'contact_skip': 'Geç',
+        'contact_submit': 'Gönder'
+    }
+}
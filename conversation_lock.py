@@ -0,0 +1,149 @@
+"""One /api/chat turn at a time per conversation, across workers and nodes.
+
+Two tabs or a double submit on the same session would otherwise read the
+history mid-write and interleave their inserts, and a failed turn's cleanup
+(remove_last_message, which drops the newest message) could remove the
+other request's message instead of its own. app.chat holds
+conversation_lock(session_id) from storing the user message until the
+reply (or the error cleanup) is written.
+
+    Postgres  session-level pg_advisory_lock on a dedicated connection, so
+              every node queues on the same lock and a crashed worker's lock
+              goes away with its connection
+    SQLite    flock on one of CONVERSATION_LOCK_BUCKETS files next to the
+              database (the file locks every worker on the box shares)
+
+Waiting is bounded by CONVERSATION_LOCK_TIMEOUT_S; past that the turn is
+refused with ConversationBusy instead of tying up the worker. stats()
+reports acquisitions, contention, wait times and queue depth.
+"""
+import os
+import threading
+import time
+import zlib
+from collections import defaultdict
+from contextlib import contextmanager
+
+import database as db
+
+CONVERSATION_LOCK_TIMEOUT_S = float(os.getenv('CONVERSATION_LOCK_TIMEOUT_S', '15'))
+CONVERSATION_LOCK_BUCKETS = int(os.getenv('CONVERSATION_LOCK_BUCKETS', '4096'))
+
+# First key of the two-int pg_advisory_lock form; the second is hashtext(conversation_id)
+ADVISORY_LOCK_NAMESPACE = 727465002
+SQLITE_POLL_S = 0.05
+
+_stats_lock = threading.Lock()
+_stats = defaultdict(int)
+
+
+class ConversationBusy(Exception):
+    """Another turn of the conversation held the lock for longer than the timeout."""
+
+
+def _record(**changes):
+    with _stats_lock:
+        for key, value in changes.items():
+            if key.endswith('_max'):
+                _stats[key] = max(_stats[key], value)
+            else:
+                _stats[key] += value
+
+
+@contextmanager
+def _postgres_lock(conversation_id: str, timeout: float):
+    import psycopg2
+    conn = db.get_db_connection()
+    try:
+        conn.autocommit = True
+        cursor = conn.cursor()
+        cursor.execute('SELECT pg_try_advisory_lock(%s, hashtext(%s))', (ADVISORY_LOCK_NAMESPACE, conversation_id))
+        contended = not cursor.fetchone()[0]
+        if contended:
+            # Queue in Postgres itself, which makes the wait visible in pg_locks
+            cursor.execute(f"SET lock_timeout = '{max(1, int(timeout * 1000))}ms'")
+            try:
+                cursor.execute('SELECT pg_advisory_lock(%s, hashtext(%s))', (ADVISORY_LOCK_NAMESPACE, conversation_id))
+            except psycopg2.errors.LockNotAvailable:
+                raise ConversationBusy(conversation_id)
+        try:
+            yield contended
+        finally:
+            cursor.execute('SELECT pg_advisory_unlock(%s, hashtext(%s))', (ADVISORY_LOCK_NAMESPACE, conversation_id))
+    finally:
+        conn.close()
+
+
+@contextmanager
+def _sqlite_lock(conversation_id: str, timeout: float):
+    import fcntl
+    lock_dir = db.DATABASE_PATH + '.locks'
+    os.makedirs(lock_dir, exist_ok=True)
+    bucket = zlib.crc32(conversation_id.encode('utf-8')) % CONVERSATION_LOCK_BUCKETS
+    # A fresh open file per acquisition, so threads of one worker exclude each other too
+    with open(os.path.join(lock_dir, f'{bucket}.lock'), 'a') as lock_file:
+        deadline = time.monotonic() + timeout
+        contended = False
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                contended = True
+                if time.monotonic() >= deadline:
+                    raise ConversationBusy(conversation_id)
+                time.sleep(SQLITE_POLL_S)
+        try:
+            yield contended
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@contextmanager
+def conversation_lock(conversation_id: str, timeout: float = CONVERSATION_LOCK_TIMEOUT_S):
+    """Hold the conversation's turn lock for the block; raises ConversationBusy after `timeout` seconds."""
+    started = time.perf_counter()
+    _record(waiting=1)
+    with _stats_lock:
+        _stats['waiting_max'] = max(_stats['waiting_max'], _stats['waiting'])
+    lock = _postgres_lock if db.USE_POSTGRES else _sqlite_lock
+    waiting = True
+    try:
+        with lock(conversation_id, timeout) as contended:
+            waiting = False
+            wait_ms = int(round((time.perf_counter() - started) * 1000))
+            _record(waiting=-1, acquired=1, contended=int(contended), wait_ms_total=wait_ms, wait_ms_max=wait_ms)
+            yield
+    except ConversationBusy:
+        if waiting:
+            _record(timeouts=1)
+        raise
+    finally:
+        # Whatever ended the wait (a timeout, a lost connection), it is over
+        if waiting:
+            _record(waiting=-1)
+
+
+def _cluster_waiting() -> int:
+    """Turns queued on conversation locks across every node (Postgres only)."""
+    with db.get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT COUNT(*) FROM pg_locks
+            WHERE locktype = 'advisory' AND classid = %s AND objsubid = 2 AND NOT granted
+        ''', (ADVISORY_LOCK_NAMESPACE,))
+        return cursor.fetchone()[0]
+
+
+def stats() -> dict:
+    """Lock counters of this process; `waiting` is the current queue depth here."""
+    with _stats_lock:
+        counters = dict(_stats)
+    for key in ('acquired', 'contended', 'timeouts', 'waiting', 'waiting_max', 'wait_ms_total', 'wait_ms_max'):
+        counters.setdefault(key, 0)
+    counters['wait_ms_avg'] = round(counters['wait_ms_total'] / counters['acquired'], 1) if counters['acquired'] else None
+    report = {'backend': 'postgres' if db.USE_POSTGRES else 'sqlite', 'timeout_s': CONVERSATION_LOCK_TIMEOUT_S,
+              'pid': os.getpid(), 'process': counters}
+    if db.USE_POSTGRES:
+        report['cluster_waiting'] = _cluster_waiting()
+    return report
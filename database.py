@@ -1,7 +1,21 @@
+import atexit
+import bisect
+import contextvars
+import html
+import itertools
+import json
 import os
+import queue
+import random
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from dataclasses import dataclass, fields
 from datetime import datetime
 from contextlib import contextmanager
-from typing import Optional
+from typing import Any, Callable, Optional
 from urllib.parse import urlparse
 
 # Check if we're using PostgreSQL (Railway) or SQLite (local)
@@ -12,34 +26,89 @@ if DATABASE_URL:
     import psycopg2
     from psycopg2.extras import RealDictCursor
     USE_POSTGRES = True
-    print("Using PostgreSQL database")
 else:
     # SQLite for local development
     import sqlite3
     USE_POSTGRES = False
     DATABASE_PATH = os.path.join(os.path.dirname(__file__), 'chat_history.db')
-    print("Using SQLite database")
+
+# Opt-in SQLite production mode: WAL, tuned pragmas, per-thread connections
+# and a single writer thread that batches commits.
+SQLITE_PRODUCTION = not USE_POSTGRES and os.getenv('SQLITE_PRODUCTION', 'false').lower() == 'true'
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+SQLITE_CACHED_STATEMENTS = int(os.getenv('SQLITE_CACHED_STATEMENTS', '256'))
+SQLITE_WRITER_BATCH = int(os.getenv('SQLITE_WRITER_BATCH', '64'))
+
+# Opt-in write-behind buffering of message/timestamp writes (Postgres only)
+WRITE_BEHIND = USE_POSTGRES and os.getenv('WRITE_BEHIND', 'false').lower() == 'true'
+WRITE_BEHIND_DIR = os.getenv('WRITE_BEHIND_DIR', os.path.join(os.path.dirname(__file__), 'write_behind'))
+WRITE_BEHIND_FLUSH_MS = int(os.getenv('WRITE_BEHIND_FLUSH_MS', '200'))
+WRITE_BEHIND_FSYNC = os.getenv('WRITE_BEHIND_FSYNC', 'true').lower() == 'true'
+
+# Coalesce XP increments in memory and flush every N ms (0 = write through)
+XP_COALESCE_MS = int(os.getenv('XP_COALESCE_MS', '0'))
+
+# Read replicas (Postgres only): comma separated URLs for get_read_db(). A
+# session that wrote reads from the primary for READ_YOUR_WRITES_MS after.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()] if USE_POSTGRES else []
+READ_YOUR_WRITES_MS = int(os.getenv('READ_YOUR_WRITES_MS', '5000'))
+REPLICA_RETRY_S = 30
+
+
+def _connect_postgres(url: str):
+    result = urlparse(url)
+    return psycopg2.connect(
+        database=result.path[1:],
+        user=result.username,
+        password=result.password,
+        host=result.hostname,
+        port=result.port
+    )
 
 
 def get_db_connection():
     """Create a database connection."""
     if USE_POSTGRES:
-        # Parse the DATABASE_URL
-        result = urlparse(DATABASE_URL)
-        conn = psycopg2.connect(
-            database=result.path[1:],
-            user=result.username,
-            password=result.password,
-            host=result.hostname,
-            port=result.port
-        )
-        return conn
+        return _connect_postgres(DATABASE_URL)
+    elif SQLITE_PRODUCTION:
+        return _sqlite_thread_connection()
     else:
         conn = sqlite3.connect(DATABASE_PATH)
         conn.row_factory = sqlite3.Row
         return conn
 
 
+def _open_tuned_sqlite_connection():
+    """Open a SQLite connection with the production pragmas applied."""
+    conn = sqlite3.connect(
+        DATABASE_PATH,
+        timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+        cached_statements=SQLITE_CACHED_STATEMENTS,
+        check_same_thread=False
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+    conn.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    return conn
+
+
+_sqlite_local = threading.local()
+
+
+def _sqlite_thread_connection():
+    """Reuse one tuned connection per thread (and per process after a fork)."""
+    conn = getattr(_sqlite_local, 'conn', None)
+    if conn is None or getattr(_sqlite_local, 'pid', None) != os.getpid():
+        conn = _open_tuned_sqlite_connection()
+        _sqlite_local.conn = conn
+        _sqlite_local.pid = os.getpid()
+    return conn
+
+
 @contextmanager
 def get_db():
     """Context manager for database connections."""
@@ -51,9 +120,211 @@ def get_db():
         conn.rollback()
         raise e
     finally:
+        # Production SQLite connections are cached per thread
+        if not SQLITE_PRODUCTION:
+            conn.close()
+
+
+# ============== Read replicas ==============
+
+# Per-request holder {'until': epoch seconds} set by begin_session(); None
+# outside a request, where reads never pin.
+_session_pin = contextvars.ContextVar('db_session_pin', default=None)
+_replica_down_until = {}
+
+
+def begin_session(pinned_until: float = 0.0):
+    """Start read routing for the current request/thread.
+
+    pinned_until carries a primary pin from an earlier request of the same
+    client (the app keeps it in a cookie) so read-your-writes holds across
+    workers.
+    """
+    _session_pin.set({'until': pinned_until})
+
+
+def session_pinned_until() -> float:
+    """Epoch seconds until which this session reads from the primary (0 if not pinned)."""
+    holder = _session_pin.get()
+    return holder['until'] if holder else 0.0
+
+
+def _pin_session():
+    holder = _session_pin.get()
+    if holder is not None and DATABASE_REPLICA_URLS:
+        holder['until'] = time.time() + READ_YOUR_WRITES_MS / 1000
+
+
+def _pick_replica() -> Optional[str]:
+    if not DATABASE_REPLICA_URLS or session_pinned_until() > time.time():
+        return None
+    now = time.monotonic()
+    healthy = [url for url in DATABASE_REPLICA_URLS if _replica_down_until.get(url, 0) <= now]
+    return random.choice(healthy) if healthy else None
+
+
+@contextmanager
+def get_read_db():
+    """Connection for read-only queries.
+
+    Uses a random healthy replica unless none are configured or the session
+    recently wrote; a replica that fails to connect is skipped for
+    REPLICA_RETRY_S and the read falls back to the primary.
+    """
+    url = _pick_replica()
+    conn = None
+    if url:
+        try:
+            conn = _connect_postgres(url)
+        except psycopg2.OperationalError as e:
+            _replica_down_until[url] = time.monotonic() + REPLICA_RETRY_S
+            print(f"Replica unavailable, reading from primary: {e}")
+    if conn is None:
+        with get_db() as primary:
+            yield primary
+        return
+    try:
+        yield conn
+    finally:
+        conn.rollback()
         conn.close()
 
 
+class SQLiteWriter:
+    """Single writer thread that applies queued writes in batched transactions.
+
+    Each write runs inside its own SAVEPOINT so a failing write is rolled back
+    and reported to its caller without discarding the rest of the batch.
+    """
+
+    def __init__(self, batch_size: int = SQLITE_WRITER_BATCH):
+        self.batch_size = batch_size
+        self.queue = queue.Queue()
+        self.pid = os.getpid()
+        self.thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+        self.thread.start()
+
+    def submit(self, fn: Callable) -> Future:
+        future = Future()
+        self.queue.put((fn, future))
+        return future
+
+    def _run(self):
+        conn = _open_tuned_sqlite_connection()
+        conn.isolation_level = None  # explicit BEGIN/COMMIT below
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            results = []
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                for fn, future in batch:
+                    conn.execute('SAVEPOINT write')
+                    try:
+                        results.append((future, fn(conn), None))
+                        conn.execute('RELEASE SAVEPOINT write')
+                    except Exception as e:
+                        conn.execute('ROLLBACK TO SAVEPOINT write')
+                        conn.execute('RELEASE SAVEPOINT write')
+                        results.append((future, None, e))
+                conn.execute('COMMIT')
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            
+            for future, result, error in results:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+
+_sqlite_writer = None
+_sqlite_writer_lock = threading.Lock()
+
+
+def _get_sqlite_writer() -> SQLiteWriter:
+    """Start the writer thread lazily so it is created after a gunicorn fork."""
+    global _sqlite_writer
+    with _sqlite_writer_lock:
+        if _sqlite_writer is None or _sqlite_writer.pid != os.getpid():
+            _sqlite_writer = SQLiteWriter()
+        return _sqlite_writer
+
+
+_write_behind = None
+_write_behind_lock = threading.Lock()
+
+
+def get_write_behind():
+    """Return this process's write-behind buffer, or None when disabled."""
+    global _write_behind
+    if not WRITE_BEHIND:
+        return None
+    with _write_behind_lock:
+        if _write_behind is None or _write_behind.pid != os.getpid():
+            from write_behind import WriteBehindBuffer
+            _write_behind = WriteBehindBuffer(get_db, WRITE_BEHIND_DIR, WRITE_BEHIND_FLUSH_MS, WRITE_BEHIND_FSYNC)
+        return _write_behind
+
+
+def flush_write_behind():
+    """Commit buffered writes before operations that must see them in the DB."""
+    buffer = get_write_behind()
+    if buffer:
+        buffer.flush()
+
+
+def execute_write(fn: Callable):
+    """Run fn(conn) as a write transaction and return its result.
+
+    In SQLite production mode the write is funnelled through the writer
+    thread; otherwise it runs on a regular connection from get_db().
+    """
+    _pin_session()
+    if SQLITE_PRODUCTION:
+        return _get_sqlite_writer().submit(fn).result()
+    with get_db() as conn:
+        return fn(conn)
+
+
+_write_listeners = []
+
+
+def add_write_listener(listener: Callable):
+    """Call listener(bot_id=..., conversation_id=...) after every committed write
+    (either may be None); used by cache.py for invalidation."""
+    _write_listeners.append(listener)
+
+
+def _notify_write(bot_id: Optional[str] = None, conversation_id: Optional[str] = None):
+    for listener in _write_listeners:
+        try:
+            listener(bot_id=bot_id, conversation_id=conversation_id)
+        except Exception as e:
+            print(f"Write listener failed: {e}")
+
+
+def _conversation_bot(cursor, conversation_id: str) -> Optional[str]:
+    """bot_id owning a conversation (live or archived), looked up inside a write."""
+    p = '%s' if USE_POSTGRES else '?'
+    cursor.execute(f'''
+        SELECT bot_id FROM conversations WHERE id = {p}
+        UNION ALL
+        SELECT bot_id FROM archived_conversations WHERE id = {p}
+    ''', (conversation_id, conversation_id))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
 def dict_from_row(row, cursor=None):
     """Convert database row to dictionary."""
     if USE_POSTGRES:
@@ -62,151 +333,103 @@ def dict_from_row(row, cursor=None):
         return dict(row) if row else None
 
 
+# Millisecond timings (monotonic clock), token usage, the model tier (see
+# routing.py) and the stored prompt version, per assistant message
+MESSAGE_METRIC_COLUMNS = (
+    'pre_model_ms',
+    'ttft_ms',
+    'total_ms',
+    'input_tokens',
+    'output_tokens',
+    'cached_tokens',
+    'model_tier',
+    'prompt_version',
+)
+
+
+class _Row:
+    """Dict-style reads (row['role'], row.get('model_tier')) for the row dataclasses."""
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def _asdict(self) -> dict:
+        return dict(self.__dict__)
+
+
+@dataclass
+class Message(_Row):
+    """A messages row, as returned by get_messages.
+
+    Built straight from the cursor's tuples, and orjson (see json_provider.py)
+    encodes it natively. Not slotted on purpose: orjson reads a dataclass's
+    __dict__ in one pass but looks slots up one attribute at a time, about
+    three times slower.
+    """
+    id: Optional[int]
+    conversation_id: str
+    role: str
+    content: str
+    response_time: Optional[int]
+    created_at: Any
+    pre_model_ms: Optional[int]
+    ttft_ms: Optional[int]
+    total_ms: Optional[int]
+    input_tokens: Optional[int]
+    output_tokens: Optional[int]
+    cached_tokens: Optional[int]
+    model_tier: Optional[str]
+    prompt_version: Optional[str]
+    bot_id: Optional[str]
+    write_id: Optional[str] = None  # write-behind messages only (Postgres)
+
+
+@dataclass
+class ConversationRow(_Row):
+    """A sidebar entry, as returned by get_conversations_by_bot."""
+    id: str
+    bot_id: str
+    title: str
+    created_at: Any
+    updated_at: Any
+    message_count: Optional[int]
+    last_message: Optional[str]
+
+
+# Column list in Message field order; SQLite has no write_id (write-behind is Postgres only)
+MESSAGE_ROW_COLUMNS = ', '.join(
+    'NULL AS write_id' if field.name == 'write_id' and not USE_POSTGRES else field.name for field in fields(Message)
+)
+
+
+# Full-text search per bot language: Postgres text search configs and SQLite FTS5 tokenizers
+SEARCH_CONFIGS = {'tr': 'turkish', 'en': 'english'}
+SQLITE_FTS_TOKENIZERS = {
+    'tr': 'unicode61 remove_diacritics 2',
+    'en': 'porter unicode61 remove_diacritics 2',
+}
+
+
 def init_db():
-    """Initialize the database with required tables."""
-    with get_db() as conn:
-        if USE_POSTGRES:
-            cursor = conn.cursor()
-            
-            # Conversations table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS conversations (
-                    id TEXT PRIMARY KEY,
-                    bot_id TEXT DEFAULT 'meliksah',
-                    title TEXT DEFAULT 'New Chat',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Messages table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS messages (
-                    id SERIAL PRIMARY KEY,
-                    conversation_id TEXT NOT NULL,
-                    role TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    response_time INTEGER DEFAULT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE
-                )
-            ''')
-            
-            # Create index
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_messages_conversation 
-                ON messages(conversation_id)
-            ''')
-            
-            # User XP table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS user_xp (
-                    bot_id TEXT PRIMARY KEY,
-                    xp INTEGER DEFAULT 0,
-                    level INTEGER DEFAULT 1,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Contact preferences table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS contact_preferences (
-                    bot_id TEXT PRIMARY KEY,
-                    bot_name TEXT,
-                    email TEXT,
-                    phone TEXT,
-                    frequency INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-        else:
-            cursor = conn.cursor()
-            
-            # Conversations table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS conversations (
-                    id TEXT PRIMARY KEY,
-                    bot_id TEXT DEFAULT 'meliksah',
-                    title TEXT DEFAULT 'New Chat',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Add bot_id column if it doesn't exist
-            try:
-                cursor.execute('ALTER TABLE conversations ADD COLUMN bot_id TEXT DEFAULT "meliksah"')
-            except sqlite3.OperationalError:
-                pass
-            
-            # Messages table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    conversation_id TEXT NOT NULL,
-                    role TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    response_time INTEGER DEFAULT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE
-                )
-            ''')
-            
-            # Add response_time column if it doesn't exist
-            try:
-                cursor.execute('ALTER TABLE messages ADD COLUMN response_time INTEGER DEFAULT NULL')
-            except sqlite3.OperationalError:
-                pass
-            
-            # Create index
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_messages_conversation 
-                ON messages(conversation_id)
-            ''')
-            
-            # User XP table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS user_xp (
-                    bot_id TEXT PRIMARY KEY,
-                    xp INTEGER DEFAULT 0,
-                    level INTEGER DEFAULT 1,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Contact preferences table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS contact_preferences (
-                    bot_id TEXT PRIMARY KEY,
-                    bot_name TEXT,
-                    email TEXT,
-                    phone TEXT,
-                    frequency INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Contact preferences table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS contact_preferences (
-                    bot_id TEXT PRIMARY KEY,
-                    email TEXT,
-                    phone TEXT,
-                    frequency INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-        
-        print("Database initialized successfully!")
+    """Bring the schema up to date; a single SELECT when it already is.
+
+    DDL lives in migrations.py, which applies pending steps under a lock so
+    that only one process migrates while the other workers wait.
+    """
+    import migrations
+    migrations.migrate()
 
 
 # Conversation operations
 def create_conversation(conversation_id: str, title: str = "New Chat", bot_id: str = "meliksah") -> dict:
     """Create a new conversation."""
-    with get_db() as conn:
+    def write(conn):
         if USE_POSTGRES:
             cursor = conn.cursor(cursor_factory=RealDictCursor)
         else:
@@ -232,6 +455,10 @@ def create_conversation(conversation_id: str, title: str = "New Chat", bot_id: s
             'created_at': now,
             'updated_at': now
         }
+    
+    conversation = execute_write(write)
+    _notify_write(bot_id, conversation_id)
+    return conversation
 
 
 def get_conversation(conversation_id: str) -> Optional[dict]:
@@ -245,60 +472,83 @@ def get_conversation(conversation_id: str) -> Optional[dict]:
             cursor.execute('SELECT * FROM conversations WHERE id = ?', (conversation_id,))
         
         row = cursor.fetchone()
-        return dict(row) if row else None
+    
+    if row:
+        return dict(row)
+    
+    # Archived conversations come back transparently when opened
+    if rehydrate_conversation(conversation_id):
+        return get_conversation(conversation_id)
+    
+    # A conversation whose first messages are still buffered
+    buffer = get_write_behind()
+    pending = buffer.pending_messages(conversation_id) if buffer else []
+    if pending:
+        return {
+            'id': conversation_id,
+            'bot_id': pending[0]['bot_id'],
+            'title': 'New Chat',
+            'created_at': pending[0]['created_at'],
+            'updated_at': pending[-1]['created_at']
+        }
+    return None
+
+
+# Sidebar columns, shared by live and archived conversations
+CONVERSATION_LISTING_COLUMNS = 'id, bot_id, title, created_at, updated_at, message_count, last_message'
 
 
 def get_all_conversations() -> list:
     """Get all conversations ordered by most recent."""
-    with get_db() as conn:
+    with get_read_db() as conn:
         if USE_POSTGRES:
             cursor = conn.cursor(cursor_factory=RealDictCursor)
-            cursor.execute('''
-                SELECT c.*, 
-                       (SELECT content FROM messages WHERE conversation_id = c.id ORDER BY created_at DESC LIMIT 1) as last_message
-                FROM conversations c 
-                ORDER BY c.updated_at DESC
+            cursor.execute(f'''
+                SELECT {CONVERSATION_LISTING_COLUMNS} FROM conversations
+                UNION ALL
+                SELECT {CONVERSATION_LISTING_COLUMNS} FROM archived_conversations
+                ORDER BY updated_at DESC
             ''')
         else:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT c.*, 
-                       (SELECT content FROM messages WHERE conversation_id = c.id ORDER BY created_at DESC LIMIT 1) as last_message
-                FROM conversations c 
-                ORDER BY c.updated_at DESC
+            cursor.execute(f'''
+                SELECT {CONVERSATION_LISTING_COLUMNS} FROM conversations
+                UNION ALL
+                SELECT {CONVERSATION_LISTING_COLUMNS} FROM archived_conversations
+                ORDER BY updated_at DESC
             ''')
         
         return [dict(row) for row in cursor.fetchall()]
 
 
 def get_conversations_by_bot(bot_id: str) -> list:
-    """Get all conversations for a specific bot ordered by most recent."""
-    with get_db() as conn:
+    """Get all conversations (ConversationRow) for a specific bot ordered by most recent."""
+    with get_read_db() as conn:
         if USE_POSTGRES:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            cursor.execute('''
-                SELECT c.*, 
-                       (SELECT content FROM messages WHERE conversation_id = c.id ORDER BY created_at DESC LIMIT 1) as last_message
-                FROM conversations c 
-                WHERE c.bot_id = %s
-                ORDER BY c.updated_at DESC
-            ''', (bot_id,))
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT {CONVERSATION_LISTING_COLUMNS} FROM conversations WHERE bot_id = %s
+                UNION ALL
+                SELECT {CONVERSATION_LISTING_COLUMNS} FROM archived_conversations WHERE bot_id = %s
+                ORDER BY updated_at DESC
+            ''', (bot_id, bot_id))
         else:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT c.*, 
-                       (SELECT content FROM messages WHERE conversation_id = c.id ORDER BY created_at DESC LIMIT 1) as last_message
-                FROM conversations c 
-                WHERE c.bot_id = ?
-                ORDER BY c.updated_at DESC
-            ''', (bot_id,))
+            cursor.execute(f'''
+                SELECT {CONVERSATION_LISTING_COLUMNS} FROM conversations WHERE bot_id = ?
+                UNION ALL
+                SELECT {CONVERSATION_LISTING_COLUMNS} FROM archived_conversations WHERE bot_id = ?
+                ORDER BY updated_at DESC
+            ''', (bot_id, bot_id))
         
-        return [dict(row) for row in cursor.fetchall()]
+        return list(itertools.starmap(ConversationRow, cursor.fetchall()))
 
 
 def update_conversation_title(conversation_id: str, title: str):
     """Update the title of a conversation."""
-    with get_db() as conn:
+    flush_write_behind()
+    
+    def write(conn):
         if USE_POSTGRES:
             cursor = conn.cursor()
             cursor.execute(
@@ -311,11 +561,21 @@ def update_conversation_title(conversation_id: str, title: str):
                 'UPDATE conversations SET title = ?, updated_at = ? WHERE id = ?',
                 (title, datetime.now().isoformat(), conversation_id)
             )
+        return _conversation_bot(cursor, conversation_id)
+    
+    _notify_write(execute_write(write), conversation_id)
 
 
 def update_conversation_timestamp(conversation_id: str):
     """Update the timestamp of a conversation."""
-    with get_db() as conn:
+    buffer = get_write_behind()
+    if buffer:
+        _pin_session()
+        buffer.touch_conversation(conversation_id, datetime.now().isoformat())
+        _notify_write(conversation_id=conversation_id)
+        return
+    
+    def write(conn):
         if USE_POSTGRES:
             cursor = conn.cursor()
             cursor.execute(
@@ -328,29 +588,107 @@ def update_conversation_timestamp(conversation_id: str):
                 'UPDATE conversations SET updated_at = ? WHERE id = ?',
                 (datetime.now().isoformat(), conversation_id)
             )
+        return _conversation_bot(cursor, conversation_id)
+    
+    _notify_write(execute_write(write), conversation_id)
 
 
 def delete_conversation(conversation_id: str):
     """Delete a conversation and all its messages."""
-    with get_db() as conn:
+    flush_write_behind()
+    
+    def write(conn):
+        cursor = conn.cursor()
+        bot_id = _conversation_bot(cursor, conversation_id)
         if USE_POSTGRES:
-            cursor = conn.cursor()
             cursor.execute('DELETE FROM messages WHERE conversation_id = %s', (conversation_id,))
             cursor.execute('DELETE FROM conversations WHERE id = %s', (conversation_id,))
+            cursor.execute('DELETE FROM archived_conversations WHERE id = %s', (conversation_id,))
+            cursor.execute('DELETE FROM chat_requests WHERE conversation_id = %s', (conversation_id,))
+            _delete_memory_rows(cursor, conversation_id)
         else:
-            cursor = conn.cursor()
+            _delete_fts_rows(cursor, conversation_id)
             cursor.execute('DELETE FROM messages WHERE conversation_id = ?', (conversation_id,))
             cursor.execute('DELETE FROM conversations WHERE id = ?', (conversation_id,))
+            cursor.execute('DELETE FROM archived_conversations WHERE id = ?', (conversation_id,))
+            cursor.execute('DELETE FROM chat_requests WHERE conversation_id = ?', (conversation_id,))
+            _delete_memory_rows(cursor, conversation_id)
+        return bot_id
+    
+    _notify_write(execute_write(write), conversation_id)
 
 
 # Message operations
-def add_message(conversation_id: str, role: str, content: str, response_time: int = None, bot_id: str = "meliksah") -> dict:
-    """Add a message to a conversation."""
-    # Ensure conversation exists
-    if not get_conversation(conversation_id):
+
+# Keeps the denormalized conversation columns current in the same UPDATE that
+# bumps updated_at; the first user message also becomes the title.
+CONVERSATION_COUNTER_UPDATE = (
+    'updated_at = {p}, last_message = {p}, message_count = message_count + 1, '
+    'title = CASE WHEN message_count = 0 AND {p} THEN {p} ELSE title END'
+)
+
+
+def title_from_message(content: str) -> str:
+    """Conversation title derived from its first user message."""
+    return content[:50] + '...' if len(content) > 50 else content
+
+
+def add_message(conversation_id: str, role: str, content: str, response_time: int = None, bot_id: Optional[str] = None,
+                metrics: Optional[dict] = None, xp_message: Optional[str] = None) -> dict:
+    """Add a message to a conversation.
+
+    The message belongs to the conversation's bot: bot_id names it for a new
+    conversation (default "meliksah") and is looked up when omitted.
+    metrics may carry any of MESSAGE_METRIC_COLUMNS (timings in ms, token counts).
+    With xp_message (the user message a stored reply answers), the XP it
+    earns is applied in the same transaction and returned under 'xp', so a
+    turn that fails before its reply is stored earns nothing.
+
+    Two settings trade that atomicity for fewer round trips: with
+    XP_COALESCE_MS the XP is queued in memory once the message has committed,
+    and with write-behind it is written while the message waits in the
+    journal. A crash inside the flush interval can then keep the message but
+    lose its XP; the reverse (XP for a message that was never stored) does
+    not happen.
+    """
+    metrics = metrics or {}
+    metric_values = tuple(metrics.get(column) for column in MESSAGE_METRIC_COLUMNS)
+    metric_columns = ', '.join(MESSAGE_METRIC_COLUMNS)
+    
+    buffer = get_write_behind()
+    if buffer:
+        if bot_id is None:
+            # Owner of the conversation, buffered or stored; caches are invalidated per bot
+            conversation = get_conversation(conversation_id)
+            bot_id = (conversation or {}).get('bot_id') or 'meliksah'
+        _pin_session()
+        entry = buffer.add_message(conversation_id, role, content, response_time, bot_id,
+                                   datetime.now().isoformat(), metrics)
+        message = {
+            'id': None,
+            'conversation_id': conversation_id,
+            'role': role,
+            'content': content,
+            'response_time': response_time,
+            'created_at': entry['created_at']
+        }
+        message.update(zip(MESSAGE_METRIC_COLUMNS, metric_values))
+        if xp_message is not None:
+            kind, gained = xp_for_message(xp_message)
+            message['xp'] = dict(add_xp(bot_id, gained), gained=gained, kind=kind)
+        _notify_write(bot_id, conversation_id)
+        return message
+    
+    # Ensure conversation exists; its bot owns the message (callers replaying
+    # history don't pass bot_id)
+    conversation = get_conversation(conversation_id)
+    if conversation:
+        bot_id = conversation['bot_id'] or bot_id or 'meliksah'
+    else:
+        bot_id = bot_id or 'meliksah'
         create_conversation(conversation_id, bot_id=bot_id)
     
-    with get_db() as conn:
+    def write(conn):
         if USE_POSTGRES:
             cursor = conn.cursor(cursor_factory=RealDictCursor)
         else:
@@ -359,51 +697,39 @@ def add_message(conversation_id: str, role: str, content: str, response_time: in
         now = datetime.now().isoformat()
         
         if USE_POSTGRES:
+            placeholders = ', '.join(['%s'] * (6 + len(MESSAGE_METRIC_COLUMNS)))
             cursor.execute(
-                'INSERT INTO messages (conversation_id, role, content, response_time, created_at) VALUES (%s, %s, %s, %s, %s) RETURNING id',
-                (conversation_id, role, content, response_time, now)
+                f'INSERT INTO messages (conversation_id, bot_id, role, content, response_time, created_at, {metric_columns}, search_vector) '
+                f'VALUES ({placeholders}, to_tsvector(%s::regconfig, %s)) RETURNING id',
+                (conversation_id, bot_id, role, content, response_time, now) + metric_values
+                + (search_config(bot_id), content)
             )
             message_id = cursor.fetchone()['id']
             
             cursor.execute(
-                'UPDATE conversations SET updated_at = %s WHERE id = %s',
-                (now, conversation_id)
+                f'UPDATE conversations SET {CONVERSATION_COUNTER_UPDATE.format(p="%s")} WHERE id = %s',
+                (now, content, role == 'user', title_from_message(content), conversation_id)
             )
-            
-            cursor.execute(
-                'SELECT COUNT(*) as count FROM messages WHERE conversation_id = %s',
-                (conversation_id,)
-            )
-            if cursor.fetchone()['count'] == 1 and role == 'user':
-                title = content[:50] + '...' if len(content) > 50 else content
-                cursor.execute(
-                    'UPDATE conversations SET title = %s WHERE id = %s',
-                    (title, conversation_id)
-                )
         else:
+            placeholders = ', '.join(['?'] * (6 + len(MESSAGE_METRIC_COLUMNS)))
             cursor.execute(
-                'INSERT INTO messages (conversation_id, role, content, response_time, created_at) VALUES (?, ?, ?, ?, ?)',
-                (conversation_id, role, content, response_time, now)
+                f'INSERT INTO messages (conversation_id, bot_id, role, content, response_time, created_at, {metric_columns}) '
+                f'VALUES ({placeholders})',
+                (conversation_id, bot_id, role, content, response_time, now) + metric_values
             )
             message_id = cursor.lastrowid
             
             cursor.execute(
-                'UPDATE conversations SET updated_at = ? WHERE id = ?',
-                (now, conversation_id)
+                f'INSERT INTO messages_fts_{search_language(bot_id)} (rowid, content) VALUES (?, ?)',
+                (message_id, content)
             )
             
             cursor.execute(
-                'SELECT COUNT(*) as count FROM messages WHERE conversation_id = ?',
-                (conversation_id,)
+                f'UPDATE conversations SET {CONVERSATION_COUNTER_UPDATE.format(p="?")} WHERE id = ?',
+                (now, content, role == 'user', title_from_message(content), conversation_id)
             )
-            if cursor.fetchone()['count'] == 1 and role == 'user':
-                title = content[:50] + '...' if len(content) > 50 else content
-                cursor.execute(
-                    'UPDATE conversations SET title = ? WHERE id = ?',
-                    (title, conversation_id)
-                )
         
-        return {
+        message = {
             'id': message_id,
             'conversation_id': conversation_id,
             'role': role,
@@ -411,25 +737,110 @@ def add_message(conversation_id: str, role: str, content: str, response_time: in
             'response_time': response_time,
             'created_at': now
         }
+        message.update(zip(MESSAGE_METRIC_COLUMNS, metric_values))
+        
+        if xp_message is not None and XP_COALESCE_MS <= 0:
+            kind, gained = xp_for_message(xp_message)
+            message['xp'] = dict(_apply_xp(conn, {bot_id: gained})[bot_id], gained=gained, kind=kind)
+        return message
+    
+    message = execute_write(write)
+    if xp_message is not None and XP_COALESCE_MS > 0:
+        # Queued only once the message is committed (see the docstring)
+        kind, gained = xp_for_message(xp_message)
+        message['xp'] = dict(_get_xp_coalescer().add(bot_id, gained), gained=gained, kind=kind)
+    _notify_write(bot_id, conversation_id)
+    return message
 
 
 def get_messages(conversation_id: str) -> list:
-    """Get all messages for a conversation."""
-    with get_db() as conn:
+    """Get all messages (Message rows) for a conversation, oldest first.
+
+    The id tie-break keeps the order stable for messages stored within the
+    same timestamp, so every turn resends the same history prefix.
+    """
+    with get_read_db() as conn:
         if USE_POSTGRES:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor = conn.cursor()
             cursor.execute(
-                'SELECT * FROM messages WHERE conversation_id = %s ORDER BY created_at ASC',
+                f'SELECT {MESSAGE_ROW_COLUMNS} FROM messages WHERE conversation_id = %s ORDER BY created_at ASC, id ASC',
                 (conversation_id,)
             )
         else:
             cursor = conn.cursor()
+            cursor.row_factory = None  # plain tuples
             cursor.execute(
-                'SELECT * FROM messages WHERE conversation_id = ? ORDER BY created_at ASC',
+                f'SELECT {MESSAGE_ROW_COLUMNS} FROM messages WHERE conversation_id = ? ORDER BY created_at ASC, id ASC',
                 (conversation_id,)
             )
         
-        return [dict(row) for row in cursor.fetchall()]
+        messages = list(itertools.starmap(Message, cursor.fetchall()))
+    
+    if not messages and rehydrate_conversation(conversation_id):
+        return get_messages(conversation_id)
+    
+    # Read-your-writes: append this process's buffered messages
+    buffer = get_write_behind()
+    if buffer:
+        flushed = {m.write_id for m in messages}
+        for entry in buffer.pending_messages(conversation_id):
+            if entry['write_id'] in flushed:
+                continue
+            metrics = entry['metrics'] or {}
+            messages.append(Message(
+                None, conversation_id, entry['role'], entry['content'], entry['response_time'], entry['created_at'],
+                *(metrics.get(column) for column in MESSAGE_METRIC_COLUMNS),
+                bot_id=entry['bot_id'], write_id=entry['write_id']
+            ))
+    return messages
+
+
+def get_message_span(conversation_id: str) -> tuple:
+    """(message count, newest message id) of a conversation, including buffered and archived messages."""
+    flush_write_behind()
+    p = '%s' if USE_POSTGRES else '?'
+    
+    def read():
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT COUNT(*), MAX(id) FROM messages WHERE conversation_id = {p}', (conversation_id,))
+            return tuple(cursor.fetchone())
+    
+    count, last_id = read()
+    if not count and rehydrate_conversation(conversation_id):
+        count, last_id = read()
+    return count, last_id
+
+
+def iter_message_windows(conversation_id: str, window: int = 500):
+    """Yield a conversation's messages as (role, content) tuples, oldest first.
+
+    Reads `window` rows per query, resuming after the last (created_at, id)
+    seen, so no cursor or transaction stays open between windows.
+    """
+    p = '%s' if USE_POSTGRES else '?'
+    after = None
+    while True:
+        with get_db() as conn:
+            cursor = conn.cursor()
+            if after is None:
+                cursor.execute(
+                    f'SELECT id, role, content, created_at FROM messages WHERE conversation_id = {p} '
+                    f'ORDER BY created_at, id LIMIT {p}',
+                    (conversation_id, window)
+                )
+            else:
+                cursor.execute(
+                    f'SELECT id, role, content, created_at FROM messages WHERE conversation_id = {p} '
+                    f'AND (created_at > {p} OR (created_at = {p} AND id > {p})) ORDER BY created_at, id LIMIT {p}',
+                    (conversation_id, after[1], after[1], after[0], window)
+                )
+            rows = cursor.fetchall()
+        for row in rows:
+            yield row[1], row[2]
+        if len(rows) < window:
+            return
+        after = (rows[-1][0], rows[-1][3])
 
 
 def get_messages_for_api(conversation_id: str) -> list:
@@ -438,15 +849,92 @@ def get_messages_for_api(conversation_id: str) -> list:
     return [{'role': m['role'], 'content': m['content']} for m in messages]
 
 
+def get_prompt_cache_stats(since: Optional[str] = None) -> list:
+    """Input and cached token totals of assistant replies per bot and model tier.
+
+    ttft_cached_ms/ttft_uncached_ms average time-to-first-token of replies
+    with and without a prompt cache hit.
+    """
+    p = '%s' if USE_POSTGRES else '?'
+    where = f'AND created_at >= {p}' if since else ''
+    with get_read_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT bot_id, model_tier, COUNT(*),
+                   SUM(input_tokens), SUM(COALESCE(cached_tokens, 0)),
+                   SUM(CASE WHEN cached_tokens > 0 THEN 1 ELSE 0 END),
+                   AVG(CASE WHEN cached_tokens > 0 THEN ttft_ms END),
+                   AVG(CASE WHEN COALESCE(cached_tokens, 0) = 0 THEN ttft_ms END)
+            FROM messages
+            WHERE role = 'assistant' AND input_tokens IS NOT NULL {where}
+            GROUP BY bot_id, model_tier
+            ORDER BY bot_id, model_tier
+        ''', (since,) if since else ())
+        rows = cursor.fetchall()
+    columns = ('bot_id', 'model_tier', 'replies', 'input_tokens', 'cached_tokens', 'cached_replies',
+               'ttft_cached_ms', 'ttft_uncached_ms')
+    return [dict(zip(columns, tuple(row))) for row in rows]
+
+
+def remove_last_message(conversation_id: str):
+    """Delete a conversation's newest message (the user message of a failed turn).
+
+    The earlier rows keep their ids, timestamps and metrics, unlike clearing
+    and re-adding the history.
+    """
+    flush_write_behind()
+    p = '%s' if USE_POSTGRES else '?'
+    
+    def write(conn):
+        cursor = conn.cursor()
+        cursor.execute(
+            f'SELECT id FROM messages WHERE conversation_id = {p} ORDER BY created_at DESC, id DESC LIMIT 1',
+            (conversation_id,)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        if not USE_POSTGRES:
+            for lang in SQLITE_FTS_TOKENIZERS:
+                cursor.execute(f'DELETE FROM messages_fts_{lang} WHERE rowid = ?', (row[0],))
+        cursor.execute(f'DELETE FROM messages WHERE id = {p}', (row[0],))
+        cursor.execute(f'DELETE FROM memory_items WHERE message_id = {p}', (row[0],))
+        cursor.execute(f'''
+            UPDATE conversations SET
+                message_count = CASE WHEN message_count > 0 THEN message_count - 1 ELSE 0 END,
+                last_message = (SELECT content FROM messages WHERE conversation_id = {p}
+                                ORDER BY created_at DESC, id DESC LIMIT 1)
+            WHERE id = {p}
+        ''', (conversation_id, conversation_id))
+        return _conversation_bot(cursor, conversation_id)
+    
+    _notify_write(execute_write(write), conversation_id)
+
+
 def clear_messages(conversation_id: str):
     """Clear all messages from a conversation."""
-    with get_db() as conn:
+    flush_write_behind()
+    
+    def write(conn):
         if USE_POSTGRES:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM messages WHERE conversation_id = %s', (conversation_id,))
+            cursor.execute(
+                'UPDATE conversations SET message_count = 0, last_message = NULL WHERE id = %s',
+                (conversation_id,)
+            )
         else:
             cursor = conn.cursor()
+            _delete_fts_rows(cursor, conversation_id)
             cursor.execute('DELETE FROM messages WHERE conversation_id = ?', (conversation_id,))
+            cursor.execute(
+                'UPDATE conversations SET message_count = 0, last_message = NULL WHERE id = ?',
+                (conversation_id,)
+            )
+        _delete_memory_rows(cursor, conversation_id)
+        return _conversation_bot(cursor, conversation_id)
+    
+    _notify_write(execute_write(write), conversation_id)
 
 
 # XP operations
@@ -470,7 +958,7 @@ def get_user_xp(bot_id: str) -> dict:
 
 def update_user_xp(bot_id: str, xp: int, level: int) -> dict:
     """Update or create XP data for a user/bot."""
-    with get_db() as conn:
+    def write(conn):
         if USE_POSTGRES:
             cursor = conn.cursor(cursor_factory=RealDictCursor)
             now = datetime.now().isoformat()
@@ -500,28 +988,823 @@ def update_user_xp(bot_id: str, xp: int, level: int) -> dict:
                 )
         
         return {'bot_id': bot_id, 'xp': xp, 'level': level}
+    
+    result = execute_write(write)
+    _notify_write(bot_id)
+    return result
+
+
+# Cumulative XP needed for each level (level = index + 1)
+LEVEL_THRESHOLDS = (0, 100, 250, 500, 850, 1300, 1850, 2500, 3250, 4100, 5000)
+
+
+# XP earned per user message, by length in characters: (kind, max length, xp)
+XP_MESSAGE_RULES = (
+    ('short', 50, 5),
+    ('medium', 150, 15),
+    ('long', None, 30),
+)
+
+
+def xp_for_message(content: str) -> tuple:
+    """Return (kind, xp) earned by a user message."""
+    length = len(content.strip())
+    for kind, max_length, xp in XP_MESSAGE_RULES:
+        if max_length is None or length < max_length:
+            return kind, xp
+
+
+def level_for_xp(xp: int) -> int:
+    """Level reached with the given XP."""
+    return max(1, bisect.bisect_right(LEVEL_THRESHOLDS, xp))
+
+
+def _level_sql(xp_expr: str) -> str:
+    """SQL CASE expression deriving the level from an XP expression."""
+    whens = ' '.join(
+        f'WHEN {xp_expr} >= {threshold} THEN {level}'
+        for level, threshold in reversed(list(enumerate(LEVEL_THRESHOLDS, start=1)))
+        if threshold > 0
+    )
+    return f'CASE {whens} ELSE 1 END'
+
+
+def _apply_xp(conn, increments: dict) -> dict:
+    """Atomically add XP per bot with one upsert each; returns the new rows."""
+    now = datetime.now().isoformat()
+    p = '%s' if USE_POSTGRES else '?'
+    sql = f'''
+        INSERT INTO user_xp (bot_id, xp, level, updated_at) VALUES ({p}, {p}, {p}, {p})
+        ON CONFLICT (bot_id) DO UPDATE SET
+            xp = user_xp.xp + excluded.xp,
+            level = {_level_sql('(user_xp.xp + excluded.xp)')},
+            updated_at = excluded.updated_at
+        RETURNING bot_id, xp, level
+    '''
+    cursor = conn.cursor()
+    results = {}
+    for bot_id, xp_amount in sorted(increments.items()):
+        cursor.execute(sql, (bot_id, xp_amount, level_for_xp(xp_amount), now))
+        row = cursor.fetchone()
+        results[bot_id] = {'bot_id': row[0], 'xp': row[1], 'level': row[2]}
+    return results
+
+
+def add_xp_batch(increments: dict) -> dict:
+    """Add XP for several bots in one transaction; {bot_id: xp} -> {bot_id: xp row}."""
+    increments = {bot_id: xp for bot_id, xp in increments.items() if xp}
+    if not increments:
+        return {}
+    results = execute_write(lambda conn: _apply_xp(conn, increments))
+    if _xp_coalescer:
+        _xp_coalescer.remember(results)
+    for bot_id in results:
+        _notify_write(bot_id)
+    return results
 
 
 def add_xp(bot_id: str, xp_amount: int) -> dict:
     """Add XP to a user and calculate new level."""
-    current = get_user_xp(bot_id)
-    new_xp = current['xp'] + xp_amount
+    if XP_COALESCE_MS > 0:
+        _notify_write(bot_id)
+        return _get_xp_coalescer().add(bot_id, xp_amount)
+    return add_xp_batch({bot_id: xp_amount})[bot_id]
+
+
+class XPCoalescer:
+    """Accumulates XP increments in memory and flushes them periodically.
+
+    add() answers from the last value read from the database plus the
+    pending increment, so steady-state XP traffic costs no round trip.
+    Increments not yet flushed are lost if the process dies.
+    """
+
+    def __init__(self, flush_ms: int):
+        self.flush_interval = flush_ms / 1000
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.known = {}
+        self.pid = os.getpid()
+        self.thread = threading.Thread(target=self._run, name='xp-coalescer', daemon=True)
+        self.thread.start()
+        atexit.register(self.flush)
+
+    def add(self, bot_id: str, xp_amount: int) -> dict:
+        if bot_id not in self.known:
+            current = get_user_xp(bot_id)
+            with self.lock:
+                self.known.setdefault(bot_id, current['xp'])
+        with self.lock:
+            self.pending[bot_id] = self.pending.get(bot_id, 0) + xp_amount
+            xp = self.known[bot_id] + self.pending[bot_id]
+        return {'bot_id': bot_id, 'xp': xp, 'level': level_for_xp(xp)}
+
+    def remember(self, results: dict):
+        with self.lock:
+            for bot_id, row in results.items():
+                self.known[bot_id] = row['xp']
+
+    def flush(self):
+        with self.lock:
+            increments, self.pending = self.pending, {}
+        if not increments:
+            return
+        try:
+            add_xp_batch(increments)
+        except Exception as e:
+            with self.lock:
+                for bot_id, xp_amount in increments.items():
+                    self.pending[bot_id] = self.pending.get(bot_id, 0) + xp_amount
+            print(f"XP flush failed, will retry: {e}")
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+_xp_coalescer = None
+_xp_coalescer_lock = threading.Lock()
+
+
+def _get_xp_coalescer() -> XPCoalescer:
+    global _xp_coalescer
+    with _xp_coalescer_lock:
+        if _xp_coalescer is None or _xp_coalescer.pid != os.getpid():
+            _xp_coalescer = XPCoalescer(XP_COALESCE_MS)
+        return _xp_coalescer
+
+
+# Search operations
+_bot_languages = {}
+
+# Snippet highlight markers; swapped for <mark> after HTML-escaping
+_HIGHLIGHT_START = '\x02'
+_HIGHLIGHT_END = '\x03'
+
+
+def set_bot_languages(languages: dict):
+    """Register each bot's language ('tr' or 'en') for search indexing."""
+    _bot_languages.update(languages)
+
+
+def search_language(bot_id: str) -> str:
+    lang = _bot_languages.get(bot_id, 'tr')
+    return lang if lang in SEARCH_CONFIGS else 'tr'
+
+
+def search_config(bot_id: str) -> str:
+    """Postgres text search configuration for a bot."""
+    return SEARCH_CONFIGS[search_language(bot_id)]
+
+
+def _delete_fts_rows(cursor, conversation_id: str):
+    """Remove a conversation's messages from the SQLite FTS tables."""
+    for lang in SQLITE_FTS_TOKENIZERS:
+        cursor.execute(
+            f'DELETE FROM messages_fts_{lang} WHERE rowid IN (SELECT id FROM messages WHERE conversation_id = ?)',
+            (conversation_id,)
+        )
+
+
+def _fts5_query(query: str, lang: str) -> str:
+    """Build an FTS5 MATCH expression from free text.
+
+    Turkish has no FTS5 stemmer, so terms are truncated to their first five
+    characters and prefix-matched, which handles its suffix-heavy morphology
+    well. Dotted and dotless i are not folded by unicode61, so each Turkish
+    term matches either spelling. English relies on the porter tokenizer.
+    """
+    terms = re.findall(r'\w+', query.replace('İ', 'i').lower())
+    if lang != 'tr':
+        return ' '.join(f'"{term}"' for term in terms)
+    
+    groups = []
+    for term in terms:
+        stem = term[:5]
+        variants = {''}
+        for char in stem:
+            options = 'iı' if char in 'iı' else char
+            variants = {prefix + option for prefix in variants for option in options}
+        groups.append('(' + ' OR '.join(f'"{variant}"*' for variant in sorted(variants)) + ')')
+    return ' '.join(groups)
+
+
+def _render_snippet(snippet: str) -> str:
+    escaped = html.escape(snippet or '')
+    return escaped.replace(_HIGHLIGHT_START, '<mark>').replace(_HIGHLIGHT_END, '</mark>')
+
+
+def encode_search_cursor(rank: float, message_id: int) -> str:
+    return f'{rank!r}:{message_id}'
+
+
+def decode_search_cursor(cursor: str) -> tuple:
+    rank, message_id = cursor.rsplit(':', 1)
+    return float(rank), int(message_id)
+
+
+def search_messages(bot_id: str, query: str, limit: int = 20, cursor: Optional[str] = None) -> dict:
+    """Ranked full-text search over a bot's messages with keyset pagination.
+
+    Returns {'results': [...], 'next_cursor': str or None}; each result has a
+    highlighted, HTML-safe snippet.
+    """
+    lang = search_language(bot_id)
+    after = decode_search_cursor(cursor) if cursor else None
+    
+    with get_read_db() as conn:
+        if USE_POSTGRES:
+            db_cursor = conn.cursor(cursor_factory=RealDictCursor)
+            keyset = 'AND (ts_rank(m.search_vector, q) < %s::real OR (ts_rank(m.search_vector, q) = %s::real AND m.id < %s))' if after else ''
+            params = [search_config(bot_id), search_config(bot_id), query, bot_id]
+            if after:
+                params += [after[0], after[0], after[1]]
+            params.append(limit + 1)
+            db_cursor.execute(f'''
+                SELECT r.*, ts_headline(%s::regconfig, r.content, r.q,
+                       'StartSel={_HIGHLIGHT_START}, StopSel={_HIGHLIGHT_END}, MaxFragments=1, MaxWords=20, MinWords=5') AS snippet
+                FROM (
+                    SELECT m.id, m.conversation_id, m.role, m.content, m.created_at, c.title,
+                           ts_rank(m.search_vector, q) AS rank, q
+                    FROM messages m
+                    JOIN conversations c ON c.id = m.conversation_id,
+                         websearch_to_tsquery(%s::regconfig, %s) q
+                    WHERE m.search_vector @@ q AND m.bot_id = %s {keyset}
+                    ORDER BY rank DESC, m.id DESC
+                    LIMIT %s
+                ) r
+                ORDER BY r.rank DESC, r.id DESC
+            ''', params)
+        else:
+            match = _fts5_query(query, lang)
+            if not match:
+                return {'results': [], 'next_cursor': None}
+            db_cursor = conn.cursor()
+            table = f'messages_fts_{lang}'
+            keyset = f'AND (bm25({table}) > ? OR (bm25({table}) = ? AND m.id > ?))' if after else ''
+            params = [match, bot_id]
+            if after:
+                params += [after[0], after[0], after[1]]
+            params.append(limit + 1)
+            db_cursor.execute(f'''
+                SELECT m.id, m.conversation_id, m.role, m.created_at, c.title,
+                       bm25({table}) AS rank,
+                       snippet({table}, 0, '{_HIGHLIGHT_START}', '{_HIGHLIGHT_END}', '…', 16) AS snippet
+                FROM {table}
+                JOIN messages m ON m.id = {table}.rowid
+                JOIN conversations c ON c.id = m.conversation_id
+                WHERE {table} MATCH ? AND c.bot_id = ? {keyset}
+                ORDER BY rank, m.id
+                LIMIT ?
+            ''', params)
+        
+        rows = [dict(row) for row in db_cursor.fetchall()]
+    
+    page = rows[:limit]
+    results = [{
+        'message_id': row['id'],
+        'conversation_id': row['conversation_id'],
+        'title': row['title'],
+        'role': row['role'],
+        'created_at': row['created_at'],
+        'snippet': _render_snippet(row['snippet']),
+        'rank': row['rank']
+    } for row in page]
+    next_cursor = encode_search_cursor(page[-1]['rank'], page[-1]['id']) if len(rows) > limit else None
+    return {'results': results, 'next_cursor': next_cursor}
+
+
+def rebuild_search_index():
+    """Re-index every message with its bot's language (after set_bot_languages)."""
+    def write(conn):
+        cursor = conn.cursor()
+        cursor.execute('SELECT DISTINCT bot_id FROM conversations')
+        bot_ids = [row[0] for row in cursor.fetchall()]
+        if USE_POSTGRES:
+            for bot_id in bot_ids:
+                cursor.execute('''
+                    UPDATE messages m SET search_vector = to_tsvector(%s::regconfig, m.content)
+                    FROM conversations c
+                    WHERE c.id = m.conversation_id AND c.bot_id = %s
+                ''', (search_config(bot_id), bot_id))
+        else:
+            for lang in SQLITE_FTS_TOKENIZERS:
+                cursor.execute(f'DELETE FROM messages_fts_{lang}')
+            for bot_id in bot_ids:
+                cursor.execute(f'''
+                    INSERT INTO messages_fts_{search_language(bot_id)} (rowid, content)
+                    SELECT m.id, m.content FROM messages m
+                    JOIN conversations c ON c.id = m.conversation_id
+                    WHERE c.bot_id = ?
+                ''', (bot_id,))
+    
+    return execute_write(write)
+
+
+# Retention operations
+
+# Message columns kept in an archived conversation's compressed payload
+ARCHIVE_MESSAGE_COLUMNS = ('id', 'role', 'content', 'response_time', 'created_at') + MESSAGE_METRIC_COLUMNS
+
+
+def _archive_conversation(cursor, conversation: dict):
+    """Move one conversation (row dict) and its messages into archived_conversations."""
+    p = '%s' if USE_POSTGRES else '?'
+    cursor.execute(
+        f'SELECT {", ".join(ARCHIVE_MESSAGE_COLUMNS)} FROM messages WHERE conversation_id = {p} ORDER BY created_at, id',
+        (conversation['id'],)
+    )
+    messages = [
+        {column: value.isoformat() if isinstance(value, datetime) else value
+         for column, value in zip(ARCHIVE_MESSAGE_COLUMNS, row)}
+        for row in cursor.fetchall()
+    ]
+    payload = zlib.compress(json.dumps(messages, ensure_ascii=False).encode('utf-8'), 6)
     
-    # Calculate level based on XP thresholds
-    level_thresholds = [0, 100, 250, 500, 850, 1300, 1850, 2500, 3250, 4100, 5000]
-    new_level = 1
-    for i in range(len(level_thresholds) - 1, -1, -1):
-        if new_xp >= level_thresholds[i]:
-            new_level = i + 1
-            break
+    cursor.execute(f'''
+        INSERT INTO archived_conversations
+            (id, bot_id, title, created_at, updated_at, message_count, last_message, archived_at, messages)
+        VALUES ({p}, {p}, {p}, {p}, {p}, {p}, {p}, {p}, {p})
+    ''', (conversation['id'], conversation['bot_id'], conversation['title'], conversation['created_at'],
+          conversation['updated_at'], len(messages), conversation['last_message'],
+          datetime.now().isoformat(), payload))
     
-    return update_user_xp(bot_id, new_xp, new_level)
+    if not USE_POSTGRES:
+        _delete_fts_rows(cursor, conversation['id'])
+    cursor.execute(f'DELETE FROM messages WHERE conversation_id = {p}', (conversation['id'],))
+    cursor.execute(f'DELETE FROM conversations WHERE id = {p}', (conversation['id'],))
+
+
+def archive_idle_conversations(bot_id: str, idle_before: str, limit: int = 50) -> int:
+    """Archive up to `limit` of a bot's conversations last updated before `idle_before`.
+    
+    Returns how many were archived; call again until it returns less than limit.
+    """
+    flush_write_behind()
+    
+    def write(conn):
+        if USE_POSTGRES:
+            cursor = conn.cursor()
+            # SKIP LOCKED lets several workers archive concurrently without overlap
+            cursor.execute(f'''
+                SELECT {CONVERSATION_LISTING_COLUMNS} FROM conversations
+                WHERE bot_id = %s AND updated_at < %s
+                ORDER BY updated_at LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            ''', (bot_id, idle_before, limit))
+        else:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT {CONVERSATION_LISTING_COLUMNS} FROM conversations
+                WHERE bot_id = ? AND updated_at < ?
+                ORDER BY updated_at LIMIT ?
+            ''', (bot_id, idle_before, limit))
+        
+        columns = CONVERSATION_LISTING_COLUMNS.split(', ')
+        conversations = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        for conversation in conversations:
+            _archive_conversation(cursor, conversation)
+        return len(conversations)
+    
+    archived = execute_write(write)
+    _notify_write(bot_id)
+    return archived
+
+
+def rehydrate_conversation(conversation_id: str) -> bool:
+    """Restore an archived conversation into the live tables; False if not archived."""
+    # Cheap read first: unknown ids (e.g. brand-new sessions) must not cost a write
+    with get_db() as conn:
+        cursor = conn.cursor()
+        p = '%s' if USE_POSTGRES else '?'
+        cursor.execute(f'SELECT 1 FROM archived_conversations WHERE id = {p}', (conversation_id,))
+        if cursor.fetchone() is None:
+            return False
+    
+    def write(conn):
+        if USE_POSTGRES:
+            cursor = conn.cursor()
+            # DELETE ... RETURNING: only one concurrent caller gets the row
+            cursor.execute(f'''
+                DELETE FROM archived_conversations WHERE id = %s
+                RETURNING {CONVERSATION_LISTING_COLUMNS}, messages
+            ''', (conversation_id,))
+            row = cursor.fetchone()
+        else:
+            cursor = conn.cursor()
+            cursor.execute(
+                f'SELECT {CONVERSATION_LISTING_COLUMNS}, messages FROM archived_conversations WHERE id = ?',
+                (conversation_id,)
+            )
+            row = cursor.fetchone()
+            if row:
+                cursor.execute('DELETE FROM archived_conversations WHERE id = ?', (conversation_id,))
+        if not row:
+            return False
+        
+        conversation_id_, bot_id, title, created_at, updated_at, message_count, last_message, payload = row
+        messages = json.loads(zlib.decompress(bytes(payload)).decode('utf-8'))
+        p = '%s' if USE_POSTGRES else '?'
+        cursor.execute(
+            f'INSERT INTO conversations (id, bot_id, title, created_at, updated_at, message_count, last_message) '
+            f'VALUES ({p}, {p}, {p}, {p}, {p}, {p}, {p})',
+            (conversation_id_, bot_id, title, created_at, updated_at, message_count, last_message)
+        )
+        if messages:
+            placeholders = ', '.join([p] * len(ARCHIVE_MESSAGE_COLUMNS))
+            rows = [tuple(m.get(column) for column in ARCHIVE_MESSAGE_COLUMNS) for m in messages]
+            if USE_POSTGRES:
+                cursor.executemany(
+                    f'INSERT INTO messages (conversation_id, bot_id, {", ".join(ARCHIVE_MESSAGE_COLUMNS)}, search_vector) '
+                    f'VALUES (%s, %s, {placeholders}, to_tsvector(%s::regconfig, %s))',
+                    [(conversation_id_, bot_id) + r + (search_config(bot_id), r[2]) for r in rows]
+                )
+            else:
+                cursor.executemany(
+                    f'INSERT INTO messages (conversation_id, bot_id, {", ".join(ARCHIVE_MESSAGE_COLUMNS)}) '
+                    f'VALUES (?, ?, {placeholders})',
+                    [(conversation_id_, bot_id) + r for r in rows]
+                )
+                cursor.executemany(
+                    f'INSERT INTO messages_fts_{search_language(bot_id)} (rowid, content) VALUES (?, ?)',
+                    [(r[0], r[2]) for r in rows]
+                )
+        return True
+    
+    return execute_write(write)
+
+
+def purge_conversations(bot_id: str, updated_before: str, limit: int = 50) -> int:
+    """Permanently delete up to `limit` live or archived conversations of a bot
+    last updated before `updated_before`. Returns how many were deleted."""
+    flush_write_behind()
+    
+    def write(conn):
+        p = '%s' if USE_POSTGRES else '?'
+        cursor = conn.cursor()
+        cursor.execute(
+            f'SELECT id FROM conversations WHERE bot_id = {p} AND updated_at < {p} ORDER BY updated_at LIMIT {p}',
+            (bot_id, updated_before, limit)
+        )
+        live_ids = [row[0] for row in cursor.fetchall()]
+        for conversation_id in live_ids:
+            if not USE_POSTGRES:
+                _delete_fts_rows(cursor, conversation_id)
+            cursor.execute(f'DELETE FROM messages WHERE conversation_id = {p}', (conversation_id,))
+            cursor.execute(f'DELETE FROM conversations WHERE id = {p}', (conversation_id,))
+            cursor.execute(f'DELETE FROM chat_requests WHERE conversation_id = {p}', (conversation_id,))
+            _delete_memory_rows(cursor, conversation_id)
+        
+        cursor.execute(
+            f'SELECT id FROM archived_conversations WHERE bot_id = {p} AND updated_at < {p} ORDER BY updated_at LIMIT {p}',
+            (bot_id, updated_before, limit - len(live_ids))
+        )
+        archived_ids = [row[0] for row in cursor.fetchall()]
+        for conversation_id in archived_ids:
+            cursor.execute(f'DELETE FROM archived_conversations WHERE id = {p}', (conversation_id,))
+            _delete_memory_rows(cursor, conversation_id)
+        return len(live_ids) + len(archived_ids)
+    
+    purged = execute_write(write)
+    _notify_write(bot_id)
+    return purged
+
+
+def delete_bot_data(bot_id: str) -> int:
+    """Delete every conversation, live or archived, of a bot.
+
+    With messages partitioned by bot_id (migrations.partition_messages) the
+    bot's messages go with a partition DROP instead of row deletes. Returns
+    the number of conversations removed.
+    """
+    flush_write_behind()
+    
+    def write(conn):
+        p = '%s' if USE_POSTGRES else '?'
+        cursor = conn.cursor()
+        if USE_POSTGRES:
+            import migrations
+            partition = migrations._partition_name(bot_id)
+            partitioned = migrations.messages_partitioned(cursor)
+            cursor.execute('SELECT to_regclass(%s)', (partition,))
+            if partitioned and cursor.fetchone()[0] is not None:
+                cursor.execute(f'ALTER TABLE messages DETACH PARTITION {partition}')
+                cursor.execute(f'DROP TABLE {partition}')
+                # Recreate it empty so new messages of the bot stay isolated
+                cursor.execute(f'CREATE TABLE {partition} PARTITION OF messages FOR VALUES IN (%s)', (bot_id,))
+            cursor.execute('DELETE FROM messages WHERE bot_id = %s', (bot_id,))
+        else:
+            cursor.execute('SELECT id FROM conversations WHERE bot_id = ?', (bot_id,))
+            for row in cursor.fetchall():
+                _delete_fts_rows(cursor, row[0])
+            cursor.execute('DELETE FROM messages WHERE bot_id = ?', (bot_id,))
+        cursor.execute(f'DELETE FROM chat_requests WHERE bot_id = {p}', (bot_id,))
+        cursor.execute(f'DELETE FROM memory_items WHERE bot_id = {p}', (bot_id,))
+        cursor.execute(f'DELETE FROM conversation_memory WHERE bot_id = {p}', (bot_id,))
+        cursor.execute(f'DELETE FROM conversations WHERE bot_id = {p}', (bot_id,))
+        deleted = cursor.rowcount
+        cursor.execute(f'DELETE FROM archived_conversations WHERE bot_id = {p}', (bot_id,))
+        return deleted + cursor.rowcount
+    
+    deleted = execute_write(write)
+    _notify_write(bot_id)
+    return deleted
+
+
+def get_conversation_bot_ids() -> list:
+    """Bot ids that own at least one live or archived conversation."""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT DISTINCT bot_id FROM conversations
+            UNION
+            SELECT DISTINCT bot_id FROM archived_conversations
+        ''')
+        return [row[0] for row in cursor.fetchall()]
+
+
+# Chat request operations
+
+# One row per /api/chat turn: pending until the reply is stored (complete),
+# cancelled by the client, or failed upstream.
+
+
+def create_chat_request(request_id: str, conversation_id: str, bot_id: str) -> bool:
+    """Record a pending turn; False if request_id was already used."""
+    now = datetime.now().isoformat()
+    
+    def write(conn):
+        cursor = conn.cursor()
+        if USE_POSTGRES:
+            cursor.execute('''
+                INSERT INTO chat_requests (request_id, conversation_id, bot_id, status, created_at, updated_at)
+                VALUES (%s, %s, %s, 'pending', %s, %s)
+                ON CONFLICT (request_id) DO NOTHING
+            ''', (request_id, conversation_id, bot_id, now, now))
+        else:
+            cursor.execute('''
+                INSERT OR IGNORE INTO chat_requests (request_id, conversation_id, bot_id, status, created_at, updated_at)
+                VALUES (?, ?, ?, 'pending', ?, ?)
+            ''', (request_id, conversation_id, bot_id, now, now))
+        return cursor.rowcount > 0
+    
+    return execute_write(write)
+
+
+def finish_chat_request(request_id: str, status: str, reply: Optional[str] = None, error: Optional[str] = None,
+                        response_time_ms: Optional[int] = None) -> bool:
+    """Move a pending turn to its final status.
+
+    Only a pending row (or one already in `status`) changes, so False means
+    the turn ended differently first, e.g. it was cancelled while the reply
+    was being stored.
+    """
+    p = '%s' if USE_POSTGRES else '?'
+    
+    def write(conn):
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            UPDATE chat_requests SET status = {p}, reply = {p}, error = {p}, response_time_ms = {p}, updated_at = {p}
+            WHERE request_id = {p} AND status IN ('pending', {p})
+        ''', (status, reply, error, response_time_ms, datetime.now().isoformat(), request_id, status))
+        return cursor.rowcount > 0
+    
+    return execute_write(write)
+
+
+def discard_chat_request(request_id: str) -> bool:
+    """Forget a turn that never started, so a retry with its request_id runs it."""
+    p = '%s' if USE_POSTGRES else '?'
+    
+    def write(conn):
+        cursor = conn.cursor()
+        cursor.execute(f"DELETE FROM chat_requests WHERE request_id = {p} AND status = 'pending'", (request_id,))
+        return cursor.rowcount > 0
+    
+    return execute_write(write)
+
+
+def save_partial_reply(request_id: str, reply: str):
+    """Checkpoint the text streamed so far so a reconnecting client can resume."""
+    p = '%s' if USE_POSTGRES else '?'
+    
+    def write(conn):
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            UPDATE chat_requests SET reply = {p}, updated_at = {p}
+            WHERE request_id = {p} AND status = 'pending'
+        ''', (reply, datetime.now().isoformat(), request_id))
+    
+    execute_write(write)
+
+
+def get_chat_request(request_id: str) -> Optional[dict]:
+    """A turn's status and reply so far, read from the primary (replicas may lag behind the stream)."""
+    p = '%s' if USE_POSTGRES else '?'
+    with get_db() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor) if USE_POSTGRES else conn.cursor()
+        cursor.execute(f'''
+            SELECT request_id, conversation_id, bot_id, status, reply, error, response_time_ms, created_at, updated_at
+            FROM chat_requests WHERE request_id = {p}
+        ''', (request_id,))
+        return dict_from_row(cursor.fetchone())
+
+
+def cancel_chat_requests(request_id: Optional[str] = None, conversation_id: Optional[str] = None) -> int:
+    """Mark a pending turn, or every pending turn of a conversation, cancelled."""
+    p = '%s' if USE_POSTGRES else '?'
+    column, value = ('request_id', request_id) if request_id else ('conversation_id', conversation_id)
+    
+    def write(conn):
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            UPDATE chat_requests SET status = 'cancelled', updated_at = {p}
+            WHERE {column} = {p} AND status = 'pending'
+        ''', (datetime.now().isoformat(), value))
+        return cursor.rowcount
+    
+    return execute_write(write)
+
+
+def cancelled_chat_requests(request_ids: list) -> set:
+    """The subset of request_ids whose turn has been cancelled (read from the primary)."""
+    if not request_ids:
+        return set()
+    p = '%s' if USE_POSTGRES else '?'
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT request_id FROM chat_requests
+            WHERE status = 'cancelled' AND request_id IN ({", ".join([p] * len(request_ids))})
+        ''', tuple(request_ids))
+        return {row[0] for row in cursor.fetchall()}
+
+
+def prune_chat_requests(created_before: str, limit: int = 500) -> int:
+    """Delete up to `limit` request rows created before `created_before`.
+
+    Finished replies live on in messages; the rows only serve resume and
+    cancellation while a turn is recent.
+    """
+    p = '%s' if USE_POSTGRES else '?'
+    
+    def write(conn):
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            DELETE FROM chat_requests WHERE request_id IN (
+                SELECT request_id FROM chat_requests WHERE created_at < {p} LIMIT {p}
+            )
+        ''', (created_before, limit))
+        return cursor.rowcount
+    
+    return execute_write(write)
+
+
+# Memory operations
+
+# One row per embedded user message or session summary (see memory.py);
+# embeddings are float32 bytes, tagged with the model that made them
+MEMORY_ITEM_COLUMNS = ('bot_id', 'conversation_id', 'source', 'message_id', 'content', 'model', 'embedding', 'created_at')
+
+
+def _delete_memory_rows(cursor, conversation_id: str):
+    p = '%s' if USE_POSTGRES else '?'
+    cursor.execute(f'DELETE FROM memory_items WHERE conversation_id = {p}', (conversation_id,))
+    cursor.execute(f'DELETE FROM conversation_memory WHERE conversation_id = {p}', (conversation_id,))
+
+
+def get_unindexed_messages(bot_id: str, model: str, min_chars: int, limit: int = 500) -> list:
+    """User messages of a bot newer than the last one embedded with `model`, oldest first."""
+    p = '%s' if USE_POSTGRES else '?'
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT id, conversation_id, content, created_at FROM messages
+            WHERE bot_id = {p} AND role = 'user' AND LENGTH(content) >= {p} AND id > (
+                SELECT COALESCE(MAX(message_id), 0) FROM memory_items
+                WHERE bot_id = {p} AND model = {p} AND source = 'message'
+            )
+            ORDER BY id LIMIT {p}
+        ''', (bot_id, min_chars, bot_id, model, limit))
+        return [tuple(row) for row in cursor.fetchall()]
+
+
+def add_memory_items(items: list, replace_summary: bool = False):
+    """Insert memory_items rows (dicts of MEMORY_ITEM_COLUMNS); repeats of a message are ignored.
+
+    With replace_summary, earlier summary items of the same conversations go first.
+    """
+    if not items:
+        return
+    p = '%s' if USE_POSTGRES else '?'
+    columns = ', '.join(MEMORY_ITEM_COLUMNS)
+    placeholders = ', '.join([p] * len(MEMORY_ITEM_COLUMNS))
+    if USE_POSTGRES:
+        sql = f'INSERT INTO memory_items ({columns}) VALUES ({placeholders}) ON CONFLICT DO NOTHING'
+    else:
+        sql = f'INSERT OR IGNORE INTO memory_items ({columns}) VALUES ({placeholders})'
+    
+    def write(conn):
+        cursor = conn.cursor()
+        if replace_summary:
+            for item in items:
+                cursor.execute(
+                    f"DELETE FROM memory_items WHERE conversation_id = {p} AND model = {p} AND source = 'summary'",
+                    (item['conversation_id'], item['model'])
+                )
+        cursor.executemany(sql, [tuple(item[column] for column in MEMORY_ITEM_COLUMNS) for item in items])
+    
+    execute_write(write)
+
+
+def get_memory_vectors(bot_id: str, model: str, after_id: int = 0) -> list:
+    """(id, conversation_id, source, embedding bytes) of a bot's items with id > after_id."""
+    p = '%s' if USE_POSTGRES else '?'
+    with get_read_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT id, conversation_id, source, embedding FROM memory_items
+            WHERE bot_id = {p} AND model = {p} AND id > {p}
+            ORDER BY id
+        ''', (bot_id, model, after_id))
+        return [(row[0], row[1], row[2], bytes(row[3])) for row in cursor.fetchall()]
+
+
+def get_memory_items(ids: list) -> dict:
+    """id -> {conversation_id, source, content, created_at} for the items that still exist."""
+    if not ids:
+        return {}
+    p = '%s' if USE_POSTGRES else '?'
+    with get_read_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f'SELECT id, conversation_id, source, content, created_at FROM memory_items '
+            f'WHERE id IN ({", ".join([p] * len(ids))})',
+            tuple(ids)
+        )
+        return {row[0]: {'conversation_id': row[1], 'source': row[2], 'content': row[3], 'created_at': row[4]}
+                for row in cursor.fetchall()}
+
+
+def get_recent_summary_items(bot_id: str, model: str, exclude_conversation: str, limit: int) -> list:
+    """Latest session summaries of a bot, newest first, as get_memory_items values."""
+    p = '%s' if USE_POSTGRES else '?'
+    with get_read_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT conversation_id, source, content, created_at FROM memory_items
+            WHERE bot_id = {p} AND model = {p} AND source = 'summary' AND conversation_id != {p}
+            ORDER BY id DESC LIMIT {p}
+        ''', (bot_id, model, exclude_conversation, limit))
+        return [{'conversation_id': row[0], 'source': row[1], 'content': row[2], 'created_at': row[3]}
+                for row in cursor.fetchall()]
+
+
+def get_memory_stats(bot_id: str) -> dict:
+    """Item counts of a bot's memory per model and source."""
+    p = '%s' if USE_POSTGRES else '?'
+    with get_read_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f'SELECT model, source, COUNT(*) FROM memory_items WHERE bot_id = {p} GROUP BY model, source',
+            (bot_id,)
+        )
+        stats = {}
+        for model, source, count in cursor.fetchall():
+            stats.setdefault(model, {})[source] = count
+        return stats
+
+
+def get_conversation_memory(conversation_id: str) -> Optional[str]:
+    """Memory context recalled when the conversation started, if any."""
+    p = '%s' if USE_POSTGRES else '?'
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT content FROM conversation_memory WHERE conversation_id = {p}', (conversation_id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+
+def save_conversation_memory(conversation_id: str, bot_id: str, content: str):
+    """Store a conversation's recalled context once; the first one written stays."""
+    p = '%s' if USE_POSTGRES else '?'
+    
+    def write(conn):
+        cursor = conn.cursor()
+        if USE_POSTGRES:
+            sql = f'INSERT INTO conversation_memory (conversation_id, bot_id, content, created_at) VALUES ({p}, {p}, {p}, {p}) ON CONFLICT DO NOTHING'
+        else:
+            sql = 'INSERT OR IGNORE INTO conversation_memory (conversation_id, bot_id, content, created_at) VALUES (?, ?, ?, ?)'
+        cursor.execute(sql, (conversation_id, bot_id, content, datetime.now().isoformat()))
+    
+    execute_write(write)
 
 
 # Contact preferences operations
 def save_contact_preferences(bot_id: str, bot_name: str, email: str, phone: str, frequency: int) -> dict:
     """Save or update contact preferences for a user/bot."""
-    with get_db() as conn:
+    def write(conn):
         now = datetime.now().isoformat()
         
         if USE_POSTGRES:
@@ -551,6 +1834,8 @@ def save_contact_preferences(bot_id: str, bot_name: str, email: str, phone: str,
                 )
         
         return {'bot_id': bot_id, 'bot_name': bot_name, 'email': email, 'phone': phone, 'frequency': frequency}
+    
+    return execute_write(write)
 
 
 def get_contact_preferences(bot_id: str) -> Optional[dict]:
@@ -569,7 +1854,7 @@ def get_contact_preferences(bot_id: str) -> Optional[dict]:
 
 def get_all_contact_preferences() -> list:
     """Get all contact preferences."""
-    with get_db() as conn:
+    with get_read_db() as conn:
         if USE_POSTGRES:
             cursor = conn.cursor(cursor_factory=RealDictCursor)
             cursor.execute('SELECT * FROM contact_preferences ORDER BY created_at DESC')
@@ -580,6 +1865,62 @@ def get_all_contact_preferences() -> list:
         return [dict(row) for row in cursor.fetchall()]
 
 
+# Export operations
+EXPORT_BATCH_SIZE = 2000
+
+
+def _iter_query(sql_postgres: str, sql_sqlite: str, params: tuple):
+    """Yield rows as dicts with constant memory.
+
+    Postgres uses a named (server-side) cursor fetching EXPORT_BATCH_SIZE
+    rows at a time; SQLite iterates its cursor lazily.
+    """
+    with get_read_db() as conn:
+        if USE_POSTGRES:
+            cursor = conn.cursor(name='export', cursor_factory=RealDictCursor)
+            cursor.itersize = EXPORT_BATCH_SIZE
+            cursor.execute(sql_postgres, params)
+        else:
+            cursor = conn.cursor()
+            cursor.arraysize = EXPORT_BATCH_SIZE
+            cursor.execute(sql_sqlite, params)
+        
+        for row in cursor:
+            yield dict(row)
+        cursor.close()
+
+
+def iter_contact_preferences(since: Optional[str] = None):
+    """Stream contact preferences, optionally only those updated since a timestamp."""
+    where = 'WHERE updated_at >= {p}' if since else ''
+    params = (since,) if since else ()
+    sql = f'SELECT * FROM contact_preferences {where} ORDER BY updated_at, bot_id'
+    return _iter_query(sql.format(p='%s'), sql.format(p='?'), params)
+
+
+def iter_transcripts(since: Optional[str] = None, bot_id: Optional[str] = None):
+    """Stream messages with their conversation's bot and title, oldest first."""
+    filters = []
+    params = []
+    if since:
+        filters.append('m.created_at >= {p}')
+        params.append(since)
+    if bot_id:
+        filters.append('m.bot_id = {p}')
+        params.append(bot_id)
+    where = 'WHERE ' + ' AND '.join(filters) if filters else ''
+    metric_columns = ', '.join(f'm.{column}' for column in MESSAGE_METRIC_COLUMNS)
+    sql = f'''
+        SELECT m.id, m.conversation_id, c.bot_id, c.title, m.role, m.content,
+               m.response_time, {metric_columns}, m.created_at
+        FROM messages m
+        JOIN conversations c ON c.id = m.conversation_id
+        {where}
+        ORDER BY m.id
+    '''
+    return _iter_query(sql.format(p='%s'), sql.format(p='?'), tuple(params))
+
+
 # Initialize database on module import
 if __name__ == '__main__':
     init_db()
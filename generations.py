@@ -0,0 +1,187 @@
+"""In-flight replies: checkpointing for resume, and cancellation.
+
+Every /api/chat turn has a row in chat_requests (pending, then complete,
+cancelled or failed) and is registered here while its upstream stream is
+open. The text streamed so far is saved to the row every
+REPLY_CHECKPOINT_MS, so a client whose connection dropped can fetch the
+finished or still-growing reply (GET /api/chat/<request_id>) instead of
+sending the message again. A reply is cancelled when
+
+    - POST /api/chat/cancel marks its row cancelled, from any worker or node
+    - with CANCEL_ON_DISCONNECT, the client closes the connection (seen on
+      gunicorn's socket). Off by default: a dropped mobile connection should
+      not throw away a reply the client is about to resume.
+    - the request's deadline (see app.request_deadline) passes
+
+One watcher thread per process checks these every CANCEL_POLL_MS and closes
+the cancelled streams, which aborts the OpenAI request and lets the worker
+return right away instead of paying for the rest of the generation.
+"""
+import os
+import select
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import database as db
+
+CANCEL_POLL_MS = int(os.getenv('CANCEL_POLL_MS', '500'))
+CANCEL_ON_DISCONNECT = os.getenv('CANCEL_ON_DISCONNECT', 'false').lower() == 'true'
+REPLY_CHECKPOINT_MS = int(os.getenv('REPLY_CHECKPOINT_MS', '500'))
+
+_active = {}  # request_id -> Generation
+_active_lock = threading.Lock()
+_watcher_pid = None
+
+
+class GenerationCancelled(Exception):
+    """Raised by create_response when its generation was cancelled mid-stream.
+
+    Carries the text streamed so far and the metrics up to that point.
+    """
+
+    def __init__(self, reason: str, text: str = '', metrics: Optional[dict] = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.text = text
+        self.metrics = metrics or {}
+
+
+class Generation:
+    """One reply being streamed by this process (possibly over a hedged pair of streams)."""
+
+    def __init__(self, request_id: str, conversation_id: str, sock=None, deadline: Optional[float] = None):
+        self.request_id = request_id
+        self.conversation_id = conversation_id
+        self.sock = sock
+        self.deadline = deadline  # time.perf_counter() value; cancelled once passed
+        self.streams = []
+        self.reason = None  # set once cancelled
+        self.lock = threading.Lock()
+        self.checkpointed_at = time.monotonic()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.reason is not None
+
+    def attach(self, stream):
+        """Remember an upstream stream; closed at once if already cancelled."""
+        with self.lock:
+            self.streams.append(stream)
+            cancelled = self.cancelled
+        if cancelled:
+            _close(stream)
+
+    def detach(self, stream):
+        with self.lock:
+            if stream in self.streams:
+                self.streams.remove(stream)
+
+    def progress(self, parts: list):
+        """Called per streamed delta; saves the partial reply at most every REPLY_CHECKPOINT_MS."""
+        now = time.monotonic()
+        if now - self.checkpointed_at < REPLY_CHECKPOINT_MS / 1000:
+            return
+        self.checkpointed_at = now
+        try:
+            db.save_partial_reply(self.request_id, ''.join(parts))
+        except Exception as e:
+            print(f"Reply checkpoint failed: {e}")
+
+    def cancel(self, reason: str):
+        with self.lock:
+            if self.reason is not None:
+                return
+            self.reason = reason
+            streams = list(self.streams)
+        for stream in streams:
+            _close(stream)
+
+
+def _close(stream):
+    # Closing the HTTP response makes the thread iterating it stop
+    try:
+        stream.close()
+    except Exception as e:
+        print(f"Closing cancelled stream failed: {e}")
+
+
+@contextmanager
+def track(request_id: str, conversation_id: str, sock=None, deadline: Optional[float] = None):
+    """Register a generation for the duration of the block."""
+    generation = Generation(request_id, conversation_id, sock if CANCEL_ON_DISCONNECT else None, deadline)
+    with _active_lock:
+        _active[request_id] = generation
+    _ensure_watcher()
+    try:
+        yield generation
+    finally:
+        with _active_lock:
+            _active.pop(request_id, None)
+
+
+def cancel_local(request_id: Optional[str] = None, conversation_id: Optional[str] = None,
+                 reason: str = 'cancelled') -> int:
+    """Cancel matching generations running in this process without waiting for the watcher."""
+    with _active_lock:
+        matches = [generation for generation in _active.values()
+                   if (request_id and generation.request_id == request_id)
+                   or (not request_id and generation.conversation_id == conversation_id)]
+    for generation in matches:
+        generation.cancel(reason)
+    return len(matches)
+
+
+def _client_gone(sock) -> bool:
+    """True once the peer has closed the connection (readable with nothing to read)."""
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        return bool(readable) and sock.recv(1, socket.MSG_PEEK) == b''
+    except (BlockingIOError, InterruptedError):
+        return False
+    except (OSError, ValueError):
+        return True
+
+
+def _watch():
+    while True:
+        # Wake early for the nearest deadline rather than overrunning it by a poll interval
+        with _active_lock:
+            deadlines = [g.deadline for g in _active.values() if g.deadline is not None]
+        delay = CANCEL_POLL_MS / 1000
+        if deadlines:
+            delay = min(delay, max(0.01, min(deadlines) - time.perf_counter()))
+        time.sleep(delay)
+        with _active_lock:
+            active = list(_active.values())
+        if not active:
+            continue
+
+        now = time.perf_counter()
+        for generation in active:
+            if generation.deadline is not None and now >= generation.deadline:
+                generation.cancel('deadline')
+            elif generation.sock is not None and _client_gone(generation.sock):
+                generation.cancel('disconnected')
+
+        try:
+            cancelled = db.cancelled_chat_requests([g.request_id for g in active if not g.cancelled])
+        except Exception as e:
+            print(f"Cancellation check failed: {e}")
+            continue
+        for generation in active:
+            if generation.request_id in cancelled:
+                generation.cancel('cancelled')
+
+
+def _ensure_watcher():
+    """Start this process's watcher thread once (per pid, so it survives fork)."""
+    global _watcher_pid
+    if _watcher_pid == os.getpid():
+        return
+    with _active_lock:
+        if _watcher_pid != os.getpid():
+            threading.Thread(target=_watch, name='generation-watcher', daemon=True).start()
+            _watcher_pid = os.getpid()
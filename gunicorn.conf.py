@@ -0,0 +1,17 @@
+"""Gunicorn settings.
+
+preload_app imports app.py once in the master; when_ready then runs the
+startup work (migrations, heavy SDK imports) before any worker is forked,
+so workers start instantly and share those pages copy-on-write.
+"""
+import gc
+
+preload_app = True
+
+
+def when_ready(server):
+    import app
+    app.init_app(warm_imports=True)
+    # Move everything allocated so far out of the GC's reach so collections
+    # in the workers don't touch (and copy) the shared pages
+    gc.freeze()
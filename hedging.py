@@ -0,0 +1,182 @@
+"""Hedged OpenAI requests: a second attempt when the first is slow to start.
+
+Opt-in with HEDGE_PERCENTILE (0 = off). Once a bot has HEDGE_MIN_SAMPLES
+recent time-to-first-token samples, a turn whose first attempt has produced
+no output after that percentile of them (never sooner than HEDGE_MIN_DELAY_MS)
+fires one duplicate request. Whichever attempt produces output first wins
+and the other is closed right away; committing at the first token keeps the
+streamed text (and its resume checkpoints) from a single attempt. An attempt
+that fails before output leaves the field to the other one.
+
+stats() reports per bot how often turns were hedged, how often the hedge
+won, and the cost overhead: a hedge pays for the same input again, so
+extra_input_tokens adds the winner's input tokens once per hedged turn.
+"""
+import os
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Callable, Optional
+
+HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', '0'))
+HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', '20'))
+HEDGE_MIN_DELAY_MS = int(os.getenv('HEDGE_MIN_DELAY_MS', '500'))
+HEDGE_WINDOW = int(os.getenv('HEDGE_WINDOW', '200'))
+
+# Events that decide the race; anything else (response.created, ...) is noise
+DECISIVE_EVENTS = ('response.output_text.delta', 'response.completed')
+FAILURE_EVENTS = ('response.failed', 'error')
+
+_lock = threading.Lock()
+_ttft_ms = defaultdict(lambda: deque(maxlen=HEDGE_WINDOW))
+_stats = defaultdict(lambda: defaultdict(int))
+_DONE = object()
+
+
+def hedge_delay_s(bot_id: str) -> Optional[float]:
+    """Seconds to wait for a first token before hedging, or None to not hedge."""
+    if HEDGE_PERCENTILE <= 0:
+        return None
+    with _lock:
+        samples = sorted(_ttft_ms[bot_id])
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return None
+    index = min(len(samples) - 1, int(len(samples) * HEDGE_PERCENTILE / 100))
+    return max(samples[index], HEDGE_MIN_DELAY_MS) / 1000
+
+
+def record(bot_id: str, metrics: dict):
+    """Account a finished turn: its TTFT feeds the percentile, the rest the counters."""
+    with _lock:
+        if 'ttft_ms' in metrics:
+            _ttft_ms[bot_id].append(metrics['ttft_ms'])
+        counters = _stats[bot_id]
+        counters['requests'] += 1
+        counters['input_tokens'] += metrics.get('input_tokens') or 0
+        if metrics.get('hedged'):
+            counters['hedged'] += 1
+            counters['hedge_wins'] += int(metrics.get('hedge_won', False))
+            counters['extra_input_tokens'] += metrics.get('input_tokens') or 0
+
+
+def stats() -> dict:
+    """Hedge rate, win rate and cost overhead per bot for this process."""
+    with _lock:
+        bots = {}
+        for bot_id, counters in sorted(_stats.items()):
+            requests, hedged = counters['requests'], counters['hedged']
+            samples = sorted(_ttft_ms[bot_id])
+            bots[bot_id] = dict(
+                counters,
+                hedge_rate=round(hedged / requests, 4) if requests else None,
+                win_rate=round(counters['hedge_wins'] / hedged, 4) if hedged else None,
+                cost_overhead=round(counters['extra_input_tokens'] / counters['input_tokens'], 4)
+                if counters['input_tokens'] else None,
+                ttft_p50_ms=samples[len(samples) // 2] if samples else None
+            )
+    return {'percentile': HEDGE_PERCENTILE, 'min_samples': HEDGE_MIN_SAMPLES, 'pid': os.getpid(), 'bots': bots}
+
+
+class _Attempt:
+    """One upstream request, read on its own thread into the shared queue."""
+
+    def __init__(self, index: int, open_stream: Callable, events: queue.Queue, generation=None):
+        self.index = index
+        self.stream = None
+        self.closed = False
+        self.lock = threading.Lock()
+        self.generation = generation
+        threading.Thread(target=self._run, args=(open_stream, events), name=f'attempt-{index}', daemon=True).start()
+
+    def _run(self, open_stream, events):
+        try:
+            stream = open_stream()
+            with self.lock:
+                self.stream = stream
+                closed = self.closed
+            if closed:
+                stream.close()
+                return
+            if self.generation is not None:
+                self.generation.attach(stream)
+            for event in stream:
+                events.put((self, event))
+            events.put((self, _DONE))
+        except Exception as e:
+            events.put((self, e))
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            stream = self.stream
+        if stream is not None:
+            if self.generation is not None:
+                self.generation.detach(stream)
+            try:
+                stream.close()
+            except Exception as e:
+                print(f"Closing losing attempt failed: {e}")
+
+
+class Race:
+    """Iterate the events of whichever attempt produces output first.
+
+    After iteration, `hedged` tells whether a second attempt was fired and
+    `hedge_won` whether it was the one used.
+    """
+
+    def __init__(self, open_stream: Callable, hedge_after: float, generation=None):
+        self.open_stream = open_stream
+        self.hedge_after = hedge_after
+        self.generation = generation
+        self.hedged = False
+        self.hedge_won = False
+
+    def __iter__(self):
+        events = queue.Queue()
+        started = time.perf_counter()
+        attempts = [_Attempt(0, self.open_stream, events, self.generation)]
+        live = set(attempts)
+        winner = None
+        hedge_pending = True
+        try:
+            while True:
+                timeout = None
+                if hedge_pending and winner is None:
+                    timeout = max(0.0, self.hedge_after - (time.perf_counter() - started))
+                try:
+                    attempt, item = events.get(timeout=timeout)
+                except queue.Empty:
+                    hedge_pending = False
+                    # Cancelled or past its deadline: no point paying twice
+                    if self.generation is None or not self.generation.cancelled:
+                        self.hedged = True
+                        hedge = _Attempt(1, self.open_stream, events, self.generation)
+                        attempts.append(hedge)
+                        live.add(hedge)
+                    continue
+
+                if winner is not None and attempt is not winner:
+                    continue  # leftovers of the closed loser
+                failed = isinstance(item, Exception) or item is _DONE or item.type in FAILURE_EVENTS
+                if winner is None and failed and len(live) > 1:
+                    live.discard(attempt)  # the other attempt may still succeed
+                    continue
+                if winner is None and (failed or item.type in DECISIVE_EVENTS):
+                    winner = attempt
+                    self.hedge_won = attempt.index == 1
+                    for other in attempts:
+                        if other is not winner:
+                            other.close()
+
+                if item is _DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                if winner is not None:
+                    yield item
+        finally:
+            for attempt in attempts:
+                if attempt is not winner:
+                    attempt.close()
@@ -0,0 +1,93 @@
+"""Flask JSON providers: orjson when it is installed, the standard library otherwise.
+
+JSON_PROVIDER selects the encoder behind jsonify() and request.get_json():
+
+    auto    orjson if importable, else stdlib (default)
+    orjson  orjson; fails at startup when it is missing
+    stdlib  Flask's json-module provider
+
+orjson encodes dicts, lists, datetimes and the row dataclasses of
+database.py (Message, ConversationRow) in C, without building a dict per
+row first; a 10k-message history is several times faster to encode (see
+loadtest/json_bench.py). Both providers write datetime and date objects
+(Postgres rows) as HTTP dates in UTC, "Mon, 19 Oct 2026 06:23:00 GMT", as
+Flask always has: chat.html parses them with new Date(), which reads a
+zone-less ISO string as local time. Keys keep their insertion order with
+orjson and are sorted with stdlib.
+"""
+import decimal
+import os
+import uuid
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'auto').lower()
+
+try:
+    import orjson  # optional dependency
+except ImportError:
+    orjson = None
+
+
+def _default(o):
+    """Types neither encoder handles natively, encoded the way Flask does."""
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if hasattr(o, '_asdict'):
+        return o._asdict()
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's provider, with the database row types."""
+
+    default = staticmethod(_default)
+
+
+class OrjsonProvider(StdlibJSONProvider):
+    """orjson for dumps/loads and responses; falls back to the stdlib for json-module-only options."""
+
+    ORJSON_OPTIONS = ('indent', 'separators', 'sort_keys', 'ensure_ascii')
+
+    def _option(self, indent=None, sort_keys=False) -> int:
+        # Datetimes go through _default, which writes HTTP dates like the stdlib provider
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps(self, obj, **kwargs) -> str:
+        if any(key not in self.ORJSON_OPTIONS for key in kwargs):
+            return super().dumps(obj, **kwargs)
+        option = self._option(kwargs.get('indent'), kwargs.get('sort_keys', False))
+        return orjson.dumps(obj, default=_default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=_default, option=self._option(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def provider_class():
+    """The provider JSON_PROVIDER asks for."""
+    if JSON_PROVIDER == 'stdlib':
+        return StdlibJSONProvider
+    if JSON_PROVIDER == 'orjson' and orjson is None:
+        raise RuntimeError('JSON_PROVIDER=orjson but the orjson package is not installed')
+    if JSON_PROVIDER not in ('auto', 'orjson'):
+        raise ValueError(f'Unknown JSON_PROVIDER: {JSON_PROVIDER}')
+    return OrjsonProvider if orjson is not None else StdlibJSONProvider
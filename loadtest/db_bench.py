@@ -0,0 +1,274 @@
+"""Micro-benchmarks for database.py on SQLite and Postgres.
+
+Runs each public operation at several data sizes and writes JSON results
+that can be diffed across commits:
+
+    python loadtest/db_bench.py --backend sqlite --out bench-sqlite.json
+    python loadtest/db_bench.py --backend postgres \\
+        --postgres-url postgresql://postgres@127.0.0.1:5432/symbiont_bench --out bench-pg.json
+
+The Postgres database is wiped before every case, so its name must contain
+"bench" (or pass --force). Use --quick for a fast smoke run.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+db = None  # database module, imported once the backend is chosen
+
+
+def placeholder() -> str:
+    return '%s' if db.USE_POSTGRES else '?'
+
+
+def reset_tables():
+    """Remove every row the benchmarks may have written."""
+    with db.get_db() as conn:
+        cursor = conn.cursor()
+        for table in ('messages', 'conversations', 'user_xp'):
+            cursor.execute(f'DELETE FROM {table}')
+
+
+def seed_conversations(bot_id: str, count: int, messages_per_conversation: int) -> list:
+    """Bulk insert conversations with messages, bypassing database.py for speed."""
+    p = placeholder()
+    base = datetime(2025, 1, 1)
+    ids = [f'bench-{uuid.uuid4().hex}' for _ in range(count)]
+    with db.get_db() as conn:
+        cursor = conn.cursor()
+        conversations = [
+            (cid, bot_id, 'Bench', (base + timedelta(seconds=i)).isoformat(), (base + timedelta(seconds=i)).isoformat())
+            for i, cid in enumerate(ids)
+        ]
+        cursor.executemany(
+            f'INSERT INTO conversations (id, bot_id, title, created_at, updated_at) VALUES ({p}, {p}, {p}, {p}, {p})',
+            conversations
+        )
+        batch = []
+        for i, cid in enumerate(ids):
+            for j in range(messages_per_conversation):
+                role = 'user' if j % 2 == 0 else 'assistant'
+                created = (base + timedelta(seconds=i, milliseconds=j)).isoformat()
+                batch.append((cid, bot_id, role, f'bench message {j} ' * 8, created))
+                if len(batch) >= 5000:
+                    cursor.executemany(
+                        f'INSERT INTO messages (conversation_id, bot_id, role, content, created_at) VALUES ({p}, {p}, {p}, {p}, {p})',
+                        batch
+                    )
+                    batch = []
+        if batch:
+            cursor.executemany(
+                f'INSERT INTO messages (conversation_id, bot_id, role, content, created_at) VALUES ({p}, {p}, {p}, {p}, {p})',
+                batch
+            )
+    return ids
+
+
+def summarize(samples_ms: list, **extra) -> dict:
+    """Summary statistics for a list of per-operation timings."""
+    ordered = sorted(samples_ms)
+    result = {
+        'n': len(ordered),
+        'mean_ms': round(statistics.fmean(ordered), 3),
+        'p50_ms': round(ordered[len(ordered) // 2], 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'min_ms': round(ordered[0], 3),
+        'max_ms': round(ordered[-1], 3),
+        'ops_per_s': round(1000 / statistics.fmean(ordered), 1) if statistics.fmean(ordered) else None
+    }
+    result.update(extra)
+    return result
+
+
+def timed(fn, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+# ============== Cases ==============
+
+def bench_add_message(sizes: list, repeat: int) -> dict:
+    results = {}
+    for size in sizes:
+        reset_tables()
+        conversation_id = seed_conversations('bench', 1, size)[0]
+        samples = timed(lambda: db.add_message(conversation_id, 'user', 'yeni mesaj', bot_id='bench'), repeat)
+        results[f'existing_{size}'] = summarize(samples)
+    return results
+
+
+def bench_get_conversations_by_bot(count: int, repeat: int) -> dict:
+    reset_tables()
+    seed_conversations('bench', count, 2)
+    seed_conversations('other', max(1, count // 10), 2)
+    samples = timed(lambda: db.get_conversations_by_bot('bench'), repeat)
+    return {f'conversations_{count}': summarize(samples)}
+
+
+def bench_get_messages(sizes: list, repeat: int) -> dict:
+    results = {}
+    for size in sizes:
+        reset_tables()
+        conversation_id = seed_conversations('bench', 1, size)[0]
+        samples = timed(lambda: db.get_messages(conversation_id), repeat)
+        results[f'messages_{size}'] = summarize(samples)
+    return results
+
+
+def bench_add_xp(threads: int, per_thread: int) -> dict:
+    """Concurrent add_xp on one bot; reports throughput and lost updates."""
+    reset_tables()
+    samples = []
+    lock = threading.Lock()
+    errors = []
+
+    def worker():
+        local = []
+        for _ in range(per_thread):
+            started = time.perf_counter()
+            try:
+                db.add_xp('bench', 1)
+            except Exception as e:
+                errors.append(str(e))
+            local.append((time.perf_counter() - started) * 1000)
+        with lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    wall = time.perf_counter() - started
+
+    expected = threads * per_thread
+    actual = db.get_user_xp('bench')['xp']
+    return {f'threads_{threads}': summarize(
+        samples,
+        wall_s=round(wall, 3),
+        throughput_per_s=round(expected / wall, 1),
+        expected_xp=expected,
+        actual_xp=actual,
+        lost_updates=expected - actual,
+        errors=len(errors)
+    )}
+
+
+def bench_delete_conversation(sizes: list, repeat: int) -> dict:
+    results = {}
+    for size in sizes:
+        reset_tables()
+        ids = seed_conversations('bench', repeat, size)
+        seed_conversations('other', 50, 20)
+        samples = []
+        for conversation_id in ids:
+            started = time.perf_counter()
+            db.delete_conversation(conversation_id)
+            samples.append((time.perf_counter() - started) * 1000)
+        results[f'messages_{size}'] = summarize(samples)
+    return results
+
+
+def bench_error_replay(sizes: list, repeat: int) -> dict:
+    """The clear-and-replay rollback app.chat runs when the model call fails."""
+    def rollback(conversation_id):
+        messages = db.get_messages(conversation_id)
+        if messages:
+            db.clear_messages(conversation_id)
+            for msg in messages[:-1]:
+                db.add_message(conversation_id, msg['role'], msg['content'])
+        db.add_message(conversation_id, 'user', 'tekrar', bot_id='bench')
+
+    results = {}
+    for size in sizes:
+        reset_tables()
+        conversation_id = seed_conversations('bench', 1, size)[0]
+        samples = timed(lambda: rollback(conversation_id), max(1, repeat // 10) if size >= 1000 else repeat)
+        results[f'messages_{size}'] = summarize(samples)
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except Exception:
+        return 'unknown'
+
+
+def main():
+    global db
+
+    parser = argparse.ArgumentParser(description='database.py micro-benchmarks')
+    parser.add_argument('--backend', choices=['sqlite', 'postgres'], default='sqlite')
+    parser.add_argument('--postgres-url', default=None)
+    parser.add_argument('--force', action='store_true', help='allow a Postgres database without "bench" in its name')
+    parser.add_argument('--quick', action='store_true', help='small sizes for a smoke run')
+    parser.add_argument('--out', default=None, help='write JSON results to this file')
+    args = parser.parse_args()
+
+    if args.backend == 'postgres':
+        if not args.postgres_url:
+            parser.error('--postgres-url is required for the postgres backend')
+        if 'bench' not in args.postgres_url.rsplit('/', 1)[-1] and not args.force:
+            parser.error('refusing to wipe a database whose name does not contain "bench" (use --force)')
+        os.environ['DATABASE_URL'] = args.postgres_url
+    else:
+        os.environ.pop('DATABASE_URL', None)
+
+    import database
+    db = database
+    if not db.USE_POSTGRES:
+        db.DATABASE_PATH = os.path.join(tempfile.mkdtemp(prefix='symbiont-bench-'), 'bench.db')
+    db.init_db()
+
+    if args.quick:
+        sizes, conversations, repeat, xp_threads, xp_per_thread = [10, 100], 1000, 10, 4, 25
+    else:
+        sizes, conversations, repeat, xp_threads, xp_per_thread = [10, 100, 1000, 10000], 100000, 50, 8, 100
+
+    results = {
+        'add_message': bench_add_message(sizes, repeat),
+        'get_conversations_by_bot': bench_get_conversations_by_bot(conversations, max(3, repeat // 10)),
+        'get_messages': bench_get_messages(sizes, repeat),
+        'add_xp': bench_add_xp(xp_threads, xp_per_thread),
+        'delete_conversation': bench_delete_conversation(sizes, min(repeat, 20)),
+        'error_replay': bench_error_replay(sizes, min(repeat, 20))
+    }
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'backend': args.backend,
+            'quick': args.quick,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': datetime.now().isoformat()
+        },
+        'results': results
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+"""Local stand-in for the OpenAI API used by load tests.
+
+Speaks enough of /v1/responses and /v1/chat/completions (streaming and
+non-streaming) for app.py to run unchanged against it:
+
+    python loadtest/fake_openai.py --port 9000 --median-ms 1200 --error-429 0.02
+    OPENAI_BASE_URL=http://127.0.0.1:9000/v1 OPENAI_API_KEY=fake gunicorn app:app
+
+No network access or API quota is needed.
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+
+from flask import Flask, Response, request, jsonify
+
+app = Flask(__name__)
+
+# Tunables, overridden from the command line
+CONFIG = {
+    'median_ms': 800.0,     # median total generation latency
+    'sigma': 0.5,           # lognormal shape; larger means a fatter tail
+    'ttft_fraction': 0.25,  # share of total latency spent before the first token
+    'reply_words': 60,      # approximate reply length
+    'error_429': 0.0,       # probability of a rate limit error
+    'error_5xx': 0.0,       # probability of a server error
+    'cached_fraction': 0.5  # share of input tokens reported as cached
+}
+
+WORDS = (
+    'anlıyorum bu his çok doğal nefes al şimdi birlikte bakalım bedeninde '
+    'neler oluyor I hear you that sounds really hard let us take a breath '
+    'together and notice what is happening right now'
+).split()
+
+
+def sample_latency_ms() -> float:
+    """Draw a total latency from the configured lognormal distribution."""
+    return random.lognormvariate(0, CONFIG['sigma']) * CONFIG['median_ms']
+
+
+def injected_error():
+    """Return an error response according to the configured rates, or None."""
+    roll = random.random()
+    if roll < CONFIG['error_429']:
+        return jsonify({'error': {
+            'message': 'Rate limit reached (fake server)',
+            'type': 'requests',
+            'code': 'rate_limit_exceeded'
+        }}), 429
+    if roll < CONFIG['error_429'] + CONFIG['error_5xx']:
+        status = random.choice([500, 502, 503])
+        return jsonify({'error': {
+            'message': 'The server had an error (fake server)',
+            'type': 'server_error',
+            'code': None
+        }}), status
+    return None
+
+
+def count_tokens(value) -> int:
+    """Rough token estimate (4 characters per token) for any JSON input."""
+    return max(1, len(json.dumps(value, ensure_ascii=False)) // 4)
+
+
+def reply_tokens() -> list:
+    """Build the reply as a list of word tokens."""
+    length = max(1, int(random.gauss(CONFIG['reply_words'], CONFIG['reply_words'] / 4)))
+    return [random.choice(WORDS) + ' ' for _ in range(length)]
+
+
+def sse(event: dict) -> str:
+    """Encode one server-sent event."""
+    return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+def timed_tokens(tokens: list, total_ms: float):
+    """Yield tokens paced so the first arrives at ttft and the last at total_ms."""
+    ttft = total_ms * CONFIG['ttft_fraction'] / 1000
+    per_token = (total_ms / 1000 - ttft) / len(tokens)
+    time.sleep(ttft)
+    for token in tokens:
+        yield token
+        time.sleep(per_token)
+
+
+# ============== Responses API ==============
+
+def response_object(response_id: str, text: str, input_tokens: int, output_tokens: int, status: str) -> dict:
+    """Build a Responses API object the SDK can parse."""
+    return {
+        'id': response_id,
+        'object': 'response',
+        'created_at': int(time.time()),
+        'model': 'fake-model',
+        'status': status,
+        'output': [{
+            'id': 'msg_' + response_id,
+            'type': 'message',
+            'role': 'assistant',
+            'status': status,
+            'content': [{'type': 'output_text', 'text': text, 'annotations': []}] if text else []
+        }],
+        'parallel_tool_calls': False,
+        'tool_choice': 'auto',
+        'tools': [],
+        'usage': {
+            'input_tokens': input_tokens,
+            'input_tokens_details': {'cached_tokens': int(input_tokens * CONFIG['cached_fraction'])},
+            'output_tokens': output_tokens,
+            'output_tokens_details': {'reasoning_tokens': 0},
+            'total_tokens': input_tokens + output_tokens
+        } if status == 'completed' else None
+    }
+
+
+@app.route('/v1/responses', methods=['POST'])
+def responses():
+    error = injected_error()
+    if error:
+        return error
+
+    body = request.get_json() or {}
+    response_id = 'resp_' + uuid.uuid4().hex
+    input_tokens = count_tokens(body.get('input'))
+    tokens = reply_tokens()
+    total_ms = sample_latency_ms()
+
+    if not body.get('stream'):
+        time.sleep(total_ms / 1000)
+        return jsonify(response_object(response_id, ''.join(tokens), input_tokens, len(tokens), 'completed'))
+
+    def generate():
+        sequence = 0
+        yield sse({'type': 'response.created', 'sequence_number': sequence,
+                   'response': response_object(response_id, '', input_tokens, 0, 'in_progress')})
+        for token in timed_tokens(tokens, total_ms):
+            sequence += 1
+            yield sse({'type': 'response.output_text.delta', 'sequence_number': sequence,
+                       'item_id': 'msg_' + response_id, 'output_index': 0, 'content_index': 0,
+                       'delta': token, 'logprobs': []})
+        yield sse({'type': 'response.completed', 'sequence_number': sequence + 1,
+                   'response': response_object(response_id, ''.join(tokens), input_tokens, len(tokens), 'completed')})
+
+    return Response(generate(), mimetype='text/event-stream')
+
+
+# ============== Chat Completions API ==============
+
+@app.route('/v1/chat/completions', methods=['POST'])
+def chat_completions():
+    error = injected_error()
+    if error:
+        return error
+
+    body = request.get_json() or {}
+    completion_id = 'chatcmpl-' + uuid.uuid4().hex
+    model = body.get('model', 'fake-model')
+    input_tokens = count_tokens(body.get('messages'))
+    tokens = reply_tokens()
+    total_ms = sample_latency_ms()
+
+    if not body.get('stream'):
+        time.sleep(total_ms / 1000)
+        return jsonify({
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': ''.join(tokens)},
+                'finish_reason': 'stop'
+            }],
+            'usage': {
+                'prompt_tokens': input_tokens,
+                'completion_tokens': len(tokens),
+                'total_tokens': input_tokens + len(tokens),
+                'prompt_tokens_details': {'cached_tokens': int(input_tokens * CONFIG['cached_fraction'])}
+            }
+        })
+
+    def generate():
+        for token in timed_tokens(tokens, total_ms):
+            chunk = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}]
+            }
+            yield f'data: {json.dumps(chunk, ensure_ascii=False)}\n\n'
+        yield 'data: [DONE]\n\n'
+
+    return Response(generate(), mimetype='text/event-stream')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake OpenAI server for offline load tests')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--median-ms', type=float, default=CONFIG['median_ms'])
+    parser.add_argument('--sigma', type=float, default=CONFIG['sigma'])
+    parser.add_argument('--ttft-fraction', type=float, default=CONFIG['ttft_fraction'])
+    parser.add_argument('--reply-words', type=int, default=CONFIG['reply_words'])
+    parser.add_argument('--error-429', type=float, default=CONFIG['error_429'])
+    parser.add_argument('--error-5xx', type=float, default=CONFIG['error_5xx'])
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    CONFIG.update(
+        median_ms=args.median_ms,
+        sigma=args.sigma,
+        ttft_fraction=args.ttft_fraction,
+        reply_words=args.reply_words,
+        error_429=args.error_429,
+        error_5xx=args.error_5xx
+    )
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    print(f"Fake OpenAI listening on http://{args.host}:{args.port}/v1 with {CONFIG}")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""JSON response benchmark: dict rows + stdlib json vs. row dataclasses + orjson.
+
+Times the history endpoint's work for one conversation (fetch the rows, then
+build the jsonify response) and the sidebar's for one bot, for each
+combination of row type and JSON provider:
+
+    dict     the previous get_messages: SELECT *, one dict per row
+    rows     database.get_messages / get_conversations_by_bot (Message, ConversationRow)
+
+    python loadtest/json_bench.py --out bench-json.json
+    python loadtest/json_bench.py --backend postgres \\
+        --postgres-url postgresql://postgres@127.0.0.1:5432/symbiont_bench
+
+Needs orjson for the orjson columns. Same database rules as db_bench.py.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import db_bench
+from db_bench import ROOT, git_commit, reset_tables, seed_conversations, summarize, timed
+
+db = None  # database module, imported once the backend is chosen
+
+
+def dict_messages(conversation_id: str) -> list:
+    """get_messages as it was: every column of every row copied into a dict."""
+    with db.get_read_db() as conn:
+        if db.USE_POSTGRES:
+            from psycopg2.extras import RealDictCursor
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+        else:
+            cursor = conn.cursor()
+        cursor.execute(
+            f'SELECT * FROM messages WHERE conversation_id = {db_bench.placeholder()} ORDER BY created_at ASC, id ASC',
+            (conversation_id,)
+        )
+        return [dict(row) for row in cursor.fetchall()]
+
+
+def dict_conversations(bot_id: str) -> list:
+    with db.get_read_db() as conn:
+        if db.USE_POSTGRES:
+            from psycopg2.extras import RealDictCursor
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+        else:
+            cursor = conn.cursor()
+        cursor.execute(
+            f'SELECT {db.CONVERSATION_LISTING_COLUMNS} FROM conversations WHERE bot_id = {db_bench.placeholder()} '
+            'ORDER BY updated_at DESC',
+            (bot_id,)
+        )
+        return [dict(row) for row in cursor.fetchall()]
+
+
+def flask_apps() -> dict:
+    from flask import Flask
+    import json_provider
+    apps = {'stdlib': Flask('json_bench_stdlib')}
+    apps['stdlib'].json = json_provider.StdlibJSONProvider(apps['stdlib'])
+    if json_provider.orjson is not None:
+        apps['orjson'] = Flask('json_bench_orjson')
+        apps['orjson'].json = json_provider.OrjsonProvider(apps['orjson'])
+    return apps
+
+
+def bench_endpoint(apps: dict, loaders: dict, repeat: int) -> dict:
+    """Fetch + jsonify, and jsonify alone, per (row type, provider)."""
+    results = {}
+    for row_type, load in loaders.items():
+        rows = load()
+        for provider, app in apps.items():
+            with app.app_context():
+                size = len(app.json.response(rows).get_data())
+                results[f'{row_type}_{provider}'] = summarize(
+                    timed(lambda: app.json.response(load()).get_data(), repeat),
+                    encode_only_p50_ms=summarize(timed(lambda: app.json.response(rows).get_data(), repeat))['p50_ms'],
+                    bytes=size
+                )
+    baseline = results['dict_stdlib']['p50_ms']
+    for result in results.values():
+        result['speedup'] = round(baseline / result['p50_ms'], 2) if result['p50_ms'] else None
+    return results
+
+
+def main():
+    global db
+
+    parser = argparse.ArgumentParser(description='JSON response benchmark')
+    parser.add_argument('--backend', choices=['sqlite', 'postgres'], default='sqlite')
+    parser.add_argument('--postgres-url', default=None)
+    parser.add_argument('--force', action='store_true', help='allow a Postgres database without "bench" in its name')
+    parser.add_argument('--quick', action='store_true', help='small sizes for a smoke run')
+    parser.add_argument('--out', default=None, help='write JSON results to this file')
+    args = parser.parse_args()
+
+    if args.backend == 'postgres':
+        if not args.postgres_url:
+            parser.error('--postgres-url is required for the postgres backend')
+        if 'bench' not in args.postgres_url.rsplit('/', 1)[-1] and not args.force:
+            parser.error('refusing to wipe a database whose name does not contain "bench" (use --force)')
+        os.environ['DATABASE_URL'] = args.postgres_url
+    else:
+        os.environ.pop('DATABASE_URL', None)
+
+    sys.path.insert(0, ROOT)
+    import database
+    db = db_bench.db = database
+    if not db.USE_POSTGRES:
+        db.DATABASE_PATH = os.path.join(tempfile.mkdtemp(prefix='symbiont-bench-'), 'bench.db')
+    db.init_db()
+
+    sizes, conversations, repeat = ([100, 1000], 1000, 5) if args.quick else ([1000, 10000], 10000, 20)
+    apps = flask_apps()
+
+    results = {}
+    for size in sizes:
+        reset_tables()
+        conversation_id = seed_conversations('bench', 1, size)[0]
+        results[f'messages_{size}'] = bench_endpoint(apps, {
+            'dict': lambda: dict_messages(conversation_id),
+            'rows': lambda: db.get_messages(conversation_id)
+        }, repeat)
+    reset_tables()
+    seed_conversations('bench', conversations, 0)
+    results[f'conversations_{conversations}'] = bench_endpoint(apps, {
+        'dict': lambda: dict_conversations('bench'),
+        'rows': lambda: db.get_conversations_by_bot('bench')
+    }, repeat)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'backend': args.backend,
+            'quick': args.quick,
+            'providers': list(apps),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': datetime.now().isoformat()
+        },
+        'results': results
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""Replay realistic chat sessions against a running app and report latency.
+
+Each virtual user picks a bot from CHATBOTS, opens the sidebar, sends a few
+turns built from that bot's suggestions, reloads the conversation and
+finally asks for a session summary, with think time between steps.
+
+    python loadtest/load_generator.py --target http://127.0.0.1:8000 --users 50 --sessions 500
+
+Reports throughput, p50/p95/p99 latency and error rate per endpoint.
+"""
+import argparse
+import ast
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+CHATBOTS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'chatbots.py')
+
+# Bots whose page route differs from /<bot_id>
+PAGE_PATHS = {'sonmez': '/sommez-24941930940ads0f'}
+
+FOLLOW_UPS = {
+    'tr': ['Biraz daha anlatabilir misin?', 'Bunu nasıl yapabilirim?', 'Teşekkürler, şimdi biraz daha iyiyim.'],
+    'en': ['Can you tell me more?', 'How could I do that?', 'Thanks, I feel a bit better now.']
+}
+
+
+def load_chatbots() -> dict:
+    """Read CHATBOTS from chatbots.py without importing anything from the app."""
+    with open(CHATBOTS_PATH, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and getattr(node.targets[0], 'id', None) == 'CHATBOTS':
+            return ast.literal_eval(node.value)
+    raise RuntimeError('CHATBOTS not found in chatbots.py')
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+class Recorder:
+    """Thread-safe collection of per-endpoint latencies and errors."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(lambda: defaultdict(int))
+
+    def record(self, name: str, elapsed_ms: float, status: int):
+        with self.lock:
+            self.latencies[name].append(elapsed_ms)
+            if status >= 400 or status == 0:
+                self.errors[name][status] += 1
+
+    def report(self, wall_seconds: float) -> dict:
+        with self.lock:
+            endpoints = {}
+            total = 0
+            for name, values in sorted(self.latencies.items()):
+                values = sorted(values)
+                total += len(values)
+                error_count = sum(self.errors[name].values())
+                endpoints[name] = {
+                    'requests': len(values),
+                    'throughput_rps': round(len(values) / wall_seconds, 2),
+                    'p50_ms': round(percentile(values, 50), 1),
+                    'p95_ms': round(percentile(values, 95), 1),
+                    'p99_ms': round(percentile(values, 99), 1),
+                    'max_ms': round(values[-1], 1),
+                    'error_rate': round(error_count / len(values), 4),
+                    'errors_by_status': dict(self.errors[name])
+                }
+            return {
+                'wall_seconds': round(wall_seconds, 2),
+                'total_requests': total,
+                'throughput_rps': round(total / wall_seconds, 2) if wall_seconds else 0,
+                'endpoints': endpoints
+            }
+
+
+def call(recorder: Recorder, target: str, name: str, method: str, path: str, payload=None, timeout=120):
+    """Issue one HTTP request and record its latency under `name`."""
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(target + path, data=data, method=method,
+                                 headers={'Content-Type': 'application/json'})
+    started = time.perf_counter()
+    status = 0
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        status = e.code
+    except Exception:
+        status = 0
+    recorder.record(name, (time.perf_counter() - started) * 1000, status)
+    return status
+
+
+def run_session(recorder: Recorder, target: str, bots: list, turns: int, think_ms: float):
+    """Replay one user session end to end."""
+    bot = random.choice(bots)
+    lang = bot.get('lang', 'tr')
+    session_id = 'load-' + uuid.uuid4().hex
+
+    def think():
+        if think_ms:
+            time.sleep(random.expovariate(1000 / think_ms))
+
+    call(recorder, target, 'GET /<bot>', 'GET', PAGE_PATHS.get(bot['id'], '/' + bot['id']))
+    call(recorder, target, 'GET /api/xp', 'GET', f"/api/xp/{bot['id']}")
+    call(recorder, target, 'GET /api/conversations', 'GET', f"/api/conversations?bot_id={bot['id']}")
+
+    messages = [random.choice(bot['suggestions'])['message']]
+    messages += random.sample(FOLLOW_UPS[lang], k=min(len(FOLLOW_UPS[lang]), max(0, turns - 1)))
+    for message in messages[:turns]:
+        think()
+        call(recorder, target, 'POST /api/chat', 'POST', '/api/chat',
+             {'message': message, 'session_id': session_id, 'bot_id': bot['id']})
+        call(recorder, target, 'GET /api/conversations', 'GET', f"/api/conversations?bot_id={bot['id']}")
+
+    call(recorder, target, 'GET /api/conversations/<id>', 'GET', f'/api/conversations/{session_id}')
+    if random.random() < 0.3:
+        call(recorder, target, 'POST /summarize', 'POST',
+             f'/api/conversations/{session_id}/summarize', {'bot_id': bot['id']})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load generator for the chat app')
+    parser.add_argument('--target', default='http://127.0.0.1:8000')
+    parser.add_argument('--users', type=int, default=20, help='concurrent virtual users')
+    parser.add_argument('--sessions', type=int, default=100, help='total sessions to replay')
+    parser.add_argument('--turns', type=int, default=3, help='chat turns per session')
+    parser.add_argument('--think-ms', type=float, default=500, help='mean think time between turns')
+    parser.add_argument('--bots', default='', help='comma separated bot ids (default: all)')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--json', dest='json_path', default=None, help='write the report to this file')
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    chatbots = load_chatbots()
+    wanted = [b for b in args.bots.split(',') if b]
+    bots = [bot for bot_id, bot in chatbots.items()
+            if bot.get('prompt_id') and (not wanted or bot_id in wanted)]
+    if not bots:
+        parser.error('no matching bots')
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        for _ in range(args.sessions):
+            pool.submit(run_session, recorder, args.target, bots, args.turns, args.think_ms)
+    report = recorder.report(time.perf_counter() - started)
+
+    print(f"{'endpoint':32} {'reqs':>6} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'err%':>6}")
+    for name, stats in report['endpoints'].items():
+        print(f"{name:32} {stats['requests']:>6} {stats['throughput_rps']:>7} "
+              f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8} "
+              f"{stats['error_rate'] * 100:>5.1f}%")
+    print(f"total: {report['total_requests']} requests in {report['wall_seconds']}s "
+          f"({report['throughput_rps']} req/s)")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
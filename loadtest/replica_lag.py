@@ -0,0 +1,81 @@
+"""Measure stale reads with and without read-your-writes pinning.
+
+Each iteration writes a message through database.py and immediately reads
+the conversation back through get_read_db(), once as a fresh session (no
+pin, like a client without the cookie) and once in the writing session.
+Start the primary/replica pair from loadtest/replicas/docker-compose.yml
+first; the database name must contain "bench" (it is written to).
+
+    python loadtest/replica_lag.py --primary postgresql://... --replica postgresql://...
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def replica_lag_ms(url: str) -> float:
+    """Replay delay reported by the replica itself."""
+    import psycopg2
+    conn = psycopg2.connect(url)
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) * 1000')
+        value = cursor.fetchone()[0]
+        return round(float(value), 1) if value is not None else 0.0
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replica lag / read-your-writes check')
+    parser.add_argument('--primary', required=True)
+    parser.add_argument('--replica', required=True, action='append')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--pin-ms', type=int, default=5000, help='READ_YOUR_WRITES_MS')
+    parser.add_argument('--force', action='store_true', help='allow a database without "bench" in its name')
+    args = parser.parse_args()
+
+    if 'bench' not in args.primary.rsplit('/', 1)[-1] and not args.force:
+        parser.error('refusing to write to a database whose name does not contain "bench" (use --force)')
+
+    os.environ['DATABASE_URL'] = args.primary
+    os.environ['DATABASE_REPLICA_URLS'] = ','.join(args.replica)
+    os.environ['READ_YOUR_WRITES_MS'] = str(args.pin_ms)
+    import database as db
+    db.init_db()
+
+    conversation_id = f'replica-lag-{uuid.uuid4().hex}'
+    stale = {'unpinned': 0, 'pinned': 0}
+    for i in range(args.iterations):
+        db.begin_session()
+        db.add_message(conversation_id, 'user', f'lag probe {i}', bot_id='bench')
+        pinned_until = db.session_pinned_until()
+
+        db.begin_session()  # another client: no pin
+        if len(db.get_messages(conversation_id)) < i + 1:
+            stale['unpinned'] += 1
+
+        db.begin_session(pinned_until)  # same client, pin carried over
+        if len(db.get_messages(conversation_id)) < i + 1:
+            stale['pinned'] += 1
+
+    time.sleep(0.1)
+    report = {
+        'iterations': args.iterations,
+        'stale_reads': stale,
+        'stale_rate_unpinned': round(stale['unpinned'] / args.iterations, 4),
+        'stale_rate_pinned': round(stale['pinned'] / args.iterations, 4),
+        'replica_lag_ms': {url.rsplit('@', 1)[-1]: replica_lag_ms(url) for url in args.replica}
+    }
+    db.delete_conversation(conversation_id)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+#!/usr/bin/env bash
+# Start the fake OpenAI server and the app under gunicorn, then replay load.
+# Everything binds to 127.0.0.1; no network access or API key is needed.
+#
+#   loadtest/run_local.sh --users 50 --sessions 500
+set -euo pipefail
+
+cd "$(dirname "$0")/.."
+
+FAKE_PORT=${FAKE_PORT:-9000}
+APP_PORT=${APP_PORT:-8000}
+WORKERS=${WORKERS:-4}
+THREADS=${THREADS:-8}
+
+python loadtest/fake_openai.py --port "$FAKE_PORT" ${FAKE_ARGS:-} &
+FAKE_PID=$!
+
+OPENAI_BASE_URL="http://127.0.0.1:$FAKE_PORT/v1" OPENAI_API_KEY=fake \
+    gunicorn app:app -c gunicorn.conf.py --bind "127.0.0.1:$APP_PORT" --workers "$WORKERS" --threads "$THREADS" &
+APP_PID=$!
+
+trap 'kill $FAKE_PID $APP_PID 2>/dev/null' EXIT
+sleep 2
+
+python loadtest/load_generator.py --target "http://127.0.0.1:$APP_PORT" "$@"
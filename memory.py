@@ -0,0 +1,405 @@
+"""Long-term memory: a bot's past sessions, searchable by meaning.
+
+MEMORY_BACKEND selects the local embedding model:
+
+    none                   memory disabled (default)
+    hashing                feature-hashed words and character trigrams (NumPy only,
+                           no model download; matches wording rather than meaning)
+    sentence-transformers  a SentenceTransformer model run in-process (MEMORY_MODEL,
+                           multilingual by default; needs the sentence-transformers
+                           package)
+
+User messages of at least MEMORY_MIN_CHARS and session summaries are
+embedded into memory_items. Messages are picked up from a watermark on
+messages.id by a background thread every MEMORY_INDEX_INTERVAL_S seconds
+(MEMORY_INDEX_BATCH at a time; `python memory.py --reindex` catches up in
+one go), summaries when summarize_session writes them. Every worker runs
+the thread, but only the one holding the indexing claim (an advisory lock
+on Postgres, a flock next to the SQLite database) embeds; the others only
+load the new vectors. Items carry the
+model name, so switching backends starts a fresh index instead of mixing
+vector spaces.
+
+Each process holds a bot's vectors as one normalized float32 matrix; a
+search embeds only the query and is a matrix-vector product and an
+argpartition top-k, a few ms for tens of thousands of items. Embedding
+messages happens in the background thread, never inside a chat turn. The
+sentence-transformers model is loaded in the gunicorn master when it
+preloads (app.init_app), so workers share one copy; otherwise each worker's
+thread loads it. Contents are read back from the database, so deleted
+conversations never resurface.
+
+recall() runs on the first turn of a conversation: the MEMORY_TOP_K
+snippets most similar to its first message (other conversations only, at
+least MEMORY_MIN_SCORE), or the latest summaries when that message is too
+short to search with or the model is still loading. The resulting context is stored in
+conversation_memory and sent ahead of the history on every turn of the
+session, so personalization costs a constant few hundred tokens and the
+prompt prefix stays cacheable.
+"""
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+import database as db
+
+MEMORY_BACKEND = os.getenv('MEMORY_BACKEND', 'none').lower()
+MEMORY_MODEL = os.getenv('MEMORY_MODEL', 'paraphrase-multilingual-MiniLM-L12-v2')
+MEMORY_DIM = int(os.getenv('MEMORY_DIM', '512'))  # hashing backend only
+MEMORY_TOP_K = int(os.getenv('MEMORY_TOP_K', '3'))
+MEMORY_MIN_SCORE = float(os.getenv('MEMORY_MIN_SCORE', '0.3'))
+MEMORY_MIN_CHARS = int(os.getenv('MEMORY_MIN_CHARS', '40'))
+MEMORY_SNIPPET_CHARS = int(os.getenv('MEMORY_SNIPPET_CHARS', '300'))
+MEMORY_INDEX_BATCH = int(os.getenv('MEMORY_INDEX_BATCH', '500'))
+MEMORY_INDEX_INTERVAL_S = int(os.getenv('MEMORY_INDEX_INTERVAL_S', '30'))  # 0 = only --reindex
+
+# pg_advisory_lock key of the indexing claim
+INDEX_LOCK_KEY = 727465003
+
+MEMORY_HEADERS = {
+    'tr': 'Kullanıcının önceki seanslarından notlar (yalnızca ilgiliyse kullan, aynen aktarma):',
+    'en': "Notes from the user's earlier sessions (use only if relevant, don't quote them back):"
+}
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+class HashingEmbedder:
+    """Signed feature hashing of words and character trigrams into `dim` buckets.
+
+    Trigrams let Turkish suffixed forms ("kaygı", "kaygılıyım") share features.
+    """
+
+    def __init__(self, dim: int = MEMORY_DIM):
+        self.dim = dim
+        self.name = f'hashing-{dim}'
+
+    def ready(self) -> bool:
+        return True
+
+    def load(self):
+        pass
+
+    def _features(self, text: str) -> list:
+        features = []
+        for word in _WORD.findall(text.lower()):
+            features.append(word)
+            padded = f'<{word}>'
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, texts: list):
+        import numpy as np
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = np.array([zlib.crc32(f.encode('utf-8')) for f in self._features(text)], dtype=np.uint32)
+            if hashes.size:
+                signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+                np.add.at(vectors[row], hashes % self.dim, signs)
+        return _normalize(vectors)
+
+
+class SentenceTransformerEmbedder:
+    """A sentence-transformers model, loaded on first use."""
+
+    def __init__(self, model: str = MEMORY_MODEL):
+        self.model_name = model
+        self.name = f'st:{model}'
+        self.model = None
+        self.lock = threading.Lock()
+
+    def ready(self) -> bool:
+        """Whether the model is loaded, i.e. embedding a query costs no load."""
+        return self.model is not None
+
+    def load(self):
+        with self.lock:
+            if self.model is None:
+                from sentence_transformers import SentenceTransformer  # optional dependency
+                self.model = SentenceTransformer(self.model_name)
+
+    def embed(self, texts: list):
+        import numpy as np
+        self.load()
+        vectors = self.model.encode(texts, batch_size=32, normalize_embeddings=True, show_progress_bar=False)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def _normalize(vectors):
+    import numpy as np
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _make_embedder():
+    if MEMORY_BACKEND == 'hashing':
+        return HashingEmbedder()
+    if MEMORY_BACKEND in ('sentence-transformers', 'sentence_transformers'):
+        return SentenceTransformerEmbedder()
+    return None
+
+
+embedder = _make_embedder()
+
+
+def enabled() -> bool:
+    return embedder is not None
+
+
+class _BotIndex:
+    """A bot's vectors in this process, extended from the last loaded memory_items id."""
+
+    def __init__(self):
+        self.ids = None          # int64 (n,)
+        self.conversations = []  # conversation id per row
+        self.matrix = None       # float32 (n, dim), rows normalized
+        self.last_id = 0
+        self.lock = threading.Lock()
+
+    def refresh(self, bot_id: str, model: str):
+        import numpy as np
+        with self.lock:
+            rows = db.get_memory_vectors(bot_id, model, self.last_id)
+            if not rows:
+                return
+            vectors = np.stack([np.frombuffer(row[3], dtype=np.float32) for row in rows])
+            ids = np.array([row[0] for row in rows], dtype=np.int64)
+            self.ids = ids if self.ids is None else np.concatenate([self.ids, ids])
+            self.matrix = vectors if self.matrix is None else np.vstack([self.matrix, vectors])
+            self.conversations.extend(row[1] for row in rows)
+            self.last_id = int(ids[-1])
+
+    def search(self, query, k: int, exclude_conversation: Optional[str] = None) -> list:
+        """[(item id, score)] of the k best rows, best first."""
+        import numpy as np
+        with self.lock:
+            if self.matrix is None or k <= 0:
+                return []
+            scores = self.matrix @ query
+            if exclude_conversation is not None:
+                scores[np.fromiter((c == exclude_conversation for c in self.conversations), dtype=bool,
+                                   count=len(self.conversations))] = -np.inf
+            ids = self.ids
+        k = min(k, scores.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _index(bot_id: str) -> _BotIndex:
+    with _indexes_lock:
+        if bot_id not in _indexes:
+            _indexes[bot_id] = _BotIndex()
+        return _indexes[bot_id]
+
+
+def index_messages(bot_id: str, limit: int = MEMORY_INDEX_BATCH) -> int:
+    """Embed up to `limit` of the bot's messages written since the last run; returns how many."""
+    if embedder is None:
+        return 0
+    rows = db.get_unindexed_messages(bot_id, embedder.name, MEMORY_MIN_CHARS, limit)
+    if not rows:
+        return 0
+    vectors = embedder.embed([row[2] for row in rows])
+    db.add_memory_items([
+        {'bot_id': bot_id, 'conversation_id': conversation_id, 'source': 'message', 'message_id': message_id,
+         'content': content, 'model': embedder.name, 'embedding': vector.tobytes(), 'created_at': created_at}
+        for (message_id, conversation_id, content, created_at), vector in zip(rows, vectors)
+    ])
+    return len(rows)
+
+
+def add_summary(bot_id: str, conversation_id: str, summary: str):
+    """Embed a conversation's summary, replacing its previous one."""
+    if embedder is None or not summary:
+        return
+    vector = embedder.embed([summary])[0]
+    db.add_memory_items([{
+        'bot_id': bot_id, 'conversation_id': conversation_id, 'source': 'summary', 'message_id': None,
+        'content': summary, 'model': embedder.name, 'embedding': vector.tobytes(),
+        'created_at': datetime.now().isoformat()
+    }], replace_summary=True)
+
+
+def search(bot_id: str, query: str, k: int = MEMORY_TOP_K, exclude_conversation: Optional[str] = None,
+           min_score: float = MEMORY_MIN_SCORE) -> list:
+    """The k past items most similar to `query`: dicts with content, score, source, conversation_id, created_at.
+
+    Query-only: messages not yet embedded by the background thread are not searched.
+    """
+    if embedder is None:
+        return []
+    index = _index(bot_id)
+    index.refresh(bot_id, embedder.name)
+    query_vector = embedder.embed([query])[0]
+    # Ask for extra candidates: some may belong to conversations deleted since they were loaded
+    hits = [(item_id, score) for item_id, score in index.search(query_vector, k * 2, exclude_conversation)
+            if score >= min_score]
+    items = db.get_memory_items([item_id for item_id, _ in hits])
+    results = []
+    for item_id, score in hits:
+        if item_id in items:
+            results.append(dict(items[item_id], score=round(score, 4)))
+    return results[:k]
+
+
+def _snippet(item: dict) -> str:
+    content = ' '.join(item['content'].split())
+    if len(content) > MEMORY_SNIPPET_CHARS:
+        content = content[:MEMORY_SNIPPET_CHARS].rsplit(' ', 1)[0] + '…'
+    created = item['created_at']
+    day = created.date().isoformat() if isinstance(created, datetime) else str(created)[:10]
+    return f'- [{day}] {content}'
+
+
+def recall(bot: dict, conversation_id: str, first_message: str) -> Optional[str]:
+    """Build and store the memory context of a new conversation; None when there is nothing to add."""
+    if embedder is None:
+        return None
+    if len(first_message) >= MEMORY_MIN_CHARS and embedder.ready():
+        items = search(bot['id'], first_message, exclude_conversation=conversation_id)
+    else:
+        items = db.get_recent_summary_items(bot['id'], embedder.name, conversation_id, MEMORY_TOP_K)
+    if not items:
+        return None
+    header = MEMORY_HEADERS['en' if bot.get('lang') == 'en' else 'tr']
+    context = '\n'.join([header] + [_snippet(item) for item in items])
+    db.save_conversation_memory(conversation_id, bot['id'], context)
+    return context
+
+
+def context_items(bot: dict, conversation_id: str, messages: list) -> list:
+    """Input items to send ahead of a conversation's history: its stored memory context, if any.
+
+    On the first turn (one stored message) the context is recalled first.
+    Failures are logged and leave the turn without memory.
+    """
+    if embedder is None:
+        return []
+    try:
+        context = db.get_conversation_memory(conversation_id)
+        if context is None and len(messages) == 1:
+            context = recall(bot, conversation_id, messages[0]['content'])
+    except Exception as e:
+        print(f"Memory recall failed for {conversation_id}: {e}")
+        return []
+    return [{'role': 'developer', 'content': context}] if context else []
+
+
+def index_all(bot_id: str) -> int:
+    """Embed every message of the bot not yet in memory_items, MEMORY_INDEX_BATCH at a time."""
+    total = 0
+    while True:
+        done = index_messages(bot_id)
+        total += done
+        if done < MEMORY_INDEX_BATCH:
+            return total
+
+
+@contextmanager
+def _indexing_claim():
+    """True for the one process (across workers and, on Postgres, nodes) that may embed now."""
+    if db.USE_POSTGRES:
+        conn = db.get_db_connection()
+        try:
+            conn.autocommit = True
+            cursor = conn.cursor()
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', (INDEX_LOCK_KEY,))
+            claimed = cursor.fetchone()[0]
+            try:
+                yield claimed
+            finally:
+                if claimed:
+                    cursor.execute('SELECT pg_advisory_unlock(%s)', (INDEX_LOCK_KEY,))
+        finally:
+            conn.close()
+    else:
+        import fcntl
+        with open(db.DATABASE_PATH + '.memory-index.lock', 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def index_pass() -> int:
+    """Embed new messages if this process holds the claim, then load new vectors; returns how many were embedded."""
+    total = 0
+    with _indexing_claim() as claimed:
+        for bot_id in db.get_conversation_bot_ids():
+            if claimed:
+                added = index_all(bot_id)
+                if added:
+                    print(f"Memory: {added} messages embedded for {bot_id}")
+                total += added
+            # Load the new vectors here so searches find little left to read
+            if bot_id in _indexes:
+                _indexes[bot_id].refresh(bot_id, embedder.name)
+    return total
+
+
+def _run():
+    time.sleep(random.uniform(1, 10))
+    try:
+        embedder.load()  # already loaded when the gunicorn master preloaded it
+    except Exception as e:
+        print(f"Memory model failed to load, recall uses summaries only: {e}")
+    while True:
+        try:
+            index_pass()
+        except Exception as e:
+            print(f"Memory indexing failed, will retry: {e}")
+        time.sleep(MEMORY_INDEX_INTERVAL_S)
+
+
+_worker_pid = None
+_worker_lock = threading.Lock()
+
+
+def ensure_worker():
+    """Start this process's background indexing thread once (per pid, so it survives fork)."""
+    global _worker_pid
+    if _worker_pid == os.getpid() or embedder is None or MEMORY_INDEX_INTERVAL_S <= 0:
+        return
+    with _worker_lock:
+        if _worker_pid != os.getpid():
+            threading.Thread(target=_run, name='memory-index', daemon=True).start()
+            _worker_pid = os.getpid()
+
+
+def stats(bot_id: str) -> dict:
+    """Stored items per model and source, and this process's loaded index size."""
+    index = _indexes.get(bot_id)
+    return {
+        'backend': MEMORY_BACKEND,
+        'model': embedder.name if embedder else None,
+        'items': db.get_memory_stats(bot_id),
+        'loaded': int(index.ids.size) if index is not None and index.ids is not None else 0,
+        'pid': os.getpid()
+    }
+
+
+if __name__ == '__main__':
+    if '--reindex' in sys.argv:
+        if embedder is None:
+            sys.exit('Set MEMORY_BACKEND to build the memory index')
+        for bot_id in db.get_conversation_bot_ids():
+            print(f"{bot_id}: {index_all(bot_id)} messages embedded with {embedder.name}")
+    else:
+        print("Usage: python memory.py --reindex")
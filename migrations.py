@@ -0,0 +1,649 @@
+"""Versioned schema migrations.
+
+Each migration runs exactly once per database and is recorded in the
+schema_version table. database.init_db() calls migrate(): when the schema
+is already current this is a single SELECT, so workers do no DDL at
+startup. Otherwise one process takes a lock (pg_advisory_lock on Postgres,
+an EXCLUSIVE transaction on SQLite), re-checks the version and applies the
+pending steps while the others wait.
+
+To change the schema, append a Migration with the next version number;
+never edit one that has shipped.
+
+    python migrations.py                      # apply pending migrations
+    python migrations.py --status             # show the current version
+    python migrations.py --partition-messages # Postgres: partition messages by bot_id
+    python migrations.py --rebuild-search     # re-index search after a bot's language changed
+"""
+import re
+import sys
+from collections import namedtuple
+from datetime import datetime
+
+import database as db
+
+# transactional=False is for steps such as CREATE INDEX CONCURRENTLY that
+# Postgres refuses to run inside a transaction block (SQLite ignores it)
+Migration = namedtuple('Migration', ['version', 'description', 'apply', 'transactional'])
+
+# Arbitrary constant identifying our pg_advisory_lock
+ADVISORY_LOCK_KEY = 727465001
+
+
+def _sqlite_add_column(cursor, table: str, column: str, definition: str):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists."""
+    cursor.execute(f'PRAGMA table_info({table})')
+    if column not in {row[1] for row in cursor.fetchall()}:
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+# ============== Migrations ==============
+
+# The integer metric columns the baseline created; later additions to
+# db.MESSAGE_METRIC_COLUMNS get their own migration
+BASELINE_METRIC_COLUMNS = ('pre_model_ms', 'ttft_ms', 'total_ms', 'input_tokens', 'output_tokens', 'cached_tokens')
+
+
+def _baseline(cursor):
+    """Schema previously created by init_db, including its ad-hoc ALTERs.
+
+    Every statement is idempotent so databases created by the old init_db
+    are adopted without changes.
+    """
+    if db.USE_POSTGRES:
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS conversations (
+                id TEXT PRIMARY KEY,
+                bot_id TEXT DEFAULT 'meliksah',
+                title TEXT DEFAULT 'New Chat',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS messages (
+                id SERIAL PRIMARY KEY,
+                conversation_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                response_time INTEGER DEFAULT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE
+            )
+        ''')
+        for column in BASELINE_METRIC_COLUMNS:
+            cursor.execute(f'ALTER TABLE messages ADD COLUMN IF NOT EXISTS {column} INTEGER DEFAULT NULL')
+        cursor.execute('ALTER TABLE messages ADD COLUMN IF NOT EXISTS write_id TEXT DEFAULT NULL')
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_messages_write_id ON messages(write_id)')
+        cursor.execute('ALTER TABLE messages ADD COLUMN IF NOT EXISTS search_vector tsvector')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_search ON messages USING GIN(search_vector)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages(conversation_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_conversations_bot ON conversations(bot_id)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS user_xp (
+                bot_id TEXT PRIMARY KEY,
+                xp INTEGER DEFAULT 0,
+                level INTEGER DEFAULT 1,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS contact_preferences (
+                bot_id TEXT PRIMARY KEY,
+                bot_name TEXT,
+                email TEXT,
+                phone TEXT,
+                frequency INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+    else:
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS conversations (
+                id TEXT PRIMARY KEY,
+                bot_id TEXT DEFAULT 'meliksah',
+                title TEXT DEFAULT 'New Chat',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        _sqlite_add_column(cursor, 'conversations', 'bot_id', "TEXT DEFAULT 'meliksah'")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                conversation_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                response_time INTEGER DEFAULT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE
+            )
+        ''')
+        _sqlite_add_column(cursor, 'messages', 'response_time', 'INTEGER DEFAULT NULL')
+        for column in BASELINE_METRIC_COLUMNS:
+            _sqlite_add_column(cursor, 'messages', column, 'INTEGER DEFAULT NULL')
+        for lang, tokenizer in db.SQLITE_FTS_TOKENIZERS.items():
+            cursor.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts_{lang}
+                USING fts5(content, tokenize="{tokenizer}")
+            ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages(conversation_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_conversations_bot ON conversations(bot_id)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS user_xp (
+                bot_id TEXT PRIMARY KEY,
+                xp INTEGER DEFAULT 0,
+                level INTEGER DEFAULT 1,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS contact_preferences (
+                bot_id TEXT PRIMARY KEY,
+                bot_name TEXT,
+                email TEXT,
+                phone TEXT,
+                frequency INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        _sqlite_add_column(cursor, 'contact_preferences', 'bot_name', 'TEXT')
+
+
+def _listing_indexes(cursor):
+    """Composite indexes for get_messages ordering and the sidebar listing."""
+    concurrently = 'CONCURRENTLY' if db.USE_POSTGRES else ''
+    cursor.execute(f'''
+        CREATE INDEX {concurrently} IF NOT EXISTS idx_messages_conversation_created
+        ON messages(conversation_id, created_at)
+    ''')
+    cursor.execute(f'''
+        CREATE INDEX {concurrently} IF NOT EXISTS idx_conversations_bot_updated
+        ON conversations(bot_id, updated_at)
+    ''')
+    # Superseded by the composite indexes above
+    cursor.execute(f'DROP INDEX {concurrently} IF EXISTS idx_messages_conversation')
+    cursor.execute(f'DROP INDEX {concurrently} IF EXISTS idx_conversations_bot')
+
+
+def _conversation_counters(cursor):
+    """Denormalize message_count and last_message onto conversations.
+
+    Replaces the COUNT(*) per add_message and the correlated last-message
+    subquery in the sidebar listing. Adding a nullable/defaulted column is
+    a metadata-only change; the backfill runs in batches of conversations
+    to keep row locks short on Postgres.
+    """
+    if db.USE_POSTGRES:
+        cursor.execute('ALTER TABLE conversations ADD COLUMN IF NOT EXISTS message_count INTEGER NOT NULL DEFAULT 0')
+        cursor.execute('ALTER TABLE conversations ADD COLUMN IF NOT EXISTS last_message TEXT DEFAULT NULL')
+        p = '%s'
+    else:
+        _sqlite_add_column(cursor, 'conversations', 'message_count', 'INTEGER NOT NULL DEFAULT 0')
+        _sqlite_add_column(cursor, 'conversations', 'last_message', 'TEXT DEFAULT NULL')
+        p = '?'
+
+    cursor.execute('SELECT id FROM conversations ORDER BY id')
+    conversation_ids = [row[0] for row in cursor.fetchall()]
+    for start in range(0, len(conversation_ids), 1000):
+        batch = conversation_ids[start:start + 1000]
+        placeholders = ', '.join([p] * len(batch))
+        cursor.execute(f'''
+            UPDATE conversations SET
+                message_count = (SELECT COUNT(*) FROM messages m WHERE m.conversation_id = conversations.id),
+                last_message = (SELECT content FROM messages m WHERE m.conversation_id = conversations.id
+                                ORDER BY m.created_at DESC, m.id DESC LIMIT 1)
+            WHERE id IN ({placeholders})
+        ''', batch)
+
+
+def _archive_table(cursor):
+    """Cold storage for idle conversations: metadata plus zlib-compressed messages."""
+    blob = 'BYTEA' if db.USE_POSTGRES else 'BLOB'
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS archived_conversations (
+            id TEXT PRIMARY KEY,
+            bot_id TEXT,
+            title TEXT,
+            created_at TIMESTAMP,
+            updated_at TIMESTAMP,
+            message_count INTEGER NOT NULL DEFAULT 0,
+            last_message TEXT,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            messages {blob} NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_archived_conversations_bot_updated
+        ON archived_conversations(bot_id, updated_at)
+    ''')
+
+
+def _message_bot_id(cursor):
+    """Denormalize bot_id onto messages: the partition key, and lets per-bot
+    queries skip the join. Write-behind idempotency moves to (bot_id, write_id)
+    because a unique index on a partitioned table must include the key."""
+    if db.USE_POSTGRES:
+        cursor.execute('ALTER TABLE messages ADD COLUMN IF NOT EXISTS bot_id TEXT')
+        p = '%s'
+    else:
+        _sqlite_add_column(cursor, 'messages', 'bot_id', 'TEXT')
+        p = '?'
+
+    cursor.execute('SELECT id, bot_id FROM conversations ORDER BY id')
+    owners = cursor.fetchall()
+    for start in range(0, len(owners), 1000):
+        for conversation_id, bot_id in owners[start:start + 1000]:
+            cursor.execute(f'UPDATE messages SET bot_id = {p} WHERE conversation_id = {p} AND bot_id IS NULL',
+                           (bot_id, conversation_id))
+
+    if db.USE_POSTGRES:
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_messages_bot_write_id ON messages(bot_id, write_id)')
+        cursor.execute('DROP INDEX IF EXISTS idx_messages_write_id')
+
+
+def _chat_requests(cursor):
+    """One row per /api/chat turn so a generation can be cancelled from any worker."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS chat_requests (
+            request_id TEXT PRIMARY KEY,
+            conversation_id TEXT NOT NULL,
+            bot_id TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            reply TEXT,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_chat_requests_conversation_status
+        ON chat_requests(conversation_id, status)
+    ''')
+
+
+def _chat_request_resume(cursor):
+    """Reply timing for resumed turns and an index for pruning old requests."""
+    if db.USE_POSTGRES:
+        cursor.execute('ALTER TABLE chat_requests ADD COLUMN IF NOT EXISTS response_time_ms INTEGER')
+    else:
+        _sqlite_add_column(cursor, 'chat_requests', 'response_time_ms', 'INTEGER')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_chat_requests_created ON chat_requests(created_at)')
+
+
+def _message_model_tier(cursor):
+    """Model tier (routing.py) that produced each assistant message."""
+    if db.USE_POSTGRES:
+        cursor.execute('ALTER TABLE messages ADD COLUMN IF NOT EXISTS model_tier TEXT DEFAULT NULL')
+    else:
+        _sqlite_add_column(cursor, 'messages', 'model_tier', 'TEXT DEFAULT NULL')
+
+
+def _memory_tables(cursor):
+    """Embeddings of past messages and summaries (memory.py) and each session's recalled snippets."""
+    key = 'id SERIAL PRIMARY KEY' if db.USE_POSTGRES else 'id INTEGER PRIMARY KEY AUTOINCREMENT'
+    blob = 'BYTEA' if db.USE_POSTGRES else 'BLOB'
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS memory_items (
+            {key},
+            bot_id TEXT NOT NULL,
+            conversation_id TEXT NOT NULL,
+            source TEXT NOT NULL,
+            message_id INTEGER,
+            content TEXT NOT NULL,
+            model TEXT NOT NULL,
+            embedding {blob} NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_memory_items_bot_model ON memory_items(bot_id, model, id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_memory_items_conversation ON memory_items(conversation_id)')
+    # Workers catching up on the same messages insert each one once
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_memory_items_message ON memory_items(model, message_id)')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS conversation_memory (
+            conversation_id TEXT PRIMARY KEY,
+            bot_id TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _message_prompt_version(cursor):
+    """Stored prompt version (CHATBOTS prompt_version) that produced each assistant message."""
+    if db.USE_POSTGRES:
+        cursor.execute('ALTER TABLE messages ADD COLUMN IF NOT EXISTS prompt_version TEXT DEFAULT NULL')
+    else:
+        _sqlite_add_column(cursor, 'messages', 'prompt_version', 'TEXT DEFAULT NULL')
+
+
+SEARCH_BACKFILL_BATCH = 5000
+
+
+def _search_backfill(cursor):
+    """Index the messages stored before full-text search existed.
+
+    Only messages missing from the index are touched, in messages.id ranges
+    of SEARCH_BACKFILL_BATCH; on Postgres each range commits on its own, so
+    a rerun after an interruption continues where it stopped. Each bot's
+    language comes from db.set_bot_languages (app.py registers CHATBOTS at
+    import); db.rebuild_search_index() re-indexes after a language change.
+    """
+    cursor.execute('SELECT DISTINCT bot_id FROM messages WHERE bot_id IS NOT NULL')
+    languages = {}
+    for (bot_id,) in cursor.fetchall():
+        languages.setdefault(db.search_language(bot_id), []).append(bot_id)
+    cursor.execute('SELECT MAX(id) FROM messages')
+    last_id = cursor.fetchone()[0] or 0
+
+    for start in range(0, last_id, SEARCH_BACKFILL_BATCH):
+        end = start + SEARCH_BACKFILL_BATCH
+        for lang, bot_ids in languages.items():
+            if db.USE_POSTGRES:
+                cursor.execute('''
+                    UPDATE messages SET search_vector = to_tsvector(%s::regconfig, content)
+                    WHERE id > %s AND id <= %s AND search_vector IS NULL AND bot_id = ANY(%s)
+                ''', (db.SEARCH_CONFIGS[lang], start, end, bot_ids))
+            else:
+                indexed = ' AND '.join(f'NOT EXISTS (SELECT 1 FROM messages_fts_{other} f WHERE f.rowid = m.id)'
+                                       for other in db.SQLITE_FTS_TOKENIZERS)
+                cursor.execute(f'''
+                    INSERT INTO messages_fts_{lang} (rowid, content)
+                    SELECT m.id, m.content FROM messages m
+                    WHERE m.id > ? AND m.id <= ? AND m.bot_id IN ({', '.join('?' * len(bot_ids))}) AND {indexed}
+                ''', (start, end, *bot_ids))
+
+
+# Upper bounds (ms) of the response-time histogram columns h_<bound>, plus h_inf
+ROLLUP_HISTOGRAM_BOUNDS_MS = (250, 500, 1000, 1500, 2000, 3000, 4000, 5000, 7500, 10000, 15000, 20000, 30000, 60000)
+ROLLUP_HISTOGRAM_COLUMNS = tuple(f'h_{bound}' for bound in ROLLUP_HISTOGRAM_BOUNDS_MS) + ('h_inf',)
+
+
+def _rollup_tables(cursor):
+    """Hourly and daily message rollups (rollups.py) and their messages.id watermark."""
+    histogram = ',\n'.join(f'            {column} INTEGER NOT NULL DEFAULT 0' for column in ROLLUP_HISTOGRAM_COLUMNS)
+    for grain in ('hourly', 'daily'):
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS rollups_{grain} (
+                bucket_start TEXT NOT NULL,
+                bot_id TEXT NOT NULL,
+                prompt_version TEXT NOT NULL DEFAULT '',
+                messages INTEGER NOT NULL DEFAULT 0,
+                user_messages INTEGER NOT NULL DEFAULT 0,
+                responses INTEGER NOT NULL DEFAULT 0,
+                response_ms_sum BIGINT NOT NULL DEFAULT 0,
+{histogram},
+                PRIMARY KEY (bucket_start, bot_id, prompt_version)
+            )
+        ''')
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS rollup_conversations_{grain} (
+                bucket_start TEXT NOT NULL,
+                bot_id TEXT NOT NULL,
+                conversation_id TEXT NOT NULL,
+                PRIMARY KEY (bucket_start, bot_id, conversation_id)
+            )
+        ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            name TEXT PRIMARY KEY,
+            last_message_id BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+MIGRATIONS = [
+    Migration(1, 'baseline schema', _baseline, True),
+    Migration(2, 'conversation listing indexes', _listing_indexes, False),
+    Migration(3, 'denormalized conversation message_count and last_message', _conversation_counters, True),
+    Migration(4, 'archived_conversations table', _archive_table, True),
+    Migration(5, 'messages.bot_id', _message_bot_id, True),
+    Migration(6, 'chat_requests table', _chat_requests, True),
+    Migration(7, 'chat_requests.response_time_ms', _chat_request_resume, True),
+    Migration(8, 'messages.model_tier', _message_model_tier, True),
+    Migration(9, 'memory_items and conversation_memory tables', _memory_tables, True),
+    Migration(10, 'messages.prompt_version', _message_prompt_version, True),
+    Migration(11, 'hourly and daily rollup tables', _rollup_tables, True),
+    Migration(12, 'full-text index of existing messages', _search_backfill, False),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+# ============== Runner ==============
+
+def _create_version_table(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _read_version(cursor) -> int:
+    cursor.execute('SELECT MAX(version) FROM schema_version')
+    row = cursor.fetchone()
+    return row[0] or 0
+
+
+def current_version() -> int:
+    """Schema version of the database (0 when never migrated)."""
+    with db.get_db() as conn:
+        cursor = conn.cursor()
+        try:
+            return _read_version(cursor)
+        except Exception:
+            return 0
+
+
+def _record(cursor, migration: Migration):
+    p = '%s' if db.USE_POSTGRES else '?'
+    cursor.execute(
+        f'INSERT INTO schema_version (version, description, applied_at) VALUES ({p}, {p}, {p})',
+        (migration.version, migration.description, datetime.now().isoformat())
+    )
+
+
+def _migrate_postgres() -> list:
+    conn = db.get_db_connection()
+    try:
+        conn.autocommit = True
+        cursor = conn.cursor()
+        cursor.execute('SELECT pg_advisory_lock(%s)', (ADVISORY_LOCK_KEY,))
+        try:
+            _create_version_table(cursor)
+            version = _read_version(cursor)
+            applied = []
+            for migration in MIGRATIONS:
+                if migration.version <= version:
+                    continue
+                if migration.transactional:
+                    conn.autocommit = False
+                    try:
+                        migration.apply(cursor)
+                        _record(cursor, migration)
+                        conn.commit()
+                    except Exception:
+                        conn.rollback()
+                        raise
+                    finally:
+                        conn.autocommit = True
+                else:
+                    migration.apply(cursor)
+                    _record(cursor, migration)
+                applied.append(migration.version)
+            return applied
+        finally:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', (ADVISORY_LOCK_KEY,))
+    finally:
+        conn.close()
+
+
+def _migrate_sqlite() -> list:
+    # A dedicated connection; EXCLUSIVE blocks other processes until we commit
+    conn = db.sqlite3.connect(db.DATABASE_PATH, timeout=60, isolation_level=None)
+    try:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN EXCLUSIVE')
+        try:
+            _create_version_table(cursor)
+            version = _read_version(cursor)
+            applied = []
+            for migration in MIGRATIONS:
+                if migration.version <= version:
+                    continue
+                migration.apply(cursor)
+                _record(cursor, migration)
+                applied.append(migration.version)
+            cursor.execute('COMMIT')
+            return applied
+        except Exception:
+            cursor.execute('ROLLBACK')
+            raise
+    finally:
+        conn.close()
+
+
+# ============== Partitioning (Postgres, optional) ==============
+# Not a numbered migration: converting messages to LIST partitions by bot_id
+# rewrites the table under an exclusive lock, so operators run it explicitly
+#
+#     python migrations.py --partition-messages
+#
+# Afterwards init_db() only makes sure every known bot has its own partition;
+# unknown bots land in messages_default until the next ensure_bot_partitions.
+
+def _partition_name(bot_id: str) -> str:
+    return 'messages_bot_' + re.sub(r'[^a-z0-9_]', '_', bot_id.lower())
+
+
+def messages_partitioned(cursor) -> bool:
+    cursor.execute('''
+        SELECT 1 FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = 'messages' AND c.relnamespace = current_schema()::regnamespace
+    ''')
+    return cursor.fetchone() is not None
+
+
+def _create_bot_partition(cursor, bot_id: str):
+    """Give bot_id its own partition, moving its rows out of messages_default."""
+    name = _partition_name(bot_id)
+    cursor.execute('SELECT to_regclass(%s)', (name,))
+    if cursor.fetchone()[0] is not None:
+        return
+    cursor.execute(f'CREATE TABLE {name} (LIKE messages INCLUDING DEFAULTS)')
+    cursor.execute(f'INSERT INTO {name} SELECT * FROM messages_default WHERE bot_id = %s', (bot_id,))
+    cursor.execute('DELETE FROM messages_default WHERE bot_id = %s', (bot_id,))
+    cursor.execute(f'ALTER TABLE messages ATTACH PARTITION {name} FOR VALUES IN (%s)', (bot_id,))
+
+
+def partition_messages(bot_ids=()) -> bool:
+    """Convert messages into a table LIST-partitioned by bot_id (idempotent).
+
+    Returns False when it was already partitioned. Needs schema version >= 5.
+    """
+    if not db.USE_POSTGRES:
+        raise RuntimeError('partitioning is only supported on PostgreSQL')
+    migrate()
+
+    conn = db.get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', (ADVISORY_LOCK_KEY,))
+        if messages_partitioned(cursor):
+            return False
+
+        cursor.execute('LOCK TABLE messages IN ACCESS EXCLUSIVE MODE')
+        cursor.execute('ALTER TABLE messages RENAME TO messages_unpartitioned')
+        cursor.execute("ALTER SEQUENCE messages_id_seq OWNED BY NONE")
+        cursor.execute('''
+            CREATE TABLE messages (LIKE messages_unpartitioned INCLUDING DEFAULTS)
+            PARTITION BY LIST (bot_id)
+        ''')
+        cursor.execute('CREATE TABLE messages_default PARTITION OF messages DEFAULT')
+        cursor.execute('SELECT DISTINCT bot_id FROM messages_unpartitioned WHERE bot_id IS NOT NULL')
+        for bot_id in sorted(set(bot_ids) | {row[0] for row in cursor.fetchall()}):
+            cursor.execute(f'CREATE TABLE {_partition_name(bot_id)} PARTITION OF messages FOR VALUES IN (%s)', (bot_id,))
+
+        cursor.execute('INSERT INTO messages SELECT * FROM messages_unpartitioned')
+        cursor.execute('DROP TABLE messages_unpartitioned')
+        cursor.execute('ALTER SEQUENCE messages_id_seq OWNED BY messages.id')
+
+        # Keys and indexes are built after the copy; each cascades to every partition
+        cursor.execute('ALTER TABLE messages ALTER COLUMN bot_id SET DEFAULT \'meliksah\'')
+        cursor.execute('ALTER TABLE messages ADD PRIMARY KEY (bot_id, id)')
+        cursor.execute('''
+            ALTER TABLE messages ADD FOREIGN KEY (conversation_id)
+            REFERENCES conversations(id) ON DELETE CASCADE
+        ''')
+        cursor.execute('CREATE INDEX idx_messages_conversation_created ON messages(conversation_id, created_at)')
+        cursor.execute('CREATE UNIQUE INDEX idx_messages_bot_write_id ON messages(bot_id, write_id)')
+        cursor.execute('CREATE INDEX idx_messages_search ON messages USING GIN(search_vector)')
+        conn.commit()
+        print("messages partitioned by bot_id")
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def ensure_bot_partitions(bot_ids):
+    """Create missing per-bot partitions; a no-op unless messages is partitioned."""
+    if not db.USE_POSTGRES:
+        return
+    conn = db.get_db_connection()
+    try:
+        cursor = conn.cursor()
+        if not messages_partitioned(cursor):
+            return
+        missing = []
+        for bot_id in bot_ids:
+            cursor.execute('SELECT to_regclass(%s)', (_partition_name(bot_id),))
+            if cursor.fetchone()[0] is None:
+                missing.append(bot_id)
+        if missing:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', (ADVISORY_LOCK_KEY,))
+            for bot_id in missing:
+                _create_bot_partition(cursor, bot_id)
+            print(f"Created message partitions for {missing}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def migrate() -> list:
+    """Apply pending migrations; returns the versions applied by this process."""
+    if current_version() >= LATEST_VERSION:
+        return []
+    applied = _migrate_postgres() if db.USE_POSTGRES else _migrate_sqlite()
+    if applied:
+        print(f"Applied schema migrations: {applied}")
+    return applied
+
+
+if __name__ == '__main__':
+    if '--partition-messages' in sys.argv:
+        from chatbots import CHATBOTS
+        partition_messages(CHATBOTS.keys())
+    elif '--status' in sys.argv:
+        print(f"Schema version {current_version()} (latest {LATEST_VERSION})")
+    elif '--rebuild-search' in sys.argv:
+        import app  # noqa: F401  registers each bot's search language
+        db.rebuild_search_index()
+        print("Search index rebuilt")
+    else:
+        import app  # noqa: F401  registers each bot's search language for the search backfill
+        migrate()
+        print(f"Schema at version {current_version()}")
@@ -0,0 +1,127 @@
+"""Retention: archive idle conversations and purge expired ones.
+
+Conversations idle longer than ARCHIVE_AFTER_DAYS move to the
+archived_conversations table (metadata plus zlib-compressed messages) and
+are restored transparently by database.get_conversation/get_messages when
+opened. Bots with a retention policy (RETENTION_DAYS, or 'retention_days'
+in their CHATBOTS entry) have conversations older than that deleted for
+good, archived or not. chat_requests rows (per-turn resume/cancel state)
+are pruned after CHAT_REQUEST_RETENTION_HOURS; finished replies are kept in
+messages.
+
+Each web worker runs a throttled background pass every RETENTION_INTERVAL_S:
+at most RETENTION_BATCH conversations per transaction with a
+RETENTION_PAUSE_MS pause in between. Both steps are safe to run from several
+workers at once. To run a single pass by hand:
+
+    python retention.py
+"""
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+import database as db
+
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '0'))   # 0 = never archive
+RETENTION_DAYS = int(os.getenv('RETENTION_DAYS', '0'))           # default purge policy, 0 = keep forever
+RETENTION_INTERVAL_S = int(os.getenv('RETENTION_INTERVAL_S', '3600'))
+RETENTION_BATCH = int(os.getenv('RETENTION_BATCH', '50'))
+RETENTION_PAUSE_MS = int(os.getenv('RETENTION_PAUSE_MS', '500'))
+CHAT_REQUEST_RETENTION_HOURS = int(os.getenv('CHAT_REQUEST_RETENTION_HOURS', '24'))  # 0 = keep
+
+_bot_retention_days = {}
+_worker_pid = None
+_worker_lock = threading.Lock()
+
+
+def set_bot_retention(policies: dict):
+    """Per-bot purge policies in days ({bot_id: days}); 0 keeps forever."""
+    _bot_retention_days.update({bot_id: days for bot_id, days in policies.items() if days is not None})
+
+
+def retention_days(bot_id: str) -> int:
+    return _bot_retention_days.get(bot_id, RETENTION_DAYS)
+
+
+def _cutoff(days: int) -> str:
+    return (datetime.now() - timedelta(days=days)).isoformat()
+
+
+def _drain(step, bot_id: str, cutoff: str) -> int:
+    """Call a batched step until it runs dry, pausing between batches."""
+    total = 0
+    while True:
+        done = step(bot_id, cutoff, RETENTION_BATCH)
+        total += done
+        if done < RETENTION_BATCH:
+            return total
+        time.sleep(RETENTION_PAUSE_MS / 1000)
+
+
+def run_once(archive_after_days: Optional[int] = None) -> dict:
+    """One archive + purge pass over every bot, then old chat_requests; returns counts per bot."""
+    if archive_after_days is None:
+        archive_after_days = ARCHIVE_AFTER_DAYS
+
+    report = {}
+    for bot_id in db.get_conversation_bot_ids():
+        purged = archived = 0
+        days = retention_days(bot_id)
+        if days > 0:
+            purged = _drain(db.purge_conversations, bot_id, _cutoff(days))
+        if archive_after_days > 0:
+            archived = _drain(db.archive_idle_conversations, bot_id, _cutoff(archive_after_days))
+        if purged or archived:
+            report[bot_id] = {'archived': archived, 'purged': purged}
+    
+    if CHAT_REQUEST_RETENTION_HOURS > 0:
+        cutoff = (datetime.now() - timedelta(hours=CHAT_REQUEST_RETENTION_HOURS)).isoformat()
+        pruned = 0
+        while True:
+            done = db.prune_chat_requests(cutoff, RETENTION_BATCH * 10)
+            pruned += done
+            if done < RETENTION_BATCH * 10:
+                break
+            time.sleep(RETENTION_PAUSE_MS / 1000)
+        if pruned:
+            report['chat_requests'] = {'pruned': pruned}
+    return report
+
+
+def enabled() -> bool:
+    return (ARCHIVE_AFTER_DAYS > 0 or RETENTION_DAYS > 0 or CHAT_REQUEST_RETENTION_HOURS > 0
+            or any(_bot_retention_days.values()))
+
+
+def _run():
+    # Jitter so workers forked together don't all start their pass at once
+    time.sleep(random.uniform(30, 90))
+    while True:
+        try:
+            report = run_once()
+            if report:
+                print(f"Retention: {report}")
+        except Exception as e:
+            print(f"Retention pass failed, will retry: {e}")
+        time.sleep(RETENTION_INTERVAL_S)
+
+
+def ensure_worker():
+    """Start this process's background retention thread once (per pid, so it survives fork)."""
+    global _worker_pid
+    if _worker_pid == os.getpid() or not enabled():
+        return
+    with _worker_lock:
+        if _worker_pid != os.getpid():
+            threading.Thread(target=_run, name='retention', daemon=True).start()
+            _worker_pid = os.getpid()
+
+
+if __name__ == '__main__':
+    import app  # noqa: F401  registers per-bot languages and retention policies
+    import retention  # the module app configured, not this __main__ copy
+    db.init_db()
+    print(retention.run_once() or 'Nothing to archive or purge')
@@ -0,0 +1,257 @@
+"""Hourly and daily per-bot message rollups, maintained incrementally.
+
+run_once() reads the messages past the watermark in rollup_state (a
+messages.id) ROLLUP_BATCH at a time and adds them to rollups_hourly and
+rollups_daily, one row per bucket, bot and prompt_version (user messages
+count under ''):
+
+    messages, user_messages      message counts
+    responses, response_ms_sum   assistant replies with a timing, and their total
+    h_250 ... h_60000, h_inf     replies per response-time bucket (upper bound, ms)
+
+Distinct conversations per bucket and bot are kept in
+rollup_conversations_hourly/_daily. A batch and the watermark move commit
+in one transaction, so an interrupted pass, or two workers running one at
+once, never count a message twice. Messages younger than ROLLUP_LAG_S wait
+for the next pass, which gives inserts that took a lower id time to commit.
+Rows of conversations deleted later stay in the rollups.
+
+Each web worker runs a pass every ROLLUP_INTERVAL_S; /api/admin/rollups
+only reads the rollup tables, so it answers without scanning messages or
+taking the rollup_state lock (POST /api/admin/rollups/refresh runs a
+bounded pass on demand). percentiles() interpolates p50/p95/p99 from the
+histogram buckets with NumPy. To catch up in full by hand:
+
+    python rollups.py
+"""
+import bisect
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+import database as db
+from migrations import ROLLUP_HISTOGRAM_BOUNDS_MS, ROLLUP_HISTOGRAM_COLUMNS
+
+ROLLUP_INTERVAL_S = int(os.getenv('ROLLUP_INTERVAL_S', '300'))  # 0 = only on demand
+ROLLUP_BATCH = int(os.getenv('ROLLUP_BATCH', '5000'))
+ROLLUP_LAG_S = int(os.getenv('ROLLUP_LAG_S', '60'))
+
+GRAINS = ('hourly', 'daily')
+PERCENTILES = (50, 95, 99)
+COUNTER_COLUMNS = ('messages', 'user_messages', 'responses', 'response_ms_sum') + ROLLUP_HISTOGRAM_COLUMNS
+
+_worker_pid = None
+_worker_lock = threading.Lock()
+
+
+def _timestamp(value) -> str:
+    """created_at as a sortable ISO string (Postgres gives datetimes, SQLite text)."""
+    return value.isoformat() if isinstance(value, datetime) else str(value).replace(' ', 'T')
+
+
+def _buckets(timestamp: str) -> dict:
+    return {'hourly': timestamp[:13] + ':00:00', 'daily': timestamp[:10]}
+
+
+def _aggregate(rows) -> tuple:
+    """({(grain, bucket, bot_id, prompt_version): counters}, {(grain, bucket, bot_id, conversation_id)})."""
+    totals = {}
+    conversations = set()
+    for _, conversation_id, bot_id, role, created_at, total_ms, response_time, prompt_version in rows:
+        bot_id = bot_id or ''
+        if total_ms is None and response_time is not None:
+            total_ms = response_time * 1000
+        for grain, bucket in _buckets(_timestamp(created_at)).items():
+            version = (prompt_version or '') if role == 'assistant' else ''
+            counters = totals.setdefault((grain, bucket, bot_id, version), [0] * len(COUNTER_COLUMNS))
+            counters[0] += 1
+            if role == 'user':
+                counters[1] += 1
+            elif role == 'assistant' and total_ms is not None:
+                counters[2] += 1
+                counters[3] += total_ms
+                counters[4 + bisect.bisect_left(ROLLUP_HISTOGRAM_BOUNDS_MS, total_ms)] += 1
+            conversations.add((grain, bucket, bot_id, conversation_id))
+    return totals, conversations
+
+
+def _apply_batch() -> int:
+    """Roll up one batch past the watermark; returns how many messages it covered."""
+    p = '%s' if db.USE_POSTGRES else '?'
+    settled_before = (datetime.now() - timedelta(seconds=ROLLUP_LAG_S)).isoformat()
+    columns = ', '.join(COUNTER_COLUMNS)
+    increments = ', '.join(f'{column} = {{table}}.{column} + excluded.{column}' for column in COUNTER_COLUMNS)
+    ignore = ('INSERT INTO {table} (bucket_start, bot_id, conversation_id) VALUES (%s, %s, %s) ON CONFLICT DO NOTHING'
+              if db.USE_POSTGRES else
+              'INSERT OR IGNORE INTO {table} (bucket_start, bot_id, conversation_id) VALUES (?, ?, ?)')
+
+    def write(conn):
+        cursor = conn.cursor()
+        if db.USE_POSTGRES:
+            cursor.execute("INSERT INTO rollup_state (name, last_message_id) VALUES ('messages', 0) ON CONFLICT DO NOTHING")
+        else:
+            cursor.execute("INSERT OR IGNORE INTO rollup_state (name, last_message_id) VALUES ('messages', 0)")
+        # Locks the state row (the database on SQLite) until commit: one pass at a time
+        cursor.execute(f"UPDATE rollup_state SET updated_at = {p} WHERE name = 'messages'", (datetime.now().isoformat(),))
+        cursor.execute("SELECT last_message_id FROM rollup_state WHERE name = 'messages'")
+        watermark = cursor.fetchone()[0]
+        cursor.execute(f'''
+            SELECT id, conversation_id, bot_id, role, created_at, total_ms, response_time, prompt_version
+            FROM messages WHERE id > {p} ORDER BY id LIMIT {p}
+        ''', (watermark, ROLLUP_BATCH))
+        rows = []
+        for row in cursor.fetchall():
+            if _timestamp(row[4]) > settled_before:
+                break  # this and later ids wait for the next pass
+            rows.append(tuple(row))
+        if not rows:
+            return 0
+
+        totals, conversations = _aggregate(rows)
+        for grain in GRAINS:
+            table = f'rollups_{grain}'
+            values = [key[1:] + tuple(counters) for key, counters in totals.items() if key[0] == grain]
+            cursor.executemany(f'''
+                INSERT INTO {table} (bucket_start, bot_id, prompt_version, {columns})
+                VALUES ({', '.join([p] * (3 + len(COUNTER_COLUMNS)))})
+                ON CONFLICT (bucket_start, bot_id, prompt_version) DO UPDATE SET {increments.format(table=table)}
+            ''', values)
+            cursor.executemany(ignore.format(table=f'rollup_conversations_{grain}'),
+                               [key[1:] for key in conversations if key[0] == grain])
+        cursor.execute(f"UPDATE rollup_state SET last_message_id = {p} WHERE name = 'messages'", (rows[-1][0],))
+        return len(rows)
+
+    return db.execute_write(write)
+
+
+def run_once(max_batches: Optional[int] = None) -> int:
+    """Catch the rollups up (at most max_batches batches); returns how many messages were added."""
+    total = 0
+    batches = 0
+    while True:
+        done = _apply_batch()
+        total += done
+        batches += 1
+        if done < ROLLUP_BATCH or (max_batches and batches >= max_batches):
+            return total
+
+
+def watermark() -> int:
+    with db.get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT last_message_id FROM rollup_state WHERE name = 'messages'")
+        row = cursor.fetchone()
+        return row[0] if row else 0
+
+
+def percentiles(histograms, qs=PERCENTILES):
+    """Interpolated percentiles (ms) per histogram row; NaN for empty rows.
+
+    Within a bucket the replies are taken as evenly spread between its
+    bounds; the overflow bucket reports its lower bound.
+    """
+    import numpy as np
+    counts = np.asarray(histograms, dtype=np.float64).reshape(-1, len(ROLLUP_HISTOGRAM_COLUMNS))
+    bounds = np.asarray(ROLLUP_HISTOGRAM_BOUNDS_MS, dtype=np.float64)
+    lower = np.concatenate([[0.0], bounds])
+    upper = np.concatenate([bounds, bounds[-1:]])
+    totals = counts.sum(axis=1)
+    cumulative = np.cumsum(counts, axis=1)
+    rows = np.arange(len(counts))
+    result = np.full((len(counts), len(qs)), np.nan)
+    for column, q in enumerate(qs):
+        target = totals * q / 100
+        index = np.minimum((cumulative < target[:, None]).sum(axis=1), counts.shape[1] - 1)
+        before = np.where(index > 0, cumulative[rows, np.maximum(index - 1, 0)], 0.0)
+        inside = counts[rows, index]
+        fraction = np.divide(target - before, inside, out=np.zeros_like(target), where=inside > 0)
+        result[:, column] = lower[index] + fraction * (upper[index] - lower[index])
+    result[totals == 0] = np.nan
+    return result
+
+
+def query(grain: str = 'daily', bot_id: Optional[str] = None, since: Optional[str] = None,
+          until: Optional[str] = None, by: str = 'bucket') -> list:
+    """Rollup rows between bucket starts `since` and `until` (inclusive).
+
+    by='bucket' gives one row per bucket and bot (with distinct
+    conversations); by='prompt_version' one row per bot and prompt version
+    over the whole range, replies only.
+    """
+    if grain not in GRAINS or by not in ('bucket', 'prompt_version'):
+        raise ValueError('grain must be hourly or daily, by bucket or prompt_version')
+    p = '%s' if db.USE_POSTGRES else '?'
+    filters, params = [], []
+    for clause, value in (('bot_id = {p}', bot_id), ('bucket_start >= {p}', since), ('bucket_start <= {p}', until)):
+        if value:
+            filters.append(clause.format(p=p))
+            params.append(value)
+    if by == 'prompt_version':
+        filters.append("prompt_version != ''")
+    where = 'WHERE ' + ' AND '.join(filters) if filters else ''
+    keys = ('bucket_start', 'bot_id') if by == 'bucket' else ('bot_id', 'prompt_version')
+    sums = ', '.join(f'SUM({column})' for column in COUNTER_COLUMNS)
+
+    with db.get_read_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT {', '.join(keys)}, {sums} FROM rollups_{grain} {where}
+            GROUP BY {', '.join(keys)} ORDER BY {', '.join(keys)}
+        ''', tuple(params))
+        rows = [tuple(row) for row in cursor.fetchall()]
+        conversations = {}
+        if by == 'bucket':
+            cursor.execute(f'''
+                SELECT bucket_start, bot_id, COUNT(*) FROM rollup_conversations_{grain} {where}
+                GROUP BY bucket_start, bot_id
+            ''', tuple(params))
+            conversations = {(row[0], row[1]): row[2] for row in cursor.fetchall()}
+
+    if not rows:
+        return []
+    histograms = [[int(value) for value in row[6:]] for row in rows]
+    quantiles = percentiles(histograms)
+    results = []
+    for row, histogram, values in zip(rows, histograms, quantiles):
+        messages, user_messages, responses, response_ms_sum = (int(value) for value in row[2:6])
+        result = dict(zip(keys, row[:2]))
+        if by == 'bucket':
+            result.update(messages=messages, user_messages=user_messages, conversations=conversations.get(row[:2], 0))
+        result.update(
+            responses=responses,
+            avg_response_ms=round(response_ms_sum / responses) if responses else None,
+            **{f'p{q}_ms': None if value != value else int(round(value)) for q, value in zip(PERCENTILES, values)},
+            histogram=histogram
+        )
+        results.append(result)
+    return results
+
+
+def _run():
+    time.sleep(random.uniform(5, 30))
+    while True:
+        try:
+            added = run_once()
+            if added:
+                print(f"Rollups: {added} messages added")
+        except Exception as e:
+            print(f"Rollup pass failed, will retry: {e}")
+        time.sleep(ROLLUP_INTERVAL_S)
+
+
+def ensure_worker():
+    """Start this process's background rollup thread once (per pid, so it survives fork)."""
+    global _worker_pid
+    if _worker_pid == os.getpid() or ROLLUP_INTERVAL_S <= 0:
+        return
+    with _worker_lock:
+        if _worker_pid != os.getpid():
+            threading.Thread(target=_run, name='rollups', daemon=True).start()
+            _worker_pid = os.getpid()
+
+
+if __name__ == '__main__':
+    print(f"Rollups: {run_once()} messages added, watermark {watermark()}")
@@ -0,0 +1,181 @@
+"""Per-bot model tiers: a fast model for check-in turns, the full one otherwise.
+
+A CHATBOTS entry opts in with a 'routing' dict:
+
+    'routing': {
+        'fast_model': 'gpt-4.1-mini',    # model override for the fast tier
+        'fast_max_chars': 80,            # longer user messages escalate to full
+        'summary_model': 'gpt-4o-mini',  # summarize_session (default SUMMARY_MODEL)
+    }
+
+The full tier is the stored prompt's own model. choose() sends a turn to the
+fast tier only when the user message is a short check-in: no longer than
+fast_max_chars, not the first message of the session, and free of
+ESCALATION_KEYWORDS. Anything else escalates to the full tier.
+
+Upstream prompt caching is per model, so a session with ROUTING_STICKY_AFTER
+messages whose last reply came from the full tier stays there: dropping to
+the fast model for a check-in would resend the whole history uncached, twice
+(once on each model).
+
+A tier that keeps failing (TIER_ERROR_THRESHOLD errors in a row) or whose
+recent median time-to-first-token exceeds TIER_SLOW_MS is avoided for
+TIER_COOLDOWN_S, and app.generate_reply retries a turn that failed on one
+tier once on the other. Decisions, their reasons and per-tier latency are
+kept per bot for stats() (/api/admin/routing-stats); each assistant message
+also stores its tier in messages.model_tier.
+"""
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Optional
+
+FAST = 'fast'
+FULL = 'full'
+
+DEFAULT_FAST_MAX_CHARS = int(os.getenv('ROUTING_FAST_MAX_CHARS', '80'))
+TIER_ERROR_THRESHOLD = int(os.getenv('TIER_ERROR_THRESHOLD', '3'))
+TIER_SLOW_MS = int(os.getenv('TIER_SLOW_MS', '8000'))
+TIER_COOLDOWN_S = int(os.getenv('TIER_COOLDOWN_S', '60'))
+ROUTING_STICKY_AFTER = int(os.getenv('ROUTING_STICKY_AFTER', '12'))  # 0 = off
+TIER_WINDOW = 50
+SUMMARY_MODEL = os.getenv('SUMMARY_MODEL', 'gpt-4o-mini')
+SUMMARY_FALLBACK_MODEL = os.getenv('SUMMARY_FALLBACK_MODEL', 'gpt-4.1-mini')
+
+# Lower-case substrings that always get the full model, whatever the length
+ESCALATION_KEYWORDS = (
+    'intihar', 'kendime zarar', 'ölmek ist', 'yaşamak ist', 'dayanamıyorum', 'kriz',
+    'suicid', 'kill myself', 'self-harm', 'hurt myself', 'want to die', "can't go on",
+)
+
+
+class _TierHealth:
+    def __init__(self):
+        self.ttft_ms = deque(maxlen=TIER_WINDOW)
+        self.total_ms = deque(maxlen=TIER_WINDOW)
+        self.recent_ttft_ms = deque(maxlen=10)  # median of these decides "slow"
+        self.consecutive_errors = 0
+        self.unhealthy_until = 0.0
+        self.counts = defaultdict(int)
+
+
+_lock = threading.Lock()
+_health = defaultdict(_TierHealth)          # (bot_id, tier) -> _TierHealth
+_reasons = defaultdict(lambda: defaultdict(int))  # bot_id -> reason -> count
+
+
+def tier_model(bot: dict, tier: str) -> Optional[str]:
+    """Model override for a tier; None means the stored prompt's own model."""
+    if tier == FAST:
+        return (bot.get('routing') or {}).get('fast_model')
+    return None
+
+
+def _healthy(bot_id: str, tier: str) -> bool:
+    with _lock:
+        return _health[(bot_id, tier)].unhealthy_until <= time.monotonic()
+
+
+def _is_checkin(routing: dict, message: str, prior_messages: int) -> tuple:
+    """(True, reason) for a fast-tier turn, else (False, why it escalated)."""
+    if prior_messages == 0:
+        return False, 'first_turn'
+    if len(message) > routing.get('fast_max_chars', DEFAULT_FAST_MAX_CHARS):
+        return False, 'long_message'
+    lowered = message.lower()
+    if any(keyword in lowered for keyword in ESCALATION_KEYWORDS):
+        return False, 'escalation_keyword'
+    return True, 'short_checkin'
+
+
+def choose(bot: dict, message: str, prior_messages: int, previous_tier: Optional[str] = None) -> tuple:
+    """(tier, reason) for a turn.
+
+    prior_messages counts the history before this message; previous_tier is
+    the tier of the session's last reply, if known.
+    """
+    routing = bot.get('routing') or {}
+    if not routing.get('fast_model'):
+        return FULL, 'no_routing'
+
+    fast, reason = _is_checkin(routing, message, prior_messages)
+    tier = FAST if fast else FULL
+    if tier == FAST and previous_tier == FULL and ROUTING_STICKY_AFTER and prior_messages >= ROUTING_STICKY_AFTER:
+        tier, reason = FULL, 'cache_sticky'
+    if not _healthy(bot['id'], tier):
+        other = FULL if tier == FAST else FAST
+        if _healthy(bot['id'], other):
+            return other, f'{tier}_unhealthy'
+    return tier, reason
+
+
+def other_tier(bot: dict, tier: str) -> Optional[str]:
+    """The tier to fall back to, or None when the bot has only one."""
+    if not (bot.get('routing') or {}).get('fast_model'):
+        return None
+    return FULL if tier == FAST else FAST
+
+
+def record(bot_id: str, tier: str, reason: str, ok: bool, metrics: Optional[dict] = None):
+    """Account one attempt on a tier and update its health."""
+    metrics = metrics or {}
+    with _lock:
+        health = _health[(bot_id, tier)]
+        _reasons[bot_id][reason] += 1
+        health.counts['requests'] += 1
+        if ok:
+            health.consecutive_errors = 0
+            if metrics.get('ttft_ms') is not None:
+                health.ttft_ms.append(metrics['ttft_ms'])
+                health.recent_ttft_ms.append(metrics['ttft_ms'])
+            if metrics.get('total_ms') is not None:
+                health.total_ms.append(metrics['total_ms'])
+            health.counts['input_tokens'] += metrics.get('input_tokens') or 0
+            health.counts['cached_tokens'] += metrics.get('cached_tokens') or 0
+            recent = sorted(health.recent_ttft_ms)
+            slow = (TIER_SLOW_MS > 0 and len(recent) == health.recent_ttft_ms.maxlen
+                    and recent[len(recent) // 2] > TIER_SLOW_MS)
+        else:
+            health.counts['errors'] += 1
+            health.consecutive_errors += 1
+            slow = False
+        if slow or health.consecutive_errors >= TIER_ERROR_THRESHOLD:
+            if health.unhealthy_until <= time.monotonic():
+                health.counts['cooldowns'] += 1
+                print(f"Model tier {tier} of {bot_id} is {'slow' if slow else 'failing'}; avoiding it for {TIER_COOLDOWN_S}s")
+            health.unhealthy_until = time.monotonic() + TIER_COOLDOWN_S
+            health.consecutive_errors = 0
+            health.recent_ttft_ms.clear()
+
+
+def _percentile(samples, q: float) -> Optional[int]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+def stats() -> dict:
+    """Routing decisions and per-tier latency per bot for this process."""
+    now = time.monotonic()
+    with _lock:
+        bots = defaultdict(lambda: {'tiers': {}, 'reasons': {}})
+        for (bot_id, tier), health in sorted(_health.items()):
+            bots[bot_id]['tiers'][tier] = dict(
+                health.counts,
+                ttft_p50_ms=_percentile(health.ttft_ms, 50),
+                ttft_p95_ms=_percentile(health.ttft_ms, 95),
+                total_p50_ms=_percentile(health.total_ms, 50),
+                total_p95_ms=_percentile(health.total_ms, 95),
+                cooling_down_s=max(0, round(health.unhealthy_until - now))
+            )
+        for bot_id, reasons in _reasons.items():
+            bots[bot_id]['reasons'] = dict(reasons)
+    return {'pid': os.getpid(), 'slow_ms': TIER_SLOW_MS, 'cooldown_s': TIER_COOLDOWN_S, 'bots': dict(bots)}
+
+
+def summary_models(bot: dict) -> list:
+    """Models to try for a session summary, in order."""
+    primary = (bot.get('routing') or {}).get('summary_model', SUMMARY_MODEL)
+    return [primary] + ([SUMMARY_FALLBACK_MODEL] if SUMMARY_FALLBACK_MODEL and SUMMARY_FALLBACK_MODEL != primary else [])
@@ -0,0 +1,176 @@
+"""Test setup: every test that takes `fresh_db` gets an empty, migrated database.
+
+SQLite by default. Set TEST_DATABASE_URL to run the same tests on a
+disposable Postgres database (wiped before each test, so its name must
+contain "test"):
+
+    python -m pytest -q
+    TEST_DATABASE_URL=postgresql://postgres@127.0.0.1:5432/therapy_test python -m pytest -q
+"""
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# database.py picks its backend at import time
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+if TEST_DATABASE_URL:
+    if 'test' not in TEST_DATABASE_URL.rsplit('/', 1)[-1]:
+        raise RuntimeError('TEST_DATABASE_URL must name a database containing "test"; it is wiped')
+    os.environ['DATABASE_URL'] = TEST_DATABASE_URL
+else:
+    os.environ.pop('DATABASE_URL', None)
+os.environ.setdefault('ADMIN_TOKEN', 'test-admin-token')
+os.environ.setdefault('ROLLUP_INTERVAL_S', '0')  # no background passes against a wiped database
+
+import database as db  # noqa: E402
+
+
+def wipe_database():
+    """Drop every table (Postgres) or point at a new file (SQLite, done by the fixture)."""
+    conn = db.get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('DROP SCHEMA public CASCADE')
+        cursor.execute('CREATE SCHEMA public')
+        conn.commit()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def empty_db(tmp_path, monkeypatch):
+    """A database with no schema at all."""
+    if db.USE_POSTGRES:
+        wipe_database()
+    else:
+        monkeypatch.setattr(db, 'DATABASE_PATH', str(tmp_path / 'test.db'))
+    return db
+
+
+@pytest.fixture
+def fresh_db(empty_db):
+    """An empty database at the latest schema version."""
+    db.init_db()
+    return db
+
+
+def placeholder() -> str:
+    return '%s' if db.USE_POSTGRES else '?'
+
+
+def scalar(sql: str, params=()):
+    """First column of the first row of a query."""
+    with db.get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql.replace('?', placeholder()), params)
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+
+class FakeStream:
+    """A response stream that, like the SDK's, stops with a read error once closed."""
+
+    def __init__(self, events):
+        self.events = events
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.closed:
+            raise ConnectionError('stream closed')
+        return next(self.events)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeResponses:
+    """Stands in for client.responses: streams `reply`, or raises `error` once the stream is read.
+
+    `after_text` runs once the last delta has been read, before the stream
+    completes. `delays` holds seconds to wait before the first event, one
+    per request in order (later requests start at once). `cached_tokens` is
+    the prompt cache hit reported in the usage.
+    """
+
+    def __init__(self):
+        self.reply = 'Merhaba'
+        self.error = None
+        self.after_text = None
+        self.delays = []
+        self.cached_tokens = 0
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        delay = self.delays.pop(0) if self.delays else 0
+        return FakeStream(self._stream(delay))
+
+    def _stream(self, delay: float):
+        if delay:
+            time.sleep(delay)
+        if self.error is not None:
+            raise self.error
+        yield SimpleNamespace(type='response.created')
+        middle = len(self.reply) // 2
+        for delta in (self.reply[:middle], self.reply[middle:]):
+            yield SimpleNamespace(type='response.output_text.delta', delta=delta)
+        if self.after_text is not None:
+            self.after_text()
+        usage = SimpleNamespace(input_tokens=10, output_tokens=2, input_tokens_details=SimpleNamespace(cached_tokens=self.cached_tokens))
+        yield SimpleNamespace(type='response.completed', response=SimpleNamespace(output_text=self.reply, usage=usage))
+
+
+class FakeCompletions:
+    """Stands in for client.chat.completions (summaries): `answer(messages)` is the reply.
+
+    A model named in `errors` raises that exception instead.
+    """
+
+    def __init__(self):
+        self.answer = lambda messages: 'Özet'
+        self.errors = {}
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        if kwargs['model'] in self.errors:
+            raise self.errors[kwargs['model']]
+        message = SimpleNamespace(content=self.answer(kwargs['messages']))
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=2, prompt_tokens_details=SimpleNamespace(cached_tokens=0))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+@pytest.fixture
+def openai(monkeypatch):
+    import app
+    responses = FakeResponses()
+    monkeypatch.setattr(app, '_client', SimpleNamespace(responses=responses))
+    return responses
+
+
+@pytest.fixture
+def completions(openai, monkeypatch):
+    import app
+    fake = FakeCompletions()
+    monkeypatch.setattr(app._client, 'chat', SimpleNamespace(completions=fake), raising=False)
+    return fake
+
+
+@pytest.fixture
+def client(fresh_db, openai, monkeypatch):
+    """Flask test client on the fresh database, with OpenAI faked."""
+    import app
+    monkeypatch.setattr(app, '_initialized', True)
+    return app.app.test_client()
+
+
+ADMIN_HEADERS = {'Authorization': f"Bearer {os.environ['ADMIN_TOKEN']}"}
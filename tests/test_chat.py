@@ -0,0 +1,342 @@
+from contextlib import contextmanager
+
+import pytest
+
+from conftest import ADMIN_HEADERS, db
+
+
+def chat(client, message='bugün kendimi yorgun hissediyorum', session_id='s1', bot_id='cihan', **extra):
+    return client.post('/api/chat', json=dict(message=message, session_id=session_id, bot_id=bot_id, **extra))
+
+
+def test_turn_stores_both_messages_and_earns_xp(client):
+    response = chat(client)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['response'] == 'Merhaba'
+    assert body['xp']['xp'] == body['xp']['gained'] > 0
+    assert [(m.role, m.bot_id) for m in db.get_messages('s1')] == [('user', 'cihan'), ('assistant', 'cihan')]
+    assert db.get_user_xp('cihan')['xp'] == body['xp']['xp']
+
+
+def test_failed_turn_earns_no_xp(client, openai):
+    openai.error = RuntimeError('upstream exploded')
+    assert chat(client).status_code == 500
+    assert db.get_messages('s1') == []
+    assert db.get_user_xp('cihan')['xp'] == 0
+
+
+def test_clients_cannot_write_xp(client):
+    assert client.post('/api/xp/cihan', json={'xp': 1000}).status_code == 405
+    assert client.post('/api/xp/batch', json={'increments': {'cihan': 1000}}).status_code == 401
+    assert db.get_user_xp('cihan')['xp'] == 0
+
+    response = client.post('/api/xp/batch', json={'increments': {'cihan': 10}}, headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    assert response.get_json()['results']['cihan']['xp'] == 10
+
+
+def resume(client, request_id):
+    response = client.get(f'/api/chat/{request_id}')
+    return response.status_code, response.get_json()
+
+
+def test_resume_serves_a_completed_turn(client):
+    assert chat(client, request_id='r1').status_code == 200
+    status_code, body = resume(client, 'r1')
+    assert status_code == 200
+    assert (body['status'], body['response']) == ('complete', 'Merhaba')
+
+
+def test_resume_reports_a_failed_turn(client, openai):
+    openai.error = RuntimeError('upstream exploded')
+    chat(client, request_id='r1')
+    status_code, body = resume(client, 'r1')
+    assert (status_code, body['status']) == (500, 'failed')
+
+
+def test_cancel_after_the_last_token_wins(client, openai):
+    openai.after_text = lambda: db.cancel_chat_requests(request_id='r1')
+    assert chat(client, request_id='r1').status_code == 499
+    status_code, body = resume(client, 'r1')
+    assert (status_code, body['status'], body['text']) == (499, 'cancelled', 'Merhaba')
+    # The user message stays, the reply and its XP do not
+    assert [m.role for m in db.get_messages('s1')] == ['user']
+    assert db.get_user_xp('cihan')['xp'] == 0
+
+
+def test_cancel_endpoint(client):
+    assert client.post('/api/chat/cancel', json={}).status_code == 400
+    db.create_chat_request('r1', 's1', 'cihan')
+    assert client.post('/api/chat/cancel', json={'session_id': 's1'}).get_json() == {'cancelled': 1}
+    assert client.post('/api/chat/cancel', json={'request_id': 'r1'}).get_json() == {'cancelled': 0}
+    assert db.get_chat_request('r1')['status'] == 'cancelled'
+
+
+def test_local_cancel_stops_the_stream(client, openai):
+    import generations
+    openai.reply = 'Merhaba, bugün nasılsın?'
+    openai.after_text = lambda: generations.cancel_local(request_id='r1')
+    assert chat(client, request_id='r1').status_code == 499
+    status_code, body = resume(client, 'r1')
+    assert (status_code, body['status'], body['text']) == (499, 'cancelled', 'Merhaba, bugün nasılsın?')
+    assert [m.role for m in db.get_messages('s1')] == ['user']
+    assert generations._active == {}
+
+
+def test_client_disconnect_cancels_only_when_enabled(client, openai, monkeypatch):
+    import socket
+    import time
+    import generations
+    monkeypatch.setattr(generations, 'CANCEL_POLL_MS', 10)
+    server_side, client_side = socket.socketpair()
+    client_side.close()
+
+    def chat_on_closed_socket(request_id):
+        return client.post('/api/chat', json={'message': 'selam', 'session_id': 's1', 'bot_id': 'cihan',
+                                              'request_id': request_id},
+                           environ_base={'gunicorn.socket': server_side})
+
+    def wait_for_cancel():
+        # Give the watcher a few polls to notice the closed connection
+        deadline = time.monotonic() + 2
+        while time.monotonic() < deadline and not generations._active['r1'].cancelled:
+            time.sleep(0.01)
+
+    try:
+        # Off by default: the reply is kept for the client to resume
+        assert chat_on_closed_socket('r0').status_code == 200
+
+        monkeypatch.setattr(generations, 'CANCEL_ON_DISCONNECT', True)
+        openai.after_text = wait_for_cancel
+        assert chat_on_closed_socket('r1').status_code == 499
+        assert db.get_chat_request('r1')['status'] == 'cancelled'
+    finally:
+        server_side.close()
+
+
+def test_turn_past_its_deadline_is_cut_off(client, openai):
+    openai.delays = [1.0]
+    response = client.post('/api/chat', json={'message': 'selam', 'session_id': 's1', 'bot_id': 'cihan', 'request_id': 'r1'},
+                           headers={'X-Request-Timeout-Ms': '300'})
+    assert (response.status_code, response.get_json()['error_type']) == (504, 'deadline_exceeded')
+    assert db.get_messages('s1') == []
+    assert db.get_chat_request('r1')['status'] == 'failed'
+    # A malformed header keeps the default budget
+    response = client.post('/api/chat', json={'message': 'selam', 'session_id': 's1', 'bot_id': 'cihan'},
+                           headers={'X-Request-Timeout-Ms': 'soon'})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('first_attempt_s, hedged', [(1.0, True), (0, False)])
+def test_slow_first_attempt_is_hedged(client, openai, monkeypatch, first_attempt_s, hedged):
+    from collections import defaultdict
+    import hedging
+    monkeypatch.setattr(hedging, 'hedge_delay_s', lambda latency_key: 0.1)
+    monkeypatch.setattr(hedging, '_stats', defaultdict(lambda: defaultdict(int)))
+    openai.delays = [first_attempt_s]
+    response = chat(client)
+    assert (response.status_code, response.get_json()['response']) == (200, 'Merhaba')
+    assert len(openai.requests) == (2 if hedged else 1)
+    stats = client.get('/api/admin/hedge-stats', headers=ADMIN_HEADERS).get_json()
+    (bot_stats,) = stats['bots'].values()
+    assert (bot_stats['hedge_rate'], bot_stats['win_rate']) == ((1.0, 1.0) if hedged else (0.0, None))
+
+
+def test_turns_of_a_conversation_share_a_prompt_cache_key(client, openai, monkeypatch):
+    import app
+    chat(client, message='selam')
+    openai.cached_tokens = 8
+    chat(client, message='nasılsın')
+    openai.cached_tokens = 0
+    chat(client, session_id='s2')
+    assert [r['prompt_cache_key'] for r in openai.requests] == ['cihan:s1', 'cihan:s1', 'cihan:s2']
+    # The second request extends the first unchanged, so the upstream cache can serve it
+    first, second = openai.requests[0]['input'], openai.requests[1]['input']
+    assert second[:len(first)] == first
+
+    assert client.get('/api/admin/prompt-cache-stats').status_code == 401
+    stats = client.get('/api/admin/prompt-cache-stats', headers=ADMIN_HEADERS).get_json()
+    bot = stats['bots']['cihan']
+    assert (stats['key_scope'], bot['replies'], bot['input_tokens'], bot['cached_tokens']) == ('conversation', 3, 30, 8)
+    assert bot['cached_ratio'] == round(8 / 30, 4)
+
+    monkeypatch.setattr(app, 'PROMPT_CACHE_KEY_SCOPE', 'off')
+    chat(client, session_id='s3')
+    assert 'prompt_cache_key' not in openai.requests[-1]
+
+
+def test_reply_that_was_not_stored_fails_the_turn(client, monkeypatch):
+    add_message = db.add_message
+
+    def failing_add_message(conversation_id, role, *args, **kwargs):
+        if role == 'assistant':
+            raise RuntimeError('disk full')
+        return add_message(conversation_id, role, *args, **kwargs)
+
+    monkeypatch.setattr(db, 'add_message', failing_add_message)
+    assert chat(client, request_id='r1').status_code == 500
+    status_code, body = resume(client, 'r1')
+    assert (status_code, body['status']) == (500, 'failed')
+    assert db.get_messages('s1') == []
+
+
+def test_busy_turn_can_be_retried_with_its_request_id(client, monkeypatch):
+    import app
+    from conversation_lock import ConversationBusy
+    lock = app.conversation_lock
+
+    @contextmanager
+    def busy(conversation_id, timeout):
+        raise ConversationBusy(conversation_id)
+        yield
+
+    monkeypatch.setattr(app, 'conversation_lock', busy)
+    assert chat(client, request_id='r1').status_code == 409
+    assert db.get_chat_request('r1') is None
+    assert db.get_messages('s1') == []
+
+    monkeypatch.setattr(app, 'conversation_lock', lock)
+    response = chat(client, request_id='r1')
+    assert (response.status_code, response.get_json()['response']) == (200, 'Merhaba')
+    assert db.get_chat_request('r1')['status'] == 'complete'
+
+
+@pytest.fixture
+def fake_openai_server(monkeypatch):
+    """loadtest/fake_openai.py on a local port, fast and without injected errors."""
+    import threading
+    from werkzeug.serving import make_server
+    from loadtest import fake_openai
+    monkeypatch.setitem(fake_openai.CONFIG, 'median_ms', 20.0)
+    monkeypatch.setitem(fake_openai.CONFIG, 'reply_words', 5)
+    server = make_server('127.0.0.1', 0, fake_openai.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield fake_openai, f'http://127.0.0.1:{server.server_port}/v1'
+    server.shutdown()
+    thread.join()
+
+
+def test_turn_against_the_fake_openai_server(client, fake_openai_server, monkeypatch):
+    import app
+    from openai import OpenAI
+    fake_openai, base_url = fake_openai_server
+    monkeypatch.setattr(app, '_client', OpenAI(api_key='fake', base_url=base_url, max_retries=0))
+
+    response = chat(client)
+    assert response.status_code == 200 and response.get_json()['response'].strip()
+    reply = db.get_messages('s1')[-1]
+    assert reply.input_tokens > 0 and reply.cached_tokens == reply.input_tokens // 2
+
+    # Injected rate limits reach the client as the app's own 429
+    monkeypatch.setitem(fake_openai.CONFIG, 'error_429', 1.0)
+    response = chat(client, session_id='s2')
+    assert (response.status_code, response.get_json()['error_type']) == (429, 'rate_limit_error')
+    assert db.get_messages('s2') == []
+
+
+def test_transcript_export_streams_ndjson_csv_and_gzip(client):
+    import csv
+    import gzip
+    import io
+    import json
+    chat(client)
+    chat(client, session_id='s2', bot_id='meliksah')
+
+    assert client.get('/api/admin/export/transcripts').status_code == 401
+    assert client.get('/api/admin/export/transcripts?format=xml', headers=ADMIN_HEADERS).status_code == 400
+
+    response = client.get('/api/admin/export/transcripts?bot_id=cihan', headers=ADMIN_HEADERS)
+    assert response.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [(r['conversation_id'], r['bot_id'], r['role'], r['content']) for r in rows] == [
+        ('s1', 'cihan', 'user', 'bugün kendimi yorgun hissediyorum'), ('s1', 'cihan', 'assistant', 'Merhaba')]
+
+    response = client.get('/api/admin/export/transcripts?format=csv&compress=gzip', headers=ADMIN_HEADERS)
+    assert response.headers['Content-Disposition'] == 'attachment; filename=transcripts.csv.gz'
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(response.get_data()).decode('utf-8'))))
+    assert [(r['conversation_id'], r['role']) for r in rows] == [
+        ('s1', 'user'), ('s1', 'assistant'), ('s2', 'user'), ('s2', 'assistant')]
+
+
+class BrokenCache:
+    def get(self, key):
+        raise ConnectionError('cache down')
+
+    set = delete = get
+
+
+@pytest.mark.parametrize('backend', ['memory', 'sqlite', 'broken'])
+def test_cached_sidebar_is_invalidated_by_a_turn(client, backend, tmp_path, monkeypatch):
+    from collections import defaultdict
+    import cache
+    backends = {'memory': cache.MemoryBackend, 'sqlite': lambda: cache.SQLiteBackend(str(tmp_path / 'cache.db')),
+                'broken': BrokenCache}
+    monkeypatch.setattr(cache.cache, 'backend', backends[backend]())
+    monkeypatch.setattr(cache.cache, 'counters', defaultdict(lambda: defaultdict(int)))
+    monkeypatch.setattr(db, '_write_listeners', [cache.invalidate_write])
+
+    def sidebar():
+        return [c['id'] for c in client.get('/api/conversations?bot_id=cihan').get_json()]
+
+    assert sidebar() == []
+    chat(client)
+    assert sidebar() == ['s1']
+    assert sidebar() == ['s1']
+    chat(client, session_id='s2')
+    assert sorted(sidebar()) == ['s1', 's2']
+
+    counts = cache.cache.stats()['namespaces']['conversations']
+    if backend == 'broken':
+        # A failing backend degrades to database reads
+        assert (counts['hits'], counts['misses']) == (0, 4)
+    else:
+        assert (counts['hits'], counts['misses']) == (1, 3)
+        assert counts['invalidations'] >= 2
+
+
+def long_session(conversation_id='s1', turns=50):
+    """A session whose transcript is longer than one summary chunk."""
+    for turn in range(turns):
+        db.add_message(conversation_id, 'user', f'{turn}. ' + 'bugün yine çok yorgun hissettim ' * 10, bot_id='cihan')
+        db.add_message(conversation_id, 'assistant', 'anlıyorum, biraz daha anlatır mısın? ' * 8, 1)
+
+
+def test_long_session_is_summarized_chunk_by_chunk(client, completions):
+    import app
+    long_session()
+
+    def answer(messages):
+        if messages[0]['content'] == app.CHUNK_SUMMARY_PROMPT_TR:
+            return f"- yorgunluk ({messages[1]['content'][:3]})"
+        return '**📝 Özet:** Süregiden yorgunluk\n**🎯 Konular:** uyku'
+    completions.answer = answer
+
+    response = client.post('/api/conversations/s1/summarize', json={'bot_id': 'cihan'})
+    assert response.status_code == 200
+    assert response.get_json()['summary'].startswith('**📝 Özet:** Süregiden yorgunluk')
+    *maps, reduce = completions.requests
+    assert len(maps) == 2 and all(r['messages'][0]['content'] == app.CHUNK_SUMMARY_PROMPT_TR for r in maps)
+    # The notes are reduced in transcript order
+    assert reduce['messages'][1]['content'] == (app.SUMMARY_NOTE_HEADERS[False][1] + '\n\n'
+                                                '[Bölüm 1/2]\n- yorgunluk (Kul)\n\n[Bölüm 2/2]\n- yorgunluk (Kul)')
+    assert db.get_conversation('s1')['title'] == 'Süregiden yorgunluk'
+
+
+def test_failed_chunk_falls_back_then_fails_the_summary(client, completions, monkeypatch):
+    from collections import defaultdict
+    import routing
+    monkeypatch.setattr(routing, '_health', defaultdict(routing._TierHealth))
+    long_session()
+    title = db.get_conversation('s1')['title']
+    completions.errors = {routing.SUMMARY_MODEL: RuntimeError('model overloaded')}
+    response = client.post('/api/conversations/s1/summarize', json={'bot_id': 'cihan'})
+    assert response.status_code == 200
+    assert {r['model'] for r in completions.requests} == {routing.SUMMARY_MODEL, routing.SUMMARY_FALLBACK_MODEL}
+
+    # With every model failing the summary fails and the title is left alone
+    completions.errors[routing.SUMMARY_FALLBACK_MODEL] = RuntimeError('model overloaded')
+    response = client.post('/api/conversations/s1/summarize', json={'bot_id': 'cihan'})
+    assert (response.status_code, response.get_json()['error_type']) == (500, 'api_error')
+    assert db.get_conversation('s1')['title'] == title
@@ -0,0 +1,56 @@
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+import pytest
+
+import conversation_lock
+
+
+@pytest.fixture
+def counters(fresh_db, monkeypatch):
+    monkeypatch.setattr(conversation_lock, '_stats', defaultdict(int))
+    return lambda: conversation_lock.stats()['process']
+
+
+def test_acquire_and_release(counters):
+    with conversation_lock.conversation_lock('c1'):
+        assert counters()['waiting'] == 0
+    with conversation_lock.conversation_lock('c1'):
+        pass
+    assert (counters()['acquired'], counters()['contended']) == (2, 0)
+
+
+def test_timeout_raises_busy(counters):
+    held, release = threading.Event(), threading.Event()
+
+    def holder():
+        with conversation_lock.conversation_lock('c1'):
+            held.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=holder)
+    thread.start()
+    try:
+        held.wait(5)
+        with pytest.raises(conversation_lock.ConversationBusy):
+            with conversation_lock.conversation_lock('c1', timeout=0.1):
+                pass
+    finally:
+        release.set()
+        thread.join()
+    assert (counters()['timeouts'], counters()['waiting']) == (1, 0)
+
+
+def test_failed_acquire_stops_waiting(counters, monkeypatch):
+    @contextmanager
+    def broken_lock(conversation_id, timeout):
+        raise OSError('connection lost')
+        yield
+
+    monkeypatch.setattr(conversation_lock, '_postgres_lock', broken_lock)
+    monkeypatch.setattr(conversation_lock, '_sqlite_lock', broken_lock)
+    with pytest.raises(OSError):
+        with conversation_lock.conversation_lock('c1'):
+            pass
+    assert (counters()['waiting'], counters()['timeouts']) == (0, 0)
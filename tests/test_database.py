@@ -0,0 +1,262 @@
+import os
+
+import pytest
+
+from conftest import db, placeholder, scalar
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    """(bot_id, conversation_id) of every write notification."""
+    seen = []
+    monkeypatch.setattr(db, '_write_listeners', [lambda bot_id, conversation_id: seen.append((bot_id, conversation_id))])
+    return seen
+
+
+def test_message_without_bot_id_belongs_to_the_conversation(fresh_db, writes):
+    db.add_message('c1', 'user', 'selam', bot_id='cihan')
+    db.add_message('c1', 'assistant', 'merhaba', 2)
+    assert [m.bot_id for m in db.get_messages('c1')] == ['cihan', 'cihan']
+    assert set(writes) == {('cihan', 'c1')}
+    assert db.get_conversation('c1')['message_count'] == 2
+
+
+@pytest.mark.skipif(db.USE_POSTGRES, reason='SQLite production mode')
+def test_sqlite_production_writes_go_through_the_writer(fresh_db, monkeypatch):
+    import threading
+    monkeypatch.setattr(db, 'SQLITE_PRODUCTION', True)
+    monkeypatch.setattr(db, '_sqlite_local', threading.local())
+    monkeypatch.setattr(db, '_sqlite_writer', None)
+
+    assert scalar('PRAGMA journal_mode') == 'wal'
+    db.add_message('c1', 'user', 'selam', bot_id='cihan')
+    writer_threads = []
+
+    def failing_write(conn):
+        writer_threads.append(threading.current_thread().name)
+        conn.execute("INSERT INTO conversations (id, bot_id) VALUES ('c2', 'cihan')")
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError, match='boom'):
+        db.execute_write(failing_write)
+    assert writer_threads == ['sqlite-writer']
+    # The failed write is rolled back; later writes still go through
+    assert db.get_conversation('c2') is None
+    db.add_message('c1', 'assistant', 'merhaba', 2)
+    assert [m.role for m in db.get_messages('c1')] == ['user', 'assistant']
+
+
+@pytest.mark.skipif(not db.USE_POSTGRES, reason='write-behind is Postgres only')
+def test_write_behind_keeps_the_conversation_bot(fresh_db, writes, tmp_path, monkeypatch):
+    monkeypatch.setattr(db, 'WRITE_BEHIND', True)
+    monkeypatch.setattr(db, 'WRITE_BEHIND_DIR', str(tmp_path / 'journal'))
+    monkeypatch.setattr(db, 'WRITE_BEHIND_FLUSH_MS', 3600 * 1000)
+    monkeypatch.setattr(db, '_write_behind', None)
+
+    db.add_message('c1', 'user', 'selam', bot_id='cihan')
+    db.add_message('c1', 'assistant', 'merhaba', 2, metrics={'total_ms': 2100})
+    pending = db.get_messages('c1')
+    assert [(m.role, m.bot_id, m.id) for m in pending] == [('user', 'cihan', None), ('assistant', 'cihan', None)]
+    assert set(writes) == {('cihan', 'c1')}
+
+    db.flush_write_behind()
+    stored = db.get_messages('c1')
+    assert [(m.role, m.bot_id, m.total_ms) for m in stored] == [('user', 'cihan', None), ('assistant', 'cihan', 2100)]
+    assert all(m.id is not None for m in stored)
+    assert scalar('SELECT message_count FROM conversations WHERE id = ?', ('c1',)) == 2
+
+
+def journal_segment(journal_dir, name: str, content: str):
+    """A journal segment as a worker would leave it: one buffered message."""
+    import json
+    from datetime import datetime
+    journal_dir.mkdir(exist_ok=True)
+    entry = {'op': 'message', 'write_id': name, 'conversation_id': 'c1', 'bot_id': 'cihan', 'role': 'user',
+             'content': content, 'response_time': None, 'created_at': datetime.now().isoformat(), 'metrics': {}}
+    path = journal_dir / f'journal-{os.getpid()}-{name}-1.jsonl'
+    path.write_text(json.dumps(entry) + '\n', encoding='utf-8')
+    return path
+
+
+@pytest.mark.skipif(not db.USE_POSTGRES, reason='write-behind is Postgres only')
+def test_write_behind_replays_unlocked_segments(fresh_db, tmp_path):
+    """A dead worker's segment is replayed even though its pid is alive again; a live one's is left alone."""
+    import fcntl
+    from write_behind import WriteBehindBuffer
+    journal_dir = tmp_path / 'journal'
+    orphan = journal_segment(journal_dir, 'orphan', 'kalan mesaj')
+    owned = journal_segment(journal_dir, 'owned', 'sahipli mesaj')
+    with open(owned) as owner:
+        fcntl.flock(owner, fcntl.LOCK_EX)
+        buffer = WriteBehindBuffer(db.get_db, str(journal_dir), flush_ms=3600 * 1000)
+    assert [m.content for m in db.get_messages('c1')] == ['kalan mesaj']
+    assert not orphan.exists() and owned.exists()
+
+    # The buffer's own segments are locked too, so another worker's recovery skips them
+    buffer.add_message('c2', 'user', 'bekleyen', None, 'cihan', '2026-10-19T09:00:00', {})
+    WriteBehindBuffer(db.get_db, str(journal_dir), flush_ms=3600 * 1000)
+    assert db.get_messages('c2') == []
+    buffer.flush()
+    assert [m.content for m in db.get_messages('c2')] == ['bekleyen']
+
+
+def test_xp_comes_with_the_stored_reply(fresh_db):
+    kind, gained = db.xp_for_message('bugün çok yorgunum')
+    db.add_message('c1', 'user', 'bugün çok yorgunum', bot_id='cihan')
+    assert db.get_user_xp('cihan')['xp'] == 0
+    row = db.add_message('c1', 'assistant', 'anlıyorum', 1, xp_message='bugün çok yorgunum')
+    assert row['xp'] == {'bot_id': 'cihan', 'xp': gained, 'level': 1, 'gained': gained, 'kind': kind}
+    assert db.get_user_xp('cihan')['xp'] == gained
+
+
+def test_coalesced_xp_is_flushed(fresh_db, monkeypatch):
+    monkeypatch.setattr(db, 'XP_COALESCE_MS', 3600 * 1000)
+    monkeypatch.setattr(db, '_xp_coalescer', None)
+    db.add_message('c1', 'user', 'selam', bot_id='cihan')
+    first = db.add_message('c1', 'assistant', 'merhaba', 1, xp_message='selam')['xp']
+    second = db.add_message('c1', 'assistant', 'nasılsın', 1, xp_message='selam')['xp']
+    assert second['xp'] == first['xp'] + second['gained']
+    assert db.get_user_xp('cihan')['xp'] == 0
+    db._xp_coalescer.flush()
+    assert db.get_user_xp('cihan')['xp'] == second['xp']
+
+def test_concurrent_xp_increments_are_not_lost(fresh_db):
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda _: db.add_xp('cihan', 10), range(16)))
+    row = db.get_user_xp('cihan')
+    assert (row['xp'], row['level']) == (160, db.level_for_xp(160))
+    assert db.add_xp_batch({'cihan': 5, 'meliksah': 0}) == {'cihan': {'bot_id': 'cihan', 'xp': 165, 'level': db.level_for_xp(165)}}
+
+
+def test_failed_xp_flush_is_retried(fresh_db, monkeypatch):
+    monkeypatch.setattr(db, 'XP_COALESCE_MS', 3600 * 1000)
+    monkeypatch.setattr(db, '_xp_coalescer', None)
+    db.add_xp('cihan', 10)
+    with monkeypatch.context() as patch:
+        def unavailable(increments):
+            raise RuntimeError('database unavailable')
+        patch.setattr(db, 'add_xp_batch', unavailable)
+        db._xp_coalescer.flush()
+    assert db._xp_coalescer.pending == {'cihan': 10}
+    assert db.add_xp('cihan', 5)['xp'] == 15
+    db._xp_coalescer.flush()
+    assert db.get_user_xp('cihan')['xp'] == 15
+    assert db._xp_coalescer.pending == {}
+
+
+
+def seed_bot(bot_id: str, conversations: int = 2, messages: int = 3):
+    for i in range(conversations):
+        for j in range(messages):
+            db.add_message(f'{bot_id}-{i}', 'user' if j % 2 == 0 else 'assistant', f'mesaj {j}', bot_id=bot_id)
+    db.create_chat_request(f'{bot_id}-request', f'{bot_id}-0', bot_id)
+
+
+def bot_counts(bot_id: str) -> tuple:
+    return (scalar('SELECT COUNT(*) FROM conversations WHERE bot_id = ?', (bot_id,)),
+            scalar('SELECT COUNT(*) FROM messages WHERE bot_id = ?', (bot_id,)),
+            scalar('SELECT COUNT(*) FROM chat_requests WHERE bot_id = ?', (bot_id,)))
+
+
+def test_delete_bot_data(fresh_db):
+    seed_bot('cihan')
+    seed_bot('meliksah')
+    assert db.delete_bot_data('cihan') == 2
+    assert bot_counts('cihan') == (0, 0, 0)
+    assert bot_counts('meliksah') == (2, 6, 1)
+
+
+@pytest.mark.skipif(not db.USE_POSTGRES, reason='partitioning is Postgres only')
+def test_delete_bot_data_drops_the_partition(fresh_db):
+    import migrations
+    seed_bot('cihan')
+    seed_bot('meliksah')
+    assert migrations.partition_messages(['cihan', 'meliksah'])
+
+    assert db.delete_bot_data('cihan') == 2
+    assert bot_counts('cihan') == (0, 0, 0)
+    assert bot_counts('meliksah') == (2, 6, 1)
+    # Recreated empty, so the bot's next messages still get their own partition
+    assert scalar("SELECT to_regclass('messages_bot_cihan') IS NOT NULL")
+    db.add_message('cihan-new', 'user', 'yeniden', bot_id='cihan')
+    assert scalar('SELECT COUNT(*) FROM messages_bot_cihan') == 1
+
+
+def test_db_bench_cases(fresh_db, monkeypatch):
+    from loadtest import db_bench
+    monkeypatch.setattr(db_bench, 'db', db)
+    [messages] = db_bench.bench_get_messages([5], 3).values()
+    assert messages['n'] == 3 and messages['min_ms'] <= messages['p50_ms'] <= messages['max_ms']
+    [xp] = db_bench.bench_add_xp(4, 10).values()
+    assert (xp['actual_xp'], xp['lost_updates'], xp['errors']) == (40, 0, 0)
+
+
+def test_db_bench_refuses_a_database_it_would_wipe(monkeypatch):
+    from loadtest import db_bench
+    monkeypatch.setattr('sys.argv', ['db_bench.py', '--backend', 'postgres',
+                                     '--postgres-url', 'postgresql://postgres@127.0.0.1/production'])
+    with pytest.raises(SystemExit) as exit_info:
+        db_bench.main()
+    assert exit_info.value.code == 2
+
+
+def test_retention_archives_purges_and_rehydrates(fresh_db, monkeypatch):
+    from datetime import datetime, timedelta
+    import retention
+    monkeypatch.setattr(retention, '_bot_retention_days', {'meliksah': 30})
+    monkeypatch.setattr(retention, 'RETENTION_DAYS', 0)
+    monkeypatch.setattr(retention, 'CHAT_REQUEST_RETENTION_HOURS', 0)
+    for conversation_id, bot_id in (('old', 'cihan'), ('new', 'cihan'), ('expired', 'meliksah')):
+        db.add_message(conversation_id, 'user', 'selam', bot_id=bot_id)
+        db.add_message(conversation_id, 'assistant', 'merhaba', 1)
+    long_ago = (datetime.now() - timedelta(days=60)).isoformat()
+    with db.get_db() as conn:
+        conn.cursor().execute(f"UPDATE conversations SET updated_at = {placeholder()} WHERE id IN ('old', 'expired')", (long_ago,))
+
+    assert retention.run_once(archive_after_days=30) == {'cihan': {'archived': 1, 'purged': 0},
+                                                         'meliksah': {'archived': 0, 'purged': 1}}
+    assert scalar('SELECT COUNT(*) FROM conversations') == 1
+    assert scalar('SELECT COUNT(*) FROM archived_conversations') == 1
+    assert db.get_conversation('expired') is None
+
+    # Opening the archived conversation restores it with its messages
+    assert [(m.role, m.content) for m in db.get_messages('old')] == [('user', 'selam'), ('assistant', 'merhaba')]
+    assert scalar('SELECT COUNT(*) FROM archived_conversations') == 0
+    assert db.rehydrate_conversation('old') is False
+
+
+@pytest.mark.skipif(not db.USE_POSTGRES, reason='read replicas are Postgres only')
+def test_reads_use_the_replica_until_the_session_writes(fresh_db, monkeypatch):
+    import psycopg2
+    connect = db._connect_postgres
+    opened = []
+
+    def connect_replica(url):
+        opened.append(url)
+        if url == 'postgresql://down/replica':
+            raise psycopg2.OperationalError('connection refused')
+        return connect(db.DATABASE_URL)  # the "replica" serves the primary's data
+    monkeypatch.setattr(db, '_connect_postgres', connect_replica)
+    monkeypatch.setattr(db, 'DATABASE_REPLICA_URLS', ['postgresql://up/replica'])
+    monkeypatch.setattr(db, '_replica_down_until', {})
+    db.add_message('c1', 'user', 'selam', bot_id='cihan')
+
+    db.begin_session()
+    assert [m.content for m in db.get_messages('c1')] == ['selam']
+    assert opened.count('postgresql://up/replica') == 1
+
+    # Read-your-writes: after a write this session reads from the primary
+    db.add_message('c1', 'assistant', 'merhaba', 1)
+    assert db.session_pinned_until() > 0
+    opened.clear()
+    assert [m.content for m in db.get_messages('c1')] == ['selam', 'merhaba']
+    assert 'postgresql://up/replica' not in opened
+
+    # A replica that refuses connections is skipped and the read falls back to the primary
+    monkeypatch.setattr(db, 'DATABASE_REPLICA_URLS', ['postgresql://down/replica'])
+    db.begin_session()
+    opened.clear()
+    assert len(db.get_messages('c1')) == 2
+    assert len(db.get_messages('c1')) == 2
+    assert opened.count('postgresql://down/replica') == 1
@@ -0,0 +1,48 @@
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+import json_provider
+from conftest import db
+
+PROVIDERS = [json_provider.StdlibJSONProvider]
+if json_provider.orjson is not None:
+    PROVIDERS.append(json_provider.OrjsonProvider)
+
+CREATED = datetime(2026, 10, 19, 6, 23)
+PAYLOAD = {
+    'created_at': CREATED,
+    'day': date(2026, 10, 19),
+    'amount': Decimal('1.50'),
+    'id': uuid.UUID(int=1),
+    'message': db.Message(id=1, conversation_id='c1', role='user', content='Merhaba', response_time=None,
+                          created_at=CREATED, pre_model_ms=None, ttft_ms=None, total_ms=None, input_tokens=None,
+                          output_tokens=None, cached_tokens=None, model_tier=None, prompt_version=None, bot_id='cihan')
+}
+
+
+def encode(provider_class, obj) -> dict:
+    app = Flask(__name__)
+    app.json = provider_class(app)
+    with app.app_context():
+        return json.loads(app.json.response(obj).get_data())
+
+
+@pytest.mark.parametrize('provider_class', PROVIDERS)
+def test_datetimes_are_http_dates(provider_class):
+    body = encode(provider_class, PAYLOAD)
+    assert body['created_at'] == body['message']['created_at'] == 'Mon, 19 Oct 2026 06:23:00 GMT'
+    assert body['day'] == 'Mon, 19 Oct 2026 00:00:00 GMT'
+    assert (body['amount'], body['id']) == ('1.50', str(uuid.UUID(int=1)))
+
+
+@pytest.mark.parametrize('provider_class', PROVIDERS)
+def test_output_matches_flask(provider_class):
+    plain = {key: value for key, value in PAYLOAD.items() if key != 'message'}
+    assert encode(provider_class, plain) == encode(DefaultJSONProvider, plain)
+    assert encode(provider_class, PAYLOAD)['message'] == encode(DefaultJSONProvider, PAYLOAD['message']._asdict())
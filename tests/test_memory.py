@@ -0,0 +1,45 @@
+import pytest
+
+import memory
+from conftest import db
+
+PAST = 'Geçen hafta iş yerindeki toplantılardan önce yoğun bir kaygı hissettiğimi konuştuk.'
+NEW = 'Bu hafta da iş yerindeki toplantılardan önce yine yoğun kaygı hissediyorum.'
+
+
+@pytest.fixture
+def hashing(fresh_db, monkeypatch):
+    monkeypatch.setattr(memory, 'embedder', memory.HashingEmbedder())
+    monkeypatch.setattr(memory, '_indexes', {})
+    db.add_message('old', 'user', PAST, bot_id='cihan')
+
+
+def test_search_does_not_index(hashing, monkeypatch):
+    monkeypatch.setattr(memory, 'index_messages', lambda *args, **kwargs: pytest.fail('indexed on the request path'))
+    assert memory.search('cihan', NEW) == []
+
+
+def test_indexed_messages_are_recalled(hashing):
+    assert memory.index_all('cihan') == 1
+    assert memory.index_all('cihan') == 0
+    context = memory.recall({'id': 'cihan'}, 'new', NEW)
+    assert PAST in context
+    assert db.get_conversation_memory('new') == context
+
+
+def test_recall_uses_summaries_until_the_model_is_loaded(hashing, monkeypatch):
+    memory.index_all('cihan')
+    monkeypatch.setattr(memory.embedder, 'ready', lambda: False)
+    monkeypatch.setattr(memory, 'search', lambda *args, **kwargs: pytest.fail('searched without a loaded model'))
+    assert memory.recall({'id': 'cihan'}, 'new', NEW) is None
+
+
+def test_only_the_claim_holder_embeds(hashing, monkeypatch):
+    index = memory._index('cihan')
+    with memory._indexing_claim() as claimed, monkeypatch.context() as patch:
+        assert claimed
+        # Another process's pass meanwhile: it only loads new vectors
+        patch.setattr(memory, 'index_messages', lambda *args, **kwargs: pytest.fail('embedded without the claim'))
+        assert memory.index_pass() == 0
+    assert memory.index_pass() == 1
+    assert index.ids.size == 1
@@ -0,0 +1,93 @@
+import pytest
+
+import migrations
+from conftest import db, placeholder, scalar
+
+
+def columns(table: str) -> set:
+    with db.get_db() as conn:
+        cursor = conn.cursor()
+        if db.USE_POSTGRES:
+            cursor.execute('SELECT column_name FROM information_schema.columns WHERE table_name = %s', (table,))
+            return {row[0] for row in cursor.fetchall()}
+        cursor.execute(f'PRAGMA table_info({table})')
+        return {row[1] for row in cursor.fetchall()}
+
+
+def test_migrate_applies_every_version_once(empty_db):
+    assert migrations.current_version() == 0
+    assert migrations.migrate() == [m.version for m in migrations.MIGRATIONS]
+    assert migrations.current_version() == migrations.LATEST_VERSION
+    assert migrations.migrate() == []
+    assert scalar('SELECT COUNT(*) FROM schema_version') == len(migrations.MIGRATIONS)
+
+
+def test_versions_are_sequential():
+    assert [m.version for m in migrations.MIGRATIONS] == list(range(1, len(migrations.MIGRATIONS) + 1))
+
+
+def test_latest_schema(fresh_db):
+    assert {'bot_id', 'model_tier', 'prompt_version', *db.MESSAGE_METRIC_COLUMNS} <= columns('messages')
+    assert {'message_count', 'last_message'} <= columns('conversations')
+    assert {'request_id', 'status', 'reply', 'response_time_ms'} <= columns('chat_requests')
+    for table in ('rollups_hourly', 'rollups_daily'):
+        assert set(migrations.ROLLUP_HISTOGRAM_COLUMNS) <= columns(table)
+    assert 'last_message_id' in columns('rollup_state')
+    assert 'embedding' in columns('memory_items')
+
+
+def test_upgrade_keeps_and_backfills_rows(empty_db, monkeypatch):
+    """A database created before messages.bot_id gets it filled from the owning conversation."""
+    with monkeypatch.context() as patch:
+        patch.setattr(migrations, 'MIGRATIONS', migrations.MIGRATIONS[:4])
+        patch.setattr(migrations, 'LATEST_VERSION', 4)
+        assert migrations.migrate() == [1, 2, 3, 4]
+    p = placeholder()
+    with db.get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'INSERT INTO conversations (id, bot_id, title) VALUES ({p}, {p}, {p})', ('c1', 'cihan', 'Old'))
+        cursor.execute(f'INSERT INTO messages (conversation_id, role, content, pre_model_ms) VALUES ({p}, {p}, {p}, {p})',
+                       ('c1', 'user', 'eski mesaj', 42))
+
+    assert migrations.migrate() == [m.version for m in migrations.MIGRATIONS[4:]]
+    assert scalar("SELECT bot_id FROM messages WHERE conversation_id = 'c1'") == 'cihan'
+    assert [(m.content, m.pre_model_ms) for m in db.get_messages('c1')] == [('eski mesaj', 42)]
+
+
+def test_search_backfill_indexes_existing_messages(empty_db, monkeypatch):
+    """Messages written before migration 12 (with no search index entry) become searchable."""
+    with monkeypatch.context() as patch:
+        patch.setattr(migrations, 'MIGRATIONS', migrations.MIGRATIONS[:11])
+        patch.setattr(migrations, 'LATEST_VERSION', 11)
+        patch.setattr(migrations, 'SEARCH_BACKFILL_BATCH', 2)
+        migrations.migrate()
+    p = placeholder()
+    with db.get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'INSERT INTO conversations (id, bot_id, title) VALUES ({p}, {p}, {p})', ('c1', 'cihan', 'Old'))
+        for content in ('bugün çok yorgunum', 'uykularım kaçıyor', 'işte yorgunluk bitmiyor', 'merhaba'):
+            cursor.execute(f'INSERT INTO messages (conversation_id, bot_id, role, content) VALUES ({p}, {p}, {p}, {p})',
+                           ('c1', 'cihan', 'user', content))
+    assert db.search_messages('cihan', 'uykularım')['results'] == []
+
+    with monkeypatch.context() as patch:
+        patch.setattr(migrations, 'SEARCH_BACKFILL_BATCH', 2)
+        assert migrations.migrate() == [12]
+    assert [r['message_id'] for r in db.search_messages('cihan', 'uykularım')['results']] == [2]
+    assert len(db.search_messages('cihan', 'merhaba')['results']) == 1
+    # Idempotent: a second pass indexes nothing twice
+    with db.get_db() as conn:
+        migrations._search_backfill(conn.cursor())
+    assert len(db.search_messages('cihan', 'merhaba')['results']) == 1
+
+
+@pytest.mark.skipif(not db.USE_POSTGRES, reason='partitioning is Postgres only')
+def test_partition_check_follows_the_search_path(empty_db):
+    with db.get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('CREATE SCHEMA tenant')
+        cursor.execute('SET LOCAL search_path TO tenant')
+        assert not migrations.messages_partitioned(cursor)
+        cursor.execute('CREATE TABLE messages (id BIGINT, bot_id TEXT) PARTITION BY LIST (bot_id)')
+        assert migrations.messages_partitioned(cursor)
+        cursor.execute('DROP SCHEMA tenant CASCADE')
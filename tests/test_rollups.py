@@ -0,0 +1,62 @@
+import math
+
+import pytest
+
+import rollups
+from conftest import ADMIN_HEADERS, db
+from migrations import ROLLUP_HISTOGRAM_COLUMNS
+
+
+def histogram(**buckets) -> list:
+    """A histogram row from counts per column name, e.g. histogram(h_500=4)."""
+    return [buckets.get(column, 0) for column in ROLLUP_HISTOGRAM_COLUMNS]
+
+
+def test_empty_row_is_nan():
+    assert all(math.isnan(value) for value in rollups.percentiles([histogram()])[0])
+
+
+def test_interpolates_within_a_bucket():
+    p50, p95, p99 = rollups.percentiles([histogram(h_500=4)])[0]
+    assert (p50, p95, p99) == pytest.approx((375, 487.5, 497.5))
+
+
+def test_percentile_on_a_bucket_edge():
+    p50, _, p99 = rollups.percentiles([histogram(h_250=1, h_500=1)])[0]
+    assert (p50, p99) == pytest.approx((250, 495))
+
+
+def test_overflow_bucket_reports_its_lower_bound():
+    assert list(rollups.percentiles([histogram(h_inf=3)])[0]) == [60000, 60000, 60000]
+
+
+def test_rows_are_independent():
+    rows = [histogram(h_500=4), histogram(), histogram(h_250=1, h_500=1), histogram(h_inf=3)]
+    together = rollups.percentiles(rows)
+    for row, values in zip(rows, together):
+        assert list(values) == pytest.approx(list(rollups.percentiles([row])[0]), nan_ok=True)
+
+
+def test_run_once_counts_each_message_once(fresh_db, monkeypatch):
+    monkeypatch.setattr(rollups, 'ROLLUP_LAG_S', 0)
+    db.add_message('c1', 'user', 'merhaba', bot_id='cihan')
+    db.add_message('c1', 'assistant', 'selam', 1, bot_id='cihan', metrics={'total_ms': 1200})
+    assert rollups.run_once() == 2
+    assert rollups.run_once() == 0
+
+    [row] = rollups.query('daily', 'cihan')
+    assert (row['messages'], row['user_messages'], row['responses'], row['conversations']) == (2, 1, 1, 1)
+    assert (row['avg_response_ms'], row['p50_ms'], row['p95_ms']) == (1200, 1250, 1475)
+    assert rollups.query('hourly', 'meliksah') == []
+
+
+def test_rollups_endpoint_reads_and_refresh_writes(client, monkeypatch):
+    monkeypatch.setattr(rollups, 'ROLLUP_LAG_S', 0)
+    db.add_message('c1', 'user', 'merhaba', bot_id='cihan')
+    response = client.get('/api/admin/rollups?bot_id=cihan', headers=ADMIN_HEADERS)
+    assert response.get_json()['rows'] == [] and rollups.watermark() == 0
+
+    assert client.post('/api/admin/rollups/refresh').status_code == 401
+    assert client.post('/api/admin/rollups/refresh', headers=ADMIN_HEADERS).get_json() == {'added': 1, 'watermark': 1}
+    [row] = client.get('/api/admin/rollups?bot_id=cihan', headers=ADMIN_HEADERS).get_json()['rows']
+    assert row['messages'] == 1
@@ -0,0 +1,252 @@
+"""Write-behind buffering for message and timestamp writes (Postgres).
+
+Enabled with WRITE_BEHIND=true. add_message and update_conversation_timestamp
+append to a local, fsync'd journal and return immediately; a background
+thread flushes the buffer to Postgres every WRITE_BEHIND_FLUSH_MS using
+multi-row INSERTs. Journal segments are deleted only after their batch is
+committed. The writing process holds an exclusive flock on each segment
+until then, so a segment whose lock can be taken belongs to a worker that
+is gone (whatever its pid now names) and is replayed at startup. Every
+message carries a write_id so a replay never duplicates rows.
+
+Reads in the same process see their own pending writes (get_messages and
+get_conversation merge the buffer); other workers see them after the next
+flush.
+"""
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+
+class WriteBehindBuffer:
+    """Journal-backed buffer that batches writes into Postgres."""
+
+    def __init__(self, get_db: Callable, journal_dir: str, flush_ms: int = 200, fsync: bool = True):
+        self.get_db = get_db
+        self.journal_dir = journal_dir
+        self.flush_interval = flush_ms / 1000
+        self.fsync = fsync
+        self.pid = os.getpid()
+        # Segment names must not repeat across restarts, which reuse pids
+        self.token = uuid.uuid4().hex[:8]
+
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.pending = []           # entries not yet committed, oldest first
+        self.inflight = []          # entries being committed by flush()
+        self.pending_segments = []  # journal segments covering self.pending
+        self.segment_files = {}     # open, flocked file of every segment not yet deleted
+        self.segment_index = 0
+        self.journal = None
+
+        os.makedirs(journal_dir, exist_ok=True)
+        self.recover()
+        self._open_segment()
+
+        self.thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self.thread.start()
+        atexit.register(self.flush)
+
+    # ============== Journal ==============
+
+    def _open_segment(self):
+        self.segment_index += 1
+        path = os.path.join(self.journal_dir, f'journal-{self.pid}-{self.token}-{self.segment_index}.jsonl')
+        self.journal = open(path, 'a', encoding='utf-8')
+        # Held until the segment is deleted; released by the kernel if this process dies
+        fcntl.flock(self.journal, fcntl.LOCK_EX)
+        self.segment_files[path] = self.journal
+        self.pending_segments.append(path)
+
+    def _remove_segment(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        self.segment_files.pop(path).close()
+
+    def _append(self, entry: dict):
+        with self.lock:
+            self.journal.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.journal.flush()
+            if self.fsync:
+                os.fsync(self.journal.fileno())
+            self.pending.append(entry)
+
+    def recover(self):
+        """Replay journal segments whose lock is free, i.e. whose writer is no longer running."""
+        for path in sorted(glob.glob(os.path.join(self.journal_dir, 'journal-*.jsonl'))):
+            try:
+                f = open(path, encoding='utf-8')
+            except OSError:
+                continue  # replayed and removed by another worker meanwhile
+            with f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # its writer, or another worker replaying it, holds the lock
+                try:
+                    if os.stat(path).st_ino != os.fstat(f.fileno()).st_ino:
+                        continue
+                except FileNotFoundError:
+                    continue  # replayed by another worker between our open and lock
+
+                entries = []
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        break  # torn final line from the crash
+                if entries:
+                    self._write_batch(entries)
+                # Removed while still locked, so no other worker replays it again
+                os.remove(path)
+            print(f"Write-behind: replayed {len(entries)} journal entries from {os.path.basename(path)}")
+
+    # ============== Public API ==============
+
+    def add_message(self, conversation_id: str, role: str, content: str, response_time: Optional[int],
+                    bot_id: str, created_at: str, metrics: dict) -> dict:
+        entry = {
+            'op': 'message',
+            'write_id': uuid.uuid4().hex,
+            'conversation_id': conversation_id,
+            'bot_id': bot_id,
+            'role': role,
+            'content': content,
+            'response_time': response_time,
+            'created_at': created_at,
+            'metrics': metrics
+        }
+        self._append(entry)
+        return entry
+
+    def touch_conversation(self, conversation_id: str, updated_at: str):
+        self._append({'op': 'touch', 'conversation_id': conversation_id, 'updated_at': updated_at})
+
+    def pending_messages(self, conversation_id: str) -> list:
+        """Messages for a conversation that are buffered but not yet flushed."""
+        with self.lock:
+            return [e for e in self.inflight + self.pending
+                    if e['op'] == 'message' and e['conversation_id'] == conversation_id]
+
+    def flush(self):
+        """Commit everything buffered so far; safe to call from any thread."""
+        with self.flush_lock:
+            with self.lock:
+                if not self.pending:
+                    return
+                batch, segments = self.pending, self.pending_segments
+                self.pending, self.pending_segments = [], []
+                self.inflight = batch
+                # The closed segment keeps its lock until its batch is committed
+                self.journal.flush()
+                self._open_segment()
+
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                # Keep the entries (and their segments) for the next attempt
+                with self.lock:
+                    self.pending = batch + self.pending
+                    self.pending_segments = segments + self.pending_segments
+                    self.inflight = []
+                print(f"Write-behind flush failed, will retry: {e}")
+                return
+
+            with self.lock:
+                self.inflight = []
+
+            for path in segments:
+                self._remove_segment(path)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    # ============== Postgres ==============
+
+    def _write_batch(self, entries: list):
+        """Apply a batch in one transaction with multi-row statements."""
+        from psycopg2.extras import execute_values
+        import database as db
+
+        messages = [e for e in entries if e['op'] == 'message']
+        touches = {}
+        for e in entries:
+            stamp = e['created_at'] if e['op'] == 'message' else e['updated_at']
+            touches[e['conversation_id']] = max(stamp, touches.get(e['conversation_id'], stamp))
+
+        # New conversations take their title from their first user message
+        conversations = {}
+        for m in messages:
+            if m['conversation_id'] not in conversations:
+                title = db.title_from_message(m['content']) if m['role'] == 'user' else 'New Chat'
+                conversations[m['conversation_id']] = (m['conversation_id'], m['bot_id'], title, m['created_at'], m['created_at'])
+
+        with self.get_db() as conn:
+            cursor = conn.cursor()
+            if conversations:
+                execute_values(cursor, '''
+                    INSERT INTO conversations (id, bot_id, title, created_at, updated_at) VALUES %s
+                    ON CONFLICT (id) DO NOTHING
+                ''', list(conversations.values()))
+
+            if messages:
+                # A message belongs to its conversation's bot, whatever the caller passed
+                cursor.execute('SELECT id, bot_id FROM conversations WHERE id = ANY(%s)',
+                               (list({m['conversation_id'] for m in messages}),))
+                owners = dict(cursor.fetchall())
+                metric_columns = ', '.join(db.MESSAGE_METRIC_COLUMNS)
+                rows = []
+                for m in messages:
+                    bot_id = owners.get(m['conversation_id']) or m['bot_id']
+                    rows.append(
+                        (m['write_id'], m['conversation_id'], bot_id, m['role'], m['content'], m['response_time'], m['created_at'])
+                        + tuple((m.get('metrics') or {}).get(column) for column in db.MESSAGE_METRIC_COLUMNS)
+                        + (db.search_config(bot_id), m['content'])
+                    )
+                placeholders = ', '.join(['%s'] * (7 + len(db.MESSAGE_METRIC_COLUMNS)))
+                inserted = execute_values(cursor, f'''
+                    INSERT INTO messages (write_id, conversation_id, bot_id, role, content, response_time, created_at, {metric_columns}, search_vector)
+                    VALUES %s
+                    ON CONFLICT (bot_id, write_id) DO NOTHING
+                    RETURNING write_id
+                ''', rows, template=f'({placeholders}, to_tsvector(%s::regconfig, %s))', page_size=500, fetch=True)
+
+                # Counters only for rows actually inserted, so a replay doesn't double count
+                inserted_ids = {row[0] for row in inserted}
+                counters = {}
+                for m in messages:
+                    if m['write_id'] not in inserted_ids:
+                        continue
+                    cid = m['conversation_id']
+                    if cid not in counters:
+                        title = db.title_from_message(m['content']) if m['role'] == 'user' else None
+                        counters[cid] = [cid, 0, None, title]
+                    counters[cid][1] += 1
+                    counters[cid][2] = m['content']
+                if counters:
+                    execute_values(cursor, '''
+                        UPDATE conversations AS c SET
+                            message_count = c.message_count + v.added,
+                            last_message = v.last_message,
+                            title = CASE WHEN c.message_count = 0 AND v.title IS NOT NULL THEN v.title ELSE c.title END
+                        FROM (VALUES %s) AS v(id, added, last_message, title)
+                        WHERE c.id = v.id
+                    ''', [tuple(c) for c in counters.values()])
+
+            if touches:
+                execute_values(cursor, '''
+                    UPDATE conversations AS c SET updated_at = v.updated_at::timestamp
+                    FROM (VALUES %s) AS v(id, updated_at)
+                    WHERE c.id = v.id AND c.updated_at < v.updated_at::timestamp
+                ''', list(touches.items()))
+